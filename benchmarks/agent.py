@@ -0,0 +1,217 @@
+from __future__ import unicode_literals, absolute_import
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import easysnmp
+
+# The subtree the synthetic table is served under: a private enterprise
+# number which no MIB loaded by the tests describes
+TABLE_OID = ".1.3.6.1.4.1.99999.1"
+
+# The columns of each row of the synthetic table as (column, type, value)
+# where value is formatted with the index of the row
+TABLE_COLUMNS = (
+    (1, "integer", "{0}"),
+    (2, "octet_str", '"row {0}"'),
+    (3, "counter", "{0}000"),
+    (4, "unsigned", "{0}"),
+)
+
+# The column of the synthetic table which may be written to
+WRITABLE_COLUMN = 5
+
+# The USM users the agent accepts, matching those of tests/snmpd.conf
+V3_USER = "initial"
+V3_AUTH_PASSWORD = "auth_pass"
+V3_PRIVACY_PASSWORD = "priv_pass"
+
+AGENT_CONFIG = """\
+agentaddress udp:127.0.0.1:{port}
+rwcommunity public 127.0.0.1
+createUser {user} MD5 {auth} DES {priv}
+rwuser {user} priv
+syscontact easysnmp benchmarks
+"""
+
+
+def column_oid(column):
+    """
+    Returns the numeric OID of a column of the synthetic table.
+
+    :param column: the column
+    :return: the OID as a string
+    """
+
+    return "{0}.{1}".format(TABLE_OID, column)
+
+
+def table_oid(column, row):
+    """
+    Returns the numeric OID of a cell of the synthetic table.
+
+    :param column: the column of the cell
+    :param row: the index of the row, starting from 1
+    :return: the OID as a string
+    """
+
+    return "{0}.{1}".format(column_oid(column), row)
+
+
+def build_config(port, rows):
+    """
+    Builds the configuration of an snmpd serving the synthetic table.
+
+    Each cell is registered with an override directive, which serves a fixed
+    value at an arbitrary OID without any MIB module behind it.
+
+    :param port: the UDP port on the loopback address to listen on
+    :param rows: the number of rows of the synthetic table
+    :return: the contents of an snmpd.conf
+    """
+
+    lines = [
+        AGENT_CONFIG.format(
+            port=port,
+            user=V3_USER,
+            auth=V3_AUTH_PASSWORD,
+            priv=V3_PRIVACY_PASSWORD,
+        )
+    ]
+    for column, snmp_type, value in TABLE_COLUMNS:
+        for row in range(1, rows + 1):
+            lines.append(
+                "override {0} {1} {2}\n".format(
+                    table_oid(column, row), snmp_type, value.format(row)
+                )
+            )
+    for row in range(1, rows + 1):
+        lines.append(
+            "override -rw {0} integer 0\n".format(table_oid(WRITABLE_COLUMN, row))
+        )
+    return "".join(lines)
+
+
+class LocalAgent(object):
+    """
+    An snmpd listening on the loopback address, serving a synthetic table of
+    a configurable number of rows alongside the usual MIB-II objects. The
+    agent runs in the foreground of a child process with its own
+    configuration and persistent state in a temporary directory, so it does
+    not disturb the agent the tests are run against.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        with LocalAgent(rows=1000) as agent:
+            session = easysnmp.Session(**agent.session_kargs(2))
+            session.walk(column_oid(1))
+
+    :param rows: the number of rows of the synthetic table
+    :param port: the UDP port to listen on
+    :param snmpd: the path of the snmpd executable
+    :param startup_timeout: the number of seconds to wait for the agent to
+                            start answering requests
+    """
+
+    def __init__(self, rows=1000, port=11171, snmpd="snmpd", startup_timeout=30):
+        self.rows = rows
+        self.port = port
+        self.snmpd = snmpd
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.directory = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def session_kargs(self, version):
+        """
+        Returns the keyword arguments of a Session with the agent.
+
+        :param version: the SNMP version of the session: 1, 2 or 3
+        :return: a dict of Session arguments
+        """
+
+        kargs = {
+            "version": version,
+            "hostname": "127.0.0.1",
+            "remote_port": self.port,
+        }
+        if version == 3:
+            kargs.update(
+                security_level="authPriv",
+                security_username=V3_USER,
+                auth_password=V3_AUTH_PASSWORD,
+                privacy_password=V3_PRIVACY_PASSWORD,
+            )
+        else:
+            kargs["community"] = "public"
+        return kargs
+
+    def start(self):
+        """
+        Starts the agent and waits until it answers requests.
+
+        :raises RuntimeError: if the agent exits or does not answer in time
+        """
+
+        self.directory = tempfile.mkdtemp(prefix="easysnmp-bench-")
+        config = os.path.join(self.directory, "snmpd.conf")
+        with open(config, "w") as config_file:
+            config_file.write(build_config(self.port, self.rows))
+
+        env = dict(os.environ, SNMP_PERSISTENT_DIR=self.directory)
+        self.process = subprocess.Popen(
+            [
+                self.snmpd,
+                "-f",
+                "-r",
+                "-C",
+                "-c",
+                config,
+                "-I",
+                "-smux",
+                "-Lf",
+                os.path.join(self.directory, "snmpd.log"),
+            ],
+            env=env,
+        )
+        self._wait_until_ready()
+
+    def _wait_until_ready(self):
+        session = easysnmp.Session(timeout=1, retries=0, **self.session_kargs(2))
+        deadline = time.time() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError(
+                    "snmpd exited with status {0}".format(self.process.returncode)
+                )
+            try:
+                session.get(table_oid(1, self.rows))
+                return
+            except easysnmp.EasySNMPError:
+                if time.time() > deadline:
+                    self.stop()
+                    raise RuntimeError("snmpd did not start answering in time")
+                time.sleep(0.2)
+
+    def stop(self):
+        """
+        Stops the agent and removes its temporary directory.
+        """
+
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
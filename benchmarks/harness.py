@@ -0,0 +1,177 @@
+from __future__ import unicode_literals, absolute_import, division
+
+import json
+import math
+import platform
+import sys
+import time
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows, where peak RSS is not reported
+    resource = None
+
+# time.perf_counter is unavailable on Python 2
+clock = getattr(time, "perf_counter", time.time)
+
+#: The measurements of a single benchmark
+Result = namedtuple(
+    "Result",
+    ["name", "iterations", "ops_per_sec", "p50_ms", "p99_ms", "peak_rss_kib"],
+)
+
+
+def percentile(samples, fraction):
+    """
+    Returns a percentile of a list of samples by the nearest-rank method.
+
+    :param samples: a sorted, non-empty list of samples
+    :param fraction: the percentile as a fraction between 0 and 1
+    :return: the sample at that percentile
+    """
+
+    rank = int(math.ceil(fraction * len(samples))) - 1
+    return samples[min(max(rank, 0), len(samples) - 1)]
+
+
+def peak_rss_kib():
+    """
+    Returns the peak resident set size of this process so far in KiB, or
+    None where it cannot be determined.
+    """
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB elsewhere
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def measure(name, func, iterations=1000, warmup=10, min_time=0.0):
+    """
+    Calls a function repeatedly and measures how long each call takes.
+
+    :param name: the name the result is reported under
+    :param func: the function to call, without arguments
+    :param iterations: the number of calls measured
+    :param warmup: the number of calls made beforehand and not measured
+    :param min_time: keep calling the function beyond iterations until this
+                     many seconds have been spent measuring
+    :return: a :py:class:`Result`
+    """
+
+    for _ in range(warmup):
+        func()
+
+    latencies = []
+    started = clock()
+    while len(latencies) < iterations or clock() - started < min_time:
+        call_started = clock()
+        func()
+        latencies.append(clock() - call_started)
+    elapsed = clock() - started
+
+    latencies.sort()
+    return Result(
+        name=name,
+        iterations=len(latencies),
+        ops_per_sec=len(latencies) / elapsed if elapsed > 0 else float("inf"),
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        peak_rss_kib=peak_rss_kib(),
+    )
+
+
+def environment():
+    """
+    Describes the environment benchmarks are run in, so that results from
+    different releases and machines can be told apart.
+    """
+
+    try:
+        from importlib.metadata import version
+
+        easysnmp_version = version("easysnmp")
+    except Exception:
+        easysnmp_version = None
+
+    return {
+        "easysnmp": easysnmp_version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(path, results, **meta):
+    """
+    Writes the results of a benchmark run to a JSON file.
+
+    :param path: the path of the file
+    :param results: a list of :py:class:`Result`
+    :param meta: further details of the run to record, such as its
+                 parameters
+    """
+
+    meta.update(environment())
+    document = {
+        "meta": meta,
+        "results": [result._asdict() for result in results],
+    }
+    with open(path, "w") as results_file:
+        json.dump(document, results_file, indent=2, sort_keys=True)
+        results_file.write("\n")
+
+
+def read_results(path):
+    """
+    Reads the results of a benchmark run written by :py:func:`write_results`.
+
+    :param path: the path of the file
+    :return: a dict of :py:class:`Result` keyed by name
+    """
+
+    with open(path) as results_file:
+        document = json.load(results_file)
+    return dict(
+        (result["name"], Result(**result)) for result in document["results"]
+    )
+
+
+def format_results(results, baseline=None):
+    """
+    Formats results as a table, comparing the throughput of each with that
+    of the same benchmark in baseline.
+
+    :param results: a list of :py:class:`Result`
+    :param baseline: a dict of :py:class:`Result` keyed by name
+    :return: the table as a string
+    """
+
+    header = "{0:<28} {1:>12} {2:>10} {3:>10} {4:>12}".format(
+        "benchmark", "ops/s", "p50 ms", "p99 ms", "peak RSS KiB"
+    )
+    if baseline is not None:
+        header += " {0:>8}".format("change")
+
+    lines = [header]
+    for result in results:
+        line = "{0:<28} {1:>12.1f} {2:>10.3f} {3:>10.3f} {4:>12}".format(
+            result.name,
+            result.ops_per_sec,
+            result.p50_ms,
+            result.p99_ms,
+            result.peak_rss_kib if result.peak_rss_kib is not None else "-",
+        )
+        previous = baseline.get(result.name) if baseline is not None else None
+        if previous is not None and previous.ops_per_sec:
+            change = result.ops_per_sec / previous.ops_per_sec - 1
+            line += " {0:>+7.1%}".format(change)
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,225 @@
+"""
+Runs network-free microbenchmarks of the Python and C layers which turn
+OIDs into requests and responses into results, e.g.
+
+    python -m benchmarks.micro --varbinds 10000 --output micro.json
+    python -m benchmarks.micro --compare micro.json
+
+No agent is involved: requests made through the C interface are answered
+with canned responses (see interface.set_canned_responses), so each
+benchmark measures the marshalling of a fixed number of varbinds without
+any network jitter. Every benchmark handles --varbinds varbinds per call,
+so its p50 and p99 are the time taken per that many varbinds.
+"""
+
+from __future__ import unicode_literals, absolute_import, print_function
+
+import argparse
+import logging
+import re
+import sys
+from functools import partial
+
+import easysnmp
+from easysnmp import interface
+from easysnmp.helpers import normalize_oid
+from easysnmp.session import build_varlist, validate_results
+from easysnmp.variables import SNMPVariable
+
+from .harness import format_results, measure, read_results, write_results
+
+# The ASN.1 type codes of the canned varbinds
+ASN_OCTET_STR = 0x04
+ASN_COUNTER = 0x41
+
+# IF-MIB::ifInOctets and IF-MIB::ifDescr, which are served as the columns of
+# a table with one row per varbind
+IF_IN_OCTETS = (1, 3, 6, 1, 2, 1, 2, 2, 1, 10)
+IF_DESCR = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+
+# The size of each get request, which agents commonly limit
+GET_BATCH = 100
+
+
+def column_varbinds(column, rows):
+    """
+    Returns the canned varbinds of a column of the table followed by one
+    just past its end, which ends a walk of the column.
+    """
+
+    if column == IF_DESCR:
+        varbinds = [
+            (column + (row,), ASN_OCTET_STR, "eth{0}".format(row).encode("ascii"))
+            for row in range(1, rows + 1)
+        ]
+    else:
+        varbinds = [(column + (row,), ASN_COUNTER, row) for row in range(1, rows + 1)]
+    varbinds.append((column[:-1] + (column[-1] + 1, 1), ASN_COUNTER, 0))
+    return varbinds
+
+
+def chunks(items, size):
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def python_benchmarks(varbinds):
+    """
+    Yields the name and function of each benchmark of the Python layer.
+    """
+
+    oids = ["ifInOctets.{0}".format(row) for row in range(1, varbinds + 1)]
+    results = [
+        SNMPVariable("ifInOctets", str(row), str(row), "COUNTER")
+        for row in range(1, varbinds + 1)
+    ]
+
+    def normalize():
+        for oid in oids:
+            normalize_oid(oid)
+
+    def construct():
+        for row, oid in enumerate(oids):
+            SNMPVariable(oid, None, row, "COUNTER")
+
+    yield "normalize_oid", normalize
+    yield "build_varlist", lambda: build_varlist(oids)
+    yield "snmp_variable", construct
+    yield "validate_results", lambda: validate_results(results)
+
+
+def interface_benchmarks(varbinds, max_repetitions):
+    """
+    Yields the name, session, function and canned responses of each
+    benchmark of requests through the C interface.
+    """
+
+    session_kargs = {
+        "hostname": "127.0.0.1",
+        "remote_port": 11199,
+        "version": 2,
+        "community": "public",
+    }
+    session = easysnmp.Session(**session_kargs)
+    typed_session = easysnmp.Session(typed_values=True, **session_kargs)
+
+    counters = column_varbinds(IF_IN_OCTETS, varbinds)
+    walk_responses = [[varbind] for varbind in counters]
+    bulk_responses = chunks(counters, max_repetitions)
+    string_responses = [[varbind] for varbind in column_varbinds(IF_DESCR, varbinds)]
+
+    get_responses = chunks(counters[:-1], GET_BATCH)
+    get_requests = [
+        ["ifInOctets.{0}".format(name[-1]) for name, _, _ in response]
+        for response in get_responses
+    ]
+
+    def get():
+        for oids in get_requests:
+            session.get(oids)
+
+    walk = partial(session.walk, "ifInOctets")
+    bulkwalk = partial(session.bulkwalk, "ifInOctets", max_repetitions=max_repetitions)
+    bulkwalk_name = "bulkwalk_{0}".format(max_repetitions)
+
+    yield "get", session, get, get_responses
+    yield "walk", session, walk, walk_responses
+    yield "walk_octetstr", session, partial(session.walk, "ifDescr"), string_responses
+    yield "walk_columnar", session, partial(
+        walk, result_format="columnar"
+    ), walk_responses
+    yield "walk_lazy", session, partial(walk, result_format="lazy"), walk_responses
+    yield "walk_typed", typed_session, partial(
+        typed_session.walk, "ifInOctets"
+    ), walk_responses
+    yield bulkwalk_name, session, bulkwalk, bulk_responses
+    yield bulkwalk_name + "_columnar", session, partial(
+        bulkwalk, result_format="columnar"
+    ), bulk_responses
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the marshalling layers of easysnmp without an "
+        "agent."
+    )
+    parser.add_argument(
+        "--varbinds",
+        type=int,
+        default=10000,
+        help="the number of varbinds handled per call (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=20,
+        help="the number of measured calls of each benchmark (default: "
+        "%(default)s)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.0,
+        help="the least number of seconds to measure each benchmark for",
+    )
+    parser.add_argument(
+        "--max-repetitions",
+        type=int,
+        default=50,
+        help="the max_repetitions of the bulkwalk benchmarks (default: "
+        "%(default)s)",
+    )
+    parser.add_argument(
+        "--filter", help="only run benchmarks whose name matches this regex"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="compare the results with those in this JSON file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    pattern = re.compile(args.filter) if args.filter else None
+    logging.getLogger("easysnmp.interface").disabled = True
+
+    def selected(name):
+        return pattern is None or pattern.search(name)
+
+    results = []
+    for name, func in python_benchmarks(args.varbinds):
+        if selected(name):
+            results.append(
+                measure(name, func, iterations=args.iterations, min_time=args.min_time)
+            )
+
+    for name, session, func, responses in interface_benchmarks(
+        args.varbinds, args.max_repetitions
+    ):
+        if not selected(name):
+            continue
+        # Every call uses up exactly the canned responses, so each starts
+        # again from the first
+        interface.set_canned_responses(session, responses)
+        try:
+            results.append(
+                measure(name, func, iterations=args.iterations, min_time=args.min_time)
+            )
+        finally:
+            interface.set_canned_responses(session, None)
+
+    baseline = read_results(args.compare) if args.compare else None
+    print(format_results(results, baseline))
+
+    if args.output:
+        write_results(
+            args.output,
+            results,
+            varbinds=args.varbinds,
+            iterations=args.iterations,
+            max_repetitions=args.max_repetitions,
+        )
+
+
+if __name__ == "__main__":
+    main()
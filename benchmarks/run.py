@@ -0,0 +1,160 @@
+"""
+Runs the end-to-end benchmarks against a local snmpd serving a synthetic
+table, e.g.
+
+    python -m benchmarks.run --rows 1000 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+
+from __future__ import unicode_literals, absolute_import, print_function
+
+import argparse
+import logging
+import re
+import sys
+from functools import partial
+
+import easysnmp
+
+from .agent import LocalAgent, TABLE_OID, WRITABLE_COLUMN, column_oid, table_oid
+from .harness import format_results, measure, read_results, write_results
+
+# The names benchmarks of each SNMP version are prefixed with
+VERSION_NAMES = {1: "v1", 2: "v2c", 3: "v3"}
+
+
+def session_benchmarks(agent, version, rows, repetitions):
+    """
+    Yields the name and function of each benchmark of requests made through
+    a session with the agent.
+    """
+
+    session = easysnmp.Session(**agent.session_kargs(version))
+    prefix = VERSION_NAMES[version]
+
+    for count in (1, 10, 100):
+        oids = [table_oid(1, (row % rows) + 1) for row in range(count)]
+        yield "{0}_get_{1}".format(prefix, count), partial(session.get, oids)
+
+    yield "{0}_get_next".format(prefix), partial(session.get_next, table_oid(1, 1))
+    yield "{0}_walk".format(prefix), partial(session.walk, column_oid(1))
+
+    if version != 1:
+        for max_repetitions in repetitions:
+            yield "{0}_bulkwalk_{1}".format(prefix, max_repetitions), partial(
+                session.bulkwalk, column_oid(1), max_repetitions=max_repetitions
+            )
+
+    values = [
+        (table_oid(WRITABLE_COLUMN, (row % rows) + 1), row, "i") for row in range(10)
+    ]
+    yield "{0}_set_multiple_10".format(prefix), partial(session.set_multiple, values)
+
+
+def creation_benchmarks(agent, versions):
+    """
+    Yields the name and function of the benchmarks of creating sessions.
+    """
+
+    for version in versions:
+        yield "{0}_session_create".format(VERSION_NAMES[version]), partial(
+            easysnmp.Session, **agent.session_kargs(version)
+        )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Benchmark easysnmp against a local snmpd stand-in."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1000,
+        help="the number of rows of the synthetic table (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=200,
+        help="the number of measured calls of each benchmark (default: "
+        "%(default)s)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.0,
+        help="the least number of seconds to measure each benchmark for",
+    )
+    parser.add_argument(
+        "--repetitions",
+        default="10,25,50",
+        help="the max_repetitions of the bulkwalk benchmarks (default: "
+        "%(default)s)",
+    )
+    parser.add_argument(
+        "--versions",
+        default="1,2,3",
+        help="the SNMP versions to benchmark (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--filter", help="only run benchmarks whose name matches this regex"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=11171,
+        help="the UDP port the agent listens on (default: %(default)s)",
+    )
+    parser.add_argument("--snmpd", default="snmpd", help="the snmpd to run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="compare the results with those in this JSON file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    repetitions = [int(value) for value in args.repetitions.split(",")]
+    versions = [int(value) for value in args.versions.split(",")]
+    pattern = re.compile(args.filter) if args.filter else None
+
+    # The interface logs every failed request, which would only skew timings
+    logging.getLogger("easysnmp.interface").disabled = True
+
+    results = []
+    with LocalAgent(rows=args.rows, port=args.port, snmpd=args.snmpd) as agent:
+        benchmarks = list(creation_benchmarks(agent, versions))
+        for version in versions:
+            benchmarks.extend(
+                session_benchmarks(agent, version, args.rows, repetitions)
+            )
+
+        for name, func in benchmarks:
+            if pattern is not None and not pattern.search(name):
+                continue
+            # Walks return a whole column per call so they are measured
+            # fewer times
+            iterations = args.iterations
+            if "walk" in name:
+                iterations = max(iterations // 10, 1)
+            results.append(
+                measure(name, func, iterations=iterations, min_time=args.min_time)
+            )
+            print(results[-1].name, file=sys.stderr)
+
+    baseline = read_results(args.compare) if args.compare else None
+    print(format_results(results, baseline))
+
+    if args.output:
+        write_results(
+            args.output,
+            results,
+            rows=args.rows,
+            iterations=args.iterations,
+            table_oid=TABLE_OID,
+        )
+
+
+if __name__ == "__main__":
+    main()
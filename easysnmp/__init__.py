@@ -1,3 +1,5 @@
+import sys
+
 from .easy import (  # noqa
     snmp_get,
     snmp_set,
@@ -16,5 +18,8 @@ from .exceptions import (  # noqa
     EasySNMPNoSuchInstanceError,
     EasySNMPUndeterminedTypeError,
 )
-from .session import Session  # noqa
-from .variables import SNMPVariable  # noqa
+from .session import PreparedRequest, Session  # noqa
+from .variables import ColumnarResult, LazyResult, SNMPVariable  # noqa
+
+if sys.version_info >= (3, 5):
+    from .aio import AsyncSession  # noqa
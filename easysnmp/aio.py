@@ -0,0 +1,354 @@
+from __future__ import unicode_literals, absolute_import
+
+import asyncio
+import os
+
+# Don't attempt to import the C interface if building docs on RTD
+if not os.environ.get("READTHEDOCS", False):  # noqa
+    from . import interface
+
+from .exceptions import EasySNMPError, EasySNMPNoSuchNameError
+from .helpers import END_OF_WALK_TYPES, format_numeric_oid
+from .session import Session, build_varlist, validate_results
+from .variables import SNMPVariable, SNMPVariableList
+
+# asyncio.get_running_loop is unavailable before Python 3.7, where
+# get_event_loop returns the running loop when called from a coroutine
+get_running_loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+
+
+class AsyncSession(Session):
+    """
+    A Net-SNMP session whose operations are coroutines driven by an asyncio
+    event loop. Requests are sent with Net-SNMP's asynchronous API and the
+    session socket is watched by the loop, so many requests (against one or
+    many sessions) may be outstanding at the same time without any threads.
+
+    All arguments accepted by :py:class:`Session` are supported. Note that
+    ``retry_no_such`` is not applied to asynchronous requests.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        async def poll(hostnames):
+            sessions = [
+                AsyncSession(hostname=hostname, community='public', version=2)
+                for hostname in hostnames
+            ]
+            return await asyncio.gather(
+                *[session.get('sysUpTime.0') for session in sessions]
+            )
+
+    :param loop: the event loop to use; defaults to the loop running each
+                 request, so a session may be used from one loop after
+                 another as long as no requests are outstanding
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._loop = kwargs.pop("loop", None)
+        self._pending = {}
+        self._active_loop = None
+        self._reader_fd = None
+        self._timer = None
+        super(AsyncSession, self).__init__(*args, **kwargs)
+
+    def _get_loop(self):
+        """
+        Returns the loop which watches the session while requests are
+        outstanding, taking the running loop when there are none.
+        """
+
+        if self._active_loop is None:
+            self._active_loop = self._loop or get_running_loop()
+        elif self._loop is None and self._active_loop is not get_running_loop():
+            raise RuntimeError(
+                "requests of the session are outstanding on another event loop"
+            )
+        return self._active_loop
+
+    def _send(self, command, varlist, non_repeaters=0, max_repetitions=0):
+        """
+        Sends a request and returns a future which will be resolved with a
+        tuple of the response varbinds and their numeric OIDs.
+        """
+
+        loop = self._get_loop()
+        request = interface.async_send(
+            self, command, non_repeaters, max_repetitions, varlist
+        )
+        future = loop.create_future()
+        self._pending[request] = future
+        self._schedule()
+        return future
+
+    def _schedule(self):
+        """
+        Watches the session socket while requests are outstanding and arms a
+        timer for the next Net-SNMP retry or timeout.
+        """
+
+        loop = self._active_loop
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            self._remove_reader()
+            self._active_loop = None
+            return
+
+        fd, timeout = interface.async_select_info(self)
+        if self._reader_fd != fd:
+            self._remove_reader()
+            loop.add_reader(fd, self._on_readable)
+            self._reader_fd = fd
+
+        if timeout is not None:
+            self._timer = loop.call_later(timeout, self._on_timeout)
+
+    def _remove_reader(self):
+        if self._reader_fd is not None:
+            self._active_loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+
+    def _on_readable(self):
+        interface.async_read(self)
+        self._dispatch()
+
+    def _on_timeout(self):
+        self._timer = None
+        interface.async_timeout(self)
+        self._dispatch()
+
+    def _dispatch(self):
+        """
+        Resolves the futures of all requests which have completed.
+        """
+
+        for request, future in list(self._pending.items()):
+            if future.cancelled():
+                del self._pending[request]
+                continue
+
+            try:
+                result = interface.async_result(self, request)
+            except EasySNMPError as exc:
+                # The errors of the session are overwritten by the next
+                # request collected, before the awaiting coroutine resumes
+                exc.error_index = self.error_index
+                del self._pending[request]
+                future.set_exception(exc)
+                continue
+
+            if result is not None:
+                del self._pending[request]
+                future.set_result(result)
+
+        self._schedule()
+
+    def _detach(self):
+        """
+        Stops watching the current Net-SNMP session and fails any requests
+        which are still outstanding on it.
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._remove_reader()
+        self._active_loop = None
+
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(
+                    EasySNMPError("the session was updated while a request was pending")
+                )
+
+    def update_session(self, **kwargs):
+        self._detach()
+        super(AsyncSession, self).update_session(**kwargs)
+
+    update_session.__doc__ = Session.update_session.__doc__
+
+    async def get(self, oids):
+        """
+        Perform an SNMP GET operation using the prepared session to
+        retrieve a particular piece of information.
+
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :return: an SNMPVariable object containing the value that was
+                 retrieved or a list of objects when you send in a list of
+                 OIDs
+        """
+
+        varlist, is_list = build_varlist(oids)
+
+        varbinds, _ = await self._send(interface.MSG_GET, varlist)
+
+        if self.abort_on_nonexistent:
+            validate_results(varbinds)
+
+        return varbinds if is_list else varbinds[0]
+
+    async def get_next(self, oids):
+        """
+        Uses an SNMP GETNEXT operation using the prepared session to
+        retrieve the next variable after the chosen item.
+
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :return: an SNMPVariable object containing the value that was
+                 retrieved or a list of objects when you send in a list of
+                 OIDs
+        """
+
+        varlist, is_list = build_varlist(oids)
+
+        varbinds, _ = await self._send(interface.MSG_GETNEXT, varlist)
+
+        if self.abort_on_nonexistent:
+            validate_results(varbinds)
+
+        return varbinds if is_list else varbinds[0]
+
+    async def get_bulk(self, oids, non_repeaters=0, max_repetitions=10):
+        """
+        Performs a bulk SNMP GET operation using the prepared session to
+        retrieve multiple pieces of information in a single packet.
+
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :param non_repeaters: the number of objects that are only expected to
+                              return a single GETNEXT instance, not multiple
+                              instances
+        :param max_repetitions: the number of objects that should be returned
+                                for all the repeating OIDs
+        :return: a list of SNMPVariable objects containing the values that
+                 were retrieved via SNMP
+        """
+
+        if self.version == 1:
+            raise EasySNMPError(
+                "you cannot perform a bulk GET operation for SNMP version 1"
+            )
+
+        varlist, _ = build_varlist(oids)
+
+        varbinds, _ = await self._send(
+            interface.MSG_GETBULK, varlist, non_repeaters, max_repetitions
+        )
+
+        if self.abort_on_nonexistent:
+            validate_results(varbinds)
+
+        return SNMPVariableList(varbinds)
+
+    async def walk(self, oids=".1.3.6.1.2.1"):
+        """
+        Uses SNMP GETNEXT operation using the prepared session to
+        automatically retrieve multiple pieces of information in an OID.
+
+        :param oids: you may pass in a single item or a list of items which
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0)); multiple OIDs are walked in
+                     lockstep
+        :return: a list of SNMPVariable objects containing the values that
+                 were retrieved via SNMP
+        """
+
+        return await self._walk(oids, interface.MSG_GETNEXT, 0)
+
+    async def bulkwalk(self, oids=".1.3.6.1.2.1", non_repeaters=0, max_repetitions=10):
+        """
+        Uses SNMP GETBULK operation using the prepared session to
+        automatically retrieve multiple pieces of information in an OID
+
+        :param oids: you may pass in a single item or a list of items which
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0)); multiple OIDs are walked in
+                     lockstep
+        :param non_repeaters: must be 0, as every OID is walked
+        :param max_repetitions: the number of objects that should be returned
+                                for each OID per request
+        :return: a list of SNMPVariable objects containing the values that
+                 were retrieved via SNMP
+        """
+
+        if self.version == 1:
+            raise EasySNMPError("BULKWALK is not available for SNMP version 1")
+        if non_repeaters:
+            raise ValueError("an asynchronous bulkwalk takes no non_repeaters")
+
+        return await self._walk(oids, interface.MSG_GETBULK, max_repetitions)
+
+    async def _walk(self, oids, command, max_repetitions):
+        varlist, _ = build_varlist(oids)
+        roots = interface.resolve(self, varlist)
+        cursors = list(roots)
+        active = list(range(len(roots)))
+        results = SNMPVariableList()
+
+        while active:
+            request_varlist = [
+                SNMPVariable(format_numeric_oid(cursors[index])) for index in active
+            ]
+
+            try:
+                varbinds, names = await self._send(
+                    command, request_varlist, 0, max_repetitions
+                )
+            except EasySNMPNoSuchNameError as exc:
+                # SNMP v1 agents report the end of the MIB view as an error
+                # against the offending varbind
+                if self.version != 1:
+                    raise
+                if 0 < exc.error_index <= len(active):
+                    del active[exc.error_index - 1]
+                else:
+                    active = []
+                continue
+
+            finished = set()
+            for position, (varbind, name) in enumerate(zip(varbinds, names)):
+                index = active[position % len(active)]
+                if index in finished:
+                    continue
+
+                root = roots[index]
+                if (
+                    varbind.snmp_type in END_OF_WALK_TYPES
+                    or name[: len(root)] != root
+                    or name <= cursors[index]
+                ):
+                    finished.add(index)
+                    continue
+
+                cursors[index] = name
+                results.append(varbind)
+
+            # An empty response would otherwise have us loop forever
+            if not varbinds:
+                break
+
+            active = [index for index in active if index not in finished]
+
+        if self.abort_on_nonexistent:
+            validate_results(results)
+
+        return results
@@ -1,9 +1,9 @@
 from __future__ import unicode_literals, absolute_import
 
-from .session import Session
+from .pool import checkout
 
 
-def snmp_get(oids, **session_kargs):
+def snmp_get(oids, pool=None, **session_kargs):
     """
     Perform an SNMP GET operation to retrieve a particular piece of
     information.
@@ -13,16 +13,19 @@ def snmp_get(oids, **session_kargs):
                  (e.g. 'sysDescr.0') or may be a tuple containing the
                  name as its first item and index as its second
                  (e.g. ('sysDescr', 0))
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.get(oids)
+    with checkout(pool, session_kargs) as session:
+        return session.get(oids)
 
 
-def snmp_set(oid, value, type=None, **session_kargs):
+def snmp_set(oid, value, type=None, pool=None, **session_kargs):
     """
     Perform an SNMP SET operation to update a particular piece of
     information.
@@ -34,32 +37,38 @@ def snmp_set(oid, value, type=None, **session_kargs):
     :param value: the value to set the OID to
     :param snmp_type: if a numeric OID is used and the object is not in
                       the parsed MIB, a type must be explicitly supplied
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.set(oid, value, type)
+    with checkout(pool, session_kargs) as session:
+        return session.set(oid, value, type)
 
 
-def snmp_set_multiple(oid_values, **session_kargs):
+def snmp_set_multiple(oid_values, pool=None, **session_kargs):
     """
     Perform multiple SNMP SET operations to update various pieces of
     information at the same time.
 
     :param oid_values: a list of tuples whereby each tuple contains a
                        (oid, value) or an (oid, value, snmp_type)
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.set_multiple(oid_values)
+    with checkout(pool, session_kargs) as session:
+        return session.set_multiple(oid_values)
 
 
-def snmp_get_next(oids, **session_kargs):
+def snmp_get_next(oids, pool=None, **session_kargs):
     """
     Uses an SNMP GETNEXT operation to retrieve the next variable after
     the chosen item.
@@ -69,16 +78,21 @@ def snmp_get_next(oids, **session_kargs):
                  (e.g. 'sysDescr.0') or may be a tuple containing the
                  name as its first item and index as its second
                  (e.g. ('sysDescr', 0))
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.get_next(oids)
+    with checkout(pool, session_kargs) as session:
+        return session.get_next(oids)
 
 
-def snmp_get_bulk(oids, non_repeaters=0, max_repetitions=10, **session_kargs):
+def snmp_get_bulk(
+    oids, non_repeaters=0, max_repetitions=10, pool=None, **session_kargs
+):
     """
     Performs a bulk SNMP GET operation to retrieve multiple pieces of
     information in a single packet.
@@ -93,16 +107,19 @@ def snmp_get_bulk(oids, non_repeaters=0, max_repetitions=10, **session_kargs):
                           instances
     :param max_repetitions: the number of objects that should be returned
                             for all the repeating OIDs
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.get_bulk(oids, non_repeaters, max_repetitions)
+    with checkout(pool, session_kargs) as session:
+        return session.get_bulk(oids, non_repeaters, max_repetitions)
 
 
-def snmp_walk(oids=".1.3.6.1.2.1", **session_kargs):
+def snmp_walk(oids=".1.3.6.1.2.1", pool=None, **session_kargs):
     """
     Uses SNMP GETNEXT operation to automatically retrieve multiple
     pieces of information in an OID for you.
@@ -112,17 +129,24 @@ def snmp_walk(oids=".1.3.6.1.2.1", **session_kargs):
                  entire OID (e.g. 'sysDescr.0') or may be a tuple
                  containing the name as its first item and index as its
                  second (e.g. ('sysDescr', 0))
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :param session_kargs: keyword arguments which will be sent used when
                           constructing the session for this operation;
                           all parameters in the Session class are supported
     """
 
-    session = Session(**session_kargs)
-    return session.walk(oids)
+    with checkout(pool, session_kargs) as session:
+        return session.walk(oids)
 
 
 def snmp_bulkwalk(
-    oids=".1.3.6.1.2.1", non_repeaters=0, max_repetitions=10, **session_kargs
+    oids=".1.3.6.1.2.1",
+    non_repeaters=0,
+    max_repetitions=10,
+    pool=None,
+    **session_kargs
 ):
     """
     Uses SNMP GETBULK operation using the prepared session to
@@ -138,9 +162,12 @@ def snmp_bulkwalk(
                           instances
     :param max_repetitions: the number of objects that should be returned
                             for all the repeating OIDs
+    :param pool: the SessionPool the session is checked out of; defaults
+                 to the pool set with easysnmp.pool.set_default_pool, if
+                 any, or a new session for this operation
     :return: a list of SNMPVariable objects containing the values that
              were retrieved via SNMP
     """
 
-    session = Session(**session_kargs)
-    return session.bulkwalk(oids, non_repeaters, max_repetitions)
+    with checkout(pool, session_kargs) as session:
+        return session.bulkwalk(oids, non_repeaters, max_repetitions)
@@ -2,9 +2,16 @@ from __future__ import unicode_literals
 
 
 class EasySNMPError(Exception):
-    """The base Easy SNMP exception which covers all exceptions raised."""
+    """
+    The base Easy SNMP exception which covers all exceptions raised.
 
-    pass
+    When a walk or bulkwalk fails part way through, partial_results holds
+    the variables retrieved before the failure and cursor the value to pass
+    as resume_from to continue the walk from that point.
+    """
+
+    partial_results = None
+    cursor = None
 
 
 class EasySNMPConnectionError(EasySNMPError):
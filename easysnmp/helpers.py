@@ -16,6 +16,12 @@ OID_INDEX_RE = re.compile(
     re.VERBOSE,
 )
 
+# SNMP types which indicate that a walk has run past the end of its subtree
+END_OF_WALK_TYPES = ("ENDOFMIBVIEW", "NOSUCHOBJECT", "NOSUCHINSTANCE")
+
+# The error-status of a response which would not fit in a single message
+SNMP_ERR_TOOBIG = 1
+
 
 def normalize_oid(oid, oid_index=None):
     """
@@ -34,3 +40,14 @@ def normalize_oid(oid, oid_index=None):
             oid, oid_index = match.group(1, 2)
 
     return oid, oid_index
+
+
+def format_numeric_oid(oid):
+    """
+    Converts a numeric OID tuple into its dotted-decimal string form.
+
+    :param oid: a tuple of integer sub-identifiers (e.g. (1, 3, 6, 1))
+    :return: the OID as a string (e.g. '.1.3.6.1')
+    """
+
+    return "." + ".".join(str(sub_id) for sub_id in oid)
@@ -23,6 +23,10 @@
 
 #endif /* PY_VERSION_HEX */
 
+#if PY_MAJOR_VERSION < 3
+#define PyUnicode_InternFromString PyString_InternFromString
+#endif
+
 #include <net-snmp/net-snmp-config.h>
 #include <net-snmp/net-snmp-includes.h>
 #include <net-snmp/snmpv3_api.h>
@@ -68,6 +72,19 @@ static PyObject *EasySNMPUnknownObjectIDError = NULL;
 static PyObject *EasySNMPNoSuchObjectError = NULL;
 static PyObject *EasySNMPUndeterminedTypeError = NULL;
 
+/*
+ * The SNMPVariable class along with interned attribute names, used to
+ * build result varbinds without going through SNMPVariable.__init__ and
+ * SNMPVariable.__setattr__ for every one of them.
+ */
+static PyObject *easysnmp_variables_import = NULL;
+static PyObject *SNMPVariableType = NULL;
+static PyObject *empty_tuple = NULL;
+static PyObject *py_str_oid = NULL;
+static PyObject *py_str_oid_index = NULL;
+static PyObject *py_str_value = NULL;
+static PyObject *py_str_snmp_type = NULL;
+
 /*
  * Ripped wholesale from library/tools.h from Net-SNMP 5.7.3
  * to remain compatible with versions 5.7.2 and earlier.
@@ -454,16 +471,33 @@ static int __translate_asn_type(int type)
 #define USE_BASIC (0)
 #define USE_ENUMS (1)
 #define USE_SPRINT_VALUE (2)
+/*
+ * The bits of sprintval_flag holding one of the modes above; the others
+ * select values which are built without being formatted as text at all
+ * (see py_netsnmp_varbind_set_value())
+ */
+#define SPRINTVAL_MODE (0x0f)
+#define VALUE_BYTES (0x10)
+#define VALUE_TYPED (0x20)
 static int __snprint_value(char *buf, size_t buf_len,
                            netsnmp_variable_list *var,
-                           struct tree *tp, int type, int flag)
+                           struct tree *tp, int type, int flag, int format)
 {
     size_t len = 0;
     u_char *ip;
     struct enum_list *ep;
 
+    flag &= SPRINTVAL_MODE;
     buf[0] = '\0';
-    if (flag == USE_SPRINT_VALUE)
+    if (flag == USE_SPRINT_VALUE && var->type == ASN_OBJECT_ID &&
+        format != NETSNMP_OID_OUTPUT_SUFFIX)
+    {
+        /* snprint_value() would use the library-wide format */
+        __sprint_objid(buf, buf_len, var->val.objid,
+                       var->val_len / sizeof(oid), format);
+        len = STRLEN(buf);
+    }
+    else if (flag == USE_SPRINT_VALUE)
     {
         snprint_value(buf, buf_len, var->name, var->name_length, var);
         len = STRLEN(buf);
@@ -998,6 +1032,285 @@ done:
     return rtp;
 }
 
+/*
+ * Resets a tag2oid_cache to an empty cache holding at most maxsize
+ * entries. A maxsize of 0 disables caching.
+ */
+static void __tag2oid_cache_init(struct tag2oid_cache *cache, size_t maxsize)
+{
+    memset(cache, 0, sizeof(*cache));
+    cache->maxsize = maxsize;
+    cache->head = cache->tail = -1;
+}
+
+/* Removes every entry from a cache, keeping its allocation. */
+static void __tag2oid_cache_clear(struct tag2oid_cache *cache)
+{
+    size_t ind;
+
+    for (ind = 0; ind < cache->size; ind++)
+    {
+        SAFE_FREE(cache->entries[ind].name);
+    }
+    for (ind = 0; cache->buckets && ind < cache->num_buckets; ind++)
+    {
+        cache->buckets[ind] = -1;
+    }
+    cache->size = 0;
+    cache->head = cache->tail = -1;
+    cache->tree_head = NULL;
+}
+
+/* Releases all memory held by a cache and disables it. */
+static void __tag2oid_cache_free(struct tag2oid_cache *cache)
+{
+    __tag2oid_cache_clear(cache);
+    SAFE_FREE(cache->entries);
+    SAFE_FREE(cache->buckets);
+    __tag2oid_cache_init(cache, 0);
+}
+
+static unsigned long __tag2oid_cache_hash(const char *tag, int best_guess)
+{
+    unsigned long hash = 5381 + best_guess;
+
+    while (*tag)
+    {
+        hash = hash * 33 + (unsigned char)*tag++;
+    }
+    return hash;
+}
+
+/* Unlinks an entry from the recently used list. */
+static void __tag2oid_cache_unlink(struct tag2oid_cache *cache, int ind)
+{
+    struct tag2oid_cache_entry *entry = &cache->entries[ind];
+
+    if (entry->prev >= 0)
+    {
+        cache->entries[entry->prev].next = entry->next;
+    }
+    else
+    {
+        cache->head = entry->next;
+    }
+    if (entry->next >= 0)
+    {
+        cache->entries[entry->next].prev = entry->prev;
+    }
+    else
+    {
+        cache->tail = entry->prev;
+    }
+}
+
+/* Makes an entry the most recently used one. */
+static void __tag2oid_cache_push(struct tag2oid_cache *cache, int ind)
+{
+    struct tag2oid_cache_entry *entry = &cache->entries[ind];
+
+    entry->prev = -1;
+    entry->next = cache->head;
+    if (cache->head >= 0)
+    {
+        cache->entries[cache->head].prev = ind;
+    }
+    cache->head = ind;
+    if (cache->tail < 0)
+    {
+        cache->tail = ind;
+    }
+}
+
+/* Removes an entry from its hash chain. */
+static void __tag2oid_cache_unchain(struct tag2oid_cache *cache, int ind)
+{
+    int *link = &cache->buckets[cache->entries[ind].hash % cache->num_buckets];
+
+    while (*link >= 0 && *link != ind)
+    {
+        link = &cache->entries[*link].bucket_next;
+    }
+    if (*link == ind)
+    {
+        *link = cache->entries[ind].bucket_next;
+    }
+}
+
+/*
+ * Stores the translation of a tag in the cache, evicting the least recently
+ * used entry once the cache is full. Failing to allocate memory leaves the
+ * cache unchanged.
+ */
+static void __tag2oid_cache_insert(struct tag2oid_cache *cache, char *tag,
+                                   int best_guess, unsigned long hash,
+                                   struct tree *tp, int type, int concat_iid,
+                                   oid *name, size_t name_len)
+{
+    struct tag2oid_cache_entry *entry = NULL;
+    oid *key = NULL;
+    size_t ind;
+    int slot;
+
+    if (!cache->entries)
+    {
+        cache->num_buckets = cache->maxsize * 2;
+        cache->entries = calloc(cache->maxsize, sizeof(*cache->entries));
+        cache->buckets = malloc(cache->num_buckets * sizeof(int));
+        if (!cache->entries || !cache->buckets)
+        {
+            SAFE_FREE(cache->entries);
+            SAFE_FREE(cache->buckets);
+            return;
+        }
+        for (ind = 0; ind < cache->num_buckets; ind++)
+        {
+            cache->buckets[ind] = -1;
+        }
+    }
+
+    /* the tag is stored after the OID in a single allocation */
+    if (!(key = malloc(name_len * sizeof(oid) + strlen(tag) + 1)))
+    {
+        return;
+    }
+    memcpy(key, name, name_len * sizeof(oid));
+    strcpy((char *)(key + name_len), tag);
+
+    if (cache->size < cache->maxsize)
+    {
+        slot = cache->size++;
+    }
+    else
+    {
+        /* recycle the least recently used entry */
+        slot = cache->tail;
+        __tag2oid_cache_unlink(cache, slot);
+        __tag2oid_cache_unchain(cache, slot);
+        SAFE_FREE(cache->entries[slot].name);
+    }
+
+    entry = &cache->entries[slot];
+    entry->name = key;
+    entry->name_len = name_len;
+    entry->tag = (char *)(key + name_len);
+    entry->best_guess = best_guess;
+    entry->hash = hash;
+    entry->tp = tp;
+    entry->type = type;
+    entry->concat_iid = concat_iid;
+
+    entry->bucket_next = cache->buckets[hash % cache->num_buckets];
+    cache->buckets[hash % cache->num_buckets] = slot;
+    __tag2oid_cache_push(cache, slot);
+}
+
+/*
+ * Same as __tag2oid() but remembers the translation of each tag in cache so
+ * that repeated requests for the same objects skip the MIB searches; only
+ * the index is converted on every call. cache may be NULL.
+ *
+ * Tags which cannot be resolved are never cached, so loading further MIBs
+ * takes effect straight away, and the cache is emptied whenever Net-SNMP
+ * rebuilds its MIB tree.
+ */
+static struct tree *__cached_tag2oid(struct tag2oid_cache *cache, char *tag,
+                                     char *iid, oid *oid_arr,
+                                     size_t *oid_arr_len, int *type,
+                                     int best_guess)
+{
+    struct tag2oid_cache_entry *entry = NULL;
+    struct tree *tp = NULL;
+    unsigned long hash;
+    int base_type;
+    int concat_iid;
+    int ind;
+
+    if (!cache || !cache->maxsize || !tag || !oid_arr || !oid_arr_len)
+    {
+        return __tag2oid(tag, iid, oid_arr, oid_arr_len, type, best_guess);
+    }
+
+    if (cache->tree_head != get_tree_head())
+    {
+        __tag2oid_cache_clear(cache);
+        cache->tree_head = get_tree_head();
+    }
+
+    hash = __tag2oid_cache_hash(tag, best_guess);
+    for (ind = cache->entries ? cache->buckets[hash % cache->num_buckets] : -1;
+         ind >= 0; ind = cache->entries[ind].bucket_next)
+    {
+        entry = &cache->entries[ind];
+        if (entry->hash == hash && entry->best_guess == best_guess &&
+            !strcmp(entry->tag, tag))
+        {
+            break;
+        }
+    }
+
+    if (ind >= 0)
+    {
+        cache->hits++;
+        __tag2oid_cache_unlink(cache, ind);
+        __tag2oid_cache_push(cache, ind);
+
+        tp = entry->tp;
+        base_type = entry->type;
+        concat_iid = entry->concat_iid;
+        memcpy(oid_arr, entry->name, entry->name_len * sizeof(oid));
+        *oid_arr_len = entry->name_len;
+    }
+    else
+    {
+        cache->misses++;
+        tp = __tag2oid(tag, NULL, oid_arr, oid_arr_len, &base_type,
+                       best_guess);
+
+        /*
+         * __tag2oid() leaves the index off when a single symbolic name
+         * cannot be found and best_guess is off
+         */
+        concat_iid = best_guess == 1 || best_guess == 2 ||
+                     strchr(tag, '.') || strchr(tag, ':') || tp;
+
+        if (*oid_arr_len)
+        {
+            __tag2oid_cache_insert(cache, tag, best_guess, hash, tp,
+                                   base_type, concat_iid, oid_arr,
+                                   *oid_arr_len);
+        }
+    }
+
+    if (type)
+    {
+        *type = base_type;
+    }
+    if (concat_iid && iid && *iid)
+    {
+        __concat_oid_str(oid_arr, oid_arr_len, iid);
+    }
+    return tp;
+}
+
+/*
+ * Returns the session_capsule_ctx of a Session, which is kept alive by the
+ * Session's sess_ptr attribute. Raises an exception and returns NULL if the
+ * Session has no session handle.
+ */
+static struct session_capsule_ctx *__get_session_ctx(PyObject *session)
+{
+    PyObject *sess_ptr = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+
+    if ((sess_ptr = PyObject_GetAttrString(session, "sess_ptr")))
+    {
+        session_ctx = get_session_handle_from_capsule(sess_ptr);
+        Py_DECREF(sess_ptr);
+    }
+    return session_ctx;
+}
+
 /* function: __concat_oid_str
  *
  * This function converts a dotted-decimal string, soid_str, to an array
@@ -1186,13 +1499,255 @@ static int __add_var_val_str(netsnmp_pdu *pdu, oid *name, int name_length,
     return ret;
 }
 
-/* takes ss and pdu as input and updates the 'response' argument */
+/*
+ * Takes a set of scratch buffers off the free list of the session, or
+ * allocates a new set if every set is in use by another call. Must be
+ * called with the GIL held; raises MemoryError on failure.
+ */
+static struct session_scratch *__scratch_acquire(
+    struct session_capsule_ctx *session_ctx)
+{
+    struct session_scratch *scratch = session_ctx->scratch;
+
+    if (scratch)
+    {
+        session_ctx->scratch = scratch->next;
+    }
+    else if (!(scratch = malloc(sizeof *scratch)))
+    {
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    scratch->next = NULL;
+    scratch->invalid_oids = (bitarray *)scratch->invalid_oids_buf;
+    bitarray_buf_init(scratch->invalid_oids, sizeof(scratch->invalid_oids_buf));
+    return scratch;
+}
+
+/* Returns scratch to the free list of the session; requires the GIL. */
+static void __scratch_release(struct session_capsule_ctx *session_ctx,
+                              struct session_scratch *scratch)
+{
+    if (scratch)
+    {
+        scratch->next = session_ctx->scratch;
+        session_ctx->scratch = scratch;
+    }
+}
+
+/* Frees every set of scratch buffers on the free list of the session. */
+static void __scratch_free(struct session_capsule_ctx *session_ctx)
+{
+    struct session_scratch *scratch;
+
+    while ((scratch = session_ctx->scratch))
+    {
+        session_ctx->scratch = scratch->next;
+        free(scratch);
+    }
+}
+
+/*
+ * Acquires the transport lock of a thread-safe session, returning it so
+ * that it can be passed to __transport_unlock(), or returns NULL without
+ * locking anything for other sessions. May be called without the GIL.
+ */
+static PyThread_type_lock __transport_lock(
+    struct session_capsule_ctx *session_ctx)
+{
+    if (!session_ctx->options.thread_safe)
+    {
+        return NULL;
+    }
+    PyThread_acquire_lock(session_ctx->transport_lock, WAIT_LOCK);
+    return session_ctx->transport_lock;
+}
+
+/* Acquires the transport lock of a poll entry, if it has one. */
+static void __transport_lock_entry(struct poll_session_entry *entry)
+{
+    if (entry->lock)
+    {
+        PyThread_acquire_lock(entry->lock, WAIT_LOCK);
+    }
+}
+
+static void __transport_unlock(PyThread_type_lock lock)
+{
+    if (lock)
+    {
+        PyThread_release_lock(lock);
+    }
+}
+
+/*
+ * Reads a message from sock if one is waiting, without blocking, and
+ * returns whether one was read. Another thread sharing the session may
+ * have read the message which woke this one up, so a thread-safe session
+ * must check again once it holds the transport lock.
+ */
+static int __sess_read_ready(void *handle, int sock)
+{
+    netsnmp_large_fd_set fdset;
+    struct timeval zero;
+    int count;
+
+    timerclear(&zero);
+    netsnmp_large_fd_set_init(&fdset, sock + 1);
+    NETSNMP_LARGE_FD_ZERO(&fdset);
+    NETSNMP_LARGE_FD_SET(sock, &fdset);
+
+    count = netsnmp_large_fd_set_select(sock + 1, &fdset, NULL, NULL, &zero);
+    if (count > 0)
+    {
+        snmp_sess_read2(handle, &fdset);
+    }
+
+    netsnmp_large_fd_set_cleanup(&fdset);
+    return count > 0;
+}
+
+/*
+ * Sends pdu and waits for its response like snmp_sess_synch_response(),
+ * which installs its own callback on the whole session and so cannot be
+ * used by two threads at once. Instead the request carries a callback of
+ * its own: Net-SNMP matches every response to its request by request-id,
+ * so whichever waiting thread reads a response completes the request it
+ * belongs to and the other waiters simply find theirs done.
+ *
+ * The transport lock is only held while the handle is used, never while
+ * waiting in select(), and pdu is always consumed. Another thread may read
+ * this thread's response between releasing the lock and select(), which
+ * would then wait for a message that never comes, so each wait is capped
+ * at SHARED_RESPONSE_POLL_USEC before req.done is checked again. Must be
+ * called with the GIL held; it is released while waiting.
+ */
+static int __sess_shared_response(struct session_capsule_ctx *session_ctx,
+                                  netsnmp_pdu *pdu, netsnmp_pdu **response)
+{
+    struct async_request_ctx req;
+    void *handle = session_ctx->handle;
+    PyThread_type_lock lock = session_ctx->transport_lock;
+    netsnmp_transport *transport = NULL;
+    netsnmp_large_fd_set fdset;
+    struct timeval wait;
+    struct timeval poll_wait;
+    struct timeval start;
+    struct timeval now;
+    struct timeval elapsed;
+    int numfds;
+    int block;
+    int count;
+    int reqid;
+
+    memset(&req, 0, sizeof(req));
+    *response = NULL;
+
+    transport = snmp_sess_transport(handle);
+    if (!transport || transport->sock < 0)
+    {
+        snmp_free_pdu(pdu);
+        return STAT_ERROR;
+    }
+    netsnmp_large_fd_set_init(&fdset, transport->sock + 1);
+
+    Py_BEGIN_ALLOW_THREADS
+        PyThread_acquire_lock(lock, WAIT_LOCK);
+        reqid = snmp_sess_async_send(handle, pdu, __async_response_cb, &req);
+
+        while (reqid && !req.done)
+        {
+            numfds = 0;
+            block = 1;
+            timerclear(&wait);
+            NETSNMP_LARGE_FD_ZERO(&fdset);
+            snmp_sess_select_info2(handle, &numfds, &fdset, &wait, &block);
+            PyThread_release_lock(lock);
+
+            poll_wait.tv_sec = 0;
+            poll_wait.tv_usec = SHARED_RESPONSE_POLL_USEC;
+            if (!block && timercmp(&wait, &poll_wait, <))
+            {
+                poll_wait = wait;
+            }
+
+            gettimeofday(&start, NULL);
+            count = netsnmp_large_fd_set_select(numfds, &fdset, NULL, NULL,
+                                                &poll_wait);
+            gettimeofday(&now, NULL);
+            timersub(&now, &start, &elapsed);
+
+            PyThread_acquire_lock(lock, WAIT_LOCK);
+            if (req.done)
+            {
+                break;
+            }
+            if (count > 0)
+            {
+                __sess_read_ready(handle, transport->sock);
+            }
+            /* retry or expire requests whose deadline has passed */
+            if (!block && !timercmp(&wait, &elapsed, >))
+            {
+                snmp_sess_timeout(handle);
+            }
+        }
+
+        PyThread_release_lock(lock);
+    Py_END_ALLOW_THREADS
+
+    netsnmp_large_fd_set_cleanup(&fdset);
+
+    if (!reqid)
+    {
+        /* the PDU is not freed by Net-SNMP when sending fails */
+        snmp_free_pdu(pdu);
+        return STAT_ERROR;
+    }
+
+    *response = req.response;
+    return req.status;
+}
+
+/*
+ * Answers a request with the next of the canned responses of a session (see
+ * netsnmp_set_canned_responses()) rather than sending it, cycling back to
+ * the first once all of them have been used. pdu is always consumed.
+ */
+static int __canned_response(struct session_capsule_ctx *session_ctx,
+                             netsnmp_pdu *pdu, netsnmp_pdu **response)
+{
+    snmp_free_pdu(pdu);
+
+    *response = snmp_clone_pdu(session_ctx->canned[session_ctx->canned_next]);
+    session_ctx->canned_next = (session_ctx->canned_next + 1) %
+                               session_ctx->canned_count;
+    return *response ? STAT_SUCCESS : STAT_ERROR;
+}
+
+static void __canned_responses_free(struct session_capsule_ctx *session_ctx)
+{
+    int ind;
+
+    for (ind = 0; ind < session_ctx->canned_count; ind++)
+    {
+        snmp_free_pdu(session_ctx->canned[ind]);
+    }
+    SAFE_FREE(session_ctx->canned);
+    session_ctx->canned_count = 0;
+    session_ctx->canned_next = 0;
+}
+
+/* takes the session and pdu as input and updates the 'response' argument */
 /* the input 'pdu' argument will be freed */
-static int __send_sync_pdu(netsnmp_session *ss, netsnmp_pdu **pdu,
-                           netsnmp_pdu **response, int retry_nosuch,
-                           char *err_str, int *err_num, int *err_ind,
-                           bitarray *invalid_oids)
+static int __send_sync_pdu(struct session_capsule_ctx *session_ctx,
+                           netsnmp_pdu **pdu, netsnmp_pdu **response,
+                           int retry_nosuch, char *err_str, int *err_num,
+                           int *err_ind, bitarray *invalid_oids)
 {
+    netsnmp_session *ss = session_ctx->handle;
+    int shared = session_ctx->options.thread_safe;
     int status = 0;
     long command = (*pdu)->command;
     char *tmp_err_str;
@@ -1218,11 +1773,22 @@ static int __send_sync_pdu(netsnmp_session *ss, netsnmp_pdu **pdu,
 
 retry:
 
-    Py_BEGIN_ALLOW_THREADS
-        status = snmp_sess_synch_response(ss, *pdu, response);
-    Py_END_ALLOW_THREADS
+    if (session_ctx->canned_count)
+    {
+        status = __canned_response(session_ctx, *pdu, response);
+    }
+    else if (shared)
+    {
+        status = __sess_shared_response(session_ctx, *pdu, response);
+    }
+    else
+    {
+        Py_BEGIN_ALLOW_THREADS
+            status = snmp_sess_synch_response(ss, *pdu, response);
+        Py_END_ALLOW_THREADS
+    }
 
-        if ((*response == NULL) && (status == STAT_SUCCESS))
+    if ((*response == NULL) && (status == STAT_SUCCESS))
     {
         status = STAT_ERROR;
     }
@@ -1348,7 +1914,17 @@ retry:
 
     case STAT_TIMEOUT:
     case STAT_ERROR:
-        snmp_sess_error(ss, err_num, err_ind, &tmp_err_str);
+        if (shared && status == STAT_TIMEOUT)
+        {
+            /* only snmp_sess_synch_response() records timeouts in ss */
+            *err_num = 0;
+            *err_ind = SNMPERR_TIMEOUT;
+            tmp_err_str = strdup(snmp_api_errstring(SNMPERR_TIMEOUT));
+        }
+        else
+        {
+            snmp_sess_error(ss, err_num, err_ind, &tmp_err_str);
+        }
         strlcpy(err_str, tmp_err_str, STR_BUF_SIZE);
         py_log_msg(DEBUG, "sync PDU: %s", err_str);
 
@@ -1383,17 +1959,234 @@ done:
 }
 
 /*
- * Clears v3 user credentials from the local cache
+ * Sends the count varbinds of request starting at skip, which is left
+ * untouched, as a request of their own. Should the agent answer tooBig the
+ * varbinds are bisected and each half sent in turn, with the responses
+ * merged back in order; the size of the halves is remembered in the
+ * session so that later requests are split before they are sent.
+ *
+ * Bits set in invalid_oids (SNMPv1 only) are relative to the start of
+ * request rather than to skip.
  */
-static void __remove_user_from_cache(struct session_list *ss)
+static int __send_sync_pdu_range(struct session_capsule_ctx *session_ctx,
+                                 netsnmp_pdu *request, int skip, int count,
+                                 netsnmp_pdu **response, int retry_nosuch,
+                                 char *err_str, int *err_num, int *err_ind,
+                                 bitarray *invalid_oids)
 {
-    struct usmUser *actUser = usm_get_userList();
-    while (actUser != NULL)
-    {
-        struct usmUser *dummy = actUser;
-        if (
-            strcmp((const char *)dummy->secName, (const char *)ss->session->securityName) == 0 &&
-            strcmp((const char *)dummy->engineID, (const char *)ss->session->contextEngineID) == 0)
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *tail = NULL;
+    netsnmp_variable_list *vars = NULL;
+    bitarray *range_invalid_oids = NULL;
+    int batch = session_ctx->max_batch_varbinds;
+    int half;
+    int status;
+    int i;
+
+    *response = NULL;
+
+    if (count > 1 && batch > 0 && count > batch)
+    {
+        /* known not to fit; send batches of the largest size that does */
+        half = batch;
+        goto split;
+    }
+
+    if (!(pdu = snmp_split_pdu(request, skip, count)))
+    {
+        strlcpy(err_str, "could not split the request", STR_BUF_SIZE);
+        PyErr_SetString(EasySNMPError, err_str);
+        return STAT_ERROR;
+    }
+    /* so that late responses to an earlier part are not mistaken for ours */
+    pdu->reqid = snmp_get_next_reqid();
+    pdu->msgid = snmp_get_next_msgid();
+
+    /* bits are only set when NOSUCHNAME varbinds are elided */
+    if (invalid_oids && retry_nosuch &&
+        !(range_invalid_oids = bitarray_calloc(count)))
+    {
+        snmp_free_pdu(pdu);
+        PyErr_NoMemory();
+        return STAT_ERROR;
+    }
+
+    status = __send_sync_pdu(session_ctx, &pdu, response, retry_nosuch,
+                             err_str, err_num, err_ind, range_invalid_oids);
+
+    if (range_invalid_oids)
+    {
+        for (i = 0; i < count; i++)
+        {
+            if (bitarray_test_bit(range_invalid_oids, i))
+            {
+                bitarray_set_bit(invalid_oids, skip + i);
+            }
+        }
+        bitarray_free(range_invalid_oids);
+    }
+
+    if (status == 0 && *response &&
+        (*response)->errstat != SNMP_ERR_NOERROR)
+    {
+        /*
+         * Every varbind was elided by retry_nosuch; the response still
+         * carries them, which would be mistaken for the next part's.
+         */
+        snmp_free_varbind((*response)->variables);
+        (*response)->variables = NULL;
+    }
+
+    if (status == 0 || count < 2 || !*response ||
+        (*response)->errstat != SNMP_ERR_TOOBIG)
+    {
+        return status;
+    }
+
+    PyErr_Clear();
+    snmp_free_pdu(*response);
+    *response = NULL;
+
+    half = (count + 1) / 2;
+    if (!batch || half < batch)
+    {
+        session_ctx->max_batch_varbinds = half;
+    }
+    py_log_msg(DEBUG, "sync PDU: tooBig, splitting %d varbinds", count);
+
+split:
+    status = __send_sync_pdu_range(session_ctx, request, skip, half, response,
+                                   retry_nosuch, err_str, err_num, err_ind,
+                                   invalid_oids);
+    if (status != 0)
+    {
+        return status;
+    }
+
+    status = __send_sync_pdu_range(session_ctx, request, skip + half,
+                                   count - half, &tail, retry_nosuch,
+                                   err_str, err_num, err_ind, invalid_oids);
+    if (status != 0 || !*response)
+    {
+        /* report the response to the part which failed, if any */
+        if (*response)
+        {
+            snmp_free_pdu(*response);
+        }
+        *response = tail;
+        return status;
+    }
+
+    if (tail)
+    {
+        if (!(vars = (*response)->variables))
+        {
+            (*response)->variables = tail->variables;
+        }
+        else
+        {
+            while (vars->next_variable)
+            {
+                vars = vars->next_variable;
+            }
+            vars->next_variable = tail->variables;
+        }
+        tail->variables = NULL;
+        snmp_free_pdu(tail);
+    }
+
+    return status;
+}
+
+/*
+ * Sends a request like __send_sync_pdu(), recovering from tooBig errors
+ * rather than failing.
+ *
+ * GET and GETNEXT requests are bisected (see __send_sync_pdu_range()).
+ * GETBULK requests are resent with half the max-repetitions instead, as
+ * splitting their varbinds would change the meaning of non-repeaters; this
+ * is the same as an agent truncating its response to fit. SET requests are
+ * never split since the parts would no longer be applied atomically.
+ */
+static int __send_sync_pdu_split(struct session_capsule_ctx *session_ctx,
+                                 netsnmp_pdu **pdu, netsnmp_pdu **response,
+                                 int retry_nosuch, char *err_str,
+                                 int *err_num, int *err_ind,
+                                 bitarray *invalid_oids)
+{
+    netsnmp_pdu *retry_pdu = NULL;
+    netsnmp_variable_list *vars;
+    int count = 0;
+    int status;
+
+    for (vars = (*pdu)->variables; vars; vars = vars->next_variable)
+    {
+        count++;
+    }
+
+    if (((*pdu)->command == SNMP_MSG_GET ||
+         (*pdu)->command == SNMP_MSG_GETNEXT) &&
+        count > 1)
+    {
+        status = __send_sync_pdu_range(session_ctx, *pdu, 0, count, response,
+                                       retry_nosuch, err_str, err_num,
+                                       err_ind, invalid_oids);
+        snmp_free_pdu(*pdu);
+        *pdu = NULL;
+        return status;
+    }
+
+    for (;;)
+    {
+        if ((*pdu)->command == SNMP_MSG_GETBULK &&
+            (*pdu)->max_repetitions > 1)
+        {
+            retry_pdu = snmp_clone_pdu(*pdu);
+        }
+
+        status = __send_sync_pdu(session_ctx, pdu, response,
+                                 retry_nosuch, err_str, err_num, err_ind,
+                                 invalid_oids);
+
+        if (status == 0 || !retry_pdu || !*response ||
+            (*response)->errstat != SNMP_ERR_TOOBIG)
+        {
+            break;
+        }
+
+        PyErr_Clear();
+        snmp_free_pdu(*response);
+        *response = NULL;
+
+        *pdu = retry_pdu;
+        retry_pdu = NULL;
+        (*pdu)->max_repetitions /= 2;
+        (*pdu)->reqid = snmp_get_next_reqid();
+        (*pdu)->msgid = snmp_get_next_msgid();
+        py_log_msg(DEBUG, "sync PDU: tooBig, retrying with %ld repetitions",
+                   (*pdu)->max_repetitions);
+    }
+
+    if (retry_pdu)
+    {
+        snmp_free_pdu(retry_pdu);
+    }
+
+    return status;
+}
+
+/*
+ * Clears v3 user credentials from the local cache
+ */
+static void __remove_user_from_cache(struct session_list *ss)
+{
+    struct usmUser *actUser = usm_get_userList();
+    while (actUser != NULL)
+    {
+        struct usmUser *dummy = actUser;
+        if (
+            strcmp((const char *)dummy->secName, (const char *)ss->session->securityName) == 0 &&
+            strcmp((const char *)dummy->engineID, (const char *)ss->session->contextEngineID) == 0)
         {
             usm_remove_user(actUser);
             actUser->next = NULL;
@@ -1405,9 +2198,141 @@ static void __remove_user_from_cache(struct session_list *ss)
     }
 }
 
+/*
+ * Creates an empty SNMPVariable. The instance is allocated directly via
+ * tp_new and its slots are left unset, so the caller must fill every
+ * attribute (see py_netsnmp_fill_varbind()).
+ */
 static PyObject *py_netsnmp_construct_varbind(void)
 {
-    return PyObject_CallMethod(easysnmp_import, "SNMPVariable", NULL);
+    PyTypeObject *type = (PyTypeObject *)SNMPVariableType;
+
+    return type->tp_new(type, empty_tuple, NULL);
+}
+
+/*
+ * Sets a string attribute on a varbind. Values coming from the library
+ * are already text, so for plain SNMPVariable instances the slot is
+ * written directly, skipping the tostr() conversion in __setattr__.
+ */
+static int py_netsnmp_varbind_set_string(PyObject *varbind,
+                                         PyObject *attr_name, char *val,
+                                         size_t len)
+{
+    int ret;
+    PyObject *val_obj = PyUnicode_Decode(val, len, "latin-1",
+                                         "surrogateescape");
+    if (!val_obj)
+    {
+        return -1;
+    }
+
+    ret = py_netsnmp_varbind_set_object(varbind, attr_name, val_obj);
+    Py_DECREF(val_obj);
+    return ret;
+}
+
+/*
+ * Sets an attribute on a varbind to an object which is already of the
+ * type it is reported as, bypassing __setattr__ for plain SNMPVariable
+ * instances.
+ */
+static int py_netsnmp_varbind_set_object(PyObject *varbind,
+                                         PyObject *attr_name,
+                                         PyObject *val_obj)
+{
+    if (Py_TYPE(varbind) == (PyTypeObject *)SNMPVariableType)
+    {
+        return PyObject_GenericSetAttr(varbind, attr_name, val_obj);
+    }
+    return PyObject_SetAttr(varbind, attr_name, val_obj);
+}
+
+/*
+ * Returns a new reference to the value of a response variable binding as
+ * a native Python object: an int for integer, counter, gauge and timeticks
+ * values, 4 bytes for an IpAddress and a tuple of ints for an OBJECT
+ * IDENTIFIER. Returns NULL without an exception set for other types.
+ */
+static PyObject *py_netsnmp_typed_value(netsnmp_variable_list *vars)
+{
+    uint64_t counter64;
+
+    if (!vars->val.string)
+    {
+        return NULL;
+    }
+
+    switch (vars->type)
+    {
+    case ASN_INTEGER:
+        return PyLong_FromLong(*vars->val.integer);
+    case ASN_COUNTER:
+    case ASN_GAUGE:
+    case ASN_TIMETICKS:
+    case ASN_UINTEGER:
+        return PyLong_FromUnsignedLong((u_long)*vars->val.integer);
+    case ASN_COUNTER64:
+        counter64 = ((uint64_t)vars->val.counter64->high << 32) |
+                    (uint64_t)(vars->val.counter64->low & 0xffffffff);
+        return PyLong_FromUnsignedLongLong(counter64);
+    case ASN_IPADDRESS:
+        return PyBytes_FromStringAndSize((char *)vars->val.string,
+                                         vars->val_len);
+    case ASN_OBJECT_ID:
+        return py_netsnmp_oid_tuple(vars->val.objid,
+                                    vars->val_len / sizeof(oid));
+    default:
+        return NULL;
+    }
+}
+
+/*
+ * Sets the value of a varbind from a response variable binding. With
+ * VALUE_TYPED set in sprintval_flag, numeric, IpAddress and OBJECT
+ * IDENTIFIER values are built as native objects (see
+ * py_netsnmp_typed_value()), and with VALUE_BYTES set, OCTETSTR and Opaque
+ * values are copied straight from the PDU into bytes; every other value is
+ * formatted as text by __snprint_value().
+ */
+static int py_netsnmp_varbind_set_value(PyObject *varbind,
+                                        netsnmp_variable_list *vars,
+                                        struct tree *tp, int type,
+                                        int sprintval_flag, int format,
+                                        u_char *str_buf, size_t str_buf_size)
+{
+    PyObject *val_obj = NULL;
+    int ret;
+    int len;
+
+    if (sprintval_flag & VALUE_TYPED)
+    {
+        val_obj = py_netsnmp_typed_value(vars);
+    }
+    if (!val_obj && !PyErr_Occurred() && (sprintval_flag & VALUE_BYTES) &&
+        (vars->type == ASN_OCTET_STR || vars->type == ASN_OPAQUE))
+    {
+        val_obj = PyBytes_FromStringAndSize((char *)vars->val.string,
+                                            vars->val_len);
+    }
+
+    if (val_obj)
+    {
+        ret = py_netsnmp_varbind_set_object(varbind, py_str_value, val_obj);
+        Py_DECREF(val_obj);
+        return ret;
+    }
+    if (PyErr_Occurred())
+    {
+        return -1;
+    }
+
+    len = __snprint_value((char *)str_buf, str_buf_size - 1, vars, tp, type,
+                          sprintval_flag, format);
+    str_buf[len] = '\0';
+
+    return py_netsnmp_varbind_set_string(varbind, py_str_value,
+                                         (char *)str_buf, len);
 }
 
 /*
@@ -1470,7 +2395,17 @@ static int py_netsnmp_attr_set_string(PyObject *obj, char *attr_name,
                                       char *val, size_t len)
 {
     int ret = -1;
-    if (obj && attr_name)
+    if (obj && attr_name && Py_TYPE(obj) == (PyTypeObject *)SNMPVariableType)
+    {
+        PyObject *attr_name_obj = PyUnicode_InternFromString(attr_name);
+        if (!attr_name_obj)
+        {
+            return -1;
+        }
+        ret = py_netsnmp_varbind_set_string(obj, attr_name_obj, val, len);
+        Py_DECREF(attr_name_obj);
+    }
+    else if (obj && attr_name)
     {
         PyObject *val_obj = PyUnicode_Decode(val, len, "latin-1",
                                              "surrogateescape");
@@ -1543,830 +2478,2575 @@ done:
 }
 
 /*
- * Returns a new reference to a python capsule object containing
- * a newly allocated session_capsule_ctx.
+ * Translates the oid and oid_index attributes of an SNMPVariable into a
+ * numeric OID. oid_arr must hold at least MAX_OID_LEN sub-identifiers.
  *
- * This function will raise an exception on failure.
+ * Returns 0 on success or -1 with an exception set.
  */
-static PyObject *create_session_capsule(SnmpSession *session)
+static int __py_netsnmp_varbind_oid(PyObject *varbind, oid *oid_arr,
+                                    size_t *oid_arr_len, int best_guess,
+                                    struct tag2oid_cache *cache)
 {
-    void *handle = NULL;
-    struct session_capsule_ctx *ctx = NULL;
-    PyObject *capsule = NULL;
-    /* create a long lived handle from throwaway session object */
-    if (!(handle = snmp_sess_open(session)))
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    char *tag = NULL;
+    char *iid = NULL;
+
+    *oid_arr_len = 0;
+    if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) >= 0 &&
+        py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) >= 0)
     {
-        PyErr_SetString(EasySNMPConnectionError,
-                        "couldn't create SNMP handle");
-        goto done;
+        __cached_tag2oid(cache, tag, iid, oid_arr, oid_arr_len, NULL,
+                         best_guess);
     }
-    /*
-     * We have to free these here because we allocated the memory and `snmp_sess_open`
-     * does not use our instance. In fact, it creates a carbon copy. The call is as follows:
-     * snmp_sess_open -> _sess_open -> snmp_sess_add -> snmp_sess_add_ex -> snmp_sess_copy -> _sess_copy
-     */
-    if (!(ctx = malloc(sizeof *ctx)))
+
+    if (!*oid_arr_len)
     {
-        PyErr_SetString(PyExc_RuntimeError,
-                        "could not malloc() session_capsule_ctx");
-        goto done;
+        PyErr_Format(EasySNMPUnknownObjectIDError,
+                     "unknown object id (%s)",
+                     (tag ? tag : "<null>"));
     }
-    /*
-     * Create a capsule containing the ctx pointer with an "anonymous" name,
-     * which is automatically destroyed by delete_session_capsule() when
-     * no more references to the object are held.
-     */
-    if (!(capsule = PyCapsule_New(ctx, NULL, delete_session_capsule)))
+
+    Py_XDECREF(tag_bytes);
+    Py_XDECREF(iid_bytes);
+    return *oid_arr_len ? 0 : -1;
+}
+
+/*
+ * Resolves the oid and oid_index of every SNMPVariable in varlist and
+ * appends them to pdu as null variable bindings.
+ *
+ * Returns the number of variable bindings added, or -1 with an exception
+ * set if an OID could not be resolved.
+ */
+static int __py_netsnmp_add_varlist(netsnmp_pdu *pdu, PyObject *varlist,
+                                    int best_guess,
+                                    struct tag2oid_cache *cache)
+{
+    PyObject *varlist_iter = NULL;
+    PyObject *varbind = NULL;
+    oid oid_arr[MAX_OID_LEN];
+    size_t oid_arr_len = 0;
+    int varlist_len = 0;
+
+    if (!(varlist_iter = PyObject_GetIter(varlist)))
     {
-        PyErr_SetString(PyExc_RuntimeError,
-                        "failed to create Python Capsule object");
-        goto done;
+        return -1;
     }
-    free(session->securityEngineID);
-    free(session->contextEngineID);
-    /* init session context variables */
-    ctx->handle = handle;
-    ctx->invalid_oids = (bitarray *)ctx->invalid_oids_buf;
-    bitarray_buf_init(ctx->invalid_oids, sizeof(ctx->invalid_oids_buf));
-    return capsule;
-done:
-    if (handle)
+
+    while ((varbind = PyIter_Next(varlist_iter)))
     {
-        snmp_sess_close(handle);
+        if (__py_netsnmp_varbind_oid(varbind, oid_arr, &oid_arr_len,
+                                     best_guess, cache) < 0)
+        {
+            Py_DECREF(varbind);
+            Py_DECREF(varlist_iter);
+            return -1;
+        }
+
+        snmp_add_null_var(pdu, oid_arr, oid_arr_len);
+        varlist_len++;
+
+        /* release reference when done */
+        Py_DECREF(varbind);
     }
-    if (ctx)
+
+    Py_DECREF(varlist_iter);
+
+    if (PyErr_Occurred())
     {
-        free(ctx);
+        return -1;
     }
-    free(session->securityEngineID);
-    free(session->contextEngineID);
-    Py_XDECREF(capsule);
-    return NULL;
+    return varlist_len;
 }
 
-static void *get_session_handle_from_capsule(PyObject *session_capsule)
+/*
+ * Resolves the SNMPVariable objects of start, one for each OID being
+ * walked, into the OIDs a resumed walk continues after.
+ *
+ * Returns 0 on success, or -1 with an exception set.
+ */
+static int __walk_start_oids(PyObject *start, int count, oid **start_arr,
+                             size_t *start_arr_len, int best_guess,
+                             struct tag2oid_cache *cache)
 {
-    if (!session_capsule)
+    PyObject *varbind = NULL;
+    int ind;
+    int rc;
+
+    if (PySequence_Length(start) != count)
     {
-        PyErr_SetString(PyExc_RuntimeError,
-                        "NULL arg calling get_session_handle_from_capsule");
-        return NULL;
+        if (!PyErr_Occurred())
+        {
+            PyErr_SetString(PyExc_ValueError,
+                            "resume_from must hold one OID for each walked OID");
+        }
+        return -1;
     }
-    /* raises exception on failure. */
-    return PyCapsule_GetPointer(session_capsule, NULL);
-}
 
-#ifdef USE_DEPRECATED_COBJECT_API
-/* The CObject API calls destructor with stored pointer */
-static void delete_session_capsule(void *session_ptr)
-{
-    struct session_capsule_ctx *ctx = session_ptr;
-    if (ctx)
+    for (ind = 0; ind < count; ind++)
     {
-        // clear_user_list(); // Too dangerous, may disrupt other valid sessions
-        __remove_user_from_cache((struct session_list *)ctx->handle);
-        snmp_sess_close(ctx->handle);
-        free(ctx);
+        if (!(varbind = PySequence_GetItem(start, ind)))
+        {
+            return -1;
+        }
+        rc = __py_netsnmp_varbind_oid(varbind, start_arr[ind],
+                                      &start_arr_len[ind], best_guess, cache);
+        Py_DECREF(varbind);
+        if (rc < 0)
+        {
+            return -1;
+        }
     }
+    return 0;
 }
-#else
-/* Automatically called when Python reclaims session_capsule object. */
-static void delete_session_capsule(PyObject *session_capsule)
+
+/*
+ * Replaces the contents of the list cursor with the last OID received for
+ * each OID being walked, as tuples of integers. Any pending exception is
+ * preserved so this may be called while a walk is failing.
+ */
+static void __walk_store_cursor(PyObject *cursor, oid **names,
+                                size_t *name_lens, int count)
 {
-    /* PyCapsule_GetPointer will raise an exception if it fails. */
-    struct session_capsule_ctx *ctx = PyCapsule_GetPointer(session_capsule, NULL);
-    if (ctx)
+    PyObject *exc_type, *exc_value, *exc_tb;
+    PyObject *name;
+    int ind;
+
+    if (cursor == Py_None || !names)
     {
-        // clear_user_list(); // Too dangerous, may disrupt other valid sessions
-        __remove_user_from_cache((struct session_list *)ctx->handle);
-        snmp_sess_close(ctx->handle);
-        free(ctx);
+        return;
+    }
+
+    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+    if (PySequence_DelSlice(cursor, 0, PySequence_Length(cursor)) == 0)
+    {
+        for (ind = 0; ind < count; ind++)
+        {
+            if (!(name = py_netsnmp_oid_tuple(names[ind], name_lens[ind])))
+            {
+                break;
+            }
+            PyList_Append(cursor, name);
+            Py_DECREF(name);
+        }
     }
+    PyErr_Clear();
+    PyErr_Restore(exc_type, exc_value, exc_tb);
 }
-#endif /* USE_DEPRECATED_COBJECT_API */
 
-static PyObject *netsnmp_create_session(PyObject *self, PyObject *args)
+/*
+ * Returns whether every index of the table a column belongs to is rendered
+ * by Net-SNMP as a plain number, so that the instance part of its OIDs may
+ * be formatted without consulting the MIB. Scalars have no indexes.
+ */
+static int __has_numeric_index(struct tree *tp)
 {
-    int version;
-    char *community;
-    char *peer;
-    int lport;
-    int retries;
-    int timeout;
-    SnmpSession session = {0};
+    struct tree *entry = tp->parent;
+    struct tree *itp = NULL;
+    struct index_list *index = NULL;
 
-    if (!PyArg_ParseTuple(args, "issiii", &version, &community, &peer, &lport,
-                          &retries, &timeout))
+    if (!entry)
     {
-        goto done;
+        return 1;
+    }
+    if (entry->augments)
+    {
+        return 0;
     }
 
-    snmp_sess_init(&session);
+    for (index = entry->indexes; index; index = index->next)
+    {
+        if (!(itp = find_node(index->ilabel, get_tree_head())))
+        {
+            return 0;
+        }
 
-    session.version = -1;
-#ifndef DISABLE_SNMPV1
-    if (version == 1)
+        switch (itp->type)
+        {
+        case TYPE_INTEGER:
+        case TYPE_INTEGER32:
+            /* enumerated indexes may be rendered by name */
+            if (itp->enums)
+            {
+                return 0;
+            }
+            break;
+        case TYPE_UNSIGNED32:
+        case TYPE_UINTEGER:
+        case TYPE_GAUGE:
+        case TYPE_COUNTER:
+        case TYPE_TIMETICKS:
+            break;
+        default:
+            return 0;
+        }
+    }
+    return 1;
+}
+
+/*
+ * Formats name as a dotted-decimal string into buf, with a leading '.'
+ * when lead_dot is set. Returns the length of the string or -1 if buf is
+ * too small.
+ */
+static int __sprint_num_oid(char *buf, size_t buf_size, const oid *name,
+                            size_t name_len, int lead_dot)
+{
+    size_t len = 0;
+    size_t ind;
+    int ret;
+
+    if (!buf_size)
     {
-        session.version = SNMP_VERSION_1;
+        return -1;
     }
-#endif
-#ifndef DISABLE_SNMPV2C
-    if (version == 2)
+    buf[0] = '\0';
+
+    for (ind = 0; ind < name_len; ind++)
     {
-        session.version = SNMP_VERSION_2c;
+        ret = snprintf(buf + len, buf_size - len,
+                       (ind || lead_dot) ? ".%lu" : "%lu",
+                       (unsigned long)name[ind]);
+        if (ret < 0 || (size_t)ret >= buf_size - len)
+        {
+            return -1;
+        }
+        len += ret;
     }
-#endif
-    if (version == 3)
+    return (int)len;
+}
+
+/*
+ * Returns the NETSNMP_DS_LIB_OID_OUTPUT_FORMAT selected by the naming
+ * flags of a session.
+ */
+static int __oid_output_format(int getlabel_flag)
+{
+    if (getlabel_flag & USE_NUMERIC_OIDS)
     {
-        session.version = SNMP_VERSION_3;
+        return NETSNMP_OID_OUTPUT_NUMERIC;
     }
-    if (session.version == -1)
+    if (getlabel_flag & USE_LONG_NAMES)
     {
-        PyErr_Format(PyExc_ValueError, "unsupported SNMP version (%d)",
-                     version);
-        goto done;
+        return NETSNMP_OID_OUTPUT_FULL;
     }
-
-    session.community_len = STRLEN((char *)community);
-    session.community = (u_char *)community;
-    session.peername = peer;
-    session.local_port = lport;
-    session.retries = retries; /* 5 */
-    session.timeout = timeout; /* 1000000L */
-    session.authenticator = NULL;
-
-    return create_session_capsule(&session);
-
-done:
-    return NULL;
+    return NETSNMP_OID_OUTPUT_SUFFIX;
 }
 
-static PyObject *netsnmp_create_session_v3(PyObject *self, PyObject *args)
+/*
+ * Formats objid into buf in the given NETSNMP_DS_LIB_OID_OUTPUT_FORMAT.
+ *
+ * The library-wide format is set to NETSNMP_OID_OUTPUT_SUFFIX once by
+ * __libraries_init() and never changed, so that sessions with different
+ * naming options may format OIDs at the same time: numeric OIDs are
+ * formatted here and full OIDs are the suffix rendered by Net-SNMP with
+ * the labels of the ancestors of its node prepended, exactly as Net-SNMP
+ * builds them.
+ *
+ * Returns the deepest MIB tree node matching objid.
+ */
+static struct tree *__sprint_objid(char *buf, size_t buf_size,
+                                   const oid *objid, size_t objid_len,
+                                   int format)
 {
-    int version;
-    char *peer;
-    int lport;
-    int retries;
-    int timeout;
-    char *sec_name;
-    int sec_level;
-    char *sec_eng_id;
-    char *context_eng_id;
-    char *context;
-    char *auth_proto;
-    char *auth_pass;
-    char *priv_proto;
-    char *priv_pass;
-    int eng_boots;
-    int eng_time;
-    SnmpSession session = {0};
+    u_char *bufp = (u_char *)buf;
+    size_t buf_len = buf_size;
+    size_t out_len = 0;
+    size_t prefix_len = 1;
+    size_t suffix_len;
+    size_t label_len;
+    int buf_over = 0;
+    struct tree *tp = NULL;
+    struct tree *node = NULL;
 
-    if (!PyArg_ParseTuple(args, "isiiisisssssssii", &version,
-                          &peer, &lport, &retries, &timeout,
-                          &sec_name, &sec_level, &sec_eng_id,
-                          &context_eng_id, &context,
-                          &auth_proto, &auth_pass,
-                          &priv_proto, &priv_pass,
-                          &eng_boots, &eng_time))
+    if (format == NETSNMP_OID_OUTPUT_NUMERIC)
     {
-        return NULL;
+        __sprint_num_oid(buf, buf_size, objid, objid_len, 1);
+        return get_tree(objid, objid_len, get_tree_head());
     }
 
-    snmp_sess_init(&session);
+    buf[0] = '.';
+    buf[1] = '\0';
+    tp = netsnmp_sprint_realloc_objid_tree(&bufp, &buf_len, &out_len, 0,
+                                           &buf_over, objid, objid_len);
+    buf[buf_size - 1] = '\0';
 
-    if (version == 3)
+    if (format != NETSNMP_OID_OUTPUT_FULL)
     {
-        session.version = SNMP_VERSION_3;
+        return tp;
     }
-    else
+
+    for (node = tp ? tp->parent : NULL; node; node = node->parent)
     {
-        PyErr_Format(PyExc_ValueError, "unsupported SNMP version (%d)",
-                     version);
-        goto done;
+        prefix_len += strlen(node->label) + 1;
+    }
+    if (prefix_len >= buf_size)
+    {
+        return tp;
     }
 
-    session.peername = peer;
-    session.retries = retries; /* 5 */
-    session.timeout = timeout; /* 1000000L */
-    session.authenticator = NULL;
-    session.contextNameLen = STRLEN(context);
-    session.contextName = context;
-    session.securityNameLen = STRLEN(sec_name);
-    session.securityName = sec_name;
-    session.securityLevel = sec_level;
-    session.securityModel = USM_SEC_MODEL_NUMBER;
-    session.securityEngineIDLen =
-        hex_to_binary2((unsigned char *)sec_eng_id, STRLEN(sec_eng_id),
-                       (char **)&session.securityEngineID);
-    session.contextEngineIDLen =
-        hex_to_binary2((unsigned char *)context_eng_id, STRLEN(context_eng_id),
-                       (char **)&session.contextEngineID);
-    session.engineBoots = eng_boots;
-    session.engineTime = eng_time;
-    if (__match_algo(1, auth_proto, &session.securityAuthProto,
-                     &session.securityAuthProtoLen) != 0)
+    suffix_len = strlen(buf);
+    if (prefix_len + suffix_len >= buf_size)
     {
-        PyErr_Format(PyExc_ValueError,
-                     "unsupported authentication protocol (%s)", auth_proto);
-        goto done;
+        suffix_len = buf_size - prefix_len - 1;
     }
-    if (session.securityLevel >= SNMP_SEC_LEVEL_AUTHNOPRIV)
+    memmove(buf + prefix_len, buf, suffix_len);
+    buf[prefix_len + suffix_len] = '\0';
+
+    /* fill in the labels backwards from the parent of tp to the root */
+    buf[--prefix_len] = '.';
+    for (node = tp ? tp->parent : NULL; node; node = node->parent)
     {
-        if (STRLEN(auth_pass) > 0)
-        {
-            session.securityAuthKeyLen = USM_AUTH_KU_LEN;
-            if (generate_Ku(session.securityAuthProto,
-                            session.securityAuthProtoLen,
-                            (u_char *)auth_pass, STRLEN(auth_pass),
-                            session.securityAuthKey,
-                            &session.securityAuthKeyLen) != SNMPERR_SUCCESS)
-            {
-                PyErr_SetString(EasySNMPConnectionError,
-                                "error generating Ku from authentication "
-                                "password");
-                goto done;
-            }
-        }
+        label_len = strlen(node->label);
+        prefix_len -= label_len;
+        memcpy(buf + prefix_len, node->label, label_len);
+        buf[--prefix_len] = '.';
     }
-    if (__match_algo(0, priv_proto, &session.securityPrivProto,
-                     &session.securityPrivProtoLen) != 0)
+
+    return tp;
+}
+
+/*
+ * Formats the label and instance of name using a cache entry into buf
+ * rather than rendering the whole name through the MIB. tag and iid point
+ * into buf afterwards.
+ *
+ * Returns 0 on success or -1 if name cannot be formatted from the entry.
+ */
+static int __format_cached_label(struct label_cache_entry *entry,
+                                 const oid *name, size_t name_len,
+                                 char *buf, size_t buf_size, char **tag,
+                                 char **iid)
+{
+    size_t label_len;
+    int len;
+
+    /* leave instance-less names to Net-SNMP */
+    if (name_len <= entry->prefix_len)
     {
-        PyErr_Format(PyExc_ValueError,
-                     "unsupported privacy protocol (%s)", priv_proto);
-        goto done;
+        return -1;
     }
 
-    if (session.securityLevel >= SNMP_SEC_LEVEL_AUTHPRIV)
+    if (entry->getlabel_flag & USE_NUMERIC_OIDS)
     {
-        session.securityPrivKeyLen = USM_PRIV_KU_LEN;
-        if (generate_Ku(session.securityAuthProto,
-                        session.securityAuthProtoLen,
-                        (u_char *)priv_pass, STRLEN(priv_pass),
-                        session.securityPrivKey,
-                        &session.securityPrivKeyLen) != SNMPERR_SUCCESS)
+        /* numeric labels split off the last sub-identifier as the index */
+        if ((len = __sprint_num_oid(buf, buf_size, name, name_len - 1, 1)) < 0 ||
+            (size_t)len + 1 >= buf_size ||
+            __sprint_num_oid(buf + len + 1, buf_size - len - 1,
+                             name + name_len - 1, 1, 0) < 0)
         {
-            PyErr_SetString(EasySNMPConnectionError,
-                            "couldn't gen Ku from priv pass phrase");
-            goto done;
+            return -1;
         }
+        *tag = buf;
+        *iid = buf + len + 1;
+        return 0;
     }
-    return create_session_capsule(&session);
 
-done:
-    SAFE_FREE(session.securityEngineID);
-    SAFE_FREE(session.contextEngineID);
+    label_len = strlen(entry->label);
+    if (label_len + 1 >= buf_size)
+    {
+        return -1;
+    }
+    memcpy(buf, entry->label, label_len + 1);
 
-    return NULL;
+    if (__sprint_num_oid(buf + label_len + 1, buf_size - label_len - 1,
+                         name + entry->prefix_len,
+                         name_len - entry->prefix_len, 0) < 0)
+    {
+        return -1;
+    }
+    *tag = buf;
+    *iid = buf + label_len + 1;
+    return 0;
 }
 
-static PyObject *netsnmp_create_session_tunneled(PyObject *self,
-                                                 PyObject *args)
+/*
+ * Returns the cache entry whose object name prefixes name when rendered
+ * with the given label flags and output format, or NULL.
+ */
+static struct label_cache_entry *__label_cache_find(struct label_cache *labels,
+                                                    const oid *name,
+                                                    size_t name_len,
+                                                    int getlabel_flag,
+                                                    int format)
 {
-    int version;
-    char *peer;
-    int lport;
-    int retries;
-    int timeout;
-    char *sec_name;
-    int sec_level;
-    char *context_eng_id;
-    char *context;
-    char *our_identity;
-    char *their_identity;
-    char *their_hostname;
-    char *trust_cert;
-    SnmpSession session = {0};
+    struct label_cache_entry *entry = NULL;
+    int count;
+    int ind;
 
-    if (!PyArg_ParseTuple(args, "isiiisissssss", &version,
-                          &peer, &lport, &retries, &timeout,
-                          &sec_name, &sec_level,
-                          &context_eng_id, &context,
-                          &our_identity, &their_identity,
-                          &their_hostname, &trust_cert))
-    {
-        goto done;
-    }
-
-    if (version != 3)
+    if (labels->tree_head != get_tree_head())
     {
-        PyErr_SetString(PyExc_ValueError,
-                        "you must use SNMP version 3 as it's the only "
-                        "version that supports tunneling");
-        goto done;
+        labels->size = labels->last = labels->victim = 0;
+        labels->tree_head = get_tree_head();
     }
 
-    snmp_sess_init(&session);
-
-    session.peername = peer;
-    session.retries = retries; /* 5 */
-    session.timeout = timeout; /* 1000000L */
-    session.contextNameLen = STRLEN(context);
-    session.contextName = context;
-    session.securityNameLen = STRLEN(sec_name);
-    session.securityName = sec_name;
-    session.securityLevel = sec_level;
-    session.securityModel = NETSNMP_TSM_SECURITY_MODEL;
-
-    /* create the transport configuration store */
-    if (!session.transport_configuration)
+    /* start from the last entry used as walks return a column at a time */
+    for (count = 0, ind = labels->last; count < labels->size;
+         count++, ind = (ind + 1) % labels->size)
     {
-        netsnmp_container_init_list();
-        session.transport_configuration =
-            netsnmp_container_find("transport_configuration:fifo");
-        if (!session.transport_configuration)
+        entry = &labels->entries[ind];
+        if (entry->getlabel_flag == getlabel_flag &&
+            entry->format == format && entry->prefix_len <= name_len &&
+            !memcmp(entry->prefix, name, entry->prefix_len * sizeof(oid)))
         {
-            py_log_msg(ERROR, "failed to initialize the transport "
-                              "configuration container");
-            goto done;
+            labels->last = ind;
+            return entry;
         }
-
-        session.transport_configuration->compare =
-            (netsnmp_container_compare *)netsnmp_transport_config_compare;
     }
-
-    if (our_identity && our_identity[0] != '\0')
-        CONTAINER_INSERT(session.transport_configuration,
-                         netsnmp_transport_create_config("localCert",
-                                                         our_identity));
-
-    if (their_identity && their_identity[0] != '\0')
-        CONTAINER_INSERT(session.transport_configuration,
-                         netsnmp_transport_create_config("peerCert",
-                                                         their_identity));
-
-    if (their_hostname && their_hostname[0] != '\0')
-        CONTAINER_INSERT(session.transport_configuration,
-                         netsnmp_transport_create_config("their_hostname",
-                                                         their_hostname));
-
-    if (trust_cert && trust_cert[0] != '\0')
-        CONTAINER_INSERT(session.transport_configuration,
-                         netsnmp_transport_create_config("trust_cert",
-                                                         trust_cert));
-    return create_session_capsule(&session);
-
-done:
     return NULL;
 }
 
-static PyObject *netsnmp_get(PyObject *self, PyObject *args)
+/*
+ * Remembers how the name of a leaf object is rendered once a variable
+ * binding below it has been labelled by Net-SNMP. Only objects whose
+ * instances are always formatted as plain numbers are cached and the
+ * result of formatting from the cache must match Net-SNMP's exactly.
+ */
+static void __label_cache_learn(struct label_cache *labels, const oid *name,
+                                size_t name_len, struct tree *tp,
+                                int getlabel_flag, int format,
+                                const char *tag, const char *iid)
 {
-    PyObject *session = NULL;
-    PyObject *varlist = NULL;
-    PyObject *varbind = NULL;
-    PyObject *varlist_iter = NULL;
-    PyObject *err_bytes = NULL;
-    PyObject *tag_bytes = NULL;
-    PyObject *iid_bytes = NULL;
-    int varlist_len = 0;
-    int varlist_ind;
-
-    /* variables associated for session_ctx (can be condensed into a macro) */
-    PyObject *sess_ptr = NULL;
-    struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss = NULL;
-    oid *oid_arr = NULL;
-    size_t oid_arr_len = 0;
-    u_char *str_buf = NULL;
-    u_char *str_bufp = NULL;
-    char *err_str = NULL;
-    bitarray *invalid_oids = NULL;
-
-    netsnmp_pdu *pdu = NULL;
-    netsnmp_pdu *response = NULL;
-    netsnmp_variable_list *vars = NULL;
-    struct tree *tp = NULL;
-    int len;
-    int type;
-    char type_str[MAX_TYPE_NAME_LEN];
-    int status;
-    int buf_over = 0;
-    char *tag = NULL;
-    char *iid = NULL;
-    int getlabel_flag = NO_FLAGS;
-    int sprintval_flag = USE_BASIC;
-    int old_format;
-    int best_guess;
-    int retry_nosuch;
-    int err_ind;
-    int err_num;
-    char *tmpstr = NULL;
-    Py_ssize_t tmplen;
-    int error = 0;
-    unsigned long snmp_version = 0;
+    struct label_cache_entry candidate;
+    struct tree *node = NULL;
+    char check_buf[MAX_LABEL_LEN + STR_BUF_SIZE];
+    char *check_tag = NULL;
+    char *check_iid = NULL;
+    size_t depth = 0;
 
-    if (!args)
+    if (!tp || tp->child_list || !__is_leaf(tp) || !tag || !iid ||
+        strlen(tag) >= MAX_LABEL_LEN || !__has_numeric_index(tp))
     {
-        const char *err_msg = "netsnmp_get: missing arguments";
-        PyErr_SetString(PyExc_ValueError, err_msg);
-        error = 1;
-        goto done;
+        return;
     }
 
-    if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
+    for (node = tp; node; node = node->parent)
     {
-        goto done;
+        depth++;
+    }
+    if (depth >= name_len)
+    {
+        return;
     }
 
-    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
-    session_ctx = get_session_handle_from_capsule(sess_ptr);
+    memcpy(candidate.prefix, name, depth * sizeof(oid));
+    candidate.prefix_len = depth;
+    candidate.getlabel_flag = getlabel_flag;
+    candidate.format = format;
+    candidate.tp = tp;
+    strcpy(candidate.label, tag);
 
-    if (!session_ctx)
+    if (__format_cached_label(&candidate, name, name_len, check_buf,
+                              sizeof(check_buf), &check_tag, &check_iid) < 0 ||
+        strcmp(check_tag, tag) || strcmp(check_iid, iid))
     {
-        goto done;
+        return;
     }
 
-    ss = session_ctx->handle;
-    invalid_oids = session_ctx->invalid_oids;
-    oid_arr = session_ctx->oid_arr;
-    str_buf = session_ctx->buf;
-    str_bufp = str_buf;
-    err_str = session_ctx->err_str;
+    if (labels->size < LABEL_CACHE_SIZE)
+    {
+        labels->last = labels->size++;
+    }
+    else
+    {
+        labels->last = labels->victim;
+        labels->victim = (labels->victim + 1) % LABEL_CACHE_SIZE;
+    }
+    labels->entries[labels->last] = candidate;
+}
 
-    snmp_version = py_netsnmp_attr_long(session, "version");
+/*
+ * Formats the name of a response variable binding into str_buf and
+ * splits it into a label and index according to getlabel_flag; tag and
+ * iid point into str_buf afterwards. When labels is given, the label of
+ * each object is rendered once and only the index is formatted for every
+ * further instance of the same object.
+ *
+ * Returns the MIB tree node for the variable.
+ */
+static struct tree *__get_varbind_label(netsnmp_variable_list *vars,
+                                        int getlabel_flag,
+                                        struct label_cache *labels,
+                                        u_char *str_buf, size_t str_buf_size,
+                                        char **tag, char **iid)
+{
+    int format = __oid_output_format(getlabel_flag);
+    struct tree *tp = NULL;
+    struct label_cache_entry *entry = NULL;
 
-    if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
+    if (labels)
     {
-        goto done;
+        entry = __label_cache_find(labels, vars->name, vars->name_length,
+                                   getlabel_flag, format);
+        if (entry &&
+            __format_cached_label(entry, vars->name, vars->name_length,
+                                  (char *)str_buf, str_buf_size, tag,
+                                  iid) == 0)
+        {
+            return entry->tp;
+        }
     }
-    if (py_netsnmp_attr_long(session, "use_long_names"))
+
+    tp = __sprint_objid((char *)str_buf, str_buf_size, vars->name,
+                        vars->name_length, format);
+
+    if (__is_leaf(tp))
     {
-        getlabel_flag |= USE_LONG_NAMES;
+        getlabel_flag &= ~NON_LEAF_NAME;
     }
-    if (py_netsnmp_attr_long(session, "use_numeric"))
+    else
     {
-        getlabel_flag |= USE_NUMERIC_OIDS;
+        getlabel_flag |= NON_LEAF_NAME;
     }
-    if (py_netsnmp_attr_long(session, "use_enums"))
+
+    *tag = *iid = NULL;
+    __get_label_iid((char *)str_buf, tag, iid, getlabel_flag);
+
+    if (labels && !entry)
     {
-        sprintval_flag = USE_ENUMS;
+        __label_cache_learn(labels, vars->name, vars->name_length, tp,
+                            getlabel_flag, format, *tag, *iid);
     }
-    if (py_netsnmp_attr_long(session, "use_sprint_value"))
+
+    return tp;
+}
+
+/*
+ * Fills the oid, oid_index, snmp_type and value attributes of an
+ * SNMPVariable from a response variable binding.
+ *
+ * str_buf is used as scratch space for formatting the OID and value.
+ * Returns 0 on success or -1 with an exception set.
+ */
+static int py_netsnmp_fill_varbind(PyObject *varbind,
+                                   netsnmp_variable_list *vars,
+                                   int getlabel_flag, int sprintval_flag,
+                                   struct label_cache *labels,
+                                   u_char *str_buf, size_t str_buf_size)
+{
+    struct tree *tp = NULL;
+    char *tag = NULL;
+    char *iid = NULL;
+    char type_str[MAX_TYPE_NAME_LEN];
+    int type;
+
+    tp = __get_varbind_label(vars, getlabel_flag, labels, str_buf,
+                             str_buf_size, &tag, &iid);
+
+    type = __translate_asn_type(vars->type);
+
+    if (py_netsnmp_varbind_set_string(varbind, py_str_oid, tag,
+                                      STRLEN(tag)) < 0 ||
+        py_netsnmp_varbind_set_string(varbind, py_str_oid_index, iid,
+                                      STRLEN(iid)) < 0)
     {
-        sprintval_flag = USE_SPRINT_VALUE;
+        return -1;
     }
-    best_guess = py_netsnmp_attr_long(session, "best_guess");
-    retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
 
-    pdu = snmp_pdu_create(SNMP_MSG_GET);
+    __get_type_str(type, type_str, 1);
 
-    if (!varlist)
+    if (py_netsnmp_varbind_set_string(varbind, py_str_snmp_type, type_str,
+                                      strlen(type_str)) < 0)
     {
-        const char *err_msg = "unexpected error: varlist == null";
-        PyErr_SetString(PyExc_RuntimeError, err_msg);
-        error = 1;
-        goto done;
+        return -1;
     }
 
-    varlist_iter = PyObject_GetIter(varlist);
+    return py_netsnmp_varbind_set_value(varbind, vars, tp, type,
+                                        sprintval_flag,
+                                        __oid_output_format(getlabel_flag),
+                                        str_buf, str_buf_size);
+}
 
-    while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+/*
+ * Fetches the columns of an easysnmp.ColumnarResult, or the buffers of an
+ * easysnmp.LazyResult, so that rows can be appended without further
+ * attribute lookups. The sink must be released with __columnar_sink_close()
+ * even if this fails.
+ */
+static int __columnar_sink_open(PyObject *columns, struct columnar_sink *sink)
+{
+    memset(sink, 0, sizeof(*sink));
+
+    if (PyObject_HasAttrString(columns, "_raw"))
     {
-        if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
-            py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
-        {
-            oid_arr_len = 0;
-        }
-        else
+        if (!(sink->raw = PyObject_GetAttrString(columns, "_raw")) ||
+            !(sink->offsets = PyObject_GetAttrString(columns, "_offsets")) ||
+            !(sink->type_codes = PyObject_GetAttrString(columns,
+                                                        "_type_codes")))
         {
-            tp = __tag2oid(tag, iid, oid_arr, &oid_arr_len, NULL,
-                           best_guess);
+            return -1;
         }
 
-        if (oid_arr_len)
-        {
-            snmp_add_null_var(pdu, oid_arr, oid_arr_len);
-            varlist_len++;
-        }
-        else
+        if (!PyByteArray_Check(sink->raw) ||
+            !PyByteArray_Check(sink->offsets) ||
+            !PyByteArray_Check(sink->type_codes))
         {
-            PyErr_Format(EasySNMPUnknownObjectIDError,
-                         "unknown object id (%s)",
-                         (tag ? tag : "<null>"));
-            error = 1;
-            snmp_free_pdu(pdu);
-            Py_DECREF(varbind);
-            Py_DECREF(varlist_iter);
-            Py_XDECREF(tag_bytes);
-            Py_XDECREF(iid_bytes);
-            goto done;
+            PyErr_SetString(PyExc_TypeError,
+                            "columns must be an easysnmp.LazyResult");
+            return -1;
         }
-
-        /* release reference when done */
-        Py_DECREF(varbind);
-        Py_XDECREF(tag_bytes);
-        tag_bytes = NULL;
-        Py_XDECREF(iid_bytes);
-        iid_bytes = NULL;
+        return 0;
     }
 
-    Py_XDECREF(varlist_iter);
-
-    if (PyErr_Occurred())
+    if (!(sink->oids = PyObject_GetAttrString(columns, "oids")) ||
+        !(sink->oid_indexes = PyObject_GetAttrString(columns, "oid_indexes")) ||
+        !(sink->type_codes = PyObject_GetAttrString(columns, "_type_codes")) ||
+        !(sink->int_values = PyObject_GetAttrString(columns, "_int_values")) ||
+        !(sink->uint_values = PyObject_GetAttrString(columns, "_uint_values")) ||
+        !(sink->string_values = PyObject_GetAttrString(columns,
+                                                        "string_values")))
     {
-        error = 1;
-        snmp_free_pdu(pdu);
-        goto done;
+        return -1;
     }
 
-    if (snmp_version == 1)
+    if (!PyList_Check(sink->oids) || !PyList_Check(sink->oid_indexes) ||
+        !PyList_Check(sink->string_values) ||
+        !PyByteArray_Check(sink->type_codes) ||
+        !PyByteArray_Check(sink->int_values) ||
+        !PyByteArray_Check(sink->uint_values))
     {
-        bitarray_clear_bits(invalid_oids, (size_t)varlist_len);
+        PyErr_SetString(PyExc_TypeError,
+                        "columns must be an easysnmp.ColumnarResult");
+        return -1;
     }
+    return 0;
+}
 
-    status = __send_sync_pdu(ss, &pdu, &response, retry_nosuch, err_str,
-                             &err_num, &err_ind, invalid_oids);
+static void __columnar_sink_close(struct columnar_sink *sink)
+{
+    Py_XDECREF(sink->oids);
+    Py_XDECREF(sink->oid_indexes);
+    Py_XDECREF(sink->type_codes);
+    Py_XDECREF(sink->int_values);
+    Py_XDECREF(sink->uint_values);
+    Py_XDECREF(sink->string_values);
+    Py_XDECREF(sink->raw);
+    Py_XDECREF(sink->offsets);
+    memset(sink, 0, sizeof(*sink));
+}
 
-    __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
-    if (status != STAT_SUCCESS)
+static int __bytearray_append(PyObject *bytearray, const void *data,
+                              size_t len)
+{
+    Py_ssize_t size = PyByteArray_GET_SIZE(bytearray);
+
+    if (PyByteArray_Resize(bytearray, size + len) < 0)
     {
-        error = 1;
-        goto done;
+        return -1;
     }
+    memcpy(PyByteArray_AS_STRING(bytearray) + size, data, len);
+    return 0;
+}
 
-    /*
-     * Set up for numeric or full OID's, if necessary.  Save the old
-     * output format so that it can be restored when we finish -- this
-     * is a library-wide global, and has to be set/restored for each
-     * session.
-     */
-    old_format = netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID,
-                                    NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
-
-    if (py_netsnmp_attr_long(session, "use_long_names"))
+static int __py_list_append_bytes(PyObject *list, char *val, size_t len)
+{
+    int ret;
+    PyObject *val_obj = PyBytes_FromStringAndSize(val, len);
+    if (!val_obj)
     {
-        getlabel_flag |= USE_LONG_NAMES;
-
-        netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                           NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                           NETSNMP_OID_OUTPUT_FULL);
+        return -1;
     }
-    /*
-     * Setting use_numeric forces use_long_names on so check for
-     * use_numeric after use_long_names (above) to make sure the final
-     * outcome of NETSNMP_DS_LIB_OID_OUTPUT_FORMAT is
-     * NETSNMP_OID_OUTPUT_NUMERIC
-     */
-    if (py_netsnmp_attr_long(session, "use_numeric"))
-    {
-        getlabel_flag |= USE_LONG_NAMES;
-        getlabel_flag |= USE_NUMERIC_OIDS;
+    ret = PyList_Append(list, val_obj);
+    Py_DECREF(val_obj);
+    return ret;
+}
 
-        netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                           NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                           NETSNMP_OID_OUTPUT_NUMERIC);
+static int __py_list_append_string(PyObject *list, char *val, size_t len)
+{
+    int ret;
+    PyObject *val_obj = PyUnicode_Decode(val, len, "latin-1",
+                                         "surrogateescape");
+    if (!val_obj)
+    {
+        return -1;
     }
+    ret = PyList_Append(list, val_obj);
+    Py_DECREF(val_obj);
+    return ret;
+}
 
-    /*
-     * In SNMPv1 we go through the response variables only if we know
-     * the varlist_ind is not set in the invalid_oids bit array.
-     * For bits that are set, we fix the input varbind so that it
-     * indicates NOSUCHNAME. For bits that are not set, we fill in the
-     * corresponding varbind and advance.
-     *
-     * In SNMPv2/v3 we simply fill the response variables against the
-     * original input Varbind list.
-     */
-    vars = (response ? response->variables : NULL);
+/*
+ * Appends a response variable binding as a row of a columnar result.
+ *
+ * Integer types are stored in the int64 column, unsigned types (counters,
+ * gauges and timeticks) in the uint64 column and everything else is
+ * formatted as text in string_values, which holds None for numeric rows.
+ * Returns 0 on success or -1 with an exception set.
+ */
+static int py_netsnmp_append_column(struct columnar_sink *sink,
+                                    netsnmp_variable_list *vars,
+                                    int getlabel_flag, int sprintval_flag,
+                                    struct label_cache *labels,
+                                    u_char *str_buf, size_t str_buf_size)
+{
+    struct tree *tp = NULL;
+    char *tag = NULL;
+    char *iid = NULL;
+    unsigned char type_code = (unsigned char)vars->type;
+    int64_t int_value = 0;
+    uint64_t uint_value = 0;
+    int is_numeric = 1;
+    int len;
 
-    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+    tp = __get_varbind_label(vars, getlabel_flag, labels, str_buf,
+                             str_buf_size, &tag, &iid);
+
+    if (__py_list_append_string(sink->oids, tag, STRLEN(tag)) < 0 ||
+        __py_list_append_string(sink->oid_indexes, iid, STRLEN(iid)) < 0)
     {
-        int no_such_name = 0;
+        return -1;
+    }
 
-        if (snmp_version == 1)
-        {
-            if (!vars)
-            {
-                /* if no more variables in response then remaining varbinds are invalid. */
-                no_such_name = 1;
-            }
-            else if (bitarray_test_bit(invalid_oids, varlist_ind))
-            {
-                /* oid is invalid */
-                no_such_name = 1;
-            }
-        }
-        else if (!vars)
+    switch (vars->type)
+    {
+    case ASN_INTEGER:
+        int_value = vars->val.integer ? (int64_t)*vars->val.integer : 0;
+        break;
+    case ASN_COUNTER:
+    case ASN_GAUGE:
+    case ASN_TIMETICKS:
+    case ASN_UINTEGER:
+        uint_value = vars->val.integer ? (uint64_t)(u_long)*vars->val.integer
+                                       : 0;
+        break;
+    case ASN_COUNTER64:
+        if (vars->val.counter64)
         {
-            /*
-             * sanity check for snmp v2/v3: no more varbinds to inspect;
-             * this should throw an exception.
-             */
-            py_log_msg(DEBUG,
-                       "netsnmp_get: response had less vars compared to varlist");
-            break;
+            uint_value = ((uint64_t)vars->val.counter64->high << 32) |
+                         (uint64_t)(vars->val.counter64->low & 0xffffffff);
         }
+        break;
+    default:
+        is_numeric = 0;
+        break;
+    }
 
-        varbind = PySequence_GetItem(varlist, varlist_ind);
-
-        if (no_such_name)
-        {
-            if (!PyObject_HasAttrString(varbind, "oid"))
-            {
-                py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)",
-                           varlist_ind);
-                // Py_XDECREF(varbind); Double DECREF?
-            }
-
-            py_netsnmp_attr_set_string(varbind, "snmp_type", "NOSUCHNAME",
-                                       strlen("NOSUCHNAME"));
+    if (__bytearray_append(sink->type_codes, &type_code, 1) < 0 ||
+        __bytearray_append(sink->int_values, &int_value, sizeof(int_value)) < 0 ||
+        __bytearray_append(sink->uint_values, &uint_value,
+                           sizeof(uint_value)) < 0)
+    {
+        return -1;
+    }
 
-            py_netsnmp_attr_set_string(varbind, "value",
-                                       "NOSUCHNAME", strlen("NOSUCHNAME"));
+    if (is_numeric)
+    {
+        return PyList_Append(sink->string_values, Py_None);
+    }
 
-            Py_DECREF(varbind);
-        }
-        else if (PyObject_HasAttrString(varbind, "oid"))
-        {
-            size_t str_buf_len = sizeof(session_ctx->buf);
-            size_t out_len = 0;
+    if ((sprintval_flag & VALUE_BYTES) &&
+        (vars->type == ASN_OCTET_STR || vars->type == ASN_OPAQUE))
+    {
+        return __py_list_append_bytes(sink->string_values,
+                                      (char *)vars->val.string,
+                                      vars->val_len);
+    }
 
-            *str_buf = '.';
-            *(str_buf + 1) = '\0';
-            out_len = 0;
-            tp = netsnmp_sprint_realloc_objid_tree(&str_bufp, &str_buf_len,
-                                                   &out_len, 0, &buf_over,
-                                                   vars->name,
-                                                   vars->name_length);
+    len = __snprint_value((char *)str_buf, str_buf_size - 1, vars, tp,
+                          __translate_asn_type(vars->type), sprintval_flag,
+                          __oid_output_format(getlabel_flag));
+    str_buf[len] = '\0';
 
-            py_log_msg(DEBUG, "netsnmp_get: str_bufp: %s:%lu:%lu",
-                       str_bufp, str_buf_len, out_len);
+    return __py_list_append_string(sink->string_values, (char *)str_buf, len);
+}
 
-            /* clamp value */
-            str_buf[sizeof(session_ctx->buf) - 1] = '\0';
+/*
+ * Appends a response variable binding to a lazy result as a record holding
+ * its name, type and value exactly as they were received, so that nothing
+ * is formatted until the row is accessed (see netsnmp_decode_varbind()).
+ * Returns 0 on success or -1 with an exception set.
+ */
+static int py_netsnmp_append_raw(struct columnar_sink *sink,
+                                 netsnmp_variable_list *vars)
+{
+    struct raw_varbind_header header;
+    unsigned char type_code = (unsigned char)vars->type;
+    uint64_t offset = (uint64_t)PyByteArray_GET_SIZE(sink->raw);
 
-            type = __translate_asn_type(vars->type);
+    memset(&header, 0, sizeof(header));
+    header.name_length = vars->name_length;
+    header.val_len = vars->val.string ? vars->val_len : 0;
+    header.type = vars->type;
 
-            if (__is_leaf(tp))
-            {
-                getlabel_flag &= ~NON_LEAF_NAME;
-                py_log_msg(DEBUG, "netsnmp_get: is_leaf: %d", tp->type);
-            }
-            else
-            {
-                getlabel_flag |= NON_LEAF_NAME;
-                py_log_msg(DEBUG, "netsnmp_get: !is_leaf: %d", tp->type);
-            }
+    if (__bytearray_append(sink->offsets, &offset, sizeof(offset)) < 0 ||
+        __bytearray_append(sink->type_codes, &type_code, 1) < 0 ||
+        __bytearray_append(sink->raw, &header, sizeof(header)) < 0 ||
+        __bytearray_append(sink->raw, vars->name,
+                           vars->name_length * sizeof(oid)) < 0 ||
+        __bytearray_append(sink->raw, vars->val.string, header.val_len) < 0)
+    {
+        return -1;
+    }
+    return 0;
+}
 
-            py_log_msg(DEBUG, "netsnmp_get: str_buf: %s", str_buf);
+/*
+ * Adds a response variable binding to the results of an operation; as a
+ * new SNMPVariable appended to varbinds or, when sink is given, as a new
+ * row of a columnar or lazy result.
+ */
+static int py_netsnmp_emit_varbind(PyObject *varbinds,
+                                   struct columnar_sink *sink,
+                                   netsnmp_variable_list *vars,
+                                   int getlabel_flag, int sprintval_flag,
+                                   struct label_cache *labels,
+                                   u_char *str_buf, size_t str_buf_size)
+{
+    PyObject *varbind = NULL;
+    int ret = -1;
 
-            __get_label_iid((char *)str_buf, &tag, &iid, getlabel_flag);
+    if (sink && sink->raw)
+    {
+        return py_netsnmp_append_raw(sink, vars);
+    }
+    if (sink)
+    {
+        return py_netsnmp_append_column(sink, vars, getlabel_flag,
+                                        sprintval_flag, labels, str_buf,
+                                        str_buf_size);
+    }
 
-            py_netsnmp_attr_set_string(varbind, "oid", tag, STRLEN(tag));
-            py_netsnmp_attr_set_string(varbind, "oid_index", iid,
-                                       STRLEN(iid));
+    if ((varbind = py_netsnmp_construct_varbind()) &&
+        py_netsnmp_fill_varbind(varbind, vars, getlabel_flag, sprintval_flag,
+                                labels, str_buf, str_buf_size) == 0)
+    {
+        ret = PyList_Append(varbinds, varbind);
+    }
+    Py_XDECREF(varbind);
+    return ret;
+}
 
-            __get_type_str(type, type_str, 1);
+/*
+ * Fetches the label and value formatting flags from the options of a
+ * session. The OID output format is implied by the label flags (see
+ * __oid_output_format()), so no library-wide state is involved.
+ */
+static void __py_netsnmp_output_flags(struct session_options *options,
+                                      int *getlabel_flag, int *sprintval_flag)
+{
+    *getlabel_flag = options->getlabel_flag;
+    *sprintval_flag = options->sprintval_flag;
+}
 
-            py_netsnmp_attr_set_string(varbind, "snmp_type", type_str,
-                                       strlen(type_str));
+/*
+ * Compiles the options of a Session which affect how requests are built
+ * and how results are formatted into options, so that they need not be
+ * looked up on the Session for every request.
+ */
+static void __py_netsnmp_read_options(PyObject *session,
+                                      struct session_options *options)
+{
+    memset(options, 0, sizeof(*options));
 
-            len = __snprint_value((char *)str_buf, sizeof(session_ctx->buf),
-                                  vars, tp, type, sprintval_flag);
-            str_buf[len] = '\0';
-            py_netsnmp_attr_set_string(varbind, "value",
-                                       (char *)str_buf, len);
+    options->version = py_netsnmp_attr_long(session, "version");
+    options->getlabel_flag = NO_FLAGS;
+    options->sprintval_flag = USE_BASIC;
 
-            Py_DECREF(varbind);
-        }
-        else
-        {
-            py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)", varlist_ind);
-            Py_XDECREF(varbind);
-        }
+    if (py_netsnmp_attr_long(session, "use_enums"))
+    {
+        options->sprintval_flag = USE_ENUMS;
+    }
+    if (py_netsnmp_attr_long(session, "use_sprint_value"))
+    {
+        options->sprintval_flag = USE_SPRINT_VALUE;
+    }
+    if (py_netsnmp_attr_long(session, "value_bytes"))
+    {
+        options->sprintval_flag |= VALUE_BYTES;
+    }
+    if (py_netsnmp_attr_long(session, "typed_values"))
+    {
+        options->sprintval_flag |= VALUE_TYPED;
+    }
 
-        /*
-         * in v1 this will only advance if the varbind index is valid;
-         * in v2/v3 no_such_name is always set to 0.
-         */
-        if (!no_such_name)
-        {
-            vars = vars->next_variable;
-        }
+    /*
+     * Setting use_numeric forces use_long_names on; USE_NUMERIC_OIDS takes
+     * precedence when the OID output format is chosen from these flags
+     */
+    if (py_netsnmp_attr_long(session, "use_long_names"))
+    {
+        options->getlabel_flag |= USE_LONG_NAMES;
+    }
+    if (py_netsnmp_attr_long(session, "use_numeric"))
+    {
+        options->getlabel_flag |= USE_LONG_NAMES;
+        options->getlabel_flag |= USE_NUMERIC_OIDS;
     }
 
-    /* Reset the library's behavior for numeric/symbolic OID's. */
-    netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                       NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                       old_format);
+    options->use_enums = py_netsnmp_attr_long(session, "use_enums") ? 1 : 0;
+    options->best_guess = py_netsnmp_attr_long(session, "best_guess");
+    options->retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
 
-done:
-    Py_XDECREF(sess_ptr);
-    Py_XDECREF(err_bytes);
-    if (response)
+    options->thread_safe = py_netsnmp_attr_long(session, "thread_safe");
+    options->auto_max_repetitions = py_netsnmp_attr_long(session,
+                                                         "auto_max_repetitions");
+    if (options->auto_max_repetitions < AUTO_REPETITIONS_MIN)
     {
-        snmp_free_pdu(response);
-        response = NULL;
+        options->auto_max_repetitions = AUTO_REPETITIONS_START;
     }
-
-    if (error)
+    else if (options->auto_max_repetitions > AUTO_REPETITIONS_MAX)
     {
-        return NULL;
+        options->auto_max_repetitions = AUTO_REPETITIONS_MAX;
     }
-    Py_RETURN_NONE;
 }
 
-static PyObject *netsnmp_getnext(PyObject *self, PyObject *args)
+/*
+ * Returns the number of microseconds which have passed since start.
+ */
+static long __elapsed_usec(struct timeval *start)
 {
-    PyObject *session = NULL;
-    PyObject *sess_ptr = NULL;
-    PyObject *varlist;
-    PyObject *varbind;
-    PyObject *err_bytes = NULL;
-    PyObject *tag_bytes = NULL;
-    PyObject *iid_bytes = NULL;
-    unsigned int varlist_len = 0;
-    unsigned int varlist_ind;
-    struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss;
-    netsnmp_pdu *pdu = NULL;
-    netsnmp_pdu *response = NULL;
-    netsnmp_variable_list *vars;
-    struct tree *tp;
-    int len;
-    oid *oid_arr;
-    size_t oid_arr_len = MAX_OID_LEN;
-    int type;
-    char type_str[MAX_TYPE_NAME_LEN];
-    int status;
-    u_char str_buf[STR_BUF_SIZE];
-    u_char *str_bufp = str_buf;
-    size_t str_buf_len = sizeof(str_buf);
-    size_t out_len = 0;
-    int buf_over = 0;
-    char *tag;
-    char *iid = NULL;
-    int getlabel_flag = NO_FLAGS;
-    int sprintval_flag = USE_BASIC;
-    int old_format;
-    int best_guess;
-    int retry_nosuch;
-    int err_ind;
-    int err_num;
-    char err_str[STR_BUF_SIZE];
-    char *tmpstr;
-    Py_ssize_t tmplen;
-    int error = 0;
-    unsigned long snmp_version = 0;
+    struct timeval now;
 
-    BITARRAY_DECLARE(snmpv1_invalid_oids, DEFAULT_NUM_BAD_OIDS);
-    bitarray *invalid_oids = snmpv1_invalid_oids;
+    gettimeofday(&now, NULL);
+    return (now.tv_sec - start->tv_sec) * 1000000L +
+           (now.tv_usec - start->tv_usec);
+}
 
-    oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
+/*
+ * Decides whether an adaptive GETBULK request which failed should be sent
+ * again with fewer repetitions. That is the case when the agent reported
+ * tooBig, or when the request timed out after the agent has already
+ * answered during this operation (so it is likely the response which was
+ * lost rather than the agent).
+ *
+ * Returns 1 after halving the learned max_repetitions if the request should
+ * be retried, or 0 if the error stands.
+ */
+static int __auto_repetitions_retry(struct session_options *options,
+                                    netsnmp_pdu *response, int responses)
+{
+    int too_big = response && response->errstat == SNMP_ERR_TOOBIG;
+    int timed_out = !response && responses > 0 &&
+                    PyErr_ExceptionMatches(EasySNMPTimeoutError);
 
-    if (oid_arr && args)
+    if ((!too_big && !timed_out) ||
+        options->auto_max_repetitions <= AUTO_REPETITIONS_MIN)
     {
-        if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
-        {
-            goto done;
-        }
+        return 0;
+    }
 
-        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
-        session_ctx = get_session_handle_from_capsule(sess_ptr);
+    options->auto_max_repetitions /= 2;
+    py_log_msg(DEBUG, "auto max_repetitions: %s, retrying with %d",
+               too_big ? "tooBig" : "timeout", options->auto_max_repetitions);
+    return 1;
+}
 
-        if (!session_ctx)
-        {
-            goto done;
-        }
+/*
+ * Adjusts the learned max_repetitions of a session after a response to an
+ * adaptive GETBULK request which asked for requested repetitions and
+ * received used of them within the walked subtree(s).
+ *
+ * The value grows while full responses come back quickly and shrinks when
+ * responses are slow or run past the end of the subtree being walked.
+ */
+static void __auto_repetitions_learn(struct session_options *options,
+                                     int requested, int used, int overshoot,
+                                     struct timeval *start)
+{
+    long elapsed = __elapsed_usec(start);
+    int learned = requested;
+
+    if (elapsed > AUTO_REPETITIONS_SLOW_USEC)
+    {
+        learned = requested / 2;
+    }
+    else if (overshoot)
+    {
+        /* no smaller than what the subtree needed, but at most halved */
+        learned = used > requested / 2 ? used : requested / 2;
+    }
+    else if (used >= requested && elapsed < AUTO_REPETITIONS_FAST_USEC)
+    {
+        learned = requested * 2;
+    }
 
-        ss = session_ctx->handle;
+    if (learned < AUTO_REPETITIONS_MIN)
+    {
+        learned = AUTO_REPETITIONS_MIN;
+    }
+    else if (learned > AUTO_REPETITIONS_MAX)
+    {
+        learned = AUTO_REPETITIONS_MAX;
+    }
+    options->auto_max_repetitions = learned;
+}
 
-        snmp_version = py_netsnmp_attr_long(session, "version");
+/*
+ * Publishes the learned max_repetitions of a session as its
+ * auto_max_repetitions attribute, preserving any pending exception. The
+ * value behind the property is set directly, as the options of the session
+ * already hold it and need not be compiled again.
+ */
+static void __py_netsnmp_store_auto_repetitions(PyObject *session,
+                                                struct session_options *options)
+{
+    PyObject *learned;
+    PyObject *type, *value, *traceback;
 
-        if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
-        {
-            goto done;
-        }
-        memcpy(&err_str, tmpstr, tmplen);
-        err_num = py_netsnmp_attr_long(session, "error_number");
-        err_ind = py_netsnmp_attr_long(session, "error_index");
+    PyErr_Fetch(&type, &value, &traceback);
 
-        if (py_netsnmp_attr_long(session, "use_long_names"))
-        {
-            getlabel_flag |= USE_LONG_NAMES;
-        }
-        if (py_netsnmp_attr_long(session, "use_numeric"))
-        {
-            getlabel_flag |= USE_NUMERIC_OIDS;
-        }
-        if (py_netsnmp_attr_long(session, "use_enums"))
-        {
-            sprintval_flag = USE_ENUMS;
-        }
-        if (py_netsnmp_attr_long(session, "use_sprint_value"))
+    if ((learned = PyLong_FromLong(options->auto_max_repetitions)))
+    {
+        if (PyObject_SetAttrString(session, "_auto_max_repetitions",
+                                   learned) < 0)
         {
-            sprintval_flag = USE_SPRINT_VALUE;
+            PyErr_Clear();
         }
-        best_guess = py_netsnmp_attr_long(session, "best_guess");
-        retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
+        Py_DECREF(learned);
+    }
+    else
+    {
+        PyErr_Clear();
+    }
 
-        pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+    PyErr_Restore(type, value, traceback);
+}
 
-        if (varlist)
-        {
-            PyObject *varlist_iter = PyObject_GetIter(varlist);
+/*
+ * Returns a new reference to a tuple of integers representing the OID.
+ */
+static PyObject *py_netsnmp_oid_tuple(oid *name, size_t name_length)
+{
+    PyObject *oid_tuple = NULL;
+    PyObject *arc = NULL;
+    size_t i;
 
-            while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+    if (!(oid_tuple = PyTuple_New(name_length)))
+    {
+        return NULL;
+    }
+    for (i = 0; i < name_length; i++)
+    {
+        if (!(arc = PyLong_FromUnsignedLong(name[i])))
+        {
+            Py_DECREF(oid_tuple);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(oid_tuple, i, arc);
+    }
+    return oid_tuple;
+}
+
+/*
+ * Returns a new reference to a python capsule object containing
+ * a newly allocated session_capsule_ctx.
+ *
+ * This function will raise an exception on failure.
+ */
+static PyObject *create_session_capsule(SnmpSession *session)
+{
+    void *handle = NULL;
+    struct session_capsule_ctx *ctx = NULL;
+    PyObject *capsule = NULL;
+    /* create a long lived handle from throwaway session object */
+    if (!(handle = snmp_sess_open(session)))
+    {
+        PyErr_SetString(EasySNMPConnectionError,
+                        "couldn't create SNMP handle");
+        goto done;
+    }
+    /*
+     * We have to free these here because we allocated the memory and `snmp_sess_open`
+     * does not use our instance. In fact, it creates a carbon copy. The call is as follows:
+     * snmp_sess_open -> _sess_open -> snmp_sess_add -> snmp_sess_add_ex -> snmp_sess_copy -> _sess_copy
+     */
+    if (!(ctx = malloc(sizeof *ctx)))
+    {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "could not malloc() session_capsule_ctx");
+        goto done;
+    }
+    if (!(ctx->transport_lock = PyThread_allocate_lock()))
+    {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "could not allocate the session transport lock");
+        goto done;
+    }
+    /*
+     * Create a capsule containing the ctx pointer with an "anonymous" name,
+     * which is automatically destroyed by delete_session_capsule() when
+     * no more references to the object are held.
+     */
+    if (!(capsule = PyCapsule_New(ctx, NULL, delete_session_capsule)))
+    {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "failed to create Python Capsule object");
+        goto done;
+    }
+    free(session->securityEngineID);
+    free(session->contextEngineID);
+    /* init session context variables */
+    ctx->handle = handle;
+    __tag2oid_cache_init(&ctx->oid_cache, 0);
+    memset(&ctx->label_cache, 0, sizeof(ctx->label_cache));
+    memset(&ctx->options, 0, sizeof(ctx->options));
+    ctx->max_batch_varbinds = 0;
+    ctx->scratch = NULL;
+    ctx->canned = NULL;
+    ctx->canned_count = 0;
+    ctx->canned_next = 0;
+    return capsule;
+done:
+    if (handle)
+    {
+        snmp_sess_close(handle);
+    }
+    if (ctx)
+    {
+        if (ctx->transport_lock)
+        {
+            PyThread_free_lock(ctx->transport_lock);
+        }
+        free(ctx);
+    }
+    free(session->securityEngineID);
+    free(session->contextEngineID);
+    Py_XDECREF(capsule);
+    return NULL;
+}
+
+static void *get_session_handle_from_capsule(PyObject *session_capsule)
+{
+    if (!session_capsule)
+    {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "NULL arg calling get_session_handle_from_capsule");
+        return NULL;
+    }
+    /* raises exception on failure. */
+    return PyCapsule_GetPointer(session_capsule, NULL);
+}
+
+#ifdef USE_DEPRECATED_COBJECT_API
+/* The CObject API calls destructor with stored pointer */
+static void delete_session_capsule(void *session_ptr)
+{
+    struct session_capsule_ctx *ctx = session_ptr;
+    if (ctx)
+    {
+        // clear_user_list(); // Too dangerous, may disrupt other valid sessions
+        __remove_user_from_cache((struct session_list *)ctx->handle);
+        snmp_sess_close(ctx->handle);
+        __tag2oid_cache_free(&ctx->oid_cache);
+        __scratch_free(ctx);
+        __canned_responses_free(ctx);
+        PyThread_free_lock(ctx->transport_lock);
+        free(ctx);
+    }
+}
+#else
+/* Automatically called when Python reclaims session_capsule object. */
+static void delete_session_capsule(PyObject *session_capsule)
+{
+    /* PyCapsule_GetPointer will raise an exception if it fails. */
+    struct session_capsule_ctx *ctx = PyCapsule_GetPointer(session_capsule, NULL);
+    if (ctx)
+    {
+        // clear_user_list(); // Too dangerous, may disrupt other valid sessions
+        __remove_user_from_cache((struct session_list *)ctx->handle);
+        snmp_sess_close(ctx->handle);
+        __tag2oid_cache_free(&ctx->oid_cache);
+        __scratch_free(ctx);
+        __canned_responses_free(ctx);
+        PyThread_free_lock(ctx->transport_lock);
+        free(ctx);
+    }
+}
+#endif /* USE_DEPRECATED_COBJECT_API */
+
+/*
+ * Called by Net-SNMP from snmp_sess_read() or snmp_sess_timeout() when
+ * an asynchronous request completes. This may run without the GIL, so
+ * it must not call into Python.
+ */
+static int __async_response_cb(int op, netsnmp_session *sp, int reqid,
+                               netsnmp_pdu *pdu, void *magic)
+{
+    struct async_request_ctx *req = magic;
+
+    switch (op)
+    {
+    case NETSNMP_CALLBACK_OP_RECEIVED_MESSAGE:
+        /* the library frees pdu once we return */
+        req->response = snmp_clone_pdu(pdu);
+        req->status = req->response ? STAT_SUCCESS : STAT_ERROR;
+        break;
+    case NETSNMP_CALLBACK_OP_TIMED_OUT:
+        req->status = STAT_TIMEOUT;
+        break;
+    default:
+        req->status = STAT_ERROR;
+        break;
+    }
+    req->done = 1;
+
+    if (req->orphaned)
+    {
+        if (req->response)
+        {
+            snmp_free_pdu(req->response);
+        }
+        free(req);
+    }
+    return 1;
+}
+
+static void __delete_async_request(struct async_request_ctx *req)
+{
+    if (!req)
+    {
+        return;
+    }
+    Py_XDECREF(req->sess_ptr);
+    req->sess_ptr = NULL;
+    if (!req->done)
+    {
+        /* still outstanding; __async_response_cb() will free it */
+        req->orphaned = 1;
+        return;
+    }
+    if (req->response)
+    {
+        snmp_free_pdu(req->response);
+    }
+    free(req);
+}
+
+#ifdef USE_DEPRECATED_COBJECT_API
+/* The CObject API calls destructor with stored pointer */
+static void delete_async_request_capsule(void *request_ptr)
+{
+    __delete_async_request(request_ptr);
+}
+#else
+/* Automatically called when Python reclaims request_capsule object. */
+static void delete_async_request_capsule(PyObject *request_capsule)
+{
+    __delete_async_request(PyCapsule_GetPointer(request_capsule, NULL));
+}
+#endif /* USE_DEPRECATED_COBJECT_API */
+
+#ifdef USE_DEPRECATED_COBJECT_API
+/* The CObject API calls destructor with stored pointer */
+static void delete_prepared_pdu_capsule(void *pdu_ptr)
+{
+    snmp_free_pdu(pdu_ptr);
+}
+#else
+/* Automatically called when Python reclaims a prepared request capsule. */
+static void delete_prepared_pdu_capsule(PyObject *pdu_capsule)
+{
+    snmp_free_pdu(PyCapsule_GetPointer(pdu_capsule, NULL));
+}
+#endif /* USE_DEPRECATED_COBJECT_API */
+
+static PyObject *netsnmp_create_session(PyObject *self, PyObject *args)
+{
+    int version;
+    char *community;
+    char *peer;
+    int lport;
+    int retries;
+    int timeout;
+    SnmpSession session = {0};
+
+    if (!PyArg_ParseTuple(args, "issiii", &version, &community, &peer, &lport,
+                          &retries, &timeout))
+    {
+        goto done;
+    }
+
+    snmp_sess_init(&session);
+
+    session.version = -1;
+#ifndef DISABLE_SNMPV1
+    if (version == 1)
+    {
+        session.version = SNMP_VERSION_1;
+    }
+#endif
+#ifndef DISABLE_SNMPV2C
+    if (version == 2)
+    {
+        session.version = SNMP_VERSION_2c;
+    }
+#endif
+    if (version == 3)
+    {
+        session.version = SNMP_VERSION_3;
+    }
+    if (session.version == -1)
+    {
+        PyErr_Format(PyExc_ValueError, "unsupported SNMP version (%d)",
+                     version);
+        goto done;
+    }
+
+    session.community_len = STRLEN((char *)community);
+    session.community = (u_char *)community;
+    session.peername = peer;
+    session.local_port = lport;
+    session.retries = retries; /* 5 */
+    session.timeout = timeout; /* 1000000L */
+    session.authenticator = NULL;
+
+    return create_session_capsule(&session);
+
+done:
+    return NULL;
+}
+
+static PyObject *netsnmp_create_session_v3(PyObject *self, PyObject *args)
+{
+    int version;
+    char *peer;
+    int lport;
+    int retries;
+    int timeout;
+    char *sec_name;
+    int sec_level;
+    char *sec_eng_id;
+    char *context_eng_id;
+    char *context;
+    char *auth_proto;
+    char *auth_pass;
+    char *priv_proto;
+    char *priv_pass;
+    int eng_boots;
+    int eng_time;
+    SnmpSession session = {0};
+
+    if (!PyArg_ParseTuple(args, "isiiisisssssssii", &version,
+                          &peer, &lport, &retries, &timeout,
+                          &sec_name, &sec_level, &sec_eng_id,
+                          &context_eng_id, &context,
+                          &auth_proto, &auth_pass,
+                          &priv_proto, &priv_pass,
+                          &eng_boots, &eng_time))
+    {
+        return NULL;
+    }
+
+    snmp_sess_init(&session);
+
+    if (version == 3)
+    {
+        session.version = SNMP_VERSION_3;
+    }
+    else
+    {
+        PyErr_Format(PyExc_ValueError, "unsupported SNMP version (%d)",
+                     version);
+        goto done;
+    }
+
+    session.peername = peer;
+    session.retries = retries; /* 5 */
+    session.timeout = timeout; /* 1000000L */
+    session.authenticator = NULL;
+    session.contextNameLen = STRLEN(context);
+    session.contextName = context;
+    session.securityNameLen = STRLEN(sec_name);
+    session.securityName = sec_name;
+    session.securityLevel = sec_level;
+    session.securityModel = USM_SEC_MODEL_NUMBER;
+    session.securityEngineIDLen =
+        hex_to_binary2((unsigned char *)sec_eng_id, STRLEN(sec_eng_id),
+                       (char **)&session.securityEngineID);
+    session.contextEngineIDLen =
+        hex_to_binary2((unsigned char *)context_eng_id, STRLEN(context_eng_id),
+                       (char **)&session.contextEngineID);
+    session.engineBoots = eng_boots;
+    session.engineTime = eng_time;
+    if (__match_algo(1, auth_proto, &session.securityAuthProto,
+                     &session.securityAuthProtoLen) != 0)
+    {
+        PyErr_Format(PyExc_ValueError,
+                     "unsupported authentication protocol (%s)", auth_proto);
+        goto done;
+    }
+    if (session.securityLevel >= SNMP_SEC_LEVEL_AUTHNOPRIV)
+    {
+        if (STRLEN(auth_pass) > 0)
+        {
+            session.securityAuthKeyLen = USM_AUTH_KU_LEN;
+            if (generate_Ku(session.securityAuthProto,
+                            session.securityAuthProtoLen,
+                            (u_char *)auth_pass, STRLEN(auth_pass),
+                            session.securityAuthKey,
+                            &session.securityAuthKeyLen) != SNMPERR_SUCCESS)
+            {
+                PyErr_SetString(EasySNMPConnectionError,
+                                "error generating Ku from authentication "
+                                "password");
+                goto done;
+            }
+        }
+    }
+    if (__match_algo(0, priv_proto, &session.securityPrivProto,
+                     &session.securityPrivProtoLen) != 0)
+    {
+        PyErr_Format(PyExc_ValueError,
+                     "unsupported privacy protocol (%s)", priv_proto);
+        goto done;
+    }
+
+    if (session.securityLevel >= SNMP_SEC_LEVEL_AUTHPRIV)
+    {
+        session.securityPrivKeyLen = USM_PRIV_KU_LEN;
+        if (generate_Ku(session.securityAuthProto,
+                        session.securityAuthProtoLen,
+                        (u_char *)priv_pass, STRLEN(priv_pass),
+                        session.securityPrivKey,
+                        &session.securityPrivKeyLen) != SNMPERR_SUCCESS)
+        {
+            PyErr_SetString(EasySNMPConnectionError,
+                            "couldn't gen Ku from priv pass phrase");
+            goto done;
+        }
+    }
+    return create_session_capsule(&session);
+
+done:
+    SAFE_FREE(session.securityEngineID);
+    SAFE_FREE(session.contextEngineID);
+
+    return NULL;
+}
+
+static PyObject *netsnmp_create_session_tunneled(PyObject *self,
+                                                 PyObject *args)
+{
+    int version;
+    char *peer;
+    int lport;
+    int retries;
+    int timeout;
+    char *sec_name;
+    int sec_level;
+    char *context_eng_id;
+    char *context;
+    char *our_identity;
+    char *their_identity;
+    char *their_hostname;
+    char *trust_cert;
+    SnmpSession session = {0};
+
+    if (!PyArg_ParseTuple(args, "isiiisissssss", &version,
+                          &peer, &lport, &retries, &timeout,
+                          &sec_name, &sec_level,
+                          &context_eng_id, &context,
+                          &our_identity, &their_identity,
+                          &their_hostname, &trust_cert))
+    {
+        goto done;
+    }
+
+    if (version != 3)
+    {
+        PyErr_SetString(PyExc_ValueError,
+                        "you must use SNMP version 3 as it's the only "
+                        "version that supports tunneling");
+        goto done;
+    }
+
+    snmp_sess_init(&session);
+
+    session.peername = peer;
+    session.retries = retries; /* 5 */
+    session.timeout = timeout; /* 1000000L */
+    session.contextNameLen = STRLEN(context);
+    session.contextName = context;
+    session.securityNameLen = STRLEN(sec_name);
+    session.securityName = sec_name;
+    session.securityLevel = sec_level;
+    session.securityModel = NETSNMP_TSM_SECURITY_MODEL;
+
+    /* create the transport configuration store */
+    if (!session.transport_configuration)
+    {
+        netsnmp_container_init_list();
+        session.transport_configuration =
+            netsnmp_container_find("transport_configuration:fifo");
+        if (!session.transport_configuration)
+        {
+            py_log_msg(ERROR, "failed to initialize the transport "
+                              "configuration container");
+            goto done;
+        }
+
+        session.transport_configuration->compare =
+            (netsnmp_container_compare *)netsnmp_transport_config_compare;
+    }
+
+    if (our_identity && our_identity[0] != '\0')
+        CONTAINER_INSERT(session.transport_configuration,
+                         netsnmp_transport_create_config("localCert",
+                                                         our_identity));
+
+    if (their_identity && their_identity[0] != '\0')
+        CONTAINER_INSERT(session.transport_configuration,
+                         netsnmp_transport_create_config("peerCert",
+                                                         their_identity));
+
+    if (their_hostname && their_hostname[0] != '\0')
+        CONTAINER_INSERT(session.transport_configuration,
+                         netsnmp_transport_create_config("their_hostname",
+                                                         their_hostname));
+
+    if (trust_cert && trust_cert[0] != '\0')
+        CONTAINER_INSERT(session.transport_configuration,
+                         netsnmp_transport_create_config("trust_cert",
+                                                         trust_cert));
+    return create_session_capsule(&session);
+
+done:
+    return NULL;
+}
+
+static PyObject *netsnmp_get(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *varlist = NULL;
+    PyObject *varbind = NULL;
+    PyObject *varlist_iter = NULL;
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    int varlist_len = 0;
+    int varlist_ind;
+
+    /* variables associated for session_ctx (can be condensed into a macro) */
+    PyObject *sess_ptr = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct session_scratch *scratch = NULL;
+    oid *oid_arr = NULL;
+    size_t oid_arr_len = 0;
+    u_char *str_buf = NULL;
+    char *err_str = NULL;
+    bitarray *invalid_oids = NULL;
+
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    netsnmp_variable_list *vars = NULL;
+    struct tree *tp = NULL;
+    int type;
+    char type_str[MAX_TYPE_NAME_LEN];
+    int status;
+    char *tag = NULL;
+    char *iid = NULL;
+    int getlabel_flag = NO_FLAGS;
+    int sprintval_flag = USE_BASIC;
+    int best_guess;
+    int retry_nosuch;
+    int err_ind;
+    int err_num;
+    int error = 0;
+    unsigned long snmp_version = 0;
+
+    if (!args)
+    {
+        const char *err_msg = "netsnmp_get: missing arguments";
+        PyErr_SetString(PyExc_ValueError, err_msg);
+        error = 1;
+        goto done;
+    }
+
+    if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
+    {
+        goto done;
+    }
+
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
+
+    if (!session_ctx)
+    {
+        goto done;
+    }
+
+    if (!(scratch = __scratch_acquire(session_ctx)))
+    {
+        error = 1;
+        goto done;
+    }
+
+    invalid_oids = scratch->invalid_oids;
+    oid_arr = scratch->oid_arr;
+    str_buf = scratch->buf;
+    err_str = scratch->err_str;
+
+    snmp_version = session_ctx->options.version;
+
+    getlabel_flag = session_ctx->options.getlabel_flag;
+    sprintval_flag = session_ctx->options.sprintval_flag;
+    best_guess = session_ctx->options.best_guess;
+    retry_nosuch = session_ctx->options.retry_nosuch;
+
+    pdu = snmp_pdu_create(SNMP_MSG_GET);
+
+    if (!varlist)
+    {
+        const char *err_msg = "unexpected error: varlist == null";
+        PyErr_SetString(PyExc_RuntimeError, err_msg);
+        error = 1;
+        goto done;
+    }
+
+    varlist_iter = PyObject_GetIter(varlist);
+
+    while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+    {
+        if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
+            py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
+        {
+            oid_arr_len = 0;
+        }
+        else
+        {
+            tp = __cached_tag2oid(&session_ctx->oid_cache, tag, iid, oid_arr,
+                                  &oid_arr_len, NULL, best_guess);
+        }
+
+        if (oid_arr_len)
+        {
+            snmp_add_null_var(pdu, oid_arr, oid_arr_len);
+            varlist_len++;
+        }
+        else
+        {
+            PyErr_Format(EasySNMPUnknownObjectIDError,
+                         "unknown object id (%s)",
+                         (tag ? tag : "<null>"));
+            error = 1;
+            snmp_free_pdu(pdu);
+            Py_DECREF(varbind);
+            Py_DECREF(varlist_iter);
+            Py_XDECREF(tag_bytes);
+            Py_XDECREF(iid_bytes);
+            goto done;
+        }
+
+        /* release reference when done */
+        Py_DECREF(varbind);
+        Py_XDECREF(tag_bytes);
+        tag_bytes = NULL;
+        Py_XDECREF(iid_bytes);
+        iid_bytes = NULL;
+    }
+
+    Py_XDECREF(varlist_iter);
+
+    if (PyErr_Occurred())
+    {
+        error = 1;
+        snmp_free_pdu(pdu);
+        goto done;
+    }
+
+    if (snmp_version == 1)
+    {
+        bitarray_clear_bits(invalid_oids, (size_t)varlist_len);
+    }
+
+    status = __send_sync_pdu_split(session_ctx, &pdu, &response, retry_nosuch,
+                                   err_str, &err_num, &err_ind, invalid_oids);
+
+    __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
+    if (status != STAT_SUCCESS)
+    {
+        error = 1;
+        goto done;
+    }
+
+    /*
+     * Set up for numeric or full OID's, if necessary, saving the old
+     * output format which is restored when we finish.
+     */
+    __py_netsnmp_output_flags(&session_ctx->options,
+                              &getlabel_flag, &sprintval_flag);
+
+    /*
+     * In SNMPv1 we go through the response variables only if we know
+     * the varlist_ind is not set in the invalid_oids bit array.
+     * For bits that are set, we fix the input varbind so that it
+     * indicates NOSUCHNAME. For bits that are not set, we fill in the
+     * corresponding varbind and advance.
+     *
+     * In SNMPv2/v3 we simply fill the response variables against the
+     * original input Varbind list.
+     */
+    vars = (response ? response->variables : NULL);
+
+    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+    {
+        int no_such_name = 0;
+
+        if (snmp_version == 1)
+        {
+            if (!vars)
+            {
+                /* if no more variables in response then remaining varbinds are invalid. */
+                no_such_name = 1;
+            }
+            else if (bitarray_test_bit(invalid_oids, varlist_ind))
+            {
+                /* oid is invalid */
+                no_such_name = 1;
+            }
+        }
+        else if (!vars)
+        {
+            /*
+             * sanity check for snmp v2/v3: no more varbinds to inspect;
+             * this should throw an exception.
+             */
+            py_log_msg(DEBUG,
+                       "netsnmp_get: response had less vars compared to varlist");
+            break;
+        }
+
+        varbind = PySequence_GetItem(varlist, varlist_ind);
+
+        if (no_such_name)
+        {
+            if (!PyObject_HasAttrString(varbind, "oid"))
+            {
+                py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)",
+                           varlist_ind);
+                // Py_XDECREF(varbind); Double DECREF?
+            }
+
+            py_netsnmp_attr_set_string(varbind, "snmp_type", "NOSUCHNAME",
+                                       strlen("NOSUCHNAME"));
+
+            py_netsnmp_attr_set_string(varbind, "value",
+                                       "NOSUCHNAME", strlen("NOSUCHNAME"));
+
+            Py_DECREF(varbind);
+        }
+        else if (PyObject_HasAttrString(varbind, "oid"))
+        {
+            tp = __sprint_objid((char *)str_buf, sizeof(scratch->buf),
+                                vars->name, vars->name_length,
+                                __oid_output_format(getlabel_flag));
+
+            type = __translate_asn_type(vars->type);
+
+            if (__is_leaf(tp))
+            {
+                getlabel_flag &= ~NON_LEAF_NAME;
+                py_log_msg(DEBUG, "netsnmp_get: is_leaf: %d", tp->type);
+            }
+            else
+            {
+                getlabel_flag |= NON_LEAF_NAME;
+                py_log_msg(DEBUG, "netsnmp_get: !is_leaf: %d", tp->type);
+            }
+
+            py_log_msg(DEBUG, "netsnmp_get: str_buf: %s", str_buf);
+
+            __get_label_iid((char *)str_buf, &tag, &iid, getlabel_flag);
+
+            py_netsnmp_attr_set_string(varbind, "oid", tag, STRLEN(tag));
+            py_netsnmp_attr_set_string(varbind, "oid_index", iid,
+                                       STRLEN(iid));
+
+            __get_type_str(type, type_str, 1);
+
+            py_netsnmp_attr_set_string(varbind, "snmp_type", type_str,
+                                       strlen(type_str));
+
+            py_netsnmp_varbind_set_value(varbind, vars, tp, type,
+                                         sprintval_flag,
+                                         __oid_output_format(getlabel_flag),
+                                         str_buf, sizeof(scratch->buf));
+
+            Py_DECREF(varbind);
+        }
+        else
+        {
+            py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)", varlist_ind);
+            Py_XDECREF(varbind);
+        }
+
+        /*
+         * in v1 this will only advance if the varbind index is valid;
+         * in v2/v3 no_such_name is always set to 0.
+         */
+        if (!no_such_name)
+        {
+            vars = vars->next_variable;
+        }
+    }
+
+done:
+    if (session_ctx)
+    {
+        __scratch_release(session_ctx, scratch);
+    }
+    Py_XDECREF(sess_ptr);
+    if (response)
+    {
+        snmp_free_pdu(response);
+        response = NULL;
+    }
+
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_getnext(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varlist;
+    PyObject *varbind;
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    unsigned int varlist_len = 0;
+    unsigned int varlist_ind;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    netsnmp_variable_list *vars;
+    struct tree *tp;
+    oid *oid_arr;
+    size_t oid_arr_len = MAX_OID_LEN;
+    int type;
+    char type_str[MAX_TYPE_NAME_LEN];
+    int status;
+    u_char str_buf[STR_BUF_SIZE];
+    char *tag;
+    char *iid = NULL;
+    int getlabel_flag = NO_FLAGS;
+    int sprintval_flag = USE_BASIC;
+    int best_guess;
+    int retry_nosuch;
+    int err_ind;
+    int err_num;
+    char err_str[STR_BUF_SIZE];
+    int error = 0;
+    unsigned long snmp_version = 0;
+
+    BITARRAY_DECLARE(snmpv1_invalid_oids, DEFAULT_NUM_BAD_OIDS);
+    bitarray *invalid_oids = snmpv1_invalid_oids;
+
+    oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
+
+    if (oid_arr && args)
+    {
+        if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
+        {
+            goto done;
+        }
+
+        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+        session_ctx = get_session_handle_from_capsule(sess_ptr);
+
+        if (!session_ctx)
+        {
+            goto done;
+        }
+
+        snmp_version = session_ctx->options.version;
+
+        getlabel_flag = session_ctx->options.getlabel_flag;
+        sprintval_flag = session_ctx->options.sprintval_flag;
+        best_guess = session_ctx->options.best_guess;
+        retry_nosuch = session_ctx->options.retry_nosuch;
+
+        pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+
+        if (varlist)
+        {
+            PyObject *varlist_iter = PyObject_GetIter(varlist);
+
+            while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+            {
+                if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
+                    py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
+                {
+                    oid_arr_len = 0;
+                }
+                else
+                {
+                    tp = __cached_tag2oid(&session_ctx->oid_cache, tag, iid,
+                                          oid_arr, &oid_arr_len, NULL,
+                                          best_guess);
+                }
+
+                py_log_msg(DEBUG,
+                           "netsnmp_getnext: filling request: %s:%s:%d:%d",
+                           tag, iid, oid_arr_len, best_guess);
+
+                if (oid_arr_len)
+                {
+                    snmp_add_null_var(pdu, oid_arr, oid_arr_len);
+                    varlist_len++;
+                }
+                else
+                {
+                    PyErr_Format(EasySNMPUnknownObjectIDError,
+                                 "unknown object id (%s)",
+                                 (tag ? tag : "<null>"));
+                    error = 1;
+                    snmp_free_pdu(pdu);
+                    Py_DECREF(varbind);
+                    Py_DECREF(varlist_iter);
+                    Py_XDECREF(tag_bytes);
+                    Py_XDECREF(iid_bytes);
+                    goto done;
+                }
+                /* release reference when done */
+                Py_DECREF(varbind);
+                Py_XDECREF(tag_bytes);
+                tag_bytes = NULL;
+                Py_XDECREF(iid_bytes);
+                iid_bytes = NULL;
+            }
+
+            Py_DECREF(varlist_iter);
+
+            if (PyErr_Occurred())
+            {
+                error = 1;
+                snmp_free_pdu(pdu);
+                goto done;
+            }
+        }
+
+        /* if we cannot represent the number of bad oids, we will need to resize. */
+        if (snmp_version == 1 && DEFAULT_NUM_BAD_OIDS < varlist_len)
+        {
+            invalid_oids = bitarray_calloc(varlist_len);
+
+            if (!invalid_oids)
+            {
+                error = 1;
+                snmp_free_pdu(pdu);
+                const char *err_msg = "failed to call bitarray_calloc";
+                PyErr_SetString(PyExc_RuntimeError, err_msg);
+                goto done;
+            }
+        }
+
+        status = __send_sync_pdu_split(session_ctx, &pdu, &response,
+                                       retry_nosuch, err_str, &err_num,
+                                       &err_ind, invalid_oids);
+
+        __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
+        if (status != 0)
+        {
+            error = 1;
+            goto done;
+        }
+
+        /*
+         * Set up for numeric or full OID's, if necessary, saving the old
+         * output format which is restored when we finish.
+         */
+        __py_netsnmp_output_flags(&session_ctx->options,
+                                  &getlabel_flag, &sprintval_flag);
+
+        /*
+         * In SNMPv1 we go through the response variables only if we know
+         * the varlist_ind is not set in the invalid_oids bit array.
+         * For bits that are set, we fix the input varbind so that it
+         * indicates NOSUCHNAME. For bits that are not set, we fill in the
+         * corresponding varbind and advance.
+         *
+         * In SNMPv2/v3 we simply fill the response variables against the
+         * original input Varbind list.
+         */
+        vars = (response ? response->variables : NULL);
+
+        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+        {
+            int no_such_name = 0;
+
+            if (snmp_version == 1)
+            {
+                /* check if oid is invalid */
+                if (bitarray_test_bit(invalid_oids, varlist_ind))
+                {
+                    no_such_name = 1;
+                }
+            }
+            else if (!vars)
+            {
+                /*
+                 * no more varbinds to inspect
+                 * (this will only happen if no response is received from SNMP.
+                 */
+                break;
+            }
+
+            varbind = PySequence_GetItem(varlist, varlist_ind);
+
+            if (!no_such_name && PyObject_HasAttrString(varbind, "oid"))
+            {
+                tp = __sprint_objid((char *)str_buf, sizeof(str_buf),
+                                    vars->name, vars->name_length,
+                                    __oid_output_format(getlabel_flag));
+
+                type = __translate_asn_type(vars->type);
+
+                if (__is_leaf(tp))
+                {
+                    getlabel_flag &= ~NON_LEAF_NAME;
+                    py_log_msg(DEBUG, "netsnmp_getnext: is_leaf: %d", tp->type);
+                }
+                else
+                {
+                    getlabel_flag |= NON_LEAF_NAME;
+                    py_log_msg(DEBUG, "netsnmp_getnext: !is_leaf: %d", tp->type);
+                }
+
+                py_log_msg(DEBUG, "netsnmp_getnext: str_buf: %s", str_buf);
+
+                __get_label_iid((char *)str_buf, &tag, &iid, getlabel_flag);
+
+                py_log_msg(DEBUG, "netsnmp_getnext: filling response: %s:%s",
+                           tag, iid);
+
+                py_netsnmp_attr_set_string(varbind, "oid", tag, STRLEN(tag));
+                py_netsnmp_attr_set_string(varbind, "oid_index", iid,
+                                           STRLEN(iid));
+
+                __get_type_str(type, type_str, 1);
+
+                py_netsnmp_attr_set_string(varbind, "snmp_type", type_str,
+                                           strlen(type_str));
+
+                py_netsnmp_varbind_set_value(varbind, vars, tp, type,
+                                             sprintval_flag,
+                                             __oid_output_format(getlabel_flag),
+                                             str_buf, sizeof(str_buf));
+            }
+            else if (no_such_name)
+            {
+                if (!PyObject_HasAttrString(varbind, "oid"))
+                {
+                    py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)",
+                               varlist_ind);
+                    // Py_XDECREF(varbind); /* Double decref? */
+                }
+
+                py_netsnmp_attr_set_string(varbind, "snmp_type", "NOSUCHNAME",
+                                           strlen("NOSUCHNAME"));
+
+                py_netsnmp_attr_set_string(varbind, "value",
+                                           "NOSUCHNAME", strlen("NOSUCHNAME"));
+            }
+            else
+            {
+                py_log_msg(DEBUG, "netsnmp_getnext: bad varbind (%d)",
+                           varlist_ind);
+            }
+            Py_XDECREF(varbind);
+            /*
+             * in v1 this will only advance if the varbind index is valid;
+             * in v2/v3 no_such_name is always set to 0.
+             */
+            if (!no_such_name)
+            {
+                vars = vars->next_variable;
+            }
+        }
+
+    }
+
+done:
+    Py_XDECREF(sess_ptr);
+    /* the pointers will be equal if we didn't allocate additional space */
+    if (invalid_oids != snmpv1_invalid_oids)
+    {
+        bitarray_free(invalid_oids);
+    }
+
+    SAFE_FREE(oid_arr);
+    if (response)
+    {
+        snmp_free_pdu(response);
+        response = NULL;
+    }
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_walk(PyObject *self, PyObject *args)
+{
+    PyObject *columns = Py_None;
+    struct columnar_sink sink = {NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+                                 NULL};
+    struct columnar_sink *sinkp = NULL;
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varlist = NULL;
+    PyObject *varlist_iter;
+    PyObject *varbind;
+    PyObject *varbinds = NULL;
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    int varlist_len = 0;
+    int varlist_ind;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    /*
+    ** Variable `oldvars` does not appear to fufill any immediate purpose and
+    ** causes segfaults in some cases, especially when running against OID '.1'
+    ** For legacy reasons, however, we will only leave it commented out, should
+    ** we find that it was only partially implemented or actually served a purpose
+    ** somewhere in the Net-SNMP library
+    */
+    netsnmp_variable_list *vars; //, *oldvars;
+    oid **oid_arr = NULL;
+    size_t *oid_arr_len = NULL;
+    oid **oid_arr_broken_check = NULL;
+    size_t *oid_arr_broken_check_len = NULL;
+    PyObject *start_oids = Py_None;
+    PyObject *cursor = Py_None;
+    int started = 0;
+    int status;
+    u_char str_buf[STR_BUF_SIZE];
+    char *tag;
+    char *iid = NULL;
+    int getlabel_flag = NO_FLAGS;
+    int sprintval_flag = USE_BASIC;
+    int best_guess;
+    int retry_nosuch;
+    int err_ind;
+    int err_num;
+    char err_str[STR_BUF_SIZE];
+    int notdone = 1;
+    int error = 0;
+    struct session_scratch *scratch = NULL;
+    bitarray *invalid_oids = NULL;
+
+    if (args)
+    {
+        if (!PyArg_ParseTuple(args, "OO|OOO", &session, &varlist, &columns,
+                              &start_oids, &cursor))
+        {
+            goto done;
+        }
+
+        if (columns != Py_None)
+        {
+            if (__columnar_sink_open(columns, &sink) < 0)
+            {
+                goto done;
+            }
+            sinkp = &sink;
+        }
+
+        if (!varlist)
+        {
+            goto done;
+        }
+
+        if ((varbinds = PyObject_GetAttrString(varlist, "varbinds")) == NULL)
+        {
+            goto done;
+        }
+        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+        session_ctx = get_session_handle_from_capsule(sess_ptr);
+
+        if (!session_ctx)
+        {
+            goto done;
+        }
+
+        if (!(scratch = __scratch_acquire(session_ctx)))
+        {
+            error = 1;
+            goto done;
+        }
+        invalid_oids = scratch->invalid_oids;
+
+        getlabel_flag = session_ctx->options.getlabel_flag;
+        sprintval_flag = session_ctx->options.sprintval_flag;
+        best_guess = session_ctx->options.best_guess;
+        retry_nosuch = session_ctx->options.retry_nosuch;
+
+        pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+
+        /* we need an initial count for memory allocation */
+        varlist_iter = PyObject_GetIter(varlist);
+        varlist_len = 0;
+        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        {
+            varlist_len++;
+            Py_DECREF(varbind);
+        }
+        Py_XDECREF(varlist_iter);
+
+        oid_arr_len = calloc(varlist_len, sizeof(size_t));
+        oid_arr_broken_check_len = calloc(varlist_len, sizeof(size_t));
+
+        oid_arr = calloc(varlist_len, sizeof(oid *));
+        oid_arr_broken_check = calloc(varlist_len, sizeof(oid *));
+
+        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+        {
+            oid_arr[varlist_ind] = calloc(MAX_OID_LEN, sizeof(oid));
+            oid_arr_broken_check[varlist_ind] = calloc(MAX_OID_LEN,
+                                                       sizeof(oid));
+
+            oid_arr_len[varlist_ind] = MAX_OID_LEN;
+            oid_arr_broken_check_len[varlist_ind] = MAX_OID_LEN;
+        }
+
+        /* get the initial starting oids */
+        varlist_iter = PyObject_GetIter(varlist);
+        varlist_ind = 0;
+        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        {
+            if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
+                py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
+            {
+                oid_arr_len[varlist_ind] = 0;
+            }
+            else
+            {
+                __cached_tag2oid(&session_ctx->oid_cache, tag, iid,
+                                 oid_arr[varlist_ind],
+                                 &oid_arr_len[varlist_ind], NULL, best_guess);
+            }
+
+            if (oid_arr_len[varlist_ind])
+            {
+                py_log_msg(DEBUG, "netsnmp_walk: filling request: %s:%s:%d:%d",
+                           tag, iid, oid_arr_len[varlist_ind], best_guess);
+
+                snmp_add_null_var(pdu, oid_arr[varlist_ind],
+                                  oid_arr_len[varlist_ind]);
+            }
+            else
+            {
+                PyErr_Format(EasySNMPUnknownObjectIDError,
+                             "unknown object id (%s)",
+                             (tag ? tag : "<null>"));
+                error = 1;
+                snmp_free_pdu(pdu);
+                pdu = NULL;
+                Py_DECREF(varlist_iter);
+                Py_DECREF(varbind);
+                Py_XDECREF(tag_bytes);
+                Py_XDECREF(iid_bytes);
+                goto done;
+            }
+            /* release reference when done */
+            Py_DECREF(varbind);
+            Py_XDECREF(tag_bytes);
+            tag_bytes = NULL;
+            Py_XDECREF(iid_bytes);
+            iid_bytes = NULL;
+            varlist_ind++;
+        }
+
+        Py_XDECREF(varlist_iter);
+
+        if (PyErr_Occurred())
+        {
+            error = 1;
+            snmp_free_pdu(pdu);
+            pdu = NULL;
+            goto done;
+        }
+
+        /*
+         * Set up for numeric or full OID's, if necessary, saving the old
+         * output format which is restored when we finish.
+         */
+        __py_netsnmp_output_flags(&session_ctx->options,
+                                  &getlabel_flag, &sprintval_flag);
+
+        /* delete the existing varbinds that we'll replace */
+        PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
+
+        if (PyErr_Occurred())
+        {
+            error = 1;
+            snmp_free_pdu(pdu);
+            pdu = NULL;
+            goto done;
+        }
+
+        /* save the starting OID */
+
+        for (vars = pdu->variables, varlist_ind = 0;
+             vars != NULL;
+             vars = vars->next_variable, varlist_ind++)
+        {
+
+            oid_arr_broken_check_len[varlist_ind] = vars->name_length;
+            memcpy(oid_arr_broken_check[varlist_ind],
+                   vars->name, vars->name_length * sizeof(oid));
+        }
+
+        /* a resumed walk continues after the OIDs it was given instead */
+        if (start_oids != Py_None)
+        {
+            if (__walk_start_oids(start_oids, varlist_len, oid_arr_broken_check,
+                                  oid_arr_broken_check_len, best_guess,
+                                  &session_ctx->oid_cache) < 0)
+            {
+                error = 1;
+                goto done;
+            }
+
+            snmp_free_pdu(pdu);
+            pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+            for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+            {
+                snmp_add_null_var(pdu, oid_arr_broken_check[varlist_ind],
+                                  oid_arr_broken_check_len[varlist_ind]);
+            }
+        }
+        started = 1;
+
+        while (notdone)
+        {
+            status = __send_sync_pdu(session_ctx, &pdu, &response, retry_nosuch,
+                                     err_str, &err_num, &err_ind, invalid_oids);
+            __py_netsnmp_update_session_errors(session, err_str, err_num,
+                                               err_ind);
+            if (status != 0)
+            {
+                error = 1;
+                /*
+                 * pdu is released in __send_sync_pdu if an error occurs during
+                 * the snmp_sess_synch_response function. It does not, however,
+                 * appear to be set to NULL afterwards.
+                 */
+                pdu = NULL;
+                if (response)
+                {
+                    snmp_free_pdu(response);
+                    response = NULL;
+                }
+                goto done;
+            }
+
+            if (!response || !response->variables ||
+                status != STAT_SUCCESS ||
+                response->errstat != SNMP_ERR_NOERROR)
+            {
+                notdone = 0;
+            }
+            else
+            {
+
+                pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+
+                for (vars = (response ? response->variables : NULL),
+                    varlist_ind = 0;
+                     vars && (varlist_ind < varlist_len);
+                     vars = vars->next_variable, varlist_ind++)
+                {
+                    if ((vars->name_length < oid_arr_len[varlist_ind]) ||
+                        (memcmp(oid_arr[varlist_ind], vars->name,
+                                oid_arr_len[varlist_ind] * sizeof(oid)) != 0))
+                    {
+                        notdone = 0;
+                        break;
+                    }
+
+                    if ((vars->type == SNMP_ENDOFMIBVIEW) ||
+                        (vars->type == SNMP_NOSUCHOBJECT) ||
+                        (vars->type == SNMP_NOSUCHINSTANCE))
+                    {
+                        notdone = 0;
+                        break;
+                    }
+
+                    if (snmp_oid_compare(vars->name, vars->name_length,
+                                         oid_arr_broken_check[varlist_ind],
+                                         oid_arr_broken_check_len[varlist_ind]) <= 0)
+                    {
+                        /*
+                           The agent responded with an illegal response
+                           as the returning OID was lexograghically less
+                           then or equal to the requested OID...
+                           We need to give up here because an infinite
+                           loop will result otherwise.
+
+                           XXX: this really should be an option to
+                           continue like the -Cc option to the snmpwalk
+                           application.
+                        */
+                        notdone = 0;
+                        break;
+                    }
+
+                    /* push the varbind onto the return varbinds */
+                    if (py_netsnmp_emit_varbind(varbinds, sinkp, vars,
+                                                getlabel_flag, sprintval_flag,
+                                                &session_ctx->label_cache,
+                                                str_buf, sizeof(str_buf)) < 0)
+                    {
+                        py_log_msg(DEBUG, "netsnmp_walk: bad varbind (%d)",
+                                   varlist_ind);
+                        PyErr_Clear();
+                    }
+
+                    memcpy(oid_arr_broken_check[varlist_ind], vars->name,
+                           sizeof(oid) * vars->name_length);
+                    oid_arr_broken_check_len[varlist_ind] = vars->name_length;
+
+                    snmp_add_null_var(pdu, vars->name, vars->name_length);
+                }
+            }
+            if (response)
+            {
+                snmp_free_pdu(response);
+                response = NULL;
+            }
+        }
+
+        if (PyErr_Occurred())
+        {
+            error = 1;
+        }
+    }
+
+done:
+    if (started)
+    {
+        __walk_store_cursor(cursor, oid_arr_broken_check,
+                            oid_arr_broken_check_len, varlist_len);
+    }
+    __columnar_sink_close(&sink);
+    if (session_ctx)
+    {
+        __scratch_release(session_ctx, scratch);
+    }
+    Py_XDECREF(sess_ptr);
+    Py_XDECREF(varbinds);
+    SAFE_FREE(oid_arr_len);
+    SAFE_FREE(oid_arr_broken_check_len);
+    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+    {
+        SAFE_FREE(oid_arr[varlist_ind]);
+        SAFE_FREE(oid_arr_broken_check[varlist_ind]);
+    }
+    SAFE_FREE(oid_arr);
+    SAFE_FREE(oid_arr_broken_check);
+    if (response)
+    {
+        snmp_free_pdu(response);
+        response = NULL;
+    }
+    if (pdu)
+    {
+        snmp_free_pdu(pdu);
+        response = NULL;
+    }
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_getbulk(PyObject *self, PyObject *args)
+{
+    PyObject *columns = Py_None;
+    struct columnar_sink sink = {NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+                                 NULL};
+    struct columnar_sink *sinkp = NULL;
+    int nonrepeaters;
+    int maxrepetitions;
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varlist;
+    PyObject *varbinds = NULL;
+    PyObject *varbind;
+    PyObject *varbinds_iter;
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    int varbind_ind;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *retry_pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    netsnmp_variable_list *vars;
+    oid *oid_arr;
+    size_t oid_arr_len = MAX_OID_LEN;
+    int status;
+    u_char str_buf[STR_BUF_SIZE];
+    char *tag;
+    char *iid = NULL;
+    int getlabel_flag = NO_FLAGS;
+    int sprintval_flag = USE_BASIC;
+    int best_guess;
+    int retry_nosuch;
+    int err_ind;
+    int err_num;
+    char err_str[STR_BUF_SIZE];
+    int error = 0;
+    int auto_reps = 0;
+    int num_requested = 0;
+    struct timeval start;
+
+    oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
+
+    if (oid_arr && args)
+    {
+        if (!PyArg_ParseTuple(args, "OiiO|O", &session, &nonrepeaters,
+                              &maxrepetitions, &varlist, &columns))
+        {
+            goto done;
+        }
+
+        if (columns != Py_None)
+        {
+            if (__columnar_sink_open(columns, &sink) < 0)
+            {
+                goto done;
+            }
+            sinkp = &sink;
+        }
+
+        if (varlist &&
+            (varbinds = PyObject_GetAttrString(varlist, "varbinds")))
+        {
+            sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+            session_ctx = get_session_handle_from_capsule(sess_ptr);
+
+            if (!session_ctx)
+            {
+                goto done;
+            }
+
+            getlabel_flag = session_ctx->options.getlabel_flag;
+            sprintval_flag = session_ctx->options.sprintval_flag;
+            best_guess = session_ctx->options.best_guess;
+            retry_nosuch = session_ctx->options.retry_nosuch;
+
+            auto_reps = (maxrepetitions == AUTO_MAX_REPETITIONS);
+            if (auto_reps)
+            {
+                maxrepetitions = session_ctx->options.auto_max_repetitions;
+            }
+
+            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
+
+            pdu->errstat = nonrepeaters;
+            pdu->errindex = maxrepetitions;
+
+            varbinds_iter = PyObject_GetIter(varbinds);
+
+            while (varbinds_iter && (varbind = PyIter_Next(varbinds_iter)))
             {
                 if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
                     py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
@@ -2375,18 +5055,14 @@ static PyObject *netsnmp_getnext(PyObject *self, PyObject *args)
                 }
                 else
                 {
-                    tp = __tag2oid(tag, iid, oid_arr, &oid_arr_len, NULL,
-                                   best_guess);
+                    __cached_tag2oid(&session_ctx->oid_cache, tag, iid,
+                                     oid_arr, &oid_arr_len, NULL, best_guess);
                 }
 
-                py_log_msg(DEBUG,
-                           "netsnmp_getnext: filling request: %s:%s:%d:%d",
-                           tag, iid, oid_arr_len, best_guess);
-
                 if (oid_arr_len)
                 {
                     snmp_add_null_var(pdu, oid_arr, oid_arr_len);
-                    varlist_len++;
+                    num_requested++;
                 }
                 else
                 {
@@ -2396,7 +5072,7 @@ static PyObject *netsnmp_getnext(PyObject *self, PyObject *args)
                     error = 1;
                     snmp_free_pdu(pdu);
                     Py_DECREF(varbind);
-                    Py_DECREF(varlist_iter);
+                    Py_DECREF(varbinds_iter);
                     Py_XDECREF(tag_bytes);
                     Py_XDECREF(iid_bytes);
                     goto done;
@@ -2409,206 +5085,583 @@ static PyObject *netsnmp_getnext(PyObject *self, PyObject *args)
                 iid_bytes = NULL;
             }
 
-            Py_DECREF(varlist_iter);
+            Py_XDECREF(varbinds_iter);
+
+            if (PyErr_Occurred())
+            {
+                error = 1;
+                snmp_free_pdu(pdu);
+                pdu = NULL;
+                goto done;
+            }
+
+            for (;;)
+            {
+                if (auto_reps)
+                {
+                    /* kept to be sent again should the response not fit */
+                    retry_pdu = snmp_clone_pdu(pdu);
+                    gettimeofday(&start, NULL);
+                }
+
+                if (auto_reps)
+                {
+                    status = __send_sync_pdu(session_ctx, &pdu, &response,
+                                             retry_nosuch, err_str, &err_num,
+                                             &err_ind, NULL);
+                }
+                else
+                {
+                    status = __send_sync_pdu_split(session_ctx, &pdu,
+                                                   &response, retry_nosuch,
+                                                   err_str, &err_num,
+                                                   &err_ind, NULL);
+                }
+                __py_netsnmp_update_session_errors(session, err_str, err_num,
+                                                   err_ind);
+
+                if (status == 0 || !retry_pdu ||
+                    !__auto_repetitions_retry(&session_ctx->options,
+                                              response, 0))
+                {
+                    break;
+                }
+
+                PyErr_Clear();
+                if (response)
+                {
+                    snmp_free_pdu(response);
+                    response = NULL;
+                }
+                pdu = retry_pdu;
+                retry_pdu = NULL;
+                maxrepetitions = session_ctx->options.auto_max_repetitions;
+                pdu->max_repetitions = maxrepetitions;
+            }
+            if (retry_pdu)
+            {
+                snmp_free_pdu(retry_pdu);
+                retry_pdu = NULL;
+            }
+
+            if (status != 0)
+            {
+                error = 1;
+                if (response)
+                {
+                    snmp_free_pdu(response);
+                    response = NULL;
+                }
+                goto done;
+            }
+
+            /*
+             * Set up for numeric or full OID's, if necessary, saving the old
+             * output format which is restored when we finish.
+             */
+            __py_netsnmp_output_flags(&session_ctx->options,
+                                      &getlabel_flag, &sprintval_flag);
+
+            if (response && response->variables)
+            {
+                /* clear varlist to receive response varbinds*/
+                PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
+
+                if (PyErr_Occurred())
+                {
+                    error = 1;
+                    snmp_free_pdu(pdu);
+                    pdu = NULL;
+                    if (response)
+                    {
+                        snmp_free_pdu(response);
+                        response = NULL;
+                    }
+                    goto done;
+                }
+
+                for (vars = response->variables, varbind_ind = 0;
+                     vars;
+                     vars = vars->next_variable, varbind_ind++)
+                {
+
+                    /* push varbind onto varbinds */
+                    if (py_netsnmp_emit_varbind(varbinds, sinkp, vars,
+                                                getlabel_flag, sprintval_flag,
+                                                &session_ctx->label_cache,
+                                                str_buf, sizeof(str_buf)) < 0)
+                    {
+                        py_log_msg(DEBUG, "netsnmp_getbulk: bad varbind (%d)",
+                                   varbind_ind);
+                        PyErr_Clear();
+                    }
+                }
+
+                if (auto_reps && num_requested > nonrepeaters)
+                {
+                    __auto_repetitions_learn(&session_ctx->options,
+                                             maxrepetitions,
+                                             (varbind_ind - nonrepeaters) /
+                                                 (num_requested - nonrepeaters),
+                                             0, &start);
+                }
+            }
+
+            if (response)
+            {
+                snmp_free_pdu(response);
+                response = NULL;
+            }
+
+            // Py_DECREF(varbinds);
+        }
+
+        if (PyErr_Occurred())
+        {
+            error = 1;
+        }
+    }
+
+done:
+    if (session_ctx && auto_reps)
+    {
+        __py_netsnmp_store_auto_repetitions(session, &session_ctx->options);
+    }
+    __columnar_sink_close(&sink);
+    Py_XDECREF(varbinds);
+    Py_XDECREF(sess_ptr);
+    SAFE_FREE(oid_arr);
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_bulkwalk(PyObject *self, PyObject *args)
+{
+    PyObject *columns = Py_None;
+    struct columnar_sink sink = {NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+                                 NULL};
+    struct columnar_sink *sinkp = NULL;
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varlist = NULL;
+    PyObject *varlist_iter = NULL;
+    PyObject *varbind = NULL;
+    PyObject *varbinds = NULL;
+    PyObject *tag_bytes = NULL;
+    PyObject *iid_bytes = NULL;
+    int varlist_len = 0;
+    int varlist_ind;
+
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *retry_pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    netsnmp_variable_list *vars = NULL;
+
+    oid **oid_arr = NULL;
+    size_t *oid_arr_len = NULL;
+    oid **last_arr = NULL;
+    size_t *last_arr_len = NULL;
+    PyObject *start_oids = Py_None;
+    PyObject *cursor = Py_None;
+    int started = 0;
+    // char **initial_oid_str_arr = NULL;
+    char **oid_str_arr = NULL;
+    char **oid_idx_str_arr = NULL;
+    int status;
+    u_char str_buf[STR_BUF_SIZE];
+    int getlabel_flag = NO_FLAGS;
+    int sprintval_flag = USE_BASIC;
+    int best_guess;
+    int retry_nosuch;
+    int err_ind;
+    int err_num;
+    char err_str[STR_BUF_SIZE];
+    int notdone = 1;
+    int error = 0;
+    int nonrepeaters;
+    int maxrepetitions;
+    int auto_reps = 0;
+    int requested = 0;
+    int responses = 0;
+    int used;
+    struct timeval start;
+
+    py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting");
+
+    if (args)
+    {
+        if (!PyArg_ParseTuple(args, "OiiO|OOO", &session, &nonrepeaters,
+                              &maxrepetitions, &varlist, &columns, &start_oids,
+                              &cursor))
+        {
+            goto done;
+        }
 
-            if (PyErr_Occurred())
+        if (columns != Py_None)
+        {
+            if (__columnar_sink_open(columns, &sink) < 0)
             {
-                error = 1;
-                snmp_free_pdu(pdu);
                 goto done;
             }
+            sinkp = &sink;
         }
 
-        /* if we cannot represent the number of bad oids, we will need to resize. */
-        if (snmp_version == 1 && DEFAULT_NUM_BAD_OIDS < varlist_len)
+        py_log_msg(DEBUG, "netsnmp_bulkwalk: nonreps (%d) max_reps (%d)",
+                   nonrepeaters, maxrepetitions);
+
+        if (!varlist)
         {
-            invalid_oids = bitarray_calloc(varlist_len);
+            goto done;
+        }
 
-            if (!invalid_oids)
+        if ((varbinds = PyObject_GetAttrString(varlist, "varbinds")) == NULL)
+        {
+            goto done;
+        }
+
+        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+        session_ctx = get_session_handle_from_capsule(sess_ptr);
+
+        if (!session_ctx)
+        {
+            goto done;
+        }
+
+        getlabel_flag = session_ctx->options.getlabel_flag;
+        sprintval_flag = session_ctx->options.sprintval_flag;
+        best_guess = session_ctx->options.best_guess;
+        retry_nosuch = session_ctx->options.retry_nosuch;
+
+        auto_reps = (maxrepetitions == AUTO_MAX_REPETITIONS);
+        if (auto_reps)
+        {
+            maxrepetitions = session_ctx->options.auto_max_repetitions;
+        }
+
+        /* we need an initial count for memory allocation */
+        varlist_iter = PyObject_GetIter(varlist);
+        varlist_len = 0;
+        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        {
+            varlist_len++;
+            Py_DECREF(varbind);
+        }
+        Py_XDECREF(varlist_iter);
+
+        oid_arr_len = calloc(varlist_len, sizeof(size_t));
+        oid_arr = calloc(varlist_len, sizeof(oid *));
+        last_arr_len = calloc(varlist_len, sizeof(size_t));
+        last_arr = calloc(varlist_len, sizeof(oid *));
+        // initial_oid_str_arr = calloc(varlist_len, sizeof(char *));
+        oid_str_arr = calloc(varlist_len, sizeof(char *));
+        oid_idx_str_arr = calloc(varlist_len, sizeof(char *));
+
+        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+        {
+            oid_arr[varlist_ind] = calloc(MAX_OID_LEN, sizeof(oid));
+            oid_arr_len[varlist_ind] = MAX_OID_LEN;
+            last_arr[varlist_ind] = calloc(MAX_OID_LEN, sizeof(oid));
+        }
+
+        /* get the initial oids */
+        py_log_msg(DEBUG, "netsnmp_bulkwalk: Getting initial oids");
+        varlist_ind = 0;
+        varlist_iter = PyObject_GetIter(varlist);
+        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        {
+            if (py_netsnmp_attr_string(varbind, "oid",
+                                       &oid_str_arr[varlist_ind],
+                                       NULL,
+                                       &tag_bytes) >= 0 &&
+                py_netsnmp_attr_string(varbind, "oid_index",
+                                       &oid_idx_str_arr[varlist_ind],
+                                       NULL,
+                                       &iid_bytes) >= 0)
+            {
+
+                // initial_oid_str_arr[varlist_ind] = oid_str_arr[varlist_ind];
+
+                py_log_msg(DEBUG,
+                           "netsnmp_bulkwalk: Initial oid(%s) oid_idx(%s)",
+                           oid_str_arr[varlist_ind],
+                           oid_idx_str_arr[varlist_ind]);
+
+                // Get oid array len
+                __cached_tag2oid(&session_ctx->oid_cache,
+                                 oid_str_arr[varlist_ind],
+                                 oid_idx_str_arr[varlist_ind],
+                                 oid_arr[varlist_ind],
+                                 &oid_arr_len[varlist_ind], NULL, best_guess);
+            }
+            else
+            {
+                oid_arr_len[varlist_ind] = 0;
+            }
+
+            if (!oid_arr_len[varlist_ind])
             {
+                PyErr_Format(EasySNMPUnknownObjectIDError,
+                             "unknown object id (%s)",
+                             (oid_str_arr[varlist_ind] ? oid_str_arr[varlist_ind] : "<null>"));
                 error = 1;
-                snmp_free_pdu(pdu);
-                const char *err_msg = "failed to call bitarray_calloc";
-                PyErr_SetString(PyExc_RuntimeError, err_msg);
+                Py_DECREF(varbind);
+                Py_DECREF(varlist_iter);
+                Py_XDECREF(tag_bytes);
+                Py_XDECREF(iid_bytes);
                 goto done;
             }
+
+            Py_DECREF(varbind);
+            Py_XDECREF(tag_bytes);
+            tag_bytes = NULL;
+            Py_XDECREF(iid_bytes);
+            iid_bytes = NULL;
+            varlist_ind++;
         }
 
-        status = __send_sync_pdu(ss, &pdu, &response, retry_nosuch, err_str,
-                                 &err_num, &err_ind, invalid_oids);
+        Py_XDECREF(varlist_iter);
 
-        __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
-        if (status != 0)
+        if (PyErr_Occurred())
         {
             error = 1;
             goto done;
         }
 
         /*
-        ** Set up for numeric or full OID's, if necessary.  Save the old
-        ** output format so that it can be restored when we finish -- this
-        ** is a library-wide global, and has to be set/restored for each
-        ** session.
-        */
-        old_format = netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID,
-                                        NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
+         * Set up for numeric or full OID's, if necessary, saving the old
+         * output format which is restored when we finish.
+         */
+        __py_netsnmp_output_flags(&session_ctx->options,
+                                  &getlabel_flag, &sprintval_flag);
 
-        if (py_netsnmp_attr_long(session, "use_long_names"))
-        {
-            getlabel_flag |= USE_LONG_NAMES;
+        /* delete the existing varbinds that we'll replace */
+        PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
 
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_FULL);
-        }
-        /* Setting use_numeric forces use_long_names on so check for
-           use_numeric after use_long_names (above) to make sure the final
-           outcome of NETSNMP_DS_LIB_OID_OUTPUT_FORMAT is
-           NETSNMP_OID_OUTPUT_NUMERIC */
-        if (py_netsnmp_attr_long(session, "use_numeric"))
+        if (PyErr_Occurred())
         {
-            getlabel_flag |= USE_LONG_NAMES;
-            getlabel_flag |= USE_NUMERIC_OIDS;
-
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_NUMERIC);
+            error = 1;
+            goto done;
         }
 
         /*
-         * In SNMPv1 we go through the response variables only if we know
-         * the varlist_ind is not set in the invalid_oids bit array.
-         * For bits that are set, we fix the input varbind so that it
-         * indicates NOSUCHNAME. For bits that are not set, we fill in the
-         * corresponding varbind and advance.
-         *
-         * In SNMPv2/v3 we simply fill the response variables against the
-         * original input Varbind list.
+         * Each subtree is walked from its root, or from the OID given for it
+         * when resuming, and the last OID received is kept for the cursor.
          */
-        vars = (response ? response->variables : NULL);
+        if (start_oids != Py_None)
+        {
+            if (__walk_start_oids(start_oids, varlist_len, last_arr, last_arr_len,
+                                  best_guess, &session_ctx->oid_cache) < 0)
+            {
+                error = 1;
+                goto done;
+            }
+        }
+        else
+        {
+            for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+            {
+                memcpy(last_arr[varlist_ind], oid_arr[varlist_ind],
+                       oid_arr_len[varlist_ind] * sizeof(oid));
+                last_arr_len[varlist_ind] = oid_arr_len[varlist_ind];
+            }
+        }
+        started = 1;
 
+        py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting bulk walk request");
         for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
         {
-            int no_such_name = 0;
+            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
+            pdu->non_repeaters = nonrepeaters;
+            pdu->max_repetitions = maxrepetitions;
+            snmp_add_null_var(pdu, last_arr[varlist_ind],
+                              last_arr_len[varlist_ind]);
 
-            if (snmp_version == 1)
+            notdone = 1;
+            while (notdone)
             {
-                /* check if oid is invalid */
-                if (bitarray_test_bit(invalid_oids, varlist_ind))
+                py_log_msg(DEBUG, "netsnmp_bulkwalk: Sending pdu req");
+                requested = pdu->max_repetitions;
+                if (auto_reps)
                 {
-                    no_such_name = 1;
+                    /* kept to be sent again should the response not fit */
+                    retry_pdu = snmp_clone_pdu(pdu);
+                    gettimeofday(&start, NULL);
                 }
-            }
-            else if (!vars)
-            {
-                /*
-                 * no more varbinds to inspect
-                 * (this will only happen if no response is received from SNMP.
-                 */
-                break;
-            }
 
-            varbind = PySequence_GetItem(varlist, varlist_ind);
+                status = __send_sync_pdu(session_ctx, &pdu, &response, retry_nosuch,
+                                         err_str, &err_num, &err_ind, NULL);
 
-            if (!no_such_name && PyObject_HasAttrString(varbind, "oid"))
-            {
-                *str_buf = '.';
-                *(str_buf + 1) = '\0';
-                out_len = 0;
-                tp = netsnmp_sprint_realloc_objid_tree(&str_bufp, &str_buf_len,
-                                                       &out_len, 0, &buf_over,
-                                                       vars->name,
-                                                       vars->name_length);
-                str_buf[sizeof(str_buf) - 1] = '\0';
+                __py_netsnmp_update_session_errors(session, err_str, err_num,
+                                                   err_ind);
+                if (status != 0 && retry_pdu &&
+                    __auto_repetitions_retry(&session_ctx->options, response,
+                                             responses))
+                {
+                    PyErr_Clear();
+                    if (response)
+                    {
+                        snmp_free_pdu(response);
+                        response = NULL;
+                    }
+                    pdu = retry_pdu;
+                    retry_pdu = NULL;
+                    pdu->max_repetitions =
+                        session_ctx->options.auto_max_repetitions;
+                    continue;
+                }
+                if (retry_pdu)
+                {
+                    snmp_free_pdu(retry_pdu);
+                    retry_pdu = NULL;
+                }
 
-                type = __translate_asn_type(vars->type);
+                if (status != 0)
+                {
+                    error = 1;
+                    if (response)
+                    {
+                        snmp_free_pdu(response);
+                        response = NULL;
+                    }
+                    goto done;
+                }
 
-                if (__is_leaf(tp))
+                if (!response ||
+                    !response->variables ||
+                    status != STAT_SUCCESS ||
+                    response->errstat != SNMP_ERR_NOERROR)
                 {
-                    getlabel_flag &= ~NON_LEAF_NAME;
-                    py_log_msg(DEBUG, "netsnmp_getnext: is_leaf: %d", tp->type);
+                    notdone = 0;
                 }
                 else
                 {
-                    getlabel_flag |= NON_LEAF_NAME;
-                    py_log_msg(DEBUG, "netsnmp_getnext: !is_leaf: %d", tp->type);
-                }
+                    responses++;
+                    used = 0;
+                    vars = (response ? response->variables : NULL);
+                    while (vars)
+                    {
 
-                py_log_msg(DEBUG, "netsnmp_getnext: str_buf: %s", str_buf);
+                        if ((vars->name_length < oid_arr_len[varlist_ind]) ||
+                            (memcmp(oid_arr[varlist_ind], vars->name,
+                                    oid_arr_len[varlist_ind] * sizeof(oid)) != 0))
+                        {
+                            py_log_msg(DEBUG,
+                                       "netsnmp_bulkwalk: encountered end condition "
+                                       "(next subtree iteration out of scope)");
+                            notdone = 0;
+                            break;
+                        }
 
-                __get_label_iid((char *)str_buf, &tag, &iid, getlabel_flag);
+                        if ((vars->type == SNMP_ENDOFMIBVIEW) ||
+                            (vars->type == SNMP_NOSUCHOBJECT) ||
+                            (vars->type == SNMP_NOSUCHINSTANCE))
+                        {
+                            py_log_msg(DEBUG,
+                                       "netsnmp_bulkwalk: encountered end condition "
+                                       "(ENDOFMIBVIEW, NOSUCHOBJECT, NO SUCH "
+                                       "INSTANCE)");
+                            notdone = 0;
+                            break;
+                        }
 
-                py_log_msg(DEBUG, "netsnmp_getnext: filling response: %s:%s",
-                           tag, iid);
+                        /* push the varbind onto the return varbinds */
+                        if (py_netsnmp_emit_varbind(varbinds, sinkp, vars,
+                                                    getlabel_flag,
+                                                    sprintval_flag,
+                                                    &session_ctx->label_cache,
+                                                    str_buf,
+                                                    sizeof(str_buf)) < 0)
+                        {
+                            py_log_msg(DEBUG,
+                                       "netsnmp_bulkwalk: bad varbind (%d)",
+                                       varlist_ind);
+                            PyErr_Clear();
+                        }
+                        used++;
 
-                py_netsnmp_attr_set_string(varbind, "oid", tag, STRLEN(tag));
-                py_netsnmp_attr_set_string(varbind, "oid_index", iid,
-                                           STRLEN(iid));
+                        memcpy(last_arr[varlist_ind], vars->name,
+                               vars->name_length * sizeof(oid));
+                        last_arr_len[varlist_ind] = vars->name_length;
 
-                __get_type_str(type, type_str, 1);
+                        // Create next request if we've reached the end
+                        if (vars->next_variable == NULL)
+                        {
+                            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
+                            pdu->non_repeaters = nonrepeaters;
+                            pdu->max_repetitions = maxrepetitions;
+                            snmp_add_null_var(pdu, vars->name, vars->name_length);
+                        }
 
-                py_netsnmp_attr_set_string(varbind, "snmp_type", type_str,
-                                           strlen(type_str));
+                        // Move on to next
+                        vars = vars->next_variable;
+                    }
+                    py_log_msg(DEBUG,
+                               "netsnmp_bulkwalk: Finished reading all "
+                               "variables for req");
 
-                len = __snprint_value((char *)str_buf, sizeof(str_buf),
-                                      vars, tp, type, sprintval_flag);
-                str_buf[len] = '\0';
+                    if (auto_reps)
+                    {
+                        /* vars is left on the first varbind past the end */
+                        __auto_repetitions_learn(&session_ctx->options,
+                                                 requested, used,
+                                                 vars != NULL, &start);
+                        if (notdone)
+                        {
+                            pdu->max_repetitions =
+                                session_ctx->options.auto_max_repetitions;
+                        }
+                    }
+                }
 
-                py_netsnmp_attr_set_string(varbind, "value", (char *)str_buf,
-                                           len);
-            }
-            else if (no_such_name)
-            {
-                if (!PyObject_HasAttrString(varbind, "oid"))
+                if (response)
                 {
-                    py_log_msg(DEBUG, "netsnmp_get: bad varbind (%d)",
-                               varlist_ind);
-                    // Py_XDECREF(varbind); /* Double decref? */
+                    snmp_free_pdu(response);
+                    response = NULL;
                 }
-
-                py_netsnmp_attr_set_string(varbind, "snmp_type", "NOSUCHNAME",
-                                           strlen("NOSUCHNAME"));
-
-                py_netsnmp_attr_set_string(varbind, "value",
-                                           "NOSUCHNAME", strlen("NOSUCHNAME"));
-            }
-            else
-            {
-                py_log_msg(DEBUG, "netsnmp_getnext: bad varbind (%d)",
-                           varlist_ind);
-            }
-            Py_XDECREF(varbind);
-            /*
-             * in v1 this will only advance if the varbind index is valid;
-             * in v2/v3 no_such_name is always set to 0.
-             */
-            if (!no_such_name)
-            {
-                vars = vars->next_variable;
             }
         }
+        py_log_msg(DEBUG, "netsnmp_bulkwalk: Ending bulk walk request");
 
-        /* Reset the library's behavior for numeric/symbolic OID's. */
-        netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                           NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                           old_format);
+        if (PyErr_Occurred())
+        {
+            error = 1;
+        }
     }
 
 done:
-    Py_XDECREF(sess_ptr);
-    Py_XDECREF(err_bytes);
-    /* the pointers will be equal if we didn't allocate additional space */
-    if (invalid_oids != snmpv1_invalid_oids)
+    if (started)
     {
-        bitarray_free(invalid_oids);
+        __walk_store_cursor(cursor, last_arr, last_arr_len, varlist_len);
+    }
+    if (session_ctx && auto_reps)
+    {
+        __py_netsnmp_store_auto_repetitions(session, &session_ctx->options);
     }
+    __columnar_sink_close(&sink);
+    py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting cleanup");
+    Py_XDECREF(varbinds);
+    Py_XDECREF(sess_ptr);
+    // SAFE_FREE(initial_oid_str_arr);
+    SAFE_FREE(oid_arr_len);
 
-    SAFE_FREE(oid_arr);
-    if (response)
+    SAFE_FREE(last_arr_len);
+
+    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
     {
-        snmp_free_pdu(response);
-        response = NULL;
+        SAFE_FREE(oid_arr[varlist_ind]);
+        SAFE_FREE(last_arr[varlist_ind]);
     }
+
+    SAFE_FREE(oid_arr);
+    SAFE_FREE(last_arr);
+    SAFE_FREE(oid_str_arr);
+    SAFE_FREE(oid_idx_str_arr);
+    py_log_msg(DEBUG, "netsnmp_bulkwalk: End cleanup");
+
     if (error)
     {
         return NULL;
@@ -2616,77 +5669,47 @@ done:
     Py_RETURN_NONE;
 }
 
-static PyObject *netsnmp_walk(PyObject *self, PyObject *args)
+static PyObject *netsnmp_set(PyObject *self, PyObject *args)
 {
     PyObject *session = NULL;
     PyObject *sess_ptr = NULL;
     PyObject *varlist = NULL;
-    PyObject *varlist_iter;
-    PyObject *varbind;
-    PyObject *varbinds = NULL;
-    PyObject *err_bytes = NULL;
+    PyObject *varbind = NULL;
+    PyObject *ret = NULL;
     PyObject *tag_bytes = NULL;
     PyObject *iid_bytes = NULL;
-    int varlist_len = 0;
-    int varlist_ind;
+    PyObject *type_bytes = NULL;
+    PyObject *value_bytes = NULL;
     struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss;
     netsnmp_pdu *pdu = NULL;
     netsnmp_pdu *response = NULL;
-    /*
-    ** Variable `oldvars` does not appear to fufill any immediate purpose and
-    ** causes segfaults in some cases, especially when running against OID '.1'
-    ** For legacy reasons, however, we will only leave it commented out, should
-    ** we find that it was only partially implemented or actually served a purpose
-    ** somewhere in the Net-SNMP library
-    */
-    netsnmp_variable_list *vars; //, *oldvars;
-    struct tree *tp;
+    struct tree *tp = NULL;
+    char *tag = NULL;
+    char *iid = NULL;
+    char *val = NULL;
+    char *type_str;
     int len;
-    oid **oid_arr = NULL;
-    size_t *oid_arr_len = NULL;
-    oid **oid_arr_broken_check = NULL;
-    int *oid_arr_broken_check_len = NULL;
+    oid *oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
+    size_t oid_arr_len = MAX_OID_LEN;
     int type;
-    char type_str[MAX_TYPE_NAME_LEN];
-    int status;
-    u_char str_buf[STR_BUF_SIZE];
-    u_char *str_bufp = str_buf;
-    size_t str_buf_len = sizeof(str_buf);
-    size_t out_len = 0;
-    int buf_over = 0;
-    char *tag;
-    char *iid = NULL;
-    int getlabel_flag = NO_FLAGS;
-    int sprintval_flag = USE_BASIC;
-    int old_format;
+    u_char tmp_val_str[STR_BUF_SIZE];
+    int use_enums;
+    struct enum_list *ep = NULL;
     int best_guess;
-    int retry_nosuch;
+    int status;
     int err_ind;
     int err_num;
     char err_str[STR_BUF_SIZE];
-    int notdone = 1;
-    char *tmpstr;
     Py_ssize_t tmplen;
     int error = 0;
-    bitarray *invalid_oids = NULL;
 
-    if (args)
+    if (oid_arr && args)
     {
         if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
         {
             goto done;
         }
 
-        if (!varlist)
-        {
-            goto done;
-        }
-
-        if ((varbinds = PyObject_GetAttrString(varlist, "varbinds")) == NULL)
-        {
-            goto done;
-        }
         sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
         session_ctx = get_session_handle_from_capsule(sess_ptr);
 
@@ -2695,1379 +5718,1518 @@ static PyObject *netsnmp_walk(PyObject *self, PyObject *args)
             goto done;
         }
 
-        ss = session_ctx->handle;
-        invalid_oids = session_ctx->invalid_oids;
-
-        if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
-        {
-            goto done;
-        }
-        memcpy(&err_str, tmpstr, tmplen);
-        err_num = py_netsnmp_attr_long(session, "error_number");
-        err_ind = py_netsnmp_attr_long(session, "error_index");
-
-        if (py_netsnmp_attr_long(session, "use_long_names"))
-        {
-            getlabel_flag |= USE_LONG_NAMES;
-        }
-        if (py_netsnmp_attr_long(session, "use_numeric"))
-        {
-            getlabel_flag |= USE_NUMERIC_OIDS;
-        }
-        if (py_netsnmp_attr_long(session, "use_enums"))
-        {
-            sprintval_flag = USE_ENUMS;
-        }
-        if (py_netsnmp_attr_long(session, "use_sprint_value"))
-        {
-            sprintval_flag = USE_SPRINT_VALUE;
-        }
-        best_guess = py_netsnmp_attr_long(session, "best_guess");
-        retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
+        use_enums = session_ctx->options.use_enums;
+        best_guess = session_ctx->options.best_guess;
 
-        pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+        pdu = snmp_pdu_create(SNMP_MSG_SET);
 
-        /* we need an initial count for memory allocation */
-        varlist_iter = PyObject_GetIter(varlist);
-        varlist_len = 0;
-        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        if (varlist)
         {
-            varlist_len++;
-            Py_DECREF(varbind);
-        }
-        Py_XDECREF(varlist_iter);
-
-        oid_arr_len = calloc(varlist_len, sizeof(size_t));
-        oid_arr_broken_check_len = calloc(varlist_len, sizeof(int));
+            PyObject *varlist_iter = PyObject_GetIter(varlist);
 
-        oid_arr = calloc(varlist_len, sizeof(oid *));
-        oid_arr_broken_check = calloc(varlist_len, sizeof(oid *));
+            while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+            {
+                if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
+                    py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
+                {
+                    oid_arr_len = 0;
+                }
+                else
+                {
+                    tp = __cached_tag2oid(&session_ctx->oid_cache, tag, iid,
+                                          oid_arr, &oid_arr_len, &type,
+                                          best_guess);
+                }
 
-        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
-        {
-            oid_arr[varlist_ind] = calloc(MAX_OID_LEN, sizeof(oid));
-            oid_arr_broken_check[varlist_ind] = calloc(MAX_OID_LEN,
-                                                       sizeof(oid));
+                if (oid_arr_len == 0)
+                {
+                    PyErr_Format(EasySNMPUnknownObjectIDError,
+                                 "unknown object id (%s)",
+                                 (tag ? tag : "<null>"));
+                    error = 1;
+                    snmp_free_pdu(pdu);
+                    pdu = NULL;
+                    Py_DECREF(varbind);
+                    Py_DECREF(varlist_iter);
+                    Py_XDECREF(tag_bytes);
+                    Py_XDECREF(iid_bytes);
+                    goto done;
+                }
 
-            oid_arr_len[varlist_ind] = MAX_OID_LEN;
-            oid_arr_broken_check_len[varlist_ind] = MAX_OID_LEN;
-        }
+                if (type == TYPE_UNKNOWN)
+                {
+                    if (py_netsnmp_attr_string(varbind, "snmp_type", &type_str, NULL, &type_bytes) < 0)
+                    {
+                        /**
+                         * NoneType error returned if this is not included.
+                         * Not sure why original author did not raise an error
+                         * here before. Keep an eye out for edge cases!
+                         */
+                        PyErr_SetString(EasySNMPUndeterminedTypeError,
+                                        "a type could not be determine for "
+                                        "the object");
+                        error = 1;
+                        snmp_free_pdu(pdu);
+                        pdu = NULL;
+                        Py_DECREF(varbind);
+                        Py_DECREF(varlist_iter);
+                        Py_XDECREF(tag_bytes);
+                        Py_XDECREF(iid_bytes);
+                        Py_XDECREF(type_bytes);
+                        goto done;
+                    }
+                    type = __translate_appl_type(type_str);
+                    if (type == TYPE_UNKNOWN)
+                    {
+                        PyErr_SetString(EasySNMPUndeterminedTypeError,
+                                        "a type could not be determine for "
+                                        "the object");
+                        error = 1;
+                        snmp_free_pdu(pdu);
+                        pdu = NULL;
+                        Py_DECREF(varbind);
+                        Py_DECREF(varlist_iter);
+                        Py_XDECREF(tag_bytes);
+                        Py_XDECREF(iid_bytes);
+                        Py_XDECREF(type_bytes);
+                        goto done;
+                    }
+                    Py_XDECREF(type_bytes);
+                }
 
-        /* get the initial starting oids */
-        varlist_iter = PyObject_GetIter(varlist);
-        varlist_ind = 0;
-        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
-        {
-            if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
-                py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
-            {
-                oid_arr_len[varlist_ind] = 0;
-            }
-            else
-            {
-                tp = __tag2oid(tag, iid,
-                               oid_arr[varlist_ind], &oid_arr_len[varlist_ind],
-                               NULL, best_guess);
-            }
+                if (py_netsnmp_attr_string(varbind, "value", &val, &tmplen, &value_bytes) < 0)
+                {
+                    snmp_free_pdu(pdu);
+                    pdu = NULL;
+                    Py_DECREF(varbind);
+                    Py_DECREF(varlist_iter);
+                    Py_XDECREF(tag_bytes);
+                    Py_XDECREF(iid_bytes);
+                    Py_XDECREF(type_bytes);
+                    Py_XDECREF(value_bytes);
+                    goto done;
+                }
+                memset(tmp_val_str, 0, sizeof(tmp_val_str));
+                if (tmplen >= (long int)sizeof(tmp_val_str))
+                {
+                    tmplen = sizeof(tmp_val_str) - 1;
+                }
+                memcpy(tmp_val_str, val, tmplen);
+                if (type == TYPE_INTEGER && use_enums && tp && tp->enums)
+                {
+                    for (ep = tp->enums; ep; ep = ep->next)
+                    {
+                        if (val && !strcmp(ep->label, val))
+                        {
+                            snprintf((char *)tmp_val_str, sizeof(tmp_val_str),
+                                     "%d", ep->value);
+                            break;
+                        }
+                    }
+                }
+                len = (int)tmplen;
+                status = __add_var_val_str(pdu, oid_arr, oid_arr_len,
+                                           (char *)tmp_val_str, len, type);
 
-            if (oid_arr_len[varlist_ind])
-            {
-                py_log_msg(DEBUG, "netsnmp_walk: filling request: %s:%s:%d:%d",
-                           tag, iid, oid_arr_len[varlist_ind], best_guess);
+                if (status == FAILURE)
+                {
+                    py_log_msg(ERROR, "set: adding variable/value to PDU");
+                }
 
-                snmp_add_null_var(pdu, oid_arr[varlist_ind],
-                                  oid_arr_len[varlist_ind]);
+                /* release reference when done */
+                Py_DECREF(varbind);
+                Py_XDECREF(value_bytes);
+                Py_XDECREF(tag_bytes);
+                tag_bytes = NULL;
+                Py_XDECREF(iid_bytes);
+                iid_bytes = NULL;
             }
-            else
+
+            Py_DECREF(varlist_iter);
+            if (PyErr_Occurred())
             {
-                PyErr_Format(EasySNMPUnknownObjectIDError,
-                             "unknown object id (%s)",
-                             (tag ? tag : "<null>"));
                 error = 1;
                 snmp_free_pdu(pdu);
                 pdu = NULL;
-                Py_DECREF(varlist_iter);
-                Py_DECREF(varbind);
-                Py_XDECREF(tag_bytes);
-                Py_XDECREF(iid_bytes);
                 goto done;
             }
-            /* release reference when done */
-            Py_DECREF(varbind);
-            Py_XDECREF(tag_bytes);
-            tag_bytes = NULL;
-            Py_XDECREF(iid_bytes);
-            iid_bytes = NULL;
-            varlist_ind++;
         }
 
-        Py_XDECREF(varlist_iter);
+        status = __send_sync_pdu(session_ctx, &pdu, &response, NO_RETRY_NOSUCH,
+                                 err_str, &err_num, &err_ind, NULL);
+        __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
 
-        if (PyErr_Occurred())
+        if (response)
+        {
+            snmp_free_pdu(response);
+            response = NULL;
+        }
+
+        if (status != 0)
         {
             error = 1;
-            snmp_free_pdu(pdu);
-            pdu = NULL;
             goto done;
         }
 
-        /*
-        ** Set up for numeric or full OID's, if necessary.  Save the old
-        ** output format so that it can be restored when we finish -- this
-        ** is a library-wide global, and has to be set/restored for each
-        ** session.
-        */
-        old_format = netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID,
-                                        NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
-
-        if (py_netsnmp_attr_long(session, "use_long_names"))
+        if (status == STAT_SUCCESS)
         {
-            getlabel_flag |= USE_LONG_NAMES;
-
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_FULL);
+            ret = Py_BuildValue("i", 1); /* success, return True */
         }
-
-        /*
-        ** Setting use_numeric forces use_long_names on so check for
-        ** use_numeric after use_long_names (above) to make sure the final
-        ** outcome of NETSNMP_DS_LIB_OID_OUTPUT_FORMAT is
-        ** NETSNMP_OID_OUTPUT_NUMERIC
-        */
-        if (py_netsnmp_attr_long(session, "use_numeric"))
+        else
         {
-            getlabel_flag |= USE_LONG_NAMES;
-            getlabel_flag |= USE_NUMERIC_OIDS;
-
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_NUMERIC);
+            ret = Py_BuildValue("i", 0); /* fail, return False */
         }
+    }
 
-        /* delete the existing varbinds that we'll replace */
-        PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
+done:
+    Py_XDECREF(sess_ptr);
+    SAFE_FREE(oid_arr);
+    if (error)
+    {
+        return NULL;
+    }
+    return (ret ? ret : Py_BuildValue(""));
+}
+
+static PyObject *netsnmp_resolve(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *varlist = NULL;
+    PyObject *varlist_iter = NULL;
+    PyObject *varbind = NULL;
+    PyObject *oid_tuple = NULL;
+    PyObject *oids = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    oid oid_arr[MAX_OID_LEN];
+    size_t oid_arr_len = 0;
+
+    if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
+    {
+        return NULL;
+    }
+
+    if (!(session_ctx = __get_session_ctx(session)))
+    {
+        return NULL;
+    }
+
+    if (!(oids = PyList_New(0)) || !(varlist_iter = PyObject_GetIter(varlist)))
+    {
+        goto error;
+    }
+
+    while ((varbind = PyIter_Next(varlist_iter)))
+    {
+        if (__py_netsnmp_varbind_oid(varbind, oid_arr, &oid_arr_len,
+                                     session_ctx->options.best_guess,
+                                     &session_ctx->oid_cache) == 0 &&
+            (oid_tuple = py_netsnmp_oid_tuple(oid_arr, oid_arr_len)))
+        {
+            PyList_Append(oids, oid_tuple);
+            Py_DECREF(oid_tuple);
+        }
+        Py_DECREF(varbind);
 
         if (PyErr_Occurred())
         {
-            error = 1;
-            snmp_free_pdu(pdu);
-            pdu = NULL;
-            goto done;
+            goto error;
         }
+    }
 
-        /* save the starting OID */
+    if (PyErr_Occurred())
+    {
+        goto error;
+    }
 
-        for (vars = pdu->variables, varlist_ind = 0;
-             vars != NULL;
-             vars = vars->next_variable, varlist_ind++)
-        {
+    Py_DECREF(varlist_iter);
+    return oids;
 
-            oid_arr_broken_check_len[varlist_ind] = vars->name_length;
-            memcpy(oid_arr_broken_check[varlist_ind],
-                   vars->name, vars->name_length * sizeof(oid));
-        }
+error:
+    Py_XDECREF(varlist_iter);
+    Py_XDECREF(oids);
+    return NULL;
+}
 
-        while (notdone)
-        {
-            status = __send_sync_pdu(ss, &pdu, &response, retry_nosuch,
-                                     err_str, &err_num, &err_ind, invalid_oids);
-            __py_netsnmp_update_session_errors(session, err_str, err_num,
-                                               err_ind);
-            if (status != 0)
-            {
-                error = 1;
-                /*
-                 * pdu is released in __send_sync_pdu if an error occurs during
-                 * the snmp_sess_synch_response function. It does not, however,
-                 * appear to be set to NULL afterwards.
-                 */
-                pdu = NULL;
-                if (response)
-                {
-                    snmp_free_pdu(response);
-                    response = NULL;
-                }
-                goto done;
-            }
+static PyObject *netsnmp_oid_cache_resize(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    Py_ssize_t maxsize;
 
-            if (!response || !response->variables ||
-                status != STAT_SUCCESS ||
-                response->errstat != SNMP_ERR_NOERROR)
-            {
-                notdone = 0;
-            }
-            else
-            {
+    if (!PyArg_ParseTuple(args, "On", &session, &maxsize))
+    {
+        return NULL;
+    }
 
-                pdu = snmp_pdu_create(SNMP_MSG_GETNEXT);
+    if (maxsize < 0 || maxsize > INT_MAX / 2)
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid OID cache size");
+        return NULL;
+    }
 
-                for (vars = (response ? response->variables : NULL),
-                    varlist_ind = 0;
-                     vars && (varlist_ind < varlist_len);
-                     vars = vars->next_variable, varlist_ind++)
-                {
-                    if ((vars->name_length < oid_arr_len[varlist_ind]) ||
-                        (memcmp(oid_arr[varlist_ind], vars->name,
-                                oid_arr_len[varlist_ind] * sizeof(oid)) != 0))
-                    {
-                        notdone = 0;
-                        break;
-                    }
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
+    Py_XDECREF(sess_ptr);
 
-                    if ((vars->type == SNMP_ENDOFMIBVIEW) ||
-                        (vars->type == SNMP_NOSUCHOBJECT) ||
-                        (vars->type == SNMP_NOSUCHINSTANCE))
-                    {
-                        notdone = 0;
-                        break;
-                    }
+    if (!session_ctx)
+    {
+        return NULL;
+    }
 
-                    if (snmp_oid_compare(vars->name, vars->name_length,
-                                         oid_arr_broken_check[varlist_ind],
-                                         oid_arr_broken_check_len[varlist_ind]) <= 0)
-                    {
-                        /*
-                           The agent responded with an illegal response
-                           as the returning OID was lexograghically less
-                           then or equal to the requested OID...
-                           We need to give up here because an infinite
-                           loop will result otherwise.
+    /* the entries are allocated again on the next cache miss */
+    __tag2oid_cache_free(&session_ctx->oid_cache);
+    __tag2oid_cache_init(&session_ctx->oid_cache, maxsize);
 
-                           XXX: this really should be an option to
-                           continue like the -Cc option to the snmpwalk
-                           application.
-                        */
-                        notdone = 0;
-                        break;
-                    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_update_options(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+
+    if (!PyArg_ParseTuple(args, "O", &session))
+    {
+        return NULL;
+    }
+
+    if (!(session_ctx = __get_session_ctx(session)))
+    {
+        return NULL;
+    }
+
+    __py_netsnmp_read_options(session, &session_ctx->options);
+    if (PyErr_Occurred())
+    {
+        return NULL;
+    }
 
-                    varbind = py_netsnmp_construct_varbind();
+    Py_RETURN_NONE;
+}
+
+static PyObject *netsnmp_oid_cache_info(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct tag2oid_cache *cache = NULL;
+
+    if (!PyArg_ParseTuple(args, "O", &session))
+    {
+        return NULL;
+    }
+
+    if (!(session_ctx = __get_session_ctx(session)))
+    {
+        return NULL;
+    }
+    cache = &session_ctx->oid_cache;
+
+    return Py_BuildValue("(kknn)", cache->hits, cache->misses,
+                         (Py_ssize_t)cache->maxsize,
+                         (Py_ssize_t)cache->size);
+}
+
+static PyObject *netsnmp_async_send(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varlist = NULL;
+    PyObject *request = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct async_request_ctx *req = NULL;
+    netsnmp_pdu *pdu = NULL;
+    PyThread_type_lock lock = NULL;
+    int command;
+    int nonrepeaters;
+    int maxrepetitions;
+    int best_guess;
+    int reqid;
+    int err_num = 0;
+    int err_ind = 0;
+    char *tmp_err_str = NULL;
+
+    if (!PyArg_ParseTuple(args, "OiiiO", &session, &command, &nonrepeaters,
+                          &maxrepetitions, &varlist))
+    {
+        return NULL;
+    }
+
+    if (command != SNMP_MSG_GET && command != SNMP_MSG_GETNEXT &&
+        command != SNMP_MSG_GETBULK)
+    {
+        PyErr_Format(PyExc_ValueError,
+                     "unsupported asynchronous command (%d)", command);
+        return NULL;
+    }
 
-                    if (PyObject_HasAttrString(varbind, "oid"))
-                    {
-                        str_buf[0] = '.';
-                        str_buf[1] = '\0';
-                        out_len = 0;
-                        tp = netsnmp_sprint_realloc_objid_tree(&str_bufp,
-                                                               &str_buf_len,
-                                                               &out_len, 0,
-                                                               &buf_over,
-                                                               vars->name,
-                                                               vars->name_length);
-                        str_buf[sizeof(str_buf) - 1] = '\0';
-
-                        type = __translate_asn_type(vars->type);
-
-                        if (__is_leaf(tp))
-                        {
-                            getlabel_flag &= ~NON_LEAF_NAME;
-                            py_log_msg(DEBUG, "netsnmp_walk: is_leaf: %d", tp->type);
-                        }
-                        else
-                        {
-                            getlabel_flag |= NON_LEAF_NAME;
-                            py_log_msg(DEBUG, "netsnmp_walk: !is_leaf: %d", tp->type);
-                        }
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
 
-                        py_log_msg(DEBUG, "netsnmp_walk: str_buf: %s", str_buf);
+    if (!session_ctx)
+    {
+        goto done;
+    }
 
-                        __get_label_iid((char *)str_buf, &tag, &iid,
-                                        getlabel_flag);
+    best_guess = session_ctx->options.best_guess;
 
-                        py_log_msg(DEBUG,
-                                   "netsnmp_walk: filling response: %s:%s",
-                                   tag, iid);
+    pdu = snmp_pdu_create(command);
+    if (command == SNMP_MSG_GETBULK)
+    {
+        pdu->non_repeaters = nonrepeaters;
+        pdu->max_repetitions = maxrepetitions;
+    }
 
-                        py_netsnmp_attr_set_string(varbind, "oid", tag,
-                                                   STRLEN(tag));
-                        py_netsnmp_attr_set_string(varbind, "oid_index", iid,
-                                                   STRLEN(iid));
+    if (__py_netsnmp_add_varlist(pdu, varlist, best_guess,
+                                 &session_ctx->oid_cache) < 0)
+    {
+        goto done;
+    }
 
-                        __get_type_str(type, type_str, 1);
+    if (!(req = calloc(1, sizeof *req)))
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    if (!(request = PyCapsule_New(req, NULL, delete_async_request_capsule)))
+    {
+        free(req);
+        goto done;
+    }
 
-                        py_netsnmp_attr_set_string(varbind, "snmp_type",
-                                                   type_str, strlen(type_str));
+    Py_INCREF(sess_ptr);
+    req->sess_ptr = sess_ptr;
+    req->command = command;
 
-                        len = __snprint_value((char *)str_buf,
-                                              sizeof(str_buf), vars, tp,
-                                              type, sprintval_flag);
-                        str_buf[len] = '\0';
+    Py_BEGIN_ALLOW_THREADS
+        lock = __transport_lock(session_ctx);
+        reqid = snmp_sess_async_send(session_ctx->handle, pdu,
+                                     __async_response_cb, req);
+        __transport_unlock(lock);
+    Py_END_ALLOW_THREADS
 
-                        py_netsnmp_attr_set_string(varbind, "value",
-                                                   (char *)str_buf, len);
+    if (!reqid)
+    {
+        /* the PDU is not freed by Net-SNMP when sending fails */
+        req->done = 1;
+        req->status = STAT_ERROR;
+        snmp_sess_error(session_ctx->handle, &err_num, &err_ind, &tmp_err_str);
+        __py_netsnmp_update_session_errors(session, tmp_err_str, err_num,
+                                           err_ind);
+        PyErr_SetString(EasySNMPConnectionError,
+                        tmp_err_str ? tmp_err_str : "failed to send request");
+        SAFE_FREE(tmp_err_str);
+        Py_CLEAR(request);
+        goto done;
+    }
 
-                        /* push the varbind onto the return varbinds */
-                        PyList_Append(varbinds, varbind);
-                    }
-                    else
-                    {
-                        py_log_msg(DEBUG, "netsnmp_walk: bad varbind (%d)",
-                                   varlist_ind);
-                    }
-                    Py_XDECREF(varbind);
+    req->reqid = reqid;
+    pdu = NULL;
 
-                    memcpy(oid_arr_broken_check[varlist_ind], vars->name,
-                           sizeof(oid) * vars->name_length);
-                    oid_arr_broken_check_len[varlist_ind] = vars->name_length;
+done:
+    if (pdu)
+    {
+        snmp_free_pdu(pdu);
+    }
+    Py_XDECREF(sess_ptr);
+    return request;
+}
 
-                    snmp_add_null_var(pdu, vars->name, vars->name_length);
-                }
-            }
-            if (response)
-            {
-                snmp_free_pdu(response);
-                response = NULL;
-            }
-        }
+static PyObject *netsnmp_prepare(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *varlist = NULL;
+    PyObject *prepared = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu *pdu = NULL;
+    int command;
+    int nonrepeaters;
+    int maxrepetitions;
 
-        /* Reset the library's behavior for numeric/symbolic OIDs. */
-        netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                           NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                           old_format);
+    if (!PyArg_ParseTuple(args, "OiiiO", &session, &command, &nonrepeaters,
+                          &maxrepetitions, &varlist))
+    {
+        return NULL;
+    }
 
-        if (PyErr_Occurred())
-        {
-            error = 1;
-        }
+    if (command != SNMP_MSG_GET && command != SNMP_MSG_GETNEXT &&
+        command != SNMP_MSG_GETBULK)
+    {
+        PyErr_Format(PyExc_ValueError,
+                     "unsupported prepared command (%d)", command);
+        return NULL;
     }
 
-done:
-    Py_XDECREF(sess_ptr);
-    Py_XDECREF(varbinds);
-    Py_XDECREF(err_bytes);
-    SAFE_FREE(oid_arr_len);
-    SAFE_FREE(oid_arr_broken_check_len);
-    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+    if (!(session_ctx = __get_session_ctx(session)))
     {
-        SAFE_FREE(oid_arr[varlist_ind]);
-        SAFE_FREE(oid_arr_broken_check[varlist_ind]);
+        return NULL;
     }
-    SAFE_FREE(oid_arr);
-    SAFE_FREE(oid_arr_broken_check);
-    if (response)
+
+    pdu = snmp_pdu_create(command);
+    if (command == SNMP_MSG_GETBULK)
     {
-        snmp_free_pdu(response);
-        response = NULL;
+        pdu->non_repeaters = nonrepeaters;
+        pdu->max_repetitions = maxrepetitions;
     }
-    if (pdu)
+
+    if (__py_netsnmp_add_varlist(pdu, varlist,
+                                 session_ctx->options.best_guess,
+                                 &session_ctx->oid_cache) < 0)
     {
         snmp_free_pdu(pdu);
-        response = NULL;
+        return NULL;
     }
-    if (error)
+
+    /* the capsule owns the template PDU from here on */
+    if (!(prepared = PyCapsule_New(pdu, NULL, delete_prepared_pdu_capsule)))
     {
-        return NULL;
+        snmp_free_pdu(pdu);
     }
-    Py_RETURN_NONE;
+    return prepared;
 }
 
-static PyObject *netsnmp_getbulk(PyObject *self, PyObject *args)
+/*
+ * Sends a copy of a PDU created by netsnmp_prepare() and returns the
+ * response varbinds as a list of new SNMPVariable objects.
+ */
+static PyObject *netsnmp_execute(PyObject *self, PyObject *args)
 {
-    int nonrepeaters;
-    int maxrepetitions;
     PyObject *session = NULL;
+    PyObject *prepared = NULL;
     PyObject *sess_ptr = NULL;
-    PyObject *varlist;
     PyObject *varbinds = NULL;
-    PyObject *varbind;
-    PyObject *varbinds_iter;
-    PyObject *err_bytes = NULL;
-    PyObject *tag_bytes = NULL;
-    PyObject *iid_bytes = NULL;
-    int varbind_ind;
+    PyObject *varbind = NULL;
     struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss;
+    struct session_scratch *scratch = NULL;
+    netsnmp_pdu *template_pdu = NULL;
     netsnmp_pdu *pdu = NULL;
     netsnmp_pdu *response = NULL;
-    netsnmp_variable_list *vars;
-    struct tree *tp;
-    int len;
-    oid *oid_arr;
-    size_t oid_arr_len = MAX_OID_LEN;
-    int type;
-    char type_str[MAX_TYPE_NAME_LEN];
+    netsnmp_variable_list *vars = NULL;
+    int getlabel_flag;
+    int sprintval_flag;
     int status;
-    u_char str_buf[STR_BUF_SIZE];
-    u_char *str_bufp = str_buf;
-    size_t str_buf_len = sizeof(str_buf);
-    size_t out_len = 0;
-    int buf_over = 0;
-    char *tag;
-    char *iid = NULL;
-    int getlabel_flag = NO_FLAGS;
-    int sprintval_flag = USE_BASIC;
-    int old_format;
-    int best_guess;
-    int retry_nosuch;
-    int err_ind;
-    int err_num;
-    char err_str[STR_BUF_SIZE];
-    char *tmpstr;
-    Py_ssize_t tmplen;
-    int error = 0;
+    int err_num = 0;
+    int err_ind = 0;
 
-    oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
-
-    if (oid_arr && args)
+    if (!PyArg_ParseTuple(args, "OO", &session, &prepared))
     {
-        if (!PyArg_ParseTuple(args, "OiiO", &session, &nonrepeaters,
-                              &maxrepetitions, &varlist))
-        {
-            goto done;
-        }
-
-        if (varlist &&
-            (varbinds = PyObject_GetAttrString(varlist, "varbinds")))
-        {
-            sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
-            session_ctx = get_session_handle_from_capsule(sess_ptr);
-
-            if (!session_ctx)
-            {
-                goto done;
-            }
-
-            ss = session_ctx->handle;
-
-            if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
-            {
-                goto done;
-            }
-            memcpy(&err_str, tmpstr, tmplen);
-            err_num = py_netsnmp_attr_long(session, "error_number");
-            err_ind = py_netsnmp_attr_long(session, "error_index");
+        return NULL;
+    }
 
-            if (py_netsnmp_attr_long(session, "use_long_names"))
-            {
-                getlabel_flag |= USE_LONG_NAMES;
-            }
-            if (py_netsnmp_attr_long(session, "use_numeric"))
-            {
-                getlabel_flag |= USE_NUMERIC_OIDS;
-            }
-            if (py_netsnmp_attr_long(session, "use_enums"))
-            {
-                sprintval_flag = USE_ENUMS;
-            }
-            if (py_netsnmp_attr_long(session, "use_sprint_value"))
-            {
-                sprintval_flag = USE_SPRINT_VALUE;
-            }
-            best_guess = py_netsnmp_attr_long(session, "best_guess");
-            retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
+    if (!(template_pdu = PyCapsule_GetPointer(prepared, NULL)))
+    {
+        return NULL;
+    }
 
-            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
 
-            pdu->errstat = nonrepeaters;
-            pdu->errindex = maxrepetitions;
+    if (!session_ctx || !(scratch = __scratch_acquire(session_ctx)))
+    {
+        goto done;
+    }
 
-            varbinds_iter = PyObject_GetIter(varbinds);
+    if (!(pdu = snmp_clone_pdu(template_pdu)))
+    {
+        PyErr_SetString(EasySNMPError, "could not copy the prepared request");
+        goto done;
+    }
+    /* so that late responses to an earlier copy are not mistaken for ours */
+    pdu->reqid = snmp_get_next_reqid();
+    pdu->msgid = snmp_get_next_msgid();
 
-            while (varbinds_iter && (varbind = PyIter_Next(varbinds_iter)))
-            {
-                if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
-                    py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
-                {
-                    oid_arr_len = 0;
-                }
-                else
-                {
-                    tp = __tag2oid(tag, iid, oid_arr, &oid_arr_len, NULL,
-                                   best_guess);
-                }
+    status = __send_sync_pdu_split(session_ctx, &pdu, &response,
+                                   NO_RETRY_NOSUCH, scratch->err_str,
+                                   &err_num, &err_ind, NULL);
+    __py_netsnmp_update_session_errors(session, scratch->err_str, err_num,
+                                       err_ind);
 
-                if (oid_arr_len)
-                {
-                    snmp_add_null_var(pdu, oid_arr, oid_arr_len);
-                }
-                else
-                {
-                    PyErr_Format(EasySNMPUnknownObjectIDError,
-                                 "unknown object id (%s)",
-                                 (tag ? tag : "<null>"));
-                    error = 1;
-                    snmp_free_pdu(pdu);
-                    Py_DECREF(varbind);
-                    Py_DECREF(varbinds_iter);
-                    Py_XDECREF(tag_bytes);
-                    Py_XDECREF(iid_bytes);
-                    goto done;
-                }
-                /* release reference when done */
-                Py_DECREF(varbind);
-                Py_XDECREF(tag_bytes);
-                tag_bytes = NULL;
-                Py_XDECREF(iid_bytes);
-                iid_bytes = NULL;
-            }
+    if (status != 0 || !(varbinds = PyList_New(0)))
+    {
+        goto done;
+    }
 
-            Py_XDECREF(varbinds_iter);
+    __py_netsnmp_output_flags(&session_ctx->options,
+                              &getlabel_flag, &sprintval_flag);
 
-            if (PyErr_Occurred())
-            {
-                error = 1;
-                snmp_free_pdu(pdu);
-                pdu = NULL;
-                goto done;
-            }
+    for (vars = response ? response->variables : NULL; vars;
+         vars = vars->next_variable)
+    {
+        if (!(varbind = py_netsnmp_construct_varbind()) ||
+            py_netsnmp_fill_varbind(varbind, vars, getlabel_flag,
+                                    sprintval_flag, &session_ctx->label_cache,
+                                    scratch->buf,
+                                    sizeof(scratch->buf)) < 0 ||
+            PyList_Append(varbinds, varbind) < 0)
+        {
+            Py_XDECREF(varbind);
+            Py_CLEAR(varbinds);
+            break;
+        }
+        Py_DECREF(varbind);
+    }
 
-            status = __send_sync_pdu(ss, &pdu, &response, retry_nosuch,
-                                     err_str, &err_num, &err_ind, NULL);
-            __py_netsnmp_update_session_errors(session, err_str, err_num,
-                                               err_ind);
-            if (status != 0)
-            {
-                error = 1;
-                if (response)
-                {
-                    snmp_free_pdu(response);
-                    response = NULL;
-                }
-                goto done;
-            }
+done:
+    if (session_ctx)
+    {
+        __scratch_release(session_ctx, scratch);
+    }
+    if (response)
+    {
+        snmp_free_pdu(response);
+    }
+    Py_XDECREF(sess_ptr);
+    return varbinds;
+}
 
-            /*
-             * Set up for numeric or full OID's, if necessary.  Save the old
-             * output format so that it can be restored when we finish -- this
-             * is a library-wide global, and has to be set/restored for each
-             * session.
-             */
-            old_format = netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID,
-                                            NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
+static PyObject *netsnmp_async_read(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_transport *transport = NULL;
+    netsnmp_large_fd_set fdset;
+    PyThread_type_lock lock = NULL;
+    int error = 0;
 
-            if (py_netsnmp_attr_long(session, "use_long_names"))
-            {
-                getlabel_flag |= USE_LONG_NAMES;
+    if (!PyArg_ParseTuple(args, "O", &session))
+    {
+        return NULL;
+    }
 
-                netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                                   NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                                   NETSNMP_OID_OUTPUT_FULL);
-            }
-            /*
-             * Setting use_numeric forces use_long_names on so check for
-             * use_numeric after use_long_names (above) to make sure the final
-             * outcome of NETSNMP_DS_LIB_OID_OUTPUT_FORMAT is
-             *  NETSNMP_OID_OUTPUT_NUMERIC
-             */
-            if (py_netsnmp_attr_long(session, "use_numeric"))
-            {
-                getlabel_flag |= USE_LONG_NAMES;
-                getlabel_flag |= USE_NUMERIC_OIDS;
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
 
-                netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                                   NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                                   NETSNMP_OID_OUTPUT_NUMERIC);
-            }
+    if (!session_ctx)
+    {
+        error = 1;
+        goto done;
+    }
 
-            if (response && response->variables)
-            {
-                /* clear varlist to receive response varbinds*/
-                PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
+    transport = snmp_sess_transport(session_ctx->handle);
+    if (!transport || transport->sock < 0)
+    {
+        PyErr_SetString(EasySNMPConnectionError,
+                        "session has no open transport");
+        error = 1;
+        goto done;
+    }
 
-                if (PyErr_Occurred())
-                {
-                    error = 1;
-                    snmp_free_pdu(pdu);
-                    pdu = NULL;
-                    if (response)
-                    {
-                        snmp_free_pdu(response);
-                        response = NULL;
-                    }
-                    goto done;
-                }
+    netsnmp_large_fd_set_init(&fdset, transport->sock + 1);
+    NETSNMP_LARGE_FD_ZERO(&fdset);
+    NETSNMP_LARGE_FD_SET(transport->sock, &fdset);
 
-                for (vars = response->variables, varbind_ind = 0;
-                     vars;
-                     vars = vars->next_variable, varbind_ind++)
-                {
+    Py_BEGIN_ALLOW_THREADS
+        if ((lock = __transport_lock(session_ctx)))
+        {
+            /* another thread may have read the message already */
+            __sess_read_ready(session_ctx->handle, transport->sock);
+            __transport_unlock(lock);
+        }
+        else
+        {
+            snmp_sess_read2(session_ctx->handle, &fdset);
+        }
+    Py_END_ALLOW_THREADS
 
-                    varbind = py_netsnmp_construct_varbind();
+    netsnmp_large_fd_set_cleanup(&fdset);
 
-                    if (PyObject_HasAttrString(varbind, "oid"))
-                    {
-                        *str_buf = '.';
-                        *(str_buf + 1) = '\0';
-                        out_len = 0;
-                        buf_over = 0;
-                        str_bufp = str_buf;
-                        tp = netsnmp_sprint_realloc_objid_tree(&str_bufp,
-                                                               &str_buf_len,
-                                                               &out_len, 0,
-                                                               &buf_over,
-                                                               vars->name,
-                                                               vars->name_length);
-                        str_buf[sizeof(str_buf) - 1] = '\0';
-
-                        type = __translate_asn_type(vars->type);
-
-                        if (__is_leaf(tp))
-                        {
-                            getlabel_flag &= ~NON_LEAF_NAME;
-                            py_log_msg(DEBUG, "netsnmp_getbulk: is_leaf: %d", tp->type);
-                        }
-                        else
-                        {
-                            getlabel_flag |= NON_LEAF_NAME;
-                            py_log_msg(DEBUG, "netsnmp_getbulk: !is_leaf: %d", tp->type);
-                        }
+done:
+    Py_XDECREF(sess_ptr);
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
 
-                        py_log_msg(DEBUG, "netsnmp_getbulk: str_buf: %s", str_buf);
+static PyObject *netsnmp_async_timeout(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    PyThread_type_lock lock = NULL;
 
-                        __get_label_iid((char *)str_buf, &tag, &iid,
-                                        getlabel_flag);
+    if (!PyArg_ParseTuple(args, "O", &session))
+    {
+        return NULL;
+    }
 
-                        py_netsnmp_attr_set_string(varbind, "oid", tag,
-                                                   STRLEN(tag));
-                        py_netsnmp_attr_set_string(varbind, "oid_index", iid,
-                                                   STRLEN(iid));
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
 
-                        __get_type_str(type, type_str, 1);
+    if (!session_ctx)
+    {
+        Py_XDECREF(sess_ptr);
+        return NULL;
+    }
 
-                        py_netsnmp_attr_set_string(varbind, "snmp_type",
-                                                   type_str, strlen(type_str));
+    /* resends requests which need retrying and expires the rest */
+    Py_BEGIN_ALLOW_THREADS
+        lock = __transport_lock(session_ctx);
+        snmp_sess_timeout(session_ctx->handle);
+        __transport_unlock(lock);
+    Py_END_ALLOW_THREADS
 
-                        len = __snprint_value((char *)str_buf,
-                                              sizeof(str_buf), vars, tp, type,
-                                              sprintval_flag);
-                        str_buf[len] = '\0';
+    Py_DECREF(sess_ptr);
+    Py_RETURN_NONE;
+}
 
-                        py_netsnmp_attr_set_string(varbind, "value",
-                                                   (char *)str_buf, len);
+static PyObject *netsnmp_async_select_info(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *ret = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_transport *transport = NULL;
+    netsnmp_large_fd_set fdset;
+    struct timeval timeout = {0, 0};
+    PyThread_type_lock lock = NULL;
+    int numfds = 0;
+    int block = 1;
 
-                        /* push varbind onto varbinds */
-                        PyList_Append(varbinds, varbind);
-                    }
-                    else
-                    {
-                        PyObject *none = Py_BuildValue(""); /* new ref */
-                        /* not sure why making vabind failed - should not happen */
-                        PyList_Append(varbinds, none); /* increments ref */
-                        /* Return None for this variable. */
-                        Py_DECREF(none);
-                    }
+    if (!PyArg_ParseTuple(args, "O", &session))
+    {
+        return NULL;
+    }
 
-                    Py_XDECREF(varbind);
-                }
-            }
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    session_ctx = get_session_handle_from_capsule(sess_ptr);
 
-            /* Reset the library's behavior for numeric/symbolic OID's. */
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               old_format);
+    if (!session_ctx)
+    {
+        goto done;
+    }
 
-            if (response)
-            {
-                snmp_free_pdu(response);
-                response = NULL;
-            }
+    transport = snmp_sess_transport(session_ctx->handle);
+    if (!transport || transport->sock < 0)
+    {
+        PyErr_SetString(EasySNMPConnectionError,
+                        "session has no open transport");
+        goto done;
+    }
 
-            // Py_DECREF(varbinds);
-        }
+    netsnmp_large_fd_set_init(&fdset, transport->sock + 1);
+    NETSNMP_LARGE_FD_ZERO(&fdset);
+    Py_BEGIN_ALLOW_THREADS
+        lock = __transport_lock(session_ctx);
+        snmp_sess_select_info2(session_ctx->handle, &numfds, &fdset, &timeout,
+                               &block);
+        __transport_unlock(lock);
+    Py_END_ALLOW_THREADS
+    netsnmp_large_fd_set_cleanup(&fdset);
 
-        if (PyErr_Occurred())
-        {
-            error = 1;
-        }
+    /* block is left set when no requests are outstanding */
+    if (block)
+    {
+        ret = Py_BuildValue("(iO)", transport->sock, Py_None);
+    }
+    else
+    {
+        ret = Py_BuildValue("(id)", transport->sock,
+                            timeout.tv_sec + timeout.tv_usec / 1000000.0);
     }
 
 done:
-    Py_XDECREF(varbinds);
     Py_XDECREF(sess_ptr);
-    Py_XDECREF(err_bytes);
-    SAFE_FREE(oid_arr);
-    if (error)
-    {
-        return NULL;
-    }
-    Py_RETURN_NONE;
+    return ret;
 }
 
-static PyObject *netsnmp_bulkwalk(PyObject *self, PyObject *args)
+static PyObject *netsnmp_async_result(PyObject *self, PyObject *args)
 {
     PyObject *session = NULL;
     PyObject *sess_ptr = NULL;
-    PyObject *varlist = NULL;
-    PyObject *varlist_iter = NULL;
-    PyObject *varbind = NULL;
+    PyObject *request = NULL;
     PyObject *varbinds = NULL;
-    PyObject *err_bytes = NULL;
-    PyObject *tag_bytes = NULL;
-    PyObject *iid_bytes = NULL;
-    int varlist_len = 0;
-    int varlist_ind;
-
+    PyObject *varbind = NULL;
+    PyObject *names = NULL;
+    PyObject *name = NULL;
+    struct async_request_ctx *req = NULL;
     struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss = NULL;
-    netsnmp_pdu *pdu = NULL;
-    netsnmp_pdu *response = NULL;
+    struct session_scratch *scratch = NULL;
     netsnmp_variable_list *vars = NULL;
-
-    struct tree *tp = NULL;
-    int len;
-    oid **oid_arr = NULL;
-    size_t *oid_arr_len = NULL;
-    // char **initial_oid_str_arr = NULL;
-    char **oid_str_arr = NULL;
-    char **oid_idx_str_arr = NULL;
-    int type;
-    char type_str[MAX_TYPE_NAME_LEN];
-    int status;
-    u_char str_buf[STR_BUF_SIZE];
-    u_char *str_bufp = str_buf;
-    size_t str_buf_len = sizeof(str_buf);
-    size_t out_len = 0;
-    int buf_over = 0;
-    int getlabel_flag = NO_FLAGS;
-    int sprintval_flag = USE_BASIC;
-    int old_format;
-    int best_guess;
-    int retry_nosuch;
-    int err_ind;
-    int err_num;
     char err_str[STR_BUF_SIZE];
-    int notdone = 1;
-    char *tmpstr = NULL;
-    Py_ssize_t tmplen;
+    int getlabel_flag;
+    int sprintval_flag;
     int error = 0;
-    int nonrepeaters;
-    int maxrepetitions;
 
-    py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting");
+    if (!PyArg_ParseTuple(args, "OO", &session, &request))
+    {
+        return NULL;
+    }
 
-    if (args)
+    if (!(req = PyCapsule_GetPointer(request, NULL)))
     {
-        if (!PyArg_ParseTuple(args, "OiiO", &session, &nonrepeaters,
-                              &maxrepetitions, &varlist))
-        {
-            goto done;
-        }
+        return NULL;
+    }
 
-        py_log_msg(DEBUG, "netsnmp_bulkwalk: nonreps (%d) max_reps (%d)",
-                   nonrepeaters, maxrepetitions);
+    /* a request may only be collected through the session which sent it */
+    if (!(sess_ptr = PyObject_GetAttrString(session, "sess_ptr")))
+    {
+        return NULL;
+    }
+    Py_DECREF(sess_ptr);
+    if (sess_ptr != req->sess_ptr)
+    {
+        PyErr_SetString(PyExc_ValueError,
+                        "the request was not sent by this session");
+        return NULL;
+    }
 
-        if (!varlist)
+    if (!req->done)
+    {
+        Py_RETURN_NONE;
+    }
+
+    if (req->status == STAT_TIMEOUT)
+    {
+        strlcpy(err_str, snmp_api_errstring(SNMPERR_TIMEOUT), STR_BUF_SIZE);
+        __py_netsnmp_update_session_errors(session, err_str, 0,
+                                           SNMPERR_TIMEOUT);
+        PyErr_SetString(EasySNMPTimeoutError,
+                        "timed out while connecting to remote host");
+        return NULL;
+    }
+    if (req->status != STAT_SUCCESS || !req->response)
+    {
+        strlcpy(err_str, "asynchronous request failed", STR_BUF_SIZE);
+        __py_netsnmp_update_session_errors(session, err_str, 0, 0);
+        PyErr_SetString(EasySNMPError, err_str);
+        return NULL;
+    }
+    if (req->response->errstat != SNMP_ERR_NOERROR)
+    {
+        strlcpy(err_str, snmp_errstring(req->response->errstat),
+                STR_BUF_SIZE);
+        __py_netsnmp_update_session_errors(session, err_str,
+                                           req->response->errstat,
+                                           req->response->errindex);
+        if (req->response->errstat == SNMP_ERR_NOSUCHNAME)
         {
-            goto done;
+            PyErr_SetString(EasySNMPNoSuchNameError,
+                            "no such name error encountered");
         }
-
-        if ((varbinds = PyObject_GetAttrString(varlist, "varbinds")) == NULL)
+        else
         {
-            goto done;
+            PyErr_SetString(EasySNMPError, err_str);
         }
+        return NULL;
+    }
+    __py_netsnmp_update_session_errors(session, "", 0, 0);
 
-        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
-        session_ctx = get_session_handle_from_capsule(sess_ptr);
+    session_ctx = get_session_handle_from_capsule(req->sess_ptr);
+    if (!session_ctx || !(scratch = __scratch_acquire(session_ctx)))
+    {
+        return NULL;
+    }
 
-        if (!session_ctx)
+    __py_netsnmp_output_flags(&session_ctx->options,
+                              &getlabel_flag, &sprintval_flag);
+
+    if (!(varbinds = PyList_New(0)) || !(names = PyList_New(0)))
+    {
+        error = 1;
+        goto done;
+    }
+
+    for (vars = req->response->variables; vars; vars = vars->next_variable)
+    {
+        if (!(varbind = py_netsnmp_construct_varbind()))
         {
+            error = 1;
             goto done;
         }
-
-        ss = session_ctx->handle;
-
-        if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
+        if (py_netsnmp_fill_varbind(varbind, vars, getlabel_flag,
+                                    sprintval_flag, &session_ctx->label_cache,
+                                    scratch->buf, sizeof(scratch->buf)) < 0 ||
+            PyList_Append(varbinds, varbind) < 0)
         {
+            Py_DECREF(varbind);
+            error = 1;
             goto done;
         }
-        memcpy(&err_str, tmpstr, tmplen);
-        err_num = py_netsnmp_attr_long(session, "error_number");
-        err_ind = py_netsnmp_attr_long(session, "error_index");
+        Py_DECREF(varbind);
 
-        if (py_netsnmp_attr_long(session, "use_long_names"))
+        if (!(name = py_netsnmp_oid_tuple(vars->name, vars->name_length)) ||
+            PyList_Append(names, name) < 0)
         {
-            getlabel_flag |= USE_LONG_NAMES;
+            Py_XDECREF(name);
+            error = 1;
+            goto done;
         }
-        if (py_netsnmp_attr_long(session, "use_numeric"))
+        Py_DECREF(name);
+    }
+
+done:
+    __scratch_release(session_ctx, scratch);
+
+    if (error)
+    {
+        Py_XDECREF(varbinds);
+        Py_XDECREF(names);
+        return NULL;
+    }
+    return Py_BuildValue("(NN)", varbinds, names);
+}
+
+static PyObject *netsnmp_poll(PyObject *self, PyObject *args)
+{
+    PyObject *sessions = NULL;
+    PyObject *sessions_seq = NULL;
+    PyObject *timeout_obj = Py_None;
+    PyObject **sess_ptrs = NULL;
+    PyObject *ready = NULL;
+    PyObject *index = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct poll_session_entry *entries = NULL;
+    netsnmp_transport *transport = NULL;
+    netsnmp_large_fd_set fdset;
+    struct timeval wait;
+    struct timeval start;
+    struct timeval now;
+    struct timeval elapsed;
+    double timeout = -1;
+    Py_ssize_t num_sessions = 0;
+    Py_ssize_t i;
+    int fdset_initialised = 0;
+    int max_fd = 0;
+    int numfds = 0;
+    int block;
+    int has_wait = 0;
+    int count = 0;
+    int select_errno = 0;
+
+    if (!PyArg_ParseTuple(args, "O|O", &sessions, &timeout_obj))
+    {
+        return NULL;
+    }
+
+    if (timeout_obj != Py_None)
+    {
+        timeout = PyFloat_AsDouble(timeout_obj);
+        if (timeout == -1 && PyErr_Occurred())
         {
-            getlabel_flag |= USE_NUMERIC_OIDS;
+            return NULL;
         }
-        if (py_netsnmp_attr_long(session, "use_enums"))
+        if (timeout < 0)
         {
-            sprintval_flag = USE_ENUMS;
+            timeout = 0;
         }
-        if (py_netsnmp_attr_long(session, "use_sprint_value"))
+    }
+
+    sessions_seq = PySequence_Fast(sessions, "sessions must be a sequence");
+    if (!sessions_seq)
+    {
+        return NULL;
+    }
+    num_sessions = PySequence_Fast_GET_SIZE(sessions_seq);
+
+    entries = calloc(num_sessions ? num_sessions : 1, sizeof *entries);
+    sess_ptrs = calloc(num_sessions ? num_sessions : 1, sizeof *sess_ptrs);
+    if (!entries || !sess_ptrs)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    /*
+     * Hold a reference to every session capsule for the duration of the
+     * loop so that no session can be closed while the GIL is released.
+     */
+    for (i = 0; i < num_sessions; i++)
+    {
+        sess_ptrs[i] = PyObject_GetAttrString(
+            PySequence_Fast_GET_ITEM(sessions_seq, i), "sess_ptr");
+        session_ctx = get_session_handle_from_capsule(sess_ptrs[i]);
+        if (!session_ctx)
         {
-            sprintval_flag = USE_SPRINT_VALUE;
+            goto done;
         }
 
-        best_guess = py_netsnmp_attr_long(session, "best_guess");
-        retry_nosuch = py_netsnmp_attr_long(session, "retry_no_such");
-
-        /* we need an initial count for memory allocation */
-        varlist_iter = PyObject_GetIter(varlist);
-        varlist_len = 0;
-        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        transport = snmp_sess_transport(session_ctx->handle);
+        if (!transport || transport->sock < 0)
         {
-            varlist_len++;
-            Py_DECREF(varbind);
+            PyErr_SetString(EasySNMPConnectionError,
+                            "session has no open transport");
+            goto done;
         }
-        Py_XDECREF(varlist_iter);
-
-        oid_arr_len = calloc(varlist_len, sizeof(size_t));
-        oid_arr = calloc(varlist_len, sizeof(oid *));
-        // initial_oid_str_arr = calloc(varlist_len, sizeof(char *));
-        oid_str_arr = calloc(varlist_len, sizeof(char *));
-        oid_idx_str_arr = calloc(varlist_len, sizeof(char *));
 
-        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+        entries[i].handle = session_ctx->handle;
+        entries[i].sock = transport->sock;
+        if (session_ctx->options.thread_safe)
         {
-            oid_arr[varlist_ind] = calloc(MAX_OID_LEN, sizeof(oid));
-            oid_arr_len[varlist_ind] = MAX_OID_LEN;
+            entries[i].lock = session_ctx->transport_lock;
         }
-
-        /* get the initial oids */
-        py_log_msg(DEBUG, "netsnmp_bulkwalk: Getting initial oids");
-        varlist_ind = 0;
-        varlist_iter = PyObject_GetIter(varlist);
-        while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
+        if (transport->sock > max_fd)
         {
-            if (py_netsnmp_attr_string(varbind, "oid",
-                                       &oid_str_arr[varlist_ind],
-                                       NULL,
-                                       &tag_bytes) >= 0 &&
-                py_netsnmp_attr_string(varbind, "oid_index",
-                                       &oid_idx_str_arr[varlist_ind],
-                                       NULL,
-                                       &iid_bytes) >= 0)
-            {
+            max_fd = transport->sock;
+        }
+    }
 
-                // initial_oid_str_arr[varlist_ind] = oid_str_arr[varlist_ind];
+    netsnmp_large_fd_set_init(&fdset, max_fd + 1);
+    NETSNMP_LARGE_FD_ZERO(&fdset);
+    fdset_initialised = 1;
 
-                py_log_msg(DEBUG,
-                           "netsnmp_bulkwalk: Initial oid(%s) oid_idx(%s)",
-                           oid_str_arr[varlist_ind],
-                           oid_idx_str_arr[varlist_ind]);
+    if (timeout >= 0)
+    {
+        wait.tv_sec = (long)timeout;
+        wait.tv_usec = (long)((timeout - wait.tv_sec) * 1000000);
+        has_wait = 1;
+    }
 
-                // Get oid array len
-                tp = __tag2oid(oid_str_arr[varlist_ind],
-                               oid_idx_str_arr[varlist_ind],
-                               oid_arr[varlist_ind],
-                               &oid_arr_len[varlist_ind], NULL, best_guess);
-            }
-            else
-            {
-                oid_arr_len[varlist_ind] = 0;
-            }
+    Py_BEGIN_ALLOW_THREADS
 
-            if (!oid_arr_len[varlist_ind])
+        /*
+         * Collect every socket in a single fd set and work out when the
+         * earliest retry or timeout is due.
+         */
+        for (i = 0; i < num_sessions; i++)
+        {
+            block = 1;
+            timerclear(&entries[i].timeout);
+            __transport_lock_entry(&entries[i]);
+            snmp_sess_select_info2(entries[i].handle, &numfds, &fdset,
+                                   &entries[i].timeout, &block);
+            __transport_unlock(entries[i].lock);
+            if (!block)
             {
-                PyErr_Format(EasySNMPUnknownObjectIDError,
-                             "unknown object id (%s)",
-                             (oid_str_arr[varlist_ind] ? oid_str_arr[varlist_ind] : "<null>"));
-                error = 1;
-                Py_DECREF(varbind);
-                Py_DECREF(varlist_iter);
-                Py_XDECREF(tag_bytes);
-                Py_XDECREF(iid_bytes);
-                goto done;
+                entries[i].has_timeout = 1;
+                if (!has_wait || timercmp(&entries[i].timeout, &wait, <))
+                {
+                    wait = entries[i].timeout;
+                    has_wait = 1;
+                }
             }
-
-            Py_DECREF(varbind);
-            Py_XDECREF(tag_bytes);
-            tag_bytes = NULL;
-            Py_XDECREF(iid_bytes);
-            iid_bytes = NULL;
-            varlist_ind++;
         }
 
-        Py_XDECREF(varlist_iter);
+        gettimeofday(&start, NULL);
+        count = netsnmp_large_fd_set_select(numfds, &fdset, NULL, NULL,
+                                            has_wait ? &wait : NULL);
+        select_errno = errno;
+        gettimeofday(&now, NULL);
+        timersub(&now, &start, &elapsed);
 
-        if (PyErr_Occurred())
+        if (count >= 0)
         {
-            error = 1;
-            goto done;
+            for (i = 0; i < num_sessions; i++)
+            {
+                __transport_lock_entry(&entries[i]);
+                if (count > 0 &&
+                    NETSNMP_LARGE_FD_ISSET(entries[i].sock, &fdset))
+                {
+                    if (entries[i].lock)
+                    {
+                        /* another thread may have read the message already */
+                        __sess_read_ready(entries[i].handle, entries[i].sock);
+                    }
+                    else
+                    {
+                        snmp_sess_read2(entries[i].handle, &fdset);
+                    }
+                    entries[i].ready = 1;
+                }
+                /* retry or expire requests whose deadline has passed */
+                if (entries[i].has_timeout &&
+                    !timercmp(&entries[i].timeout, &elapsed, >))
+                {
+                    snmp_sess_timeout(entries[i].handle);
+                    entries[i].ready = 1;
+                }
+                __transport_unlock(entries[i].lock);
+            }
         }
 
-        /*
-         * Set up for numeric or full OID's, if necessary.  Save the old
-         * output format so that it can be restored when we finish -- this
-         * is a library-wide global, and has to be set/restored for each
-         * session.
-         */
-        old_format = netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID,
-                                        NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
+    Py_END_ALLOW_THREADS
 
-        if (py_netsnmp_attr_long(session, "use_long_names"))
-        {
-            getlabel_flag |= USE_LONG_NAMES;
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_FULL);
-        }
+    if (count < 0 && select_errno != EINTR)
+    {
+        errno = select_errno;
+        PyErr_SetFromErrno(PyExc_OSError);
+        goto done;
+    }
 
-        /*
-         * Setting use_numeric forces use_long_names on so check for
-         * use_numeric after use_long_names (above) to make sure the final
-         * outcome of NETSNMP_DS_LIB_OID_OUTPUT_FORMAT is
-         * NETSNMP_OID_OUTPUT_NUMERIC
-         */
-        if (py_netsnmp_attr_long(session, "use_numeric"))
-        {
-            getlabel_flag |= USE_LONG_NAMES;
-            getlabel_flag |= USE_NUMERIC_OIDS;
+    /*
+     * An interrupted select is retried by the caller polling again, which
+     * must not happen once a signal handler has raised (e.g. on Ctrl-C).
+     */
+    if (count < 0 && PyErr_CheckSignals() < 0)
+    {
+        goto done;
+    }
 
-            netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                               NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                               NETSNMP_OID_OUTPUT_NUMERIC);
+    if (!(ready = PyList_New(0)))
+    {
+        goto done;
+    }
+    for (i = 0; i < num_sessions; i++)
+    {
+        if (!entries[i].ready)
+        {
+            continue;
         }
-
-        /* delete the existing varbinds that we'll replace */
-        PySequence_DelSlice(varbinds, 0, PySequence_Length(varbinds));
-
-        if (PyErr_Occurred())
+        if (!(index = PyLong_FromSsize_t(i)) || PyList_Append(ready, index) < 0)
         {
-            error = 1;
+            Py_XDECREF(index);
+            Py_CLEAR(ready);
             goto done;
         }
+        Py_DECREF(index);
+    }
 
-        py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting bulk walk request");
-        for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+done:
+    if (fdset_initialised)
+    {
+        netsnmp_large_fd_set_cleanup(&fdset);
+    }
+    if (sess_ptrs)
+    {
+        for (i = 0; i < num_sessions; i++)
         {
-            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
-            pdu->non_repeaters = nonrepeaters;
-            pdu->max_repetitions = maxrepetitions;
-            snmp_add_null_var(pdu, oid_arr[varlist_ind], oid_arr_len[varlist_ind]);
-
-            notdone = 1;
-            while (notdone)
-            {
-                py_log_msg(DEBUG, "netsnmp_bulkwalk: Sending pdu req");
-                status = __send_sync_pdu(ss, &pdu, &response, retry_nosuch,
-                                         err_str, &err_num, &err_ind, NULL);
-
-                __py_netsnmp_update_session_errors(session, err_str, err_num,
-                                                   err_ind);
-                if (status != 0)
-                {
-                    error = 1;
-                    if (response)
-                    {
-                        snmp_free_pdu(response);
-                        response = NULL;
-                    }
-                    goto done;
-                }
+            Py_XDECREF(sess_ptrs[i]);
+        }
+        free(sess_ptrs);
+    }
+    free(entries);
+    Py_DECREF(sessions_seq);
+    return ready;
+}
 
-                if (!response ||
-                    !response->variables ||
-                    status != STAT_SUCCESS ||
-                    response->errstat != SNMP_ERR_NOERROR)
-                {
-                    notdone = 0;
-                }
-                else
-                {
-                    vars = (response ? response->variables : NULL);
-                    while (vars)
-                    {
+static void walk_iterator_free_cursors(walk_iterator *it)
+{
+    SAFE_FREE(it->root_oids);
+    SAFE_FREE(it->root_oid_lens);
+    SAFE_FREE(it->cursor_oids);
+    SAFE_FREE(it->cursor_oid_lens);
+    SAFE_FREE(it->active);
+    SAFE_FREE(it->request_roots);
+    it->root_oids = NULL;
+    it->root_oid_lens = NULL;
+    it->cursor_oids = NULL;
+    it->cursor_oid_lens = NULL;
+    it->active = NULL;
+    it->request_roots = NULL;
+    it->num_roots = 0;
+}
 
-                        if ((vars->name_length < oid_arr_len[varlist_ind]) ||
-                            (memcmp(oid_arr[varlist_ind], vars->name,
-                                    oid_arr_len[varlist_ind] * sizeof(oid)) != 0))
-                        {
-                            py_log_msg(DEBUG,
-                                       "netsnmp_bulkwalk: encountered end condition "
-                                       "(next subtree iteration out of scope)");
-                            notdone = 0;
-                            break;
-                        }
+static int walk_iterator_traverse(walk_iterator *it, visitproc visit,
+                                  void *arg)
+{
+    Py_VISIT(it->session);
+    Py_VISIT(it->sess_ptr);
+    return 0;
+}
 
-                        if ((vars->type == SNMP_ENDOFMIBVIEW) ||
-                            (vars->type == SNMP_NOSUCHOBJECT) ||
-                            (vars->type == SNMP_NOSUCHINSTANCE))
-                        {
-                            py_log_msg(DEBUG,
-                                       "netsnmp_bulkwalk: encountered end condition "
-                                       "(ENDOFMIBVIEW, NOSUCHOBJECT, NO SUCH "
-                                       "INSTANCE)");
-                            notdone = 0;
-                            break;
-                        }
+static int walk_iterator_clear(walk_iterator *it)
+{
+    Py_CLEAR(it->session);
+    Py_CLEAR(it->sess_ptr);
+    return 0;
+}
 
-                        varbind = py_netsnmp_construct_varbind();
+static void walk_iterator_dealloc(walk_iterator *it)
+{
+    PyObject_GC_UnTrack(it);
+    walk_iterator_clear(it);
+    walk_iterator_free_cursors(it);
+    PyObject_GC_Del(it);
+}
 
-                        if (PyObject_HasAttrString(varbind, "oid"))
-                        {
-                            str_buf[0] = '.';
-                            str_buf[1] = '\0';
-                            out_len = 0;
-                            tp = netsnmp_sprint_realloc_objid_tree(&str_bufp,
-                                                                   &str_buf_len,
-                                                                   &out_len, 0,
-                                                                   &buf_over,
-                                                                   vars->name,
-                                                                   vars->name_length);
-                            str_buf[sizeof(str_buf) - 1] = '\0';
-
-                            type = __translate_asn_type(vars->type);
-
-                            if (__is_leaf(tp))
-                            {
-                                getlabel_flag &= ~NON_LEAF_NAME;
-                                py_log_msg(DEBUG,
-                                           "netsnmp_bulkwalk: is_leaf: %d",
-                                           tp->type);
-                            }
-                            else
-                            {
-                                getlabel_flag |= NON_LEAF_NAME;
-                                py_log_msg(DEBUG,
-                                           "netsnmp_bulkwalk: !is_leaf: %d",
-                                           tp->type);
-                            }
-
-                            py_log_msg(DEBUG, "netsnmp_bulkwalk: str_buf: %s",
-                                       str_buf);
-
-                            /*
-                             * Part of adopted code. SNMPVariable does not have
-                             * a root_oid attribute. Maybe this could be added
-                             * in a future update; will not implement now in
-                             * case it breaks someone else's code
-                             */
-                            // py_netsnmp_attr_set_string(varbind, "root_oid",
-                            //                            initial_oid_str_arr[varlist_ind],
-                            //                           STRLEN(initial_oid_str_arr[varlist_ind]));
-
-                            __get_label_iid((char *)str_buf,
-                                            &oid_str_arr[varlist_ind],
-                                            &oid_idx_str_arr[varlist_ind],
-                                            getlabel_flag);
+/*
+ * Sends requests until at least one varbind inside a walked subtree is
+ * returned, and returns those varbinds as a list. Raises StopIteration
+ * once every root has been exhausted.
+ */
+static PyObject *walk_iterator_next(walk_iterator *it)
+{
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct session_scratch *scratch = NULL;
+    netsnmp_pdu *pdu = NULL;
+    netsnmp_pdu *response = NULL;
+    netsnmp_variable_list *vars = NULL;
+    PyObject *varbinds = NULL;
+    PyObject *varbind = NULL;
+    PyObject *instance = NULL;
+    oid *root;
+    oid *cursor;
+    size_t root_ind;
+    size_t num_requested;
+    size_t var_ind;
+    int getlabel_flag;
+    int sprintval_flag;
+    int status;
+    int err_ind;
+    int err_num;
+    char err_str[STR_BUF_SIZE];
+    int error = 0;
 
-                            py_log_msg(DEBUG,
-                                       "netsnmp_bulkwalk: filling response: %s:%s",
-                                       oid_str_arr[varlist_ind],
-                                       oid_idx_str_arr[varlist_ind]);
+    if (!it->session)
+    {
+        /* exhausted */
+        return NULL;
+    }
 
-                            py_netsnmp_attr_set_string(varbind, "oid",
-                                                       oid_str_arr[varlist_ind],
-                                                       STRLEN(oid_str_arr[varlist_ind]));
+    session_ctx = get_session_handle_from_capsule(it->sess_ptr);
+    if (!session_ctx || !(scratch = __scratch_acquire(session_ctx)))
+    {
+        return NULL;
+    }
+    if (!(varbinds = PyList_New(0)))
+    {
+        __scratch_release(session_ctx, scratch);
+        return NULL;
+    }
 
-                            py_netsnmp_attr_set_string(varbind, "oid_index",
-                                                       oid_idx_str_arr[varlist_ind],
-                                                       STRLEN(oid_idx_str_arr[varlist_ind]));
+    __py_netsnmp_output_flags(&session_ctx->options,
+                              &getlabel_flag, &sprintval_flag);
 
-                            __get_type_str(type, type_str, 1);
+    while (PyList_GET_SIZE(varbinds) == 0)
+    {
+        pdu = snmp_pdu_create(it->command);
+        if (it->command == SNMP_MSG_GETBULK)
+        {
+            pdu->non_repeaters = 0;
+            pdu->max_repetitions = it->max_repetitions;
+        }
 
-                            py_netsnmp_attr_set_string(varbind, "snmp_type",
-                                                       type_str,
-                                                       strlen(type_str));
+        num_requested = 0;
+        for (root_ind = 0; root_ind < it->num_roots; root_ind++)
+        {
+            if (it->active[root_ind])
+            {
+                it->request_roots[num_requested++] = root_ind;
+                snmp_add_null_var(pdu,
+                                  it->cursor_oids + root_ind * MAX_OID_LEN,
+                                  it->cursor_oid_lens[root_ind]);
+            }
+        }
 
-                            len = __snprint_value((char *)str_buf,
-                                                  sizeof(str_buf), vars, tp,
-                                                  type, sprintval_flag);
-                            str_buf[len] = '\0';
+        if (!num_requested)
+        {
+            snmp_free_pdu(pdu);
+            break;
+        }
 
-                            py_netsnmp_attr_set_string(varbind, "value",
-                                                       (char *)str_buf, len);
+        status = __send_sync_pdu(session_ctx, &pdu, &response, NO_RETRY_NOSUCH,
+                                 err_str, &err_num, &err_ind, NULL);
+        __py_netsnmp_update_session_errors(it->session, err_str, err_num,
+                                           err_ind);
 
-                            /* push the varbind onto the return varbinds */
-                            PyList_Append(varbinds, varbind);
-                        }
-                        else
-                        {
-                            py_log_msg(DEBUG,
-                                       "netsnmp_bulkwalk: bad varbind (%d)",
-                                       varlist_ind);
-                        }
-                        Py_XDECREF(varbind);
+        if (status == SNMP_ERR_NOSUCHNAME && response &&
+            response->version == SNMP_VERSION_1)
+        {
+            /*
+             * SNMPv1 agents report the end of the MIB view as a
+             * noSuchName error against the offending varbind.
+             */
+            PyErr_Clear();
+            if (response->errindex > 0 &&
+                (size_t)response->errindex <= num_requested)
+            {
+                it->active[it->request_roots[response->errindex - 1]] = 0;
+            }
+            else
+            {
+                memset(it->active, 0, it->num_roots * sizeof(int));
+            }
+            snmp_free_pdu(response);
+            response = NULL;
+            continue;
+        }
 
-                        // Create next request if we've reached the end
-                        if (vars->next_variable == NULL)
-                        {
-                            pdu = snmp_pdu_create(SNMP_MSG_GETBULK);
-                            pdu->non_repeaters = nonrepeaters;
-                            pdu->max_repetitions = maxrepetitions;
-                            snmp_add_null_var(pdu, vars->name, vars->name_length);
-                        }
+        if (status != 0)
+        {
+            if (!PyErr_Occurred())
+            {
+                PyErr_SetString(EasySNMPError, err_str);
+            }
+            error = 1;
+            goto done;
+        }
 
-                        // Move on to next
-                        vars = vars->next_variable;
-                    }
-                    py_log_msg(DEBUG,
-                               "netsnmp_bulkwalk: Finished reading all "
-                               "variables for req");
-                }
+        if (!response || !response->variables)
+        {
+            memset(it->active, 0, it->num_roots * sizeof(int));
+        }
 
-                if (response)
+        for (vars = (response ? response->variables : NULL), var_ind = 0;
+             vars;
+             vars = vars->next_variable, var_ind++)
+        {
+            root_ind = it->request_roots[var_ind % num_requested];
+            if (!it->active[root_ind])
+            {
+                continue;
+            }
+
+            root = it->root_oids + root_ind * MAX_OID_LEN;
+            cursor = it->cursor_oids + root_ind * MAX_OID_LEN;
+
+            if ((vars->name_length < it->root_oid_lens[root_ind]) ||
+                (memcmp(root, vars->name,
+                        it->root_oid_lens[root_ind] * sizeof(oid)) != 0) ||
+                (vars->type == SNMP_ENDOFMIBVIEW) ||
+                (vars->type == SNMP_NOSUCHOBJECT) ||
+                (vars->type == SNMP_NOSUCHINSTANCE) ||
+                (snmp_oid_compare(vars->name, vars->name_length, cursor,
+                                  it->cursor_oid_lens[root_ind]) <= 0))
+            {
+                /*
+                 * Out of the subtree, at the end of the MIB view or the
+                 * agent went backwards (which would otherwise loop forever).
+                 */
+                it->active[root_ind] = 0;
+                continue;
+            }
+
+            if (!(varbind = py_netsnmp_construct_varbind()))
+            {
+                error = 1;
+                goto done;
+            }
+            if (py_netsnmp_fill_varbind(varbind, vars, getlabel_flag,
+                                        sprintval_flag,
+                                        &session_ctx->label_cache,
+                                        scratch->buf,
+                                        sizeof(scratch->buf)) < 0)
+            {
+                Py_DECREF(varbind);
+                error = 1;
+                goto done;
+            }
+            if (it->with_roots > 1)
+            {
+                if (!(instance = py_netsnmp_oid_tuple(
+                          vars->name + it->root_oid_lens[root_ind],
+                          vars->name_length - it->root_oid_lens[root_ind])))
                 {
-                    snmp_free_pdu(response);
-                    response = NULL;
+                    Py_DECREF(varbind);
+                    error = 1;
+                    goto done;
                 }
+                /* steals the references to varbind and instance */
+                varbind = Py_BuildValue("(nNN)", (Py_ssize_t)root_ind, varbind,
+                                        instance);
             }
-        }
-        py_log_msg(DEBUG, "netsnmp_bulkwalk: Ending bulk walk request");
+            else if (it->with_roots)
+            {
+                /* steals the reference to varbind */
+                varbind = Py_BuildValue("(nN)", (Py_ssize_t)root_ind, varbind);
+            }
+            if (!varbind || PyList_Append(varbinds, varbind) < 0)
+            {
+                Py_XDECREF(varbind);
+                error = 1;
+                goto done;
+            }
+            Py_DECREF(varbind);
 
-        /* Reset the library's behavior for numeric/symbolic OID's. */
-        netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID,
-                           NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
-                           old_format);
+            memcpy(cursor, vars->name, vars->name_length * sizeof(oid));
+            it->cursor_oid_lens[root_ind] = vars->name_length;
+        }
 
-        if (PyErr_Occurred())
+        if (response)
         {
-            error = 1;
+            snmp_free_pdu(response);
+            response = NULL;
         }
     }
 
 done:
-    py_log_msg(DEBUG, "netsnmp_bulkwalk: Starting cleanup");
-    Py_XDECREF(varbinds);
-    Py_XDECREF(sess_ptr);
-    Py_XDECREF(err_bytes);
-    // SAFE_FREE(initial_oid_str_arr);
-    SAFE_FREE(oid_arr_len);
+    __scratch_release(session_ctx, scratch);
 
-    for (varlist_ind = 0; varlist_ind < varlist_len; varlist_ind++)
+    if (response)
     {
-        SAFE_FREE(oid_arr[varlist_ind]);
+        snmp_free_pdu(response);
     }
 
-    SAFE_FREE(oid_arr);
-    SAFE_FREE(oid_str_arr);
-    SAFE_FREE(oid_idx_str_arr);
-    py_log_msg(DEBUG, "netsnmp_bulkwalk: End cleanup");
-
-    if (error)
+    if (error || PyList_GET_SIZE(varbinds) == 0)
     {
+        /* the walk is over; release the session straight away */
+        Py_DECREF(varbinds);
+        walk_iterator_clear(it);
         return NULL;
     }
-    Py_RETURN_NONE;
+    return varbinds;
 }
 
-static PyObject *netsnmp_set(PyObject *self, PyObject *args)
+static PyTypeObject WalkIteratorType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "easysnmp.interface.WalkIterator",
+    .tp_basicsize = sizeof(walk_iterator),
+    .tp_dealloc = (destructor)walk_iterator_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = "iterates over an SNMP walk one response PDU at a time.",
+    .tp_traverse = (traverseproc)walk_iterator_traverse,
+    .tp_clear = (inquiry)walk_iterator_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)walk_iterator_next,
+};
+
+static PyObject *netsnmp_walk_iter(PyObject *self, PyObject *args)
 {
     PyObject *session = NULL;
-    PyObject *sess_ptr = NULL;
     PyObject *varlist = NULL;
-    PyObject *varbind = NULL;
-    PyObject *ret = NULL;
-    PyObject *err_bytes = NULL;
-    PyObject *tag_bytes = NULL;
-    PyObject *iid_bytes = NULL;
-    PyObject *type_bytes = NULL;
-    PyObject *value_bytes = NULL;
+    PyObject *varlist_seq = NULL;
+    walk_iterator *it = NULL;
     struct session_capsule_ctx *session_ctx = NULL;
-    netsnmp_session *ss = NULL;
-    netsnmp_pdu *pdu = NULL;
-    netsnmp_pdu *response = NULL;
-    struct tree *tp = NULL;
-    char *tag = NULL;
-    char *iid = NULL;
-    char *val = NULL;
-    char *type_str;
-    int len;
-    oid *oid_arr = calloc(MAX_OID_LEN, sizeof(oid));
-    size_t oid_arr_len = MAX_OID_LEN;
-    int type;
-    u_char tmp_val_str[STR_BUF_SIZE];
-    int use_enums;
-    struct enum_list *ep = NULL;
+    int command;
+    int max_repetitions;
+    int with_roots = 0;
     int best_guess;
-    int status;
-    int err_ind;
-    int err_num;
-    char err_str[STR_BUF_SIZE];
-    char *tmpstr = NULL;
-    Py_ssize_t tmplen;
-    int error = 0;
+    size_t root_ind;
 
-    if (oid_arr && args)
+    if (!PyArg_ParseTuple(args, "OiiO|i", &session, &command,
+                          &max_repetitions, &varlist, &with_roots))
     {
-        if (!PyArg_ParseTuple(args, "OO", &session, &varlist))
-        {
-            goto done;
-        }
+        return NULL;
+    }
 
-        sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
-        session_ctx = get_session_handle_from_capsule(sess_ptr);
+    if (command != SNMP_MSG_GETNEXT && command != SNMP_MSG_GETBULK)
+    {
+        PyErr_Format(PyExc_ValueError, "unsupported walk command (%d)",
+                     command);
+        return NULL;
+    }
 
-        if (!session_ctx)
-        {
-            goto done;
-        }
+    if (!(varlist_seq = PySequence_Fast(varlist, "varlist must be a sequence")))
+    {
+        return NULL;
+    }
 
-        ss = session_ctx->handle;
+    if (!(it = PyObject_GC_New(walk_iterator, &WalkIteratorType)))
+    {
+        Py_DECREF(varlist_seq);
+        return NULL;
+    }
 
-        /* PyObject_SetAttrString(); */
-        if (py_netsnmp_attr_string(session, "error_string", &tmpstr, &tmplen, &err_bytes) < 0)
-        {
-            goto done;
-        }
+    it->session = NULL;
+    it->sess_ptr = NULL;
+    it->command = command;
+    it->max_repetitions = max_repetitions;
+    it->with_roots = with_roots;
+    it->num_roots = PySequence_Fast_GET_SIZE(varlist_seq);
+    it->root_oids = calloc(it->num_roots * MAX_OID_LEN + 1, sizeof(oid));
+    it->root_oid_lens = calloc(it->num_roots + 1, sizeof(size_t));
+    it->cursor_oids = calloc(it->num_roots * MAX_OID_LEN + 1, sizeof(oid));
+    it->cursor_oid_lens = calloc(it->num_roots + 1, sizeof(size_t));
+    it->active = calloc(it->num_roots + 1, sizeof(int));
+    it->request_roots = calloc(it->num_roots + 1, sizeof(size_t));
+    PyObject_GC_Track(it);
 
-        use_enums = py_netsnmp_attr_long(session, "use_enums");
+    if (!it->root_oids || !it->root_oid_lens || !it->cursor_oids ||
+        !it->cursor_oid_lens || !it->active || !it->request_roots)
+    {
+        PyErr_NoMemory();
+        goto error;
+    }
 
-        best_guess = py_netsnmp_attr_long(session, "best_guess");
+    if (!(it->sess_ptr = PyObject_GetAttrString(session, "sess_ptr")) ||
+        !(session_ctx = get_session_handle_from_capsule(it->sess_ptr)))
+    {
+        goto error;
+    }
+    Py_INCREF(session);
+    it->session = session;
 
-        pdu = snmp_pdu_create(SNMP_MSG_SET);
+    best_guess = session_ctx->options.best_guess;
 
-        if (varlist)
+    /* the walk starts from each root itself */
+    for (root_ind = 0; root_ind < it->num_roots; root_ind++)
+    {
+        if (__py_netsnmp_varbind_oid(PySequence_Fast_GET_ITEM(varlist_seq,
+                                                              root_ind),
+                                     it->root_oids + root_ind * MAX_OID_LEN,
+                                     &it->root_oid_lens[root_ind],
+                                     best_guess, &session_ctx->oid_cache) < 0)
         {
-            PyObject *varlist_iter = PyObject_GetIter(varlist);
-
-            while (varlist_iter && (varbind = PyIter_Next(varlist_iter)))
-            {
-                if (py_netsnmp_attr_string(varbind, "oid", &tag, NULL, &tag_bytes) < 0 ||
-                    py_netsnmp_attr_string(varbind, "oid_index", &iid, NULL, &iid_bytes) < 0)
-                {
-                    oid_arr_len = 0;
-                }
-                else
-                {
-                    tp = __tag2oid(tag, iid, oid_arr, &oid_arr_len, &type,
-                                   best_guess);
-                }
-
-                if (oid_arr_len == 0)
-                {
-                    PyErr_Format(EasySNMPUnknownObjectIDError,
-                                 "unknown object id (%s)",
-                                 (tag ? tag : "<null>"));
-                    error = 1;
-                    snmp_free_pdu(pdu);
-                    pdu = NULL;
-                    Py_DECREF(varbind);
-                    Py_DECREF(varlist_iter);
-                    Py_XDECREF(tag_bytes);
-                    Py_XDECREF(iid_bytes);
-                    goto done;
-                }
-
-                if (type == TYPE_UNKNOWN)
-                {
-                    if (py_netsnmp_attr_string(varbind, "snmp_type", &type_str, NULL, &type_bytes) < 0)
-                    {
-                        /**
-                         * NoneType error returned if this is not included.
-                         * Not sure why original author did not raise an error
-                         * here before. Keep an eye out for edge cases!
-                         */
-                        PyErr_SetString(EasySNMPUndeterminedTypeError,
-                                        "a type could not be determine for "
-                                        "the object");
-                        error = 1;
-                        snmp_free_pdu(pdu);
-                        pdu = NULL;
-                        Py_DECREF(varbind);
-                        Py_DECREF(varlist_iter);
-                        Py_XDECREF(tag_bytes);
-                        Py_XDECREF(iid_bytes);
-                        Py_XDECREF(type_bytes);
-                        goto done;
-                    }
-                    type = __translate_appl_type(type_str);
-                    if (type == TYPE_UNKNOWN)
-                    {
-                        PyErr_SetString(EasySNMPUndeterminedTypeError,
-                                        "a type could not be determine for "
-                                        "the object");
-                        error = 1;
-                        snmp_free_pdu(pdu);
-                        pdu = NULL;
-                        Py_DECREF(varbind);
-                        Py_DECREF(varlist_iter);
-                        Py_XDECREF(tag_bytes);
-                        Py_XDECREF(iid_bytes);
-                        Py_XDECREF(type_bytes);
-                        goto done;
-                    }
-                    Py_XDECREF(type_bytes);
-                }
+            goto error;
+        }
 
-                if (py_netsnmp_attr_string(varbind, "value", &val, &tmplen, &value_bytes) < 0)
-                {
-                    snmp_free_pdu(pdu);
-                    pdu = NULL;
-                    Py_DECREF(varbind);
-                    Py_DECREF(varlist_iter);
-                    Py_XDECREF(tag_bytes);
-                    Py_XDECREF(iid_bytes);
-                    Py_XDECREF(type_bytes);
-                    Py_XDECREF(value_bytes);
-                    goto done;
-                }
-                memset(tmp_val_str, 0, sizeof(tmp_val_str));
-                if (tmplen >= (long int)sizeof(tmp_val_str))
-                {
-                    tmplen = sizeof(tmp_val_str) - 1;
-                }
-                memcpy(tmp_val_str, val, tmplen);
-                if (type == TYPE_INTEGER && use_enums && tp && tp->enums)
-                {
-                    for (ep = tp->enums; ep; ep = ep->next)
-                    {
-                        if (val && !strcmp(ep->label, val))
-                        {
-                            snprintf((char *)tmp_val_str, sizeof(tmp_val_str),
-                                     "%d", ep->value);
-                            break;
-                        }
-                    }
-                }
-                len = (int)tmplen;
-                status = __add_var_val_str(pdu, oid_arr, oid_arr_len,
-                                           (char *)tmp_val_str, len, type);
+        memcpy(it->cursor_oids + root_ind * MAX_OID_LEN,
+               it->root_oids + root_ind * MAX_OID_LEN,
+               it->root_oid_lens[root_ind] * sizeof(oid));
+        it->cursor_oid_lens[root_ind] = it->root_oid_lens[root_ind];
+        it->active[root_ind] = 1;
+    }
 
-                if (status == FAILURE)
-                {
-                    py_log_msg(ERROR, "set: adding variable/value to PDU");
-                }
+    Py_DECREF(varlist_seq);
+    return (PyObject *)it;
 
-                /* release reference when done */
-                Py_DECREF(varbind);
-                Py_XDECREF(value_bytes);
-                Py_XDECREF(tag_bytes);
-                tag_bytes = NULL;
-                Py_XDECREF(iid_bytes);
-                iid_bytes = NULL;
-            }
+error:
+    Py_DECREF(varlist_seq);
+    Py_DECREF(it);
+    return NULL;
+}
 
-            Py_DECREF(varlist_iter);
-            if (PyErr_Occurred())
-            {
-                error = 1;
-                snmp_free_pdu(pdu);
-                pdu = NULL;
-                goto done;
-            }
-        }
+/*
+ * Returns a list of (sub-identifier, label) tuples for the accessible
+ * columns of a conceptual row (e.g. ifXEntry) as defined by the loaded MIBs.
+ */
+static PyObject *netsnmp_table_columns(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *entry = NULL;
+    PyObject *columns = NULL;
+    PyObject *column = NULL;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct tree *tp = NULL;
+    struct tree *node = NULL;
+    oid oid_arr[MAX_OID_LEN];
+    size_t oid_arr_len = 0;
+    size_t depth = 0;
 
-        status = __send_sync_pdu(ss, &pdu, &response, NO_RETRY_NOSUCH,
-                                 err_str, &err_num, &err_ind, NULL);
-        __py_netsnmp_update_session_errors(session, err_str, err_num, err_ind);
+    if (!PyArg_ParseTuple(args, "OO", &session, &entry))
+    {
+        return NULL;
+    }
 
-        if (response)
-        {
-            snmp_free_pdu(response);
-            response = NULL;
-        }
+    if (!(session_ctx = __get_session_ctx(session)))
+    {
+        return NULL;
+    }
 
-        if (status != 0)
-        {
-            error = 1;
-            goto done;
-        }
+    if (__py_netsnmp_varbind_oid(entry, oid_arr, &oid_arr_len,
+                                 session_ctx->options.best_guess,
+                                 &session_ctx->oid_cache) < 0)
+    {
+        return NULL;
+    }
 
-        if (status == STAT_SUCCESS)
+    /* get_tree() returns the closest ancestor when there is no exact match */
+    tp = get_tree(oid_arr, oid_arr_len, get_tree_head());
+    for (node = tp; node; node = node->parent)
+    {
+        depth++;
+    }
+    if (!tp || depth != oid_arr_len || !tp->child_list)
+    {
+        PyErr_SetString(EasySNMPUnknownObjectIDError,
+                        "the OID is not a conceptual row in the loaded MIBs");
+        return NULL;
+    }
+
+    if (!(columns = PyList_New(0)))
+    {
+        return NULL;
+    }
+    for (node = tp->child_list; node; node = node->next_peer)
+    {
+        if (node->access == MIB_ACCESS_NOACCESS ||
+            node->access == MIB_ACCESS_NOTIFY)
         {
-            ret = Py_BuildValue("i", 1); /* success, return True */
+            continue;
         }
-        else
+        if (!(column = Py_BuildValue("(ks)", node->subid, node->label)) ||
+            PyList_Append(columns, column) < 0)
         {
-            ret = Py_BuildValue("i", 0); /* fail, return False */
+            Py_XDECREF(column);
+            Py_DECREF(columns);
+            return NULL;
         }
+        Py_DECREF(column);
     }
 
-done:
-    Py_XDECREF(sess_ptr);
-    Py_XDECREF(err_bytes);
-    SAFE_FREE(oid_arr);
-    if (error)
-    {
-        return NULL;
-    }
-    return (ret ? ret : Py_BuildValue(""));
+    return columns;
 }
 
 /**
@@ -4184,6 +7346,334 @@ static void py_log_msg(int log_level, char *printf_fmt, ...)
  * See: https://docs.python.org/2/c-api/structures.html for more info.
  *
  */
+/*
+ * Formats a record appended to a lazy result by py_netsnmp_append_raw() into
+ * a new SNMPVariable, following the current options of the session.
+ */
+static PyObject *netsnmp_decode_varbind(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *raw = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *varbind = NULL;
+    Py_ssize_t offset;
+    Py_ssize_t size;
+    struct session_capsule_ctx *session_ctx = NULL;
+    struct raw_varbind_header header;
+    netsnmp_variable_list vars;
+    oid name[MAX_OID_LEN];
+    u_char *val = NULL;
+    u_char str_buf[STR_BUF_SIZE];
+    char *record;
+
+    if (!PyArg_ParseTuple(args, "OOn", &session, &raw, &offset))
+    {
+        goto done;
+    }
+
+    if (!PyByteArray_Check(raw))
+    {
+        PyErr_SetString(PyExc_TypeError, "raw must be a bytearray");
+        goto done;
+    }
+
+    size = PyByteArray_GET_SIZE(raw);
+    if (offset < 0 || (size_t)(size - offset) < sizeof(header))
+    {
+        PyErr_SetString(PyExc_IndexError, "record offset out of range");
+        goto done;
+    }
+
+    record = PyByteArray_AS_STRING(raw) + offset;
+    memcpy(&header, record, sizeof(header));
+    record += sizeof(header);
+
+    if (header.name_length > MAX_OID_LEN ||
+        (size_t)(size - offset) < sizeof(header) +
+                                      header.name_length * sizeof(oid) +
+                                      header.val_len)
+    {
+        PyErr_SetString(PyExc_ValueError, "truncated varbind record");
+        goto done;
+    }
+
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    if (!(session_ctx = get_session_handle_from_capsule(sess_ptr)))
+    {
+        goto done;
+    }
+
+    /*
+     * The record is copied out of the buffer so that the name and value
+     * are suitably aligned for the types they are read as
+     */
+    if (!(val = malloc(header.val_len + 1)))
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    memcpy(name, record, header.name_length * sizeof(oid));
+    memcpy(val, record + header.name_length * sizeof(oid), header.val_len);
+
+    memset(&vars, 0, sizeof(vars));
+    vars.name = name;
+    vars.name_length = header.name_length;
+    vars.type = header.type;
+    vars.val.string = val;
+    vars.val_len = header.val_len;
+
+    if ((varbind = py_netsnmp_construct_varbind()) &&
+        py_netsnmp_fill_varbind(varbind, &vars,
+                                session_ctx->options.getlabel_flag,
+                                session_ctx->options.sprintval_flag,
+                                &session_ctx->label_cache, str_buf,
+                                sizeof(str_buf)) < 0)
+    {
+        Py_CLEAR(varbind);
+    }
+
+done:
+    SAFE_FREE(val);
+    Py_XDECREF(sess_ptr);
+    return varbind;
+}
+
+/*
+ * Converts a sequence of integers into an OID.
+ *
+ * Returns 0 on success, or -1 with an exception set.
+ */
+static int __py_netsnmp_oid_array(PyObject *seq, oid *name,
+                                  size_t *name_length)
+{
+    PyObject *fast = NULL;
+    Py_ssize_t count;
+    Py_ssize_t ind;
+
+    if (!(fast = PySequence_Fast(seq, "an OID must be a sequence of ints")))
+    {
+        return -1;
+    }
+
+    count = PySequence_Fast_GET_SIZE(fast);
+    if (count > MAX_OID_LEN)
+    {
+        Py_DECREF(fast);
+        PyErr_SetString(PyExc_ValueError, "OID is too long");
+        return -1;
+    }
+
+    for (ind = 0; ind < count; ind++)
+    {
+        name[ind] = (oid)PyLong_AsUnsignedLong(
+            PySequence_Fast_GET_ITEM(fast, ind));
+    }
+    Py_DECREF(fast);
+
+    *name_length = count;
+    return PyErr_Occurred() ? -1 : 0;
+}
+
+/*
+ * Builds a response PDU from a sequence of (name, type, value) tuples, where
+ * name is a tuple of integers, type an ASN.1 type code and value an int for
+ * the numeric types, a tuple of integers for OBJECT IDENTIFIER, None for
+ * NULL and the exception types or bytes for anything else.
+ *
+ * Returns NULL with an exception set on failure.
+ */
+static netsnmp_pdu *__py_netsnmp_canned_pdu(PyObject *varbinds)
+{
+    PyObject *varbinds_iter = NULL;
+    PyObject *item = NULL;
+    PyObject *name_obj;
+    PyObject *value_obj;
+    netsnmp_pdu *pdu = NULL;
+    oid name[MAX_OID_LEN];
+    size_t name_length;
+    oid objid[MAX_OID_LEN];
+    size_t objid_length;
+    struct counter64 counter64;
+    unsigned long long uint64_value;
+    long int_value;
+    u_long uint_value;
+    char *buf;
+    Py_ssize_t buf_len;
+    const void *value;
+    size_t value_len;
+    int type;
+
+    if (!(varbinds_iter = PyObject_GetIter(varbinds)))
+    {
+        return NULL;
+    }
+
+    pdu = snmp_pdu_create(SNMP_MSG_RESPONSE);
+
+    while ((item = PyIter_Next(varbinds_iter)))
+    {
+        if (!PyArg_ParseTuple(item, "OiO", &name_obj, &type, &value_obj) ||
+            __py_netsnmp_oid_array(name_obj, name, &name_length) < 0)
+        {
+            goto error;
+        }
+
+        value = NULL;
+        value_len = 0;
+        switch (type)
+        {
+        case ASN_INTEGER:
+            int_value = PyLong_AsLong(value_obj);
+            value = &int_value;
+            value_len = sizeof(int_value);
+            break;
+        case ASN_COUNTER:
+        case ASN_GAUGE:
+        case ASN_TIMETICKS:
+        case ASN_UINTEGER:
+            uint_value = PyLong_AsUnsignedLong(value_obj);
+            value = &uint_value;
+            value_len = sizeof(uint_value);
+            break;
+        case ASN_COUNTER64:
+            uint64_value = PyLong_AsUnsignedLongLong(value_obj);
+            counter64.high = (u_long)(uint64_value >> 32);
+            counter64.low = (u_long)(uint64_value & 0xffffffff);
+            value = &counter64;
+            value_len = sizeof(counter64);
+            break;
+        case ASN_OBJECT_ID:
+            if (__py_netsnmp_oid_array(value_obj, objid, &objid_length) < 0)
+            {
+                goto error;
+            }
+            value = objid;
+            value_len = objid_length * sizeof(oid);
+            break;
+        case ASN_NULL:
+        case SNMP_NOSUCHOBJECT:
+        case SNMP_NOSUCHINSTANCE:
+        case SNMP_ENDOFMIBVIEW:
+            break;
+        default:
+            if (PyBytes_AsStringAndSize(value_obj, &buf, &buf_len) < 0)
+            {
+                goto error;
+            }
+            value = buf;
+            value_len = buf_len;
+            break;
+        }
+
+        if (PyErr_Occurred())
+        {
+            goto error;
+        }
+        if (!snmp_pdu_add_variable(pdu, name, name_length, (u_char)type,
+                                   value, value_len))
+        {
+            PyErr_SetString(PyExc_ValueError, "could not add a varbind");
+            goto error;
+        }
+        Py_CLEAR(item);
+    }
+
+    Py_DECREF(varbinds_iter);
+    if (PyErr_Occurred())
+    {
+        snmp_free_pdu(pdu);
+        return NULL;
+    }
+    return pdu;
+
+error:
+    Py_XDECREF(item);
+    Py_DECREF(varbinds_iter);
+    snmp_free_pdu(pdu);
+    return NULL;
+}
+
+/*
+ * Sets the canned responses of a session: while any are set, synchronous
+ * requests are not sent to the agent but answered with each response in
+ * turn. This exercises everything but the network, for benchmarks and
+ * tests; passing None clears them.
+ */
+static PyObject *netsnmp_set_canned_responses(PyObject *self, PyObject *args)
+{
+    PyObject *session = NULL;
+    PyObject *responses = NULL;
+    PyObject *sess_ptr = NULL;
+    PyObject *response;
+    struct session_capsule_ctx *session_ctx = NULL;
+    netsnmp_pdu **canned = NULL;
+    Py_ssize_t count = 0;
+    Py_ssize_t ind;
+    int error = 1;
+
+    if (!PyArg_ParseTuple(args, "OO", &session, &responses))
+    {
+        return NULL;
+    }
+
+    sess_ptr = PyObject_GetAttrString(session, "sess_ptr");
+    if (!(session_ctx = get_session_handle_from_capsule(sess_ptr)))
+    {
+        goto done;
+    }
+
+    if (responses != Py_None)
+    {
+        if ((count = PySequence_Length(responses)) < 0)
+        {
+            goto done;
+        }
+        if (count && !(canned = calloc(count, sizeof(netsnmp_pdu *))))
+        {
+            PyErr_NoMemory();
+            goto done;
+        }
+        for (ind = 0; ind < count; ind++)
+        {
+            if (!(response = PySequence_GetItem(responses, ind)))
+            {
+                goto done;
+            }
+            canned[ind] = __py_netsnmp_canned_pdu(response);
+            Py_DECREF(response);
+            if (!canned[ind])
+            {
+                goto done;
+            }
+        }
+    }
+
+    __canned_responses_free(session_ctx);
+    session_ctx->canned = canned;
+    session_ctx->canned_count = count;
+    canned = NULL;
+    error = 0;
+
+done:
+    if (canned)
+    {
+        for (ind = 0; ind < count; ind++)
+        {
+            if (canned[ind])
+            {
+                snmp_free_pdu(canned[ind]);
+            }
+        }
+        free(canned);
+    }
+    Py_XDECREF(sess_ptr);
+    if (error)
+    {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
 static PyMethodDef interface_methods[] =
     {
         {"session",
@@ -4222,6 +7712,70 @@ static PyMethodDef interface_methods[] =
          netsnmp_bulkwalk,
          METH_VARARGS,
          "perform an SNMP BULKWALK operation."},
+        {"decode_varbind",
+         netsnmp_decode_varbind,
+         METH_VARARGS,
+         "format a variable binding held by a lazy result."},
+        {"set_canned_responses",
+         netsnmp_set_canned_responses,
+         METH_VARARGS,
+         "answer requests with canned responses instead of the agent."},
+        {"resolve",
+         netsnmp_resolve,
+         METH_VARARGS,
+         "translate varbind OIDs into numeric OID tuples."},
+        {"update_options",
+         netsnmp_update_options,
+         METH_VARARGS,
+         "snapshot the formatting and lookup options of a session."},
+        {"table_columns",
+         netsnmp_table_columns,
+         METH_VARARGS,
+         "list the accessible columns of a conceptual row."},
+        {"oid_cache_resize",
+         netsnmp_oid_cache_resize,
+         METH_VARARGS,
+         "empty the OID translation cache of a session and set its size."},
+        {"oid_cache_info",
+         netsnmp_oid_cache_info,
+         METH_VARARGS,
+         "return the hits, misses, maximum and current size of the OID cache."},
+        {"prepare",
+         netsnmp_prepare,
+         METH_VARARGS,
+         "build a request PDU which can be sent many times."},
+        {"execute",
+         netsnmp_execute,
+         METH_VARARGS,
+         "send a copy of a prepared request PDU."},
+        {"async_send",
+         netsnmp_async_send,
+         METH_VARARGS,
+         "send an SNMP request without waiting for the response."},
+        {"async_read",
+         netsnmp_async_read,
+         METH_VARARGS,
+         "read pending responses for asynchronous requests."},
+        {"async_timeout",
+         netsnmp_async_timeout,
+         METH_VARARGS,
+         "retry or expire overdue asynchronous requests."},
+        {"async_select_info",
+         netsnmp_async_select_info,
+         METH_VARARGS,
+         "return the socket and next timeout of a session."},
+        {"async_result",
+         netsnmp_async_result,
+         METH_VARARGS,
+         "return the varbinds of a completed asynchronous request."},
+        {"walk_iter",
+         netsnmp_walk_iter,
+         METH_VARARGS,
+         "return an iterator over an SNMP walk yielding per response."},
+        {"poll",
+         netsnmp_poll,
+         METH_VARARGS,
+         "wait for asynchronous responses on many sessions at once."},
         {NULL,
          NULL,
          0,
@@ -4301,6 +7855,34 @@ PyMODINIT_FUNC initinterface(void)
         goto done;
     }
 
+    easysnmp_variables_import = PyImport_ImportModule("easysnmp.variables");
+    if (easysnmp_variables_import == NULL)
+    {
+        const char *err_msg = "failed to import 'easysnmp.variables'";
+        PyErr_SetString(PyExc_ImportError, err_msg);
+        goto done;
+    }
+
+    SNMPVariableType = PyObject_GetAttrString(easysnmp_variables_import,
+                                              "SNMPVariable");
+    if (SNMPVariableType == NULL || !PyType_Check(SNMPVariableType))
+    {
+        const char *err_msg = "failed to load 'easysnmp.variables.SNMPVariable'";
+        PyErr_SetString(PyExc_ImportError, err_msg);
+        goto done;
+    }
+
+    empty_tuple = PyTuple_New(0);
+    py_str_oid = PyUnicode_InternFromString("oid");
+    py_str_oid_index = PyUnicode_InternFromString("oid_index");
+    py_str_value = PyUnicode_InternFromString("value");
+    py_str_snmp_type = PyUnicode_InternFromString("snmp_type");
+    if (!empty_tuple || !py_str_oid || !py_str_oid_index || !py_str_value ||
+        !py_str_snmp_type)
+    {
+        goto done;
+    }
+
     EasySNMPError = PyObject_GetAttrString(easysnmp_exceptions_import, "EasySNMPError");
     EasySNMPConnectionError = PyObject_GetAttrString(easysnmp_exceptions_import,
                                                      "EasySNMPConnectionError");
@@ -4323,6 +7905,28 @@ PyMODINIT_FUNC initinterface(void)
         goto done;
     }
 
+    if (PyType_Ready(&WalkIteratorType) < 0)
+    {
+        goto done;
+    }
+
+    /* PDU types accepted by async_send() */
+    if (PyModule_AddIntConstant(interface_module, "MSG_GET", SNMP_MSG_GET) < 0 ||
+        PyModule_AddIntConstant(interface_module, "MSG_GETNEXT",
+                                SNMP_MSG_GETNEXT) < 0 ||
+        PyModule_AddIntConstant(interface_module, "MSG_GETBULK",
+                                SNMP_MSG_GETBULK) < 0)
+    {
+        goto done;
+    }
+
+    /* max_repetitions requesting adaptive GETBULK requests */
+    if (PyModule_AddIntConstant(interface_module, "AUTO_MAX_REPETITIONS",
+                                AUTO_MAX_REPETITIONS) < 0)
+    {
+        goto done;
+    }
+
     /* initialise the netsnmp library */
     __libraries_init();
 
@@ -4340,6 +7944,13 @@ done:
     Py_XDECREF(easysnmp_import);
     Py_XDECREF(easysnmp_exceptions_import);
     Py_XDECREF(easysnmp_compat_import);
+    Py_XDECREF(easysnmp_variables_import);
+    Py_XDECREF(SNMPVariableType);
+    Py_XDECREF(empty_tuple);
+    Py_XDECREF(py_str_oid);
+    Py_XDECREF(py_str_oid_index);
+    Py_XDECREF(py_str_value);
+    Py_XDECREF(py_str_snmp_type);
     Py_XDECREF(EasySNMPError);
     Py_XDECREF(EasySNMPConnectionError);
     Py_XDECREF(EasySNMPTimeoutError);
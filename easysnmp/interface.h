@@ -31,6 +31,16 @@
 #define MAX_INVALID_OIDS (MAX_VALUE_SIZE / MIN_OID_LEN)
 #define ENG_ID_BUF_SIZE (32)
 #define NO_RETRY_NOSUCH (0)
+/* max_repetitions value selecting adaptive GETBULK requests */
+#define AUTO_MAX_REPETITIONS (-1)
+#define AUTO_REPETITIONS_MIN (1)
+#define AUTO_REPETITIONS_MAX (512)
+#define AUTO_REPETITIONS_START (10)
+/* responses quicker than this grow max_repetitions, slower ones shrink it */
+#define AUTO_REPETITIONS_FAST_USEC (250000L)
+#define AUTO_REPETITIONS_SLOW_USEC (1000000L)
+/* the longest a thread sharing a session waits before checking its request */
+#define SHARED_RESPONSE_POLL_USEC (10000L)
 #define USE_NUMERIC_OIDS (0x08)
 #define NON_LEAF_NAME (0x04)
 #define USE_LONG_NAMES (0x02)
@@ -63,14 +73,132 @@ struct session_list
  ******************************************************************************/
 
 typedef netsnmp_session SnmpSession;
+/*
+ * An entry of a tag2oid_cache holding the translation of a tag (without
+ * its index) by __tag2oid().
+ */
+struct tag2oid_cache_entry
+{
+    /* name and tag share a single allocation owned by name */
+    oid *name;
+    size_t name_len;
+    char *tag;
+    int best_guess;
+    unsigned long hash;
+    struct tree *tp;
+    int type;
+    /* whether __tag2oid() would append an index to this translation */
+    int concat_iid;
+    /* neighbours in the recently used list and the next entry in the bucket */
+    int prev;
+    int next;
+    int bucket_next;
+};
+
+/*
+ * A least recently used cache of OID translations held by each session
+ * so that requests for the same objects skip the MIB searches.
+ */
+struct tag2oid_cache
+{
+    struct tag2oid_cache_entry *entries;
+    int *buckets;
+    size_t num_buckets;
+    size_t size;
+    size_t maxsize;
+    /* most and least recently used entries */
+    int head;
+    int tail;
+    unsigned long hits;
+    unsigned long misses;
+    /* the MIB tree the cached entries were resolved against */
+    struct tree *tree_head;
+};
+
+/* The number of objects whose labels are cached by each session */
+#define LABEL_CACHE_SIZE (16)
+#define MAX_LABEL_LEN (256)
+
+/*
+ * How the name of a leaf object is rendered, so that only the instance
+ * part of the OIDs below it has to be formatted.
+ */
+struct label_cache_entry
+{
+    oid prefix[MAX_OID_LEN];
+    size_t prefix_len;
+    /* the label flags and Net-SNMP OID output format rendered with */
+    int getlabel_flag;
+    int format;
+    struct tree *tp;
+    char label[MAX_LABEL_LEN];
+};
+
+struct label_cache
+{
+    struct label_cache_entry entries[LABEL_CACHE_SIZE];
+    int size;
+    /* the entry matched last and the next entry to be replaced */
+    int last;
+    int victim;
+    /* the MIB tree the cached entries were rendered from */
+    struct tree *tree_head;
+};
+
+/*
+ * The options of an easysnmp.Session which are used by every request,
+ * compiled by __py_netsnmp_read_options() whenever they change.
+ */
+struct session_options
+{
+    long version;
+    int getlabel_flag;
+    int sprintval_flag;
+    int use_enums;
+    int best_guess;
+    int retry_nosuch;
+    /* max_repetitions learned by adaptive GETBULK requests */
+    int auto_max_repetitions;
+    /* wait for responses with __sess_shared_response(); see thread_safe */
+    int thread_safe;
+};
+
+/*
+ * Scratch buffers used for the duration of a single call. Every call takes
+ * its own set from __scratch_acquire(), so calls made through one session
+ * by several threads at once (while the GIL is released around network
+ * I/O) never share them. Released sets are kept on a free list in the
+ * session_capsule_ctx for reuse by later calls.
+ */
+struct session_scratch
+{
+    /* buf is reusable and stores OID values and names */
+    u_char buf[MAX_VALUE_SIZE];
+    /* err_str is used to fetch the error message from net-snmp libs */
+    char err_str[STR_BUF_SIZE];
+    /* used by netsnmp_{get,getnext,set}. */
+    oid oid_arr[MAX_OID_LEN];
+    /*
+     * invalid_oids is a bitarray for maintaining invalid OIDS when performing
+     * SNMPv1 requests.
+     *
+     * Note: prior to use, the number of bits required should be cleared.
+     */
+    unsigned char invalid_oids_buf[MAX_INVALID_OIDS / CHAR_BIT];
+    bitarray *invalid_oids;
+    /* the next idle set on the free list */
+    struct session_scratch *next;
+};
+
 /*
  * This structure is attached to the easysnmp.Session
  * object as a Python Capsule (or CObject).
  *
- * This allows a one time allocation of large buffers
- * without resorting to (unnecessary) allocation on the
- * stack, but also remains thread safe; as long as only
- * one Session object is restricted to each thread.
+ * Scratch buffers are allocated once and reused without
+ * resorting to (unnecessary) allocation on the stack. A
+ * Session may be shared between threads if its thread_safe
+ * option is set, in which case every use of the Net-SNMP
+ * handle is serialised by transport_lock.
  *
  * This is allocated in create_session_capsule()
  * and later (automatically via garbage collection) destroyed
@@ -83,20 +211,144 @@ struct session_capsule_ctx
      * won't ever change in Net-SNMP.
      */
     netsnmp_session *handle;
-    /* buf is reusable and stores OID values and names */
-    u_char buf[MAX_VALUE_SIZE];
-    /* err_str is used to fetch the error message from net-snmp libs */
-    char err_str[STR_BUF_SIZE];
-    /* used by netsnmp_{get,getnext,set}. */
-    oid oid_arr[MAX_OID_LEN];
+    /* held around every use of handle while options.thread_safe is set */
+    PyThread_type_lock transport_lock;
+    /* idle scratch buffers; see __scratch_acquire() */
+    struct session_scratch *scratch;
+    /* options of the Session; see netsnmp_update_options() */
+    struct session_options options;
+    /* translations of the OIDs requested through this session */
+    struct tag2oid_cache oid_cache;
+    /* labels of the objects returned to this session */
+    struct label_cache label_cache;
     /*
-     * invalid_oids is a bitarray for maintaining invalid OIDS when performing
-     * SNMPv1 requests.
-     *
-     * Note: prior to use, the number of bits required should be cleared.
+     * The largest number of varbinds a GET or GETNEXT request to the agent
+     * is known to fit (after it has answered tooBig), or 0 if no limit is
+     * known.
      */
-    unsigned char invalid_oids_buf[MAX_INVALID_OIDS / CHAR_BIT];
-    bitarray *invalid_oids;
+    int max_batch_varbinds;
+    /*
+     * Responses synchronous requests are answered with instead of being
+     * sent to the agent; see netsnmp_set_canned_responses()
+     */
+    netsnmp_pdu **canned;
+    int canned_count;
+    int canned_next;
+};
+
+/*
+ * This structure is attached to a request sent with
+ * snmp_sess_async_send() as a Python Capsule.
+ *
+ * The Net-SNMP callback only stores the response PDU and never
+ * touches Python objects, so snmp_sess_read() and snmp_sess_timeout()
+ * may be called with the GIL released.
+ *
+ * If the capsule is reclaimed while the request is still outstanding,
+ * the structure is flagged as orphaned and released by the callback
+ * instead.
+ *
+ * This is allocated in netsnmp_async_send() and later destroyed by
+ * delete_async_request_capsule() or __async_response_cb().
+ */
+struct async_request_ctx
+{
+    /* reference to the session capsule which keeps the handle alive */
+    PyObject *sess_ptr;
+    int reqid;
+    int command;
+    int done;
+    int orphaned;
+    /* one of STAT_SUCCESS, STAT_TIMEOUT or STAT_ERROR once done is set */
+    int status;
+    /* a clone of the response PDU, owned by this structure */
+    netsnmp_pdu *response;
+};
+
+/*
+ * Per-session state used by netsnmp_poll(). Everything the poll loop
+ * needs is copied here while holding the GIL so that the loop itself can
+ * run with the GIL released.
+ */
+struct poll_session_entry
+{
+    void *handle;
+    int sock;
+    /* set when the session has a retry or timeout pending */
+    int has_timeout;
+    struct timeval timeout;
+    int ready;
+    /* the transport_lock of a thread-safe session, otherwise NULL */
+    PyThread_type_lock lock;
+};
+
+/*
+ * Iterator object returned by interface.walk_iter(). It owns the walk
+ * cursors so that a walk can be advanced one response PDU at a time
+ * rather than accumulating every varbind before returning.
+ *
+ * All roots are walked in lockstep; each request carries the cursor of
+ * every root which has not yet left its subtree.
+ */
+typedef struct
+{
+    PyObject_HEAD
+    PyObject *session;
+    /* reference to the session capsule which keeps the handle alive */
+    PyObject *sess_ptr;
+    int command;
+    int max_repetitions;
+    /*
+     * yield (root index, varbind) tuples rather than bare varbinds when 1,
+     * or (root index, varbind, numeric OID below the root) tuples when 2
+     */
+    int with_roots;
+    size_t num_roots;
+    /* num_roots blocks of MAX_OID_LEN sub-identifiers each */
+    oid *root_oids;
+    size_t *root_oid_lens;
+    /* the last OID returned for each root (starts as the root itself) */
+    oid *cursor_oids;
+    size_t *cursor_oid_lens;
+    /* non-zero while a root still has to be walked */
+    int *active;
+    /* maps each varbind of the outstanding request back to its root */
+    size_t *request_roots;
+} walk_iterator;
+
+/*
+ * Borrowed-then-owned references to the columns of an
+ * easysnmp.ColumnarResult which results are appended to instead of
+ * creating one SNMPVariable per variable binding.
+ */
+struct columnar_sink
+{
+    PyObject *oids;
+    PyObject *oid_indexes;
+    /* bytearrays of uint8, int64 and uint64 items respectively */
+    PyObject *type_codes;
+    PyObject *int_values;
+    PyObject *uint_values;
+    PyObject *string_values;
+    /*
+     * bytearrays of the records and their uint64 offsets for an
+     * easysnmp.LazyResult, in which case only type_codes is used of the
+     * columns above
+     */
+    PyObject *raw;
+    PyObject *offsets;
+};
+
+/*
+ * The header of each record in the buffer of an easysnmp.LazyResult; it is
+ * followed by name_length sub-identifiers and val_len bytes of the value as
+ * received.
+ */
+struct raw_varbind_header
+{
+    size_t name_length;
+    size_t val_len;
+    u_char type;
 };
 
 enum
@@ -128,18 +380,138 @@ static int __translate_appl_type(char *typestr);
 static int __translate_asn_type(int type);
 static int __snprint_value(char *buf, size_t buf_len,
                            netsnmp_variable_list *var,
-                           struct tree *tp, int type, int flag);
+                           struct tree *tp, int type, int flag, int format);
 static int __sprint_num_objid(char *buf, oid *objid, int len);
+static int __oid_output_format(int getlabel_flag);
+static struct tree *__sprint_objid(char *buf, size_t buf_size,
+                                   const oid *objid, size_t objid_len,
+                                   int format);
 static int __scan_num_objid(char *buf, oid *objid, size_t *len);
 static int __get_type_str(int type, char *str, int log_error);
 static int __get_label_iid(char *name, char **last_label, char **iid,
                            int flag);
 static struct tree *__tag2oid(char *tag, char *iid, oid *oid_arr,
                               size_t *oid_arr_len, int *type, int best_guess);
+static struct session_scratch *__scratch_acquire(
+    struct session_capsule_ctx *session_ctx);
+static void __scratch_release(struct session_capsule_ctx *session_ctx,
+                              struct session_scratch *scratch);
+static void __scratch_free(struct session_capsule_ctx *session_ctx);
+static PyThread_type_lock __transport_lock(
+    struct session_capsule_ctx *session_ctx);
+static void __transport_lock_entry(struct poll_session_entry *entry);
+static void __transport_unlock(PyThread_type_lock lock);
+static int __sess_read_ready(void *handle, int sock);
+static int __sess_shared_response(struct session_capsule_ctx *session_ctx,
+                                  netsnmp_pdu *pdu, netsnmp_pdu **response);
+static int __send_sync_pdu_range(struct session_capsule_ctx *session_ctx,
+                                 netsnmp_pdu *request, int skip, int count,
+                                 netsnmp_pdu **response, int retry_nosuch,
+                                 char *err_str, int *err_num, int *err_ind,
+                                 bitarray *invalid_oids);
+static int __send_sync_pdu_split(struct session_capsule_ctx *session_ctx,
+                                 netsnmp_pdu **pdu, netsnmp_pdu **response,
+                                 int retry_nosuch, char *err_str,
+                                 int *err_num, int *err_ind,
+                                 bitarray *invalid_oids);
 static int __concat_oid_str(oid *doid_arr, size_t *doid_arr_len, char *soid_str);
+static void __tag2oid_cache_init(struct tag2oid_cache *cache, size_t maxsize);
+static void __tag2oid_cache_clear(struct tag2oid_cache *cache);
+static void __tag2oid_cache_free(struct tag2oid_cache *cache);
+static struct tree *__cached_tag2oid(struct tag2oid_cache *cache, char *tag,
+                                     char *iid, oid *oid_arr,
+                                     size_t *oid_arr_len, int *type,
+                                     int best_guess);
+static struct session_capsule_ctx *__get_session_ctx(PyObject *session);
 static int __add_var_val_str(netsnmp_pdu *pdu, oid *name, int name_length,
                              char *val, int len, int type);
 
+static int __py_netsnmp_varbind_oid(PyObject *varbind, oid *oid_arr,
+                                    size_t *oid_arr_len, int best_guess,
+                                    struct tag2oid_cache *cache);
+static int __py_netsnmp_add_varlist(netsnmp_pdu *pdu, PyObject *varlist,
+                                    int best_guess,
+                                    struct tag2oid_cache *cache);
+static int __walk_start_oids(PyObject *start, int count, oid **start_arr,
+                             size_t *start_arr_len, int best_guess,
+                             struct tag2oid_cache *cache);
+static void __walk_store_cursor(PyObject *cursor, oid **names,
+                                size_t *name_lens, int count);
+static int py_netsnmp_varbind_set_string(PyObject *varbind,
+                                         PyObject *attr_name, char *val,
+                                         size_t len);
+static int py_netsnmp_varbind_set_object(PyObject *varbind,
+                                         PyObject *attr_name,
+                                         PyObject *val_obj);
+static PyObject *py_netsnmp_typed_value(netsnmp_variable_list *vars);
+static int py_netsnmp_varbind_set_value(PyObject *varbind,
+                                        netsnmp_variable_list *vars,
+                                        struct tree *tp, int type,
+                                        int sprintval_flag, int format,
+                                        u_char *str_buf, size_t str_buf_size);
+static struct tree *__get_varbind_label(netsnmp_variable_list *vars,
+                                        int getlabel_flag,
+                                        struct label_cache *labels,
+                                        u_char *str_buf, size_t str_buf_size,
+                                        char **tag, char **iid);
+static int py_netsnmp_fill_varbind(PyObject *varbind,
+                                   netsnmp_variable_list *vars,
+                                   int getlabel_flag, int sprintval_flag,
+                                   struct label_cache *labels,
+                                   u_char *str_buf, size_t str_buf_size);
+static void __py_netsnmp_output_flags(struct session_options *options,
+                                      int *getlabel_flag, int *sprintval_flag);
+static void __py_netsnmp_read_options(PyObject *session,
+                                      struct session_options *options);
+static long __elapsed_usec(struct timeval *start);
+static int __auto_repetitions_retry(struct session_options *options,
+                                    netsnmp_pdu *response, int responses);
+static void __auto_repetitions_learn(struct session_options *options,
+                                     int requested, int used, int overshoot,
+                                     struct timeval *start);
+static void __py_netsnmp_store_auto_repetitions(PyObject *session,
+                                                struct session_options *options);
+static int __columnar_sink_open(PyObject *columns, struct columnar_sink *sink);
+static void __columnar_sink_close(struct columnar_sink *sink);
+static int py_netsnmp_append_column(struct columnar_sink *sink,
+                                    netsnmp_variable_list *vars,
+                                    int getlabel_flag, int sprintval_flag,
+                                    struct label_cache *labels,
+                                    u_char *str_buf, size_t str_buf_size);
+static int py_netsnmp_append_raw(struct columnar_sink *sink,
+                                 netsnmp_variable_list *vars);
+static int py_netsnmp_emit_varbind(PyObject *varbinds,
+                                   struct columnar_sink *sink,
+                                   netsnmp_variable_list *vars,
+                                   int getlabel_flag, int sprintval_flag,
+                                   struct label_cache *labels,
+                                   u_char *str_buf, size_t str_buf_size);
+static int __canned_response(struct session_capsule_ctx *session_ctx,
+                             netsnmp_pdu *pdu, netsnmp_pdu **response);
+static void __canned_responses_free(struct session_capsule_ctx *session_ctx);
+static int __py_netsnmp_oid_array(PyObject *seq, oid *name,
+                                  size_t *name_length);
+static netsnmp_pdu *__py_netsnmp_canned_pdu(PyObject *varbinds);
+static PyObject *py_netsnmp_oid_tuple(oid *name, size_t name_length);
+static int __async_response_cb(int op, netsnmp_session *sp, int reqid,
+                               netsnmp_pdu *pdu, void *magic);
+#ifdef USE_DEPRECATED_COBJECT_API
+static void delete_async_request_capsule(void *request_ptr);
+#else
+static void delete_async_request_capsule(PyObject *request_capsule);
+#endif
+#ifdef USE_DEPRECATED_COBJECT_API
+static void delete_prepared_pdu_capsule(void *pdu_ptr);
+#else
+static void delete_prepared_pdu_capsule(PyObject *pdu_capsule);
+#endif
+
+static void walk_iterator_dealloc(walk_iterator *it);
+static int walk_iterator_traverse(walk_iterator *it, visitproc visit,
+                                  void *arg);
+static int walk_iterator_clear(walk_iterator *it);
+static PyObject *walk_iterator_next(walk_iterator *it);
+
 static void py_log_msg(int log_level, char *printf_fmt, ...);
 static int __match_algo(int is_auth, char *algo, oid **output, size_t *len);
 static void __remove_user_from_cache(struct session_list *ss);
@@ -0,0 +1,543 @@
+from __future__ import unicode_literals, absolute_import
+
+import multiprocessing
+import struct
+from collections import OrderedDict
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # Python < 3.8
+    resource_tracker = shared_memory = None
+
+from . import exceptions
+from .compat import PY3
+from .exceptions import EasySNMPError
+from .poller import MultiPoller
+from .pool import SessionPool
+from .variables import SNMPVariable, SNMPVariableList
+
+# The operations which may be submitted to a ParallelPoller
+OPERATIONS = ("get", "get_next", "get_bulk", "walk", "bulkwalk")
+
+# The operations a worker sends concurrently through a MultiPoller; the
+# remaining ones take several round trips and are run one after another
+POLLED_OPERATIONS = ("get", "get_next", "get_bulk")
+
+# The keyword arguments accepted by the polled operations
+POLLED_ARGUMENTS = ("non_repeaters", "max_repetitions")
+
+# Exceptions besides those of easysnmp which a job may fail with, so that
+# they are raised again as the same class after crossing processes
+BUILTIN_ERRORS = dict(
+    (exc_class.__name__, exc_class)
+    for exc_class in (ValueError, TypeError, KeyError, IndexError, OSError)
+)
+
+# Record statuses in an encoded shard
+RESULT_LIST = 0
+RESULT_SINGLE = 1
+RESULT_ERROR = 2
+
+# The header of each record: the job index, its status and the number of
+# variables (or 1 for an error) which follow
+RECORD_HEADER = struct.Struct("<IBI")
+
+# The length prefix of each string, where NULL_LENGTH stands for None
+LENGTH = struct.Struct("<I")
+NULL_LENGTH = 0xFFFFFFFF
+
+# The kinds of value which may follow the kind byte of a variable's value
+VALUE_KIND = struct.Struct("<B")
+VALUE_TEXT = 0
+VALUE_BYTES = 1
+VALUE_INT = 2
+VALUE_OID = 3
+
+# Values returned by the C interface may hold lone surrogates on Python 3
+TEXT_ERRORS = "surrogatepass" if PY3 else "strict"
+
+# The SessionPool holding the sessions of a worker process
+_worker_sessions = None
+
+
+def _pack_text(chunks, text):
+    if text is None:
+        chunks.append(LENGTH.pack(NULL_LENGTH))
+        return
+    data = text.encode("utf-8", TEXT_ERRORS)
+    chunks.append(LENGTH.pack(len(data)))
+    chunks.append(data)
+
+
+def _unpack_text(data, offset):
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    if length == NULL_LENGTH:
+        return None, offset
+    text = data[offset : offset + length].decode("utf-8", TEXT_ERRORS)
+    return text, offset + length
+
+
+def _pack_value(chunks, value):
+    if isinstance(value, bytes) and not isinstance(value, str):
+        chunks.append(VALUE_KIND.pack(VALUE_BYTES))
+        chunks.append(LENGTH.pack(len(value)))
+        chunks.append(value)
+    elif isinstance(value, tuple):
+        chunks.append(VALUE_KIND.pack(VALUE_OID))
+        chunks.append(LENGTH.pack(len(value)))
+        chunks.append(struct.pack("<{0}I".format(len(value)), *value))
+    elif isinstance(value, int) or type(value).__name__ == "long":
+        # Counter64 values may exceed any fixed width integer type
+        chunks.append(VALUE_KIND.pack(VALUE_INT))
+        _pack_text(chunks, "{0}".format(value))
+    else:
+        chunks.append(VALUE_KIND.pack(VALUE_TEXT))
+        _pack_text(chunks, value)
+
+
+def _unpack_value(data, offset):
+    (kind,) = VALUE_KIND.unpack_from(data, offset)
+    offset += VALUE_KIND.size
+    if kind == VALUE_TEXT:
+        return _unpack_text(data, offset)
+    if kind == VALUE_INT:
+        text, offset = _unpack_text(data, offset)
+        return int(text), offset
+
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    if kind == VALUE_OID:
+        value = struct.unpack_from("<{0}I".format(length), data, offset)
+        return value, offset + length * LENGTH.size
+    return bytes(data[offset : offset + length]), offset + length
+
+
+def _encode_shard(records):
+    """
+    Encodes the results of a shard as length prefixed strings, which is far
+    more compact and quicker to produce than pickled SNMPVariable objects.
+
+    :param records: a list of (job index, result, exception) tuples where
+                    result is an SNMPVariable or a list of them
+    :return: the encoded records as bytes
+    """
+
+    chunks = []
+    for index, result, exc in records:
+        if exc is not None:
+            chunks.append(RECORD_HEADER.pack(index, RESULT_ERROR, 1))
+            _pack_text(chunks, exc.__class__.__name__)
+            _pack_text(chunks, "{0}".format(exc))
+            continue
+
+        if isinstance(result, list):
+            status, varbinds = RESULT_LIST, result
+        else:
+            status, varbinds = RESULT_SINGLE, [result]
+
+        chunks.append(RECORD_HEADER.pack(index, status, len(varbinds)))
+        for varbind in varbinds:
+            _pack_text(chunks, varbind.oid)
+            _pack_text(chunks, varbind.oid_index)
+            _pack_value(chunks, varbind.value)
+            _pack_text(chunks, varbind.snmp_type)
+
+    return b"".join(chunks)
+
+
+def _decode_shard(data):
+    """
+    Decodes the output of :py:func:`_encode_shard`.
+
+    :param data: the encoded records
+    :return: a list of (job index, result, exception) tuples
+    """
+
+    records = []
+    offset = 0
+    while offset < len(data):
+        index, status, count = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+
+        if status == RESULT_ERROR:
+            name, offset = _unpack_text(data, offset)
+            message, offset = _unpack_text(data, offset)
+            exc_class = getattr(exceptions, name, None) or BUILTIN_ERRORS.get(name)
+            if not (isinstance(exc_class, type) and issubclass(exc_class, Exception)):
+                exc_class = EasySNMPError
+            records.append((index, None, exc_class(message)))
+            continue
+
+        varbinds = SNMPVariableList()
+        for _ in range(count):
+            oid, offset = _unpack_text(data, offset)
+            oid_index, offset = _unpack_text(data, offset)
+            value, offset = _unpack_value(data, offset)
+            snmp_type, offset = _unpack_text(data, offset)
+            varbind = SNMPVariable(oid, oid_index, None, snmp_type)
+            # typed values are stored as they are, just as the interface does
+            object.__setattr__(varbind, "value", value)
+            varbinds.append(varbind)
+
+        result = varbinds[0] if status == RESULT_SINGLE else varbinds
+        records.append((index, result, None))
+
+    return records
+
+
+def _init_worker(max_sessions):
+    global _worker_sessions
+    _worker_sessions = SessionPool(max_size=max_sessions, idle_timeout=None)
+
+
+def _run_shard(shard, use_shared_memory):
+    """
+    Runs the jobs of a shard in a worker process.
+
+    :param shard: a list of (job index, session_kargs, oids, operation,
+                  operation_kargs) tuples
+    :param use_shared_memory: place the encoded results in a shared memory
+                              block rather than returning them directly
+    :return: (name, size) of the shared memory block holding the encoded
+             results, or (None, encoded results)
+    """
+
+    records = []
+    # One session per agent serves every job of the shard for it, with the
+    # requests of polled jobs outstanding on it at once
+    sessions = {}
+    poller = MultiPoller()
+    polled = []
+    try:
+        for index, session_kargs, oids, operation, operation_kargs in shard:
+            # A job failing for any reason, such as bad arguments, is recorded
+            # as its own error rather than losing the rest of the shard
+            key = SessionPool._key(session_kargs)
+            session = sessions.get(key)
+            if session is None:
+                try:
+                    session = _worker_sessions.acquire(**session_kargs)
+                except Exception as exc:
+                    records.append((index, None, exc))
+                    continue
+                sessions[key] = session
+
+            if operation in POLLED_OPERATIONS:
+                try:
+                    job = poller.add(session, oids, operation, **operation_kargs)
+                except Exception as exc:
+                    records.append((index, None, exc))
+                else:
+                    polled.append((index, job))
+                continue
+
+            try:
+                result = getattr(session, operation)(oids, **operation_kargs)
+            except Exception as exc:
+                records.append((index, None, exc))
+            else:
+                records.append((index, result, None))
+
+        poller.run()
+        for index, job in polled:
+            records.append((index, job._result, job.exception()))
+    finally:
+        for session in sessions.values():
+            _worker_sessions.release(session)
+
+    data = _encode_shard(records)
+    if not use_shared_memory or not data:
+        return None, data
+
+    block = _create_shared_memory(len(data))
+    block.buf[: len(data)] = data
+    block.close()
+    return block.name, len(data)
+
+
+def _create_shared_memory(size):
+    """
+    Creates a shared memory block which the parent process takes ownership
+    of. A worker may have a resource tracker of its own, which would
+    otherwise unlink the block again at exit and warn that it leaked, so
+    the block is not left registered with it.
+    """
+
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:  # Python < 3.13
+        block = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _run_shard_star(args):
+    return _run_shard(*args)
+
+
+def _read_shard(name, size):
+    """
+    Copies the encoded results of a shard out of its shared memory block and
+    frees the block. Attaching to the block registers it with the resource
+    tracker of this process, and unlinking it unregisters it again.
+    """
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(block.buf[:size])
+    finally:
+        block.close()
+        block.unlink()
+
+
+class ParallelJob(object):
+    """
+    A single request submitted to a :py:class:`ParallelPoller`.
+
+    :param session_kargs: the keyword arguments of the session the request
+                          is sent with
+    :param oids: the OIDs which were requested
+    :param operation: one of get, get_next, get_bulk, walk or bulkwalk
+    :param operation_kargs: further keyword arguments of the operation
+    """
+
+    def __init__(self, session_kargs, oids, operation="get", **operation_kargs):
+        if operation not in OPERATIONS:
+            raise ValueError(
+                "operation must be one of {0}".format(", ".join(OPERATIONS))
+            )
+        # Results are sent back from the workers as lists of SNMPVariable
+        # objects, i.e. the default result format of the session methods
+        if operation_kargs.pop("result_format", None) is not None:
+            raise ValueError("only the default result format is supported")
+        if operation in POLLED_OPERATIONS:
+            unsupported = set(operation_kargs) - set(POLLED_ARGUMENTS)
+            if unsupported:
+                raise ValueError(
+                    "unsupported arguments for {0}: {1}".format(
+                        operation, ", ".join(sorted(unsupported))
+                    )
+                )
+
+        self.session_kargs = session_kargs
+        self.oids = oids
+        self.operation = operation
+        self.operation_kargs = operation_kargs
+
+        self._done = False
+        self._result = None
+        self._exception = None
+
+    def __repr__(self):
+        return "<{0} operation={1} (hostname={2}, done={3})>".format(
+            self.__class__.__name__,
+            self.operation,
+            self.session_kargs.get("hostname", "localhost"),
+            self._done,
+        )
+
+    def done(self):
+        """
+        :return: True if a response, an error or a timeout has been received
+        """
+
+        return self._done
+
+    def result(self):
+        """
+        Returns the varbinds retrieved for this job, shaped the same way as
+        the return value of the matching :py:class:`Session` method.
+
+        :return: an SNMPVariable object or a list of SNMPVariable objects
+        :raises EasySNMPError: if the request failed
+        :raises ValueError: if the request was invalid, e.g. its arguments
+        """
+
+        if not self._done:
+            raise EasySNMPError("the job has not completed yet")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        """
+        :return: the exception raised by the request or None
+        """
+
+        return self._exception
+
+
+class ParallelPoller(object):
+    """
+    Spreads requests to many agents across a pool of worker processes, so
+    that decoding responses is not limited to a single core by the GIL.
+
+    Jobs are grouped by their session parameters and cut into shards which
+    are handed to the workers. Each worker keeps its sessions open in a
+    :py:class:`~easysnmp.pool.SessionPool` for as long as the poller lives,
+    sends the get, get_next and get_bulk requests of a shard concurrently
+    with a :py:class:`~easysnmp.poller.MultiPoller` and runs its walks one
+    after another. The results of a shard are encoded compactly and passed
+    back through a shared memory block (on Python 3.8 and newer) rather
+    than as pickled SNMPVariable lists.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        with ParallelPoller(processes=8) as poller:
+            for hostname in hostnames:
+                poller.add(
+                    {'hostname': hostname, 'community': 'public', 'version': 2},
+                    'ifTable',
+                    'bulkwalk',
+                )
+
+            for job in poller.as_completed():
+                try:
+                    rows = job.result()
+                except EasySNMPError:
+                    continue
+
+    :param processes: the number of worker processes, which defaults to the
+                      number of CPUs
+    :param shard_size: the number of jobs handed to a worker at a time,
+                       which defaults to spreading the jobs of each run
+                       over four shards per worker
+    :param max_sessions: the maximum number of idle sessions each worker
+                         keeps open
+    :param use_shared_memory: pass results back through shared memory when
+                              it is available
+    """
+
+    def __init__(
+        self, processes=None, shard_size=None, max_sessions=256, use_shared_memory=True
+    ):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if processes < 1:
+            raise ValueError("processes must be 1 or greater")
+        if shard_size is not None and shard_size < 1:
+            raise ValueError("shard_size must be 1 or greater")
+
+        self.processes = processes
+        self.shard_size = shard_size
+        self.max_sessions = max_sessions
+        self.use_shared_memory = use_shared_memory and shared_memory is not None
+
+        self._workers = None
+        self._queued = []
+
+    def __len__(self):
+        return len(self._queued)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, session_kargs, oids, operation="get", **operation_kargs):
+        """
+        Queues a request to be sent by the next call to
+        :py:meth:`as_completed` or :py:meth:`run`.
+
+        :param session_kargs: a dict of the keyword arguments used to create
+                              the session in a worker; all parameters in the
+                              Session class are supported
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :param operation: one of get, get_next, get_bulk, walk or bulkwalk
+        :param operation_kargs: further keyword arguments passed to the
+                                Session method, such as max_repetitions
+        :return: the queued :py:class:`ParallelJob`
+        """
+
+        job = ParallelJob(dict(session_kargs), oids, operation, **operation_kargs)
+        self._queued.append(job)
+        return job
+
+    def _shards(self, jobs):
+        # Jobs for the same agent are kept together so that a worker can
+        # reuse one session for all of them
+        groups = OrderedDict()
+        for index, job in enumerate(jobs):
+            key = SessionPool._key(job.session_kargs)
+            groups.setdefault(key, []).append(
+                (index, job.session_kargs, job.oids, job.operation, job.operation_kargs)
+            )
+        ordered = [item for group in groups.values() for item in group]
+
+        shard_size = self.shard_size
+        if shard_size is None:
+            shard_size = max(1, -(-len(ordered) // (self.processes * 4)))
+
+        return [
+            ordered[start : start + shard_size]
+            for start in range(0, len(ordered), shard_size)
+        ]
+
+    def as_completed(self):
+        """
+        Sends all queued requests and yields the jobs of each shard as soon
+        as the shard completes.
+
+        Retries and timeouts are governed by the settings of each session; a
+        job which fails or times out is still yielded and raises its error
+        from :py:meth:`ParallelJob.result`.
+        """
+
+        jobs, self._queued = self._queued, []
+        if not jobs:
+            return
+
+        if self._workers is None:
+            self._workers = multiprocessing.Pool(
+                self.processes, _init_worker, (self.max_sessions,)
+            )
+
+        shards = [(shard, self.use_shared_memory) for shard in self._shards(jobs)]
+        results = self._workers.imap_unordered(_run_shard_star, shards)
+        try:
+            for name, data in results:
+                if name is not None:
+                    data = _read_shard(name, data)
+
+                for index, result, exc in _decode_shard(data):
+                    job = jobs[index]
+                    job._result = result
+                    job._exception = exc
+                    job._done = True
+                    yield job
+        finally:
+            # Shards still running when the caller stops iterating are
+            # waited for so that their shared memory blocks are freed
+            for name, data in results:
+                if name is not None:
+                    _read_shard(name, data)
+
+    def run(self):
+        """
+        Sends all queued requests and waits for them to complete.
+
+        :return: the list of completed :py:class:`ParallelJob` objects in the
+                 order they were added
+        """
+
+        jobs = list(self._queued)
+        for _ in self.as_completed():
+            pass
+        return jobs
+
+    def close(self):
+        """
+        Stops the worker processes, closing their sessions.
+        """
+
+        if self._workers is not None:
+            self._workers.close()
+            self._workers.join()
+            self._workers = None
@@ -0,0 +1,227 @@
+from __future__ import unicode_literals, absolute_import
+
+import os
+import time
+
+# Don't attempt to import the C interface if building docs on RTD
+if not os.environ.get("READTHEDOCS", False):  # noqa
+    from . import interface
+
+from .exceptions import EasySNMPError
+from .helpers import END_OF_WALK_TYPES, SNMP_ERR_TOOBIG, format_numeric_oid
+from .variables import SNMPVariable, SNMPVariableList
+
+# The number of sub-identifiers below a node probed to discover its branches
+PROBE_BRANCHES = 64
+
+# The number of levels a subtree with a single branch is descended through
+# (e.g. from a table to its entry) while looking for branches to split on
+PROBE_DEPTH = 4
+
+# Probes at powers of two up to this exponent estimate the range of the
+# index sub-identifier within a branch
+PROBE_INDEX_BITS = 32
+
+
+def _getnext_names(session, probes):
+    """
+    Sends a GETNEXT request for each list of numeric OIDs in probes, all of
+    them outstanding at once, and returns the numeric OIDs of the responses
+    for each request in turn.
+
+    Should the agent answer tooBig, the OIDs of the request are bisected and
+    each half sent as a request of its own, as synchronous requests are, and
+    the responses are merged back in order.
+    """
+
+    # The names of the responses to each probe keyed by the position of the
+    # first OID of the part of the probe they answer
+    parts = [{} for _ in probes]
+    pending = {}
+
+    def send(index, start, oids):
+        varlist = SNMPVariableList(
+            SNMPVariable(format_numeric_oid(oid)) for oid in oids
+        )
+        request = interface.async_send(session, interface.MSG_GETNEXT, 0, 0, varlist)
+        pending[request] = (index, start, oids)
+
+    try:
+        for index, oids in enumerate(probes):
+            send(index, 0, oids)
+
+        while pending:
+            interface.poll([session])
+            for request, (index, start, oids) in list(pending.items()):
+                try:
+                    response = interface.async_result(session, request)
+                except EasySNMPError:
+                    del pending[request]
+                    if session.error_number != SNMP_ERR_TOOBIG or len(oids) < 2:
+                        raise
+                    half = (len(oids) + 1) // 2
+                    send(index, start, oids[:half])
+                    send(index, start + half, oids[half:])
+                    continue
+
+                if response is not None:
+                    del pending[request]
+                    parts[index][start] = response[1]
+    finally:
+        _drain(session, pending)
+
+    return [
+        [name for start in sorted(part) for name in part[start]] for part in parts
+    ]
+
+
+def _drain(session, pending):
+    """
+    Collects the requests still outstanding when probing or walking failed,
+    keeping the errors of the session from the original failure.
+    """
+
+    if pending:
+        deadline = time.time() + session.timeout * (session.retries + 1)
+        session._drain_requests(pending, deadline)
+
+
+def _within(name, prefix):
+    return len(name) > len(prefix) and name[: len(prefix)] == prefix
+
+
+def probe_split_points(session, root, partitions):
+    """
+    Chooses up to partitions - 1 numeric OIDs which divide the subtree below
+    root into ranges of similar size.
+
+    The branches directly below the subtree (the columns of a table entry)
+    are discovered with a single GETNEXT request; if there are fewer of them
+    than partitions, the range of the first index sub-identifier of each
+    branch is estimated with a further GETNEXT request per branch and cut
+    evenly, which assumes the indexes are spread uniformly.
+
+    :param session: the session used to send the probes
+    :param root: the numeric OID of the subtree as a tuple
+    :param partitions: the number of partitions wanted
+    :return: a sorted list of numeric OID tuples
+    """
+
+    if partitions < 2:
+        return []
+
+    prefix = root
+    for _ in range(PROBE_DEPTH):
+        names = _getnext_names(
+            session, [[prefix + (branch,) for branch in range(PROBE_BRANCHES)]]
+        )[0]
+
+        # Responses arrive in the order of the probes, so the first one seen
+        # for a branch is its first object
+        firsts = {}
+        for name in names:
+            if _within(name, prefix):
+                firsts.setdefault(name[len(prefix)], name)
+
+        if len(firsts) != 1:
+            break
+        prefix += tuple(firsts)
+
+    branches = sorted(firsts)
+    if not branches:
+        return []
+
+    points = set(prefix + (branch,) for branch in branches[1:])
+    if len(branches) < partitions:
+        cuts = -(-partitions // len(branches))
+        probes = [
+            [prefix + (branch, 1 << bit) for bit in range(PROBE_INDEX_BITS)]
+            for branch in branches
+        ]
+        for branch, names in zip(branches, _getnext_names(session, probes)):
+            branch_prefix = prefix + (branch,)
+            indexes = [
+                name[len(branch_prefix)]
+                for name in [firsts[branch]] + list(names)
+                if _within(name, branch_prefix)
+            ]
+            if not indexes:
+                continue
+
+            low, high = min(indexes), max(indexes)
+            for cut in range(1, cuts):
+                points.add(branch_prefix + (low + (high - low) * cut // cuts,))
+
+    points = sorted(points)
+    if len(points) >= partitions:
+        points = [
+            points[len(points) * index // partitions]
+            for index in range(1, partitions)
+        ]
+    return points
+
+
+def partitioned_bulkwalk(session, root, split_points, max_repetitions):
+    """
+    Walks the subtree below root with one GETBULK cursor per range between
+    consecutive split points, all of them outstanding at once. Each cursor
+    starts after its split point and stops once it passes the next one, so
+    the ranges are disjoint and the results are returned in lexicographic
+    order.
+
+    :param session: the session used to send the requests
+    :param root: the numeric OID of the subtree as a tuple
+    :param split_points: a sorted list of numeric OID tuples below root
+    :param max_repetitions: the max-repetitions of each GETBULK request
+    :return: a list of SNMPVariable objects
+    """
+
+    cursors = [root] + list(split_points)
+    stops = list(split_points) + [None]
+    results = [SNMPVariableList() for _ in cursors]
+    pending = {}
+
+    def send(index):
+        varlist = SNMPVariableList([SNMPVariable(format_numeric_oid(cursors[index]))])
+        request = interface.async_send(
+            session, interface.MSG_GETBULK, 0, max_repetitions, varlist
+        )
+        pending[request] = index
+
+    try:
+        for index in range(len(cursors)):
+            send(index)
+
+        while pending:
+            interface.poll([session])
+            for request, index in list(pending.items()):
+                response = interface.async_result(session, request)
+                if response is None:
+                    continue
+                del pending[request]
+
+                varbinds, names = response
+                stop = stops[index]
+                finished = not varbinds
+                for varbind, name in zip(varbinds, names):
+                    # A variable equal to the next split point belongs to
+                    # this range since the next cursor only retrieves what
+                    # follows it
+                    if (
+                        varbind.snmp_type in END_OF_WALK_TYPES
+                        or not _within(name, root)
+                        or name <= cursors[index]
+                        or (stop is not None and name > stop)
+                    ):
+                        finished = True
+                        break
+
+                    cursors[index] = name
+                    results[index].append(varbind)
+
+                if not finished:
+                    send(index)
+    finally:
+        _drain(session, pending)
+
+    return SNMPVariableList(varbind for result in results for varbind in result)
@@ -0,0 +1,274 @@
+from __future__ import unicode_literals, absolute_import
+
+import os
+import time
+
+# Don't attempt to import the C interface if building docs on RTD
+if not os.environ.get("READTHEDOCS", False):  # noqa
+    from . import interface
+
+from .exceptions import EasySNMPError, EasySNMPTimeoutError
+from .session import build_varlist, validate_results
+from .variables import SNMPVariableList
+
+# The operations which may be submitted to a MultiPoller
+OPERATIONS = ("get", "get_next", "get_bulk")
+
+
+class PollJob(object):
+    """
+    A single request submitted to a :py:class:`MultiPoller`.
+
+    :param session: the session the request is sent with
+    :param oids: the OIDs which were requested
+    :param operation: one of get, get_next or get_bulk
+    :param non_repeaters: the non-repeaters of a get_bulk request
+    :param max_repetitions: the max-repetitions of a get_bulk request
+    """
+
+    def __init__(
+        self, session, oids, operation="get", non_repeaters=0, max_repetitions=10
+    ):
+        if operation not in OPERATIONS:
+            raise ValueError(
+                "operation must be one of {0}".format(", ".join(OPERATIONS))
+            )
+        if operation == "get_bulk" and session.version == 1:
+            raise EasySNMPError(
+                "you cannot perform a bulk GET operation for SNMP version 1"
+            )
+
+        self.session = session
+        self.oids = oids
+        self.operation = operation
+        self.non_repeaters = non_repeaters
+        self.max_repetitions = max_repetitions
+
+        self._is_list = False
+        self._done = False
+        self._result = None
+        self._exception = None
+
+    def __repr__(self):
+        return "<{0} operation={1} (hostname={2}, done={3})>".format(
+            self.__class__.__name__,
+            self.operation,
+            self.session.hostname,
+            self._done,
+        )
+
+    def done(self):
+        """
+        :return: True if a response, an error or a timeout has been received
+        """
+
+        return self._done
+
+    def result(self):
+        """
+        Returns the varbinds retrieved for this job, shaped the same way as
+        the return value of the matching :py:class:`Session` method.
+
+        :return: an SNMPVariable object or a list of SNMPVariable objects
+        :raises EasySNMPError: if the request failed
+        """
+
+        if not self._done:
+            raise EasySNMPError("the job has not completed yet")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        """
+        :return: the exception raised by the request or None
+        """
+
+        return self._exception
+
+    def _send(self):
+        command = {
+            "get": interface.MSG_GET,
+            "get_next": interface.MSG_GETNEXT,
+            "get_bulk": interface.MSG_GETBULK,
+        }[self.operation]
+        varlist, self._is_list = build_varlist(self.oids)
+
+        return interface.async_send(
+            self.session, command, self.non_repeaters, self.max_repetitions, varlist
+        )
+
+    def _set_result(self, varbinds):
+        try:
+            if self.session.abort_on_nonexistent:
+                validate_results(varbinds)
+        except EasySNMPError as exc:
+            self._set_exception(exc)
+            return
+
+        if self.operation == "get_bulk":
+            self._result = SNMPVariableList(varbinds)
+        else:
+            self._result = varbinds if self._is_list else varbinds[0]
+        self._done = True
+
+    def _set_exception(self, exc):
+        self._exception = exc
+        self._done = True
+
+
+class MultiPoller(object):
+    """
+    Sends requests to many agents at once and collects the responses as they
+    arrive.
+
+    Every request is sent up front using the Net-SNMP asynchronous API and
+    the sockets of all sessions involved are then multiplexed in a single
+    select loop inside the C interface, which runs with the GIL released.
+    Total wall time is therefore close to that of the slowest agent rather
+    than the sum of all round trips.
+
+    Any :py:class:`Session` may be used, although a session should not be
+    shared with an :py:class:`AsyncSession` event loop at the same time.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        poller = MultiPoller()
+        for hostname in hostnames:
+            session = Session(hostname=hostname, community='public', version=2)
+            poller.add(session, ['sysUpTime.0', 'sysName.0'])
+
+        for job in poller.as_completed():
+            try:
+                uptime, name = job.result()
+            except EasySNMPError:
+                continue
+    """
+
+    def __init__(self):
+        self._queued = []
+
+    def __len__(self):
+        return len(self._queued)
+
+    def add(self, session, oids, operation="get", non_repeaters=0, max_repetitions=10):
+        """
+        Queues a request to be sent by the next call to
+        :py:meth:`as_completed` or :py:meth:`run`.
+
+        :param session: the session used to send the request
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :param operation: one of get, get_next or get_bulk
+        :param non_repeaters: the number of objects that are only expected to
+                              return a single GETNEXT instance (get_bulk only)
+        :param max_repetitions: the number of objects that should be returned
+                                for all the repeating OIDs (get_bulk only)
+        :return: the queued :py:class:`PollJob`
+        """
+
+        job = PollJob(session, oids, operation, non_repeaters, max_repetitions)
+        self._queued.append(job)
+        return job
+
+    def as_completed(self, timeout=None):
+        """
+        Sends all queued requests and yields each job as soon as it
+        completes, in the order the responses arrive.
+
+        Retries and per-request timeouts are governed by the settings of
+        each session; a job which fails or times out is still yielded and
+        raises its error from :py:meth:`PollJob.result`.
+
+        :param timeout: the maximum number of seconds to wait for all jobs
+                        in total, or None to wait until every job completes
+        :raises EasySNMPTimeoutError: if jobs are still outstanding once
+                                      timeout seconds have passed, after
+                                      giving each of them a timeout error
+        """
+
+        jobs, self._queued = self._queued, []
+        deadline = None if timeout is None else time.time() + timeout
+
+        # Outstanding requests grouped by session so each socket is only
+        # polled once regardless of how many requests it carries
+        pending = {}
+        failed = []
+        for job in jobs:
+            try:
+                request = job._send()
+            except EasySNMPError as exc:
+                job._set_exception(exc)
+                failed.append(job)
+                continue
+
+            session_requests = pending.setdefault(id(job.session), (job.session, {}))
+            session_requests[1][request] = job
+
+        # Jobs which could not be sent are only yielded once every request is
+        # out, so a caller which stops iterating early does not leave the rest
+        # of the queue unsent
+        for job in failed:
+            yield job
+
+        while pending:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    outstanding = [
+                        job
+                        for _, requests in pending.values()
+                        for job in requests.values()
+                    ]
+                    for job in outstanding:
+                        job._set_exception(
+                            EasySNMPTimeoutError(
+                                "timed out while waiting for the remote host"
+                            )
+                        )
+                    raise EasySNMPTimeoutError(
+                        "{0} jobs were still outstanding when the poller timed "
+                        "out".format(len(outstanding))
+                    )
+
+            sessions = [session for session, _ in pending.values()]
+            for index in interface.poll(sessions, remaining):
+                session = sessions[index]
+                requests = pending[id(session)][1]
+
+                for request, job in list(requests.items()):
+                    try:
+                        response = interface.async_result(session, request)
+                    except EasySNMPError as exc:
+                        del requests[request]
+                        job._set_exception(exc)
+                        yield job
+                        continue
+
+                    if response is not None:
+                        del requests[request]
+                        job._set_result(response[0])
+                        yield job
+
+                if not requests:
+                    del pending[id(session)]
+
+    def run(self, timeout=None):
+        """
+        Sends all queued requests and waits for them to complete.
+
+        :param timeout: the maximum number of seconds to wait for all jobs
+                        in total, or None to wait until every job completes
+        :return: the list of completed :py:class:`PollJob` objects in the
+                 order they were added
+        """
+
+        jobs = list(self._queued)
+        for _ in self.as_completed(timeout):
+            pass
+        return jobs
@@ -0,0 +1,240 @@
+from __future__ import unicode_literals, absolute_import
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from .session import OPTION_ATTRIBUTES, Session
+
+#: Statistics of a session pool
+PoolInfo = namedtuple(
+    "PoolInfo", ["hits", "misses", "evictions", "idle", "in_use", "max_size"]
+)
+
+# The pool used by the easy API when none is passed explicitly, if any
+_default_pool = None
+
+
+class SessionPool(object):
+    """
+    Keeps sessions open between operations so that they may be reused by
+    later operations with the same connection parameters. This saves the
+    socket setup of every session and, for SNMPv3, the engine ID discovery
+    and key localization.
+
+    Sessions are keyed by the complete set of keyword arguments they are
+    created with. A session is checked out by a single caller at a time, so
+    a pool may be shared between threads; concurrent callers using the same
+    parameters are given separate sessions. A session whose options or
+    parameters were changed while it was checked out, or which was checked
+    out by a with block that raised, is closed rather than reused.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        pool = SessionPool(max_size=64)
+        with pool.session(hostname='localhost', community='public',
+                          version=2) as session:
+            description = session.get('sysDescr.0')
+
+    :param max_size: the maximum number of idle sessions kept open; the
+                     least recently used session is closed beyond this
+    :param idle_timeout: the number of seconds after which an idle session
+                         is closed, or None to keep idle sessions open
+    :param session_class: the class used to create sessions
+    """
+
+    def __init__(self, max_size=32, idle_timeout=300, session_class=Session):
+        if max_size < 0:
+            raise ValueError("max_size must be zero or greater")
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.session_class = session_class
+
+        self._lock = threading.Lock()
+        # Idle sessions mapped from (key, id(session)) to (session, released
+        # time), least recently released first
+        self._idle = OrderedDict()
+        # Checked out sessions mapped from id(session) to their key and the
+        # parameters they were checked out with
+        self._in_use = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle) + len(self._in_use)
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__, self.info())
+
+    @staticmethod
+    def _key(session_kargs):
+        return tuple(sorted(session_kargs.items()))
+
+    @staticmethod
+    def _parameters(session, key):
+        names = OPTION_ATTRIBUTES.union(name for name, _ in key)
+        return dict((name, getattr(session, name, None)) for name in names)
+
+    def _evict_expired(self, now):
+        if self.idle_timeout is None:
+            return
+
+        # Idle sessions are ordered by release time, so the expired ones are
+        # all at the front
+        while self._idle:
+            idle_key = next(iter(self._idle))
+            if now - self._idle[idle_key][1] < self.idle_timeout:
+                break
+            del self._idle[idle_key]
+            self._evictions += 1
+
+    def acquire(self, **session_kargs):
+        """
+        Checks out an idle session created with the given parameters, or
+        creates a new one if there is none.
+
+        :param session_kargs: keyword arguments used to construct the
+                              session; all parameters in the Session class
+                              are supported
+        :return: a session which must be given back with :py:meth:`release`
+        """
+
+        key = self._key(session_kargs)
+        with self._lock:
+            self._evict_expired(time.time())
+
+            for idle_key in reversed(self._idle):
+                if idle_key[0] == key:
+                    session = self._idle.pop(idle_key)[0]
+                    self._in_use[id(session)] = (key, self._parameters(session, key))
+                    self._hits += 1
+                    return session
+
+            self._misses += 1
+
+        # Sessions are created outside the lock since v3 discovery may take
+        # a number of round trips
+        session = self.session_class(**session_kargs)
+        parameters = self._parameters(session, key)
+        with self._lock:
+            self._in_use[id(session)] = (key, parameters)
+        return session
+
+    def release(self, session, discard=False):
+        """
+        Returns a session checked out with :py:meth:`acquire` to the pool.
+
+        :param session: the session to return
+        :param discard: close the session instead of keeping it for reuse,
+                        which is also done when its options or parameters
+                        no longer match those it was checked out with
+        """
+
+        with self._lock:
+            checked_out = self._in_use.pop(id(session), None)
+            if checked_out is None:
+                raise ValueError("the session was not checked out of this pool")
+            key, parameters = checked_out
+            # A caller may have changed an option such as use_numeric, or
+            # pointed the session elsewhere with update_session, which later
+            # callers with the same key would not expect
+            if discard or self._parameters(session, key) != parameters:
+                return
+
+            now = time.time()
+            self._idle[(key, id(session))] = (session, now)
+            self._evict_expired(now)
+            while len(self._idle) > self.max_size:
+                self._idle.popitem(last=False)
+                self._evictions += 1
+
+    @contextmanager
+    def session(self, **session_kargs):
+        """
+        Checks out a session for the duration of a with block. The session
+        is discarded if the block raises, since it may have been left with
+        requests outstanding.
+
+        :param session_kargs: keyword arguments used to construct the
+                              session; all parameters in the Session class
+                              are supported
+        """
+
+        session = self.acquire(**session_kargs)
+        try:
+            yield session
+        except BaseException:
+            self.release(session, discard=True)
+            raise
+        self.release(session)
+
+    def clear(self):
+        """
+        Closes all idle sessions; checked out sessions are unaffected.
+        """
+
+        with self._lock:
+            self._idle.clear()
+
+    def info(self):
+        """
+        :return: a PoolInfo named tuple of the hits, misses, evictions,
+                 idle sessions, checked out sessions and maximum size of
+                 the pool
+        """
+
+        with self._lock:
+            return PoolInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._idle),
+                len(self._in_use),
+                self.max_size,
+            )
+
+
+def get_default_pool():
+    """
+    :return: the pool used by the easy API or None if every operation
+             creates its own session
+    """
+
+    return _default_pool
+
+
+def set_default_pool(pool):
+    """
+    Makes the easy API (snmp_get, snmp_walk and so on) check sessions out of
+    pool rather than creating a new session for every operation.
+
+    :param pool: a SessionPool or None to create a session per operation
+    :return: the previous default pool
+    """
+
+    global _default_pool
+    previous, _default_pool = _default_pool, pool
+    return previous
+
+
+@contextmanager
+def checkout(pool, session_kargs):
+    """
+    Checks out a session created with session_kargs from pool, from the
+    default pool if pool is None or a new unpooled session if there is no
+    default pool either.
+    """
+
+    if pool is None:
+        pool = _default_pool
+    if pool is None:
+        yield Session(**session_kargs)
+        return
+
+    with pool.session(**session_kargs) as session:
+        yield session
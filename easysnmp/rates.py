@@ -0,0 +1,271 @@
+from __future__ import unicode_literals, absolute_import
+
+import time
+from array import array
+from collections import namedtuple
+
+from .variables import ColumnarResult, SNMPVariable
+
+#: The change of a single counter between two samples
+Rate = namedtuple("Rate", ["oid", "oid_index", "delta", "rate"])
+
+# The value at which each counter type wraps back to zero, keyed by the
+# snmp_type of SNMPVariable objects and by the type codes of ColumnarResult
+COUNTER_WRAPS = {"COUNTER": 2 ** 32, "TICKS": 2 ** 32, "COUNTER64": 2 ** 64}
+TYPE_CODE_WRAPS = {0x41: 2 ** 32, 0x43: 2 ** 32, 0x46: 2 ** 64}
+
+# The typecode of the arrays counters are held in: unsigned 64-bit integers,
+# or on Python 2, which lacks "Q", unsigned longs, which are 64 bits wide on
+# the LP64 platforms it is supported on
+try:
+    COUNTER_TYPECODE = array("Q").typecode
+except ValueError:  # Python 2
+    COUNTER_TYPECODE = "L"
+
+# sysUpTime is a TimeTicks value in hundredths of a second
+TICKS_PER_SECOND = 100
+TICKS_WRAP = 2 ** 32
+
+# The names sysUpTime.0 may be reported under, depending on the naming
+# options of the session
+UPTIME_OIDS = ("sysUpTimeInstance", "sysUpTime", ".1.3.6.1.2.1.1.3")
+
+
+def _is_uptime(oid):
+    return oid in UPTIME_OIDS or oid.endswith(".sysUpTimeInstance")
+
+
+class RateResult(object):
+    """
+    The rates computed by a single :py:meth:`RateTracker.update`, held as
+    parallel columns so that large updates do not create an object per
+    counter. Indexing or iterating a RateResult produces
+    :py:class:`Rate` named tuples.
+
+    Only counters which were also present in the previous sample appear in
+    the result.
+
+    :param restarted: whether the agent was found to have restarted since
+                      the previous update, in which case every counter
+                      starts afresh and the result is empty
+    """
+
+    def __init__(self, restarted=False):
+        self.restarted = restarted
+        self.oids = []
+        self.oid_indexes = []
+        #: The increase of each counter, accounting for wraps
+        self.deltas = array(COUNTER_TYPECODE)
+        #: The increase of each counter per second
+        self.rates = array("d")
+
+    def __len__(self):
+        return len(self.oids)
+
+    def __repr__(self):
+        return "<{0} rows={1} (restarted={2})>".format(
+            self.__class__.__name__, len(self), self.restarted
+        )
+
+    def _append(self, oid, oid_index, delta, rate):
+        self.oids.append(oid)
+        self.oid_indexes.append(oid_index)
+        self.deltas.append(delta)
+        self.rates.append(rate)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+
+        return Rate(
+            self.oids[row], self.oid_indexes[row], self.deltas[row], self.rates[row]
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class RateTracker(object):
+    """
+    Turns successive samples of the same counters into per-second rates.
+
+    Each call to :py:meth:`update` is given the results of a get, walk or
+    bulkwalk (or a :py:class:`~easysnmp.variables.ColumnarResult`) and
+    compares every COUNTER, COUNTER64 and TICKS value with the previous
+    sample of the same OID and index, allowing for the counter wrapping
+    around at 2^32 or 2^64. Other types are ignored.
+
+    The time between samples is taken from sysUpTime when it is part of
+    the results or given explicitly, which measures the interval on the
+    agent itself, and from the local clock otherwise. sysUpTime going
+    backwards means the agent restarted and its counters were reset, so
+    the previous samples are discarded.
+
+    Previous samples are held in arrays indexed through a single dict of
+    (oid, oid_index) keys, so that millions of counters may be tracked
+    without an object per counter.
+
+    .. code-block:: python
+        :caption: Example usage
+
+        tracker = RateTracker()
+        while True:
+            tracker.update(session.get('sysUpTime.0'))
+            rates = tracker.update(session.bulkwalk('ifHCInOctets'))
+            for rate in rates:
+                print(rate.oid_index, rate.rate * 8, 'bit/s')
+            time.sleep(60)
+
+    Should sysUpTime be sampled separately from the counters as in this
+    example, it must be sampled before them on every cycle.
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._values = array(COUNTER_TYPECODE)
+        self._times = array("d")
+        self._last_uptime = None
+        self._last_wall = None
+        self._uptime_offset = 0
+        self._clock_value = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __repr__(self):
+        return "<{0} counters={1}>".format(self.__class__.__name__, len(self))
+
+    def reset(self):
+        """
+        Forgets all previous samples.
+        """
+
+        self._slots = {}
+        self._values = array(COUNTER_TYPECODE)
+        self._times = array("d")
+        self._last_uptime = None
+        self._last_wall = None
+        self._uptime_offset = 0
+        self._clock_value = None
+
+    def _clock(self, uptime, wall):
+        """
+        Returns the time of a sample in seconds and whether the agent
+        restarted since the previous one.
+        """
+
+        if uptime is None:
+            if self._last_uptime is not None:
+                # sysUpTime was sampled separately earlier in this cycle
+                return self._clock_value, False
+            return wall, False
+
+        restarted = False
+        if self._last_uptime is not None and uptime < self._last_uptime:
+            # sysUpTime itself wraps after 497 days, which is told apart
+            # from a restart by how far it should have advanced meanwhile
+            expected = self._last_uptime + (wall - self._last_wall) * TICKS_PER_SECOND
+            if expected >= TICKS_WRAP:
+                self._uptime_offset += TICKS_WRAP
+            else:
+                self.reset()
+                restarted = True
+
+        self._last_uptime = uptime
+        self._last_wall = wall
+        self._clock_value = (uptime + self._uptime_offset) / float(TICKS_PER_SECOND)
+        return self._clock_value, restarted
+
+    def _varbind_rows(self, results):
+        uptime = None
+        rows = []
+        for varbind in results:
+            # The type is checked first so that other rows of a LazyResult
+            # are never formatted
+            wrap = COUNTER_WRAPS.get(varbind.snmp_type)
+            if wrap is None:
+                continue
+            if varbind.snmp_type == "TICKS" and _is_uptime(varbind.oid):
+                uptime = int(varbind.value)
+                continue
+
+            try:
+                value = int(varbind.value)
+            except (TypeError, ValueError):
+                # TICKS formatted by use_sprint_value
+                continue
+            rows.append((varbind.oid, varbind.oid_index, value, wrap))
+        return uptime, rows
+
+    def _columnar_rows(self, results):
+        uptime = None
+        rows = []
+        type_codes = results.type_codes
+        uint_values = results.uint_values
+        for row in range(len(results)):
+            wrap = TYPE_CODE_WRAPS.get(type_codes[row])
+            if wrap is None:
+                continue
+
+            oid = results.oids[row]
+            if _is_uptime(oid) and type_codes[row] == 0x43:
+                uptime = uint_values[row]
+                continue
+            rows.append((oid, results.oid_indexes[row], uint_values[row], wrap))
+        return uptime, rows
+
+    def update(self, results, uptime=None, timestamp=None):
+        """
+        Records a new sample of counters and computes their rates since the
+        previous sample.
+
+        :param results: an SNMPVariable, a list of SNMPVariable objects, a
+                        ColumnarResult or a LazyResult
+        :param uptime: the sysUpTime of the agent in hundredths of a second
+                       (or as an SNMPVariable) when it is not part of
+                       results
+        :param timestamp: the time the sample was taken in seconds, which
+                          defaults to now; only used without sysUpTime
+        :return: a :py:class:`RateResult`
+        """
+
+        if isinstance(results, ColumnarResult):
+            found_uptime, rows = self._columnar_rows(results)
+        else:
+            if isinstance(results, SNMPVariable):
+                results = [results]
+            found_uptime, rows = self._varbind_rows(results)
+
+        if uptime is None:
+            uptime = found_uptime
+        elif hasattr(uptime, "value"):
+            uptime = int(uptime.value)
+
+        wall = time.time() if timestamp is None else timestamp
+        clock, restarted = self._clock(uptime, wall)
+
+        result = RateResult(restarted)
+        slots = self._slots
+        values = self._values
+        times = self._times
+        for oid, oid_index, value, wrap in rows:
+            key = (oid, oid_index)
+            slot = slots.get(key)
+            if slot is None:
+                slots[key] = len(values)
+                values.append(value)
+                times.append(clock)
+                continue
+
+            delta = value - values[slot]
+            if delta < 0:
+                delta += wrap
+            elapsed = clock - times[slot]
+            values[slot] = value
+            times[slot] = clock
+
+            if delta >= 0 and elapsed > 0:
+                result._append(oid, oid_index, delta, delta / elapsed)
+
+        return result
@@ -2,6 +2,9 @@ from __future__ import unicode_literals, absolute_import
 
 import os
 import re
+import time
+from collections import OrderedDict, namedtuple
+from operator import attrgetter
 from warnings import warn
 
 # Don't attempt to import the C interface if building docs on RTD
@@ -12,8 +15,12 @@ from .exceptions import (
     EasySNMPError,
     EasySNMPNoSuchObjectError,
     EasySNMPNoSuchInstanceError,
+    EasySNMPTimeoutError,
 )
-from .variables import SNMPVariable, SNMPVariableList
+from .compat import text_type
+from .helpers import SNMP_ERR_TOOBIG, format_numeric_oid
+from .partition import partitioned_bulkwalk, probe_split_points
+from .variables import ColumnarResult, LazyResult, SNMPVariable, SNMPVariableList
 
 # Mapping between security level strings and their associated integer values.
 # Here we provide camelCase naming as per the original spec but also more
@@ -72,19 +79,213 @@ def validate_results(varlist):
     """
 
     for variable in varlist:
+        # The type is checked first so that the rows of a LazyResult are
+        # only formatted when an error is raised for them
+        snmp_type = variable.snmp_type
+        if snmp_type not in ("NOSUCHOBJECT", "NOSUCHINSTANCE"):
+            continue
+
         # Create a printable variable string for the error
         varstr = variable.oid
         if variable.oid_index:
             varstr += " with index {0}".format(variable.oid_index)
 
-        if variable.snmp_type == "NOSUCHOBJECT":
+        if snmp_type == "NOSUCHOBJECT":
             raise EasySNMPNoSuchObjectError(
                 "no such object {0} could be found".format(varstr)
             )
-        if variable.snmp_type == "NOSUCHINSTANCE":
-            raise EasySNMPNoSuchInstanceError(
-                "no such instance {0} could be found".format(varstr)
+        raise EasySNMPNoSuchInstanceError(
+            "no such instance {0} could be found".format(varstr)
+        )
+
+
+def build_columns(result_format, session=None):
+    """
+    Creates the container results are collected into for a given
+    result_format.
+
+    :param result_format: None for a list of SNMPVariable objects,
+                          'columnar' for a :py:class:`ColumnarResult` or
+                          'lazy' for a :py:class:`LazyResult`
+    :param session: the Session the results are retrieved through, which
+                    a LazyResult formats its rows with
+    :return: a new ColumnarResult, LazyResult or None
+    """
+
+    if result_format is None:
+        return None
+    if result_format == "columnar":
+        return ColumnarResult()
+    if result_format == "lazy":
+        return LazyResult(session)
+    raise ValueError("result_format must be None, 'columnar' or 'lazy'")
+
+
+def build_start_varlist(varlist, resume_from):
+    """
+    Prepare the variable binding list a resumed walk continues after.
+
+    :param varlist: the variable binding list of the OIDs being walked
+    :param resume_from: None, a single OID or a sequence holding one OID for
+                        each OID walked (such as the cursor of an earlier
+                        walk), where None restarts that OID from its root
+    :return: an SNMPVariableList or None if the walk is not resumed
+    """
+
+    if resume_from is None:
+        return None
+    if isinstance(resume_from, (str, text_type)):
+        resume_from = [resume_from]
+
+    resume_from = list(resume_from)
+    if len(resume_from) != len(varlist):
+        raise ValueError("resume_from must hold one OID for each walked OID")
+
+    start = SNMPVariableList()
+    for root, oid in zip(varlist, resume_from):
+        start.append(root if oid is None else build_varlist(oid)[0][0])
+    return start
+
+
+def build_cursor(cursor):
+    """
+    Converts the last OIDs received by a walk, as filled in by the C
+    interface, into the form accepted by resume_from.
+
+    :param cursor: a list of numeric OID tuples
+    :return: a tuple of numeric OID strings or None if the walk never
+             started
+    """
+
+    if not cursor:
+        return None
+    return tuple(format_numeric_oid(name) for name in cursor)
+
+
+def build_max_repetitions(max_repetitions):
+    """
+    Converts the max_repetitions of a bulk operation into the value passed
+    to the C interface.
+
+    :param max_repetitions: a number of repetitions or 'auto' for adaptive
+                            repetitions
+    :return: the number of repetitions or interface.AUTO_MAX_REPETITIONS
+    """
+
+    if max_repetitions == "auto":
+        return interface.AUTO_MAX_REPETITIONS
+    if max_repetitions < 0:
+        raise ValueError("max_repetitions must be a positive integer or 'auto'")
+    return max_repetitions
+
+
+# The operations which may be prepared with Session.prepare
+PREPARED_OPERATIONS = ("get", "get_next", "get_bulk")
+
+
+class PreparedRequest(object):
+    """
+    A request whose OIDs have been translated and whose PDU has been built
+    once, so that it may be sent again and again at little more than the
+    cost of the network round trip. Created by :py:meth:`Session.prepare`.
+
+    The label and value formatting options of the session are applied to
+    every execution, however the OIDs are translated using the options in
+    effect when the request was prepared.
+
+    :param session: the session the request is sent with
+    :param oids: the OIDs to request
+    :param op: one of get, get_next or get_bulk
+    :param non_repeaters: the non-repeaters of a get_bulk request
+    :param max_repetitions: the max-repetitions of a get_bulk request
+    """
+
+    def __init__(self, session, oids, op="get", non_repeaters=0, max_repetitions=10):
+        if op not in PREPARED_OPERATIONS:
+            raise ValueError(
+                "op must be one of {0}".format(", ".join(PREPARED_OPERATIONS))
             )
+        if op == "get_bulk" and session.version == 1:
+            raise EasySNMPError(
+                "you cannot perform a bulk GET operation for SNMP version 1"
+            )
+
+        command = {
+            "get": interface.MSG_GET,
+            "get_next": interface.MSG_GETNEXT,
+            "get_bulk": interface.MSG_GETBULK,
+        }[op]
+        varlist, self._is_list = build_varlist(oids)
+
+        self.session = session
+        self.op = op
+        self._pdu = interface.prepare(
+            session, command, non_repeaters, max_repetitions, varlist
+        )
+
+    def __repr__(self):
+        return "<{0} op={1} (hostname={2})>".format(
+            self.__class__.__name__, self.op, self.session.hostname
+        )
+
+    def execute(self):
+        """
+        Sends the prepared request and waits for the response.
+
+        :return: the same as the matching :py:class:`Session` method; an
+                 SNMPVariable object or a list of SNMPVariable objects
+        """
+
+        varbinds = interface.execute(self.session, self._pdu)
+
+        if self.session.abort_on_nonexistent:
+            validate_results(varbinds)
+
+        if self.op == "get_bulk":
+            return SNMPVariableList(varbinds)
+        return varbinds if self._is_list else varbinds[0]
+
+
+#: Statistics of the OID translation cache of a session, in the same form as
+#: functools.lru_cache reports them
+OIDCacheInfo = namedtuple("OIDCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Session attributes which are compiled into the session capsule and must be
+# compiled again whenever they are assigned
+OPTION_ATTRIBUTES = frozenset(
+    (
+        "version",
+        "use_long_names",
+        "use_numeric",
+        "use_sprint_value",
+        "use_enums",
+        "best_guess",
+        "retry_no_such",
+        "auto_max_repetitions",
+        "thread_safe",
+        "value_bytes",
+        "typed_values",
+    )
+)
+
+
+def _option_property(name):
+    """
+    Builds the property of a session option, which keeps its value in the
+    instance dict under a leading underscore and recompiles the options of
+    the session capsule when assigned. Reading an option costs no more than
+    reading a plain attribute, and other attributes such as error_string,
+    which the C interface assigns on every request, are left alone.
+    """
+
+    private_name = "_" + name
+
+    def setter(self, value):
+        self.__dict__[private_name] = value
+        if self.__dict__.get("sess_ptr"):
+            interface.update_options(self)
+
+    return property(attrgetter(private_name), setter)
 
 
 class Session(object):
@@ -168,6 +369,43 @@ class Session(object):
     :param abort_on_nonexistent: raise an exception if no object or no
                                  instance is found for the given oid and
                                  oid index
+    :param oid_cache_size: the number of OID translations (e.g. 'sysDescr' to
+                           .1.3.6.1.2.1.1.1) to remember for the requests
+                           made with this session; set to 0 to translate
+                           every OID on every request
+    :param auto_max_repetitions: the max_repetitions adaptive bulk operations
+                                 (max_repetitions='auto') start from; it is
+                                 updated with the value learned from each
+                                 such operation, so it may be saved and
+                                 passed in again to resume with what has
+                                 been learned about the agent
+    :param max_varbinds_per_pdu: the maximum number of OIDs to send in a
+                                 single request by get and get_next; longer
+                                 lists are packed into several requests
+                                 whose results are reassembled in order,
+                                 while 0 sends every OID in one request
+    :param pdu_window: the number of requests packed by
+                       max_varbinds_per_pdu which may be outstanding to the
+                       agent at the same time
+    :param thread_safe: set to True to allow the session to be used by
+                        several threads at once; requests from all threads
+                        then share the socket of the session and each
+                        response is matched to its request by request-id.
+                        Note that error_string, error_number and
+                        error_index describe the most recent request of any
+                        thread
+    :param value_bytes: set to True to return the values of OCTETSTR and
+                        OPAQUE variables as bytes copied straight from the
+                        response, rather than decoding them to text; useful
+                        for binary values such as MAC addresses
+    :param typed_values: set to True to return values as native Python
+                         objects built directly from the response rather
+                         than as text: INTEGER, COUNTER, COUNTER64, GAUGE,
+                         TICKS and UINTEGER values as int, IPADDR values as
+                         4 bytes and OBJECTID values as a tuple of ints;
+                         this takes precedence over use_enums and
+                         use_sprint_value for those types and does not
+                         affect columnar results
     """
 
     def __init__(
@@ -201,6 +439,13 @@ class Session(object):
         best_guess=0,
         retry_no_such=False,
         abort_on_nonexistent=False,
+        oid_cache_size=256,
+        auto_max_repetitions=10,
+        max_varbinds_per_pdu=0,
+        pdu_window=4,
+        thread_safe=False,
+        value_bytes=False,
+        typed_values=False,
     ):
         # Validate and extract the remote port
         if ":" in hostname:
@@ -242,6 +487,13 @@ class Session(object):
         self.best_guess = best_guess
         self.retry_no_such = retry_no_such
         self.abort_on_nonexistent = abort_on_nonexistent
+        self.oid_cache_size = oid_cache_size
+        self.auto_max_repetitions = auto_max_repetitions
+        self.max_varbinds_per_pdu = max_varbinds_per_pdu
+        self.pdu_window = pdu_window
+        self.thread_safe = thread_safe
+        self.value_bytes = value_bytes
+        self.typed_values = typed_values
 
         # The following variables are required for internal use as they are
         # passed to the C interface
@@ -264,6 +516,20 @@ class Session(object):
         # Create interface instance
         self.update_session()
 
+    # Options are read by the C interface from a snapshot taken when the
+    # session is created, so it is refreshed whenever one of them is assigned
+    version = _option_property("version")
+    use_long_names = _option_property("use_long_names")
+    use_numeric = _option_property("use_numeric")
+    use_sprint_value = _option_property("use_sprint_value")
+    use_enums = _option_property("use_enums")
+    best_guess = _option_property("best_guess")
+    retry_no_such = _option_property("retry_no_such")
+    auto_max_repetitions = _option_property("auto_max_repetitions")
+    thread_safe = _option_property("thread_safe")
+    value_bytes = _option_property("value_bytes")
+    typed_values = _option_property("typed_values")
+
     @property
     def connect_hostname(self):
         if self.remote_port:
@@ -295,7 +561,10 @@ class Session(object):
         varlist, is_list = build_varlist(oids)
 
         # Perform the SNMP GET operation
-        interface.get(self, varlist)
+        if self._should_pack(varlist):
+            varlist = self._send_packed(interface.MSG_GET, varlist)
+        else:
+            interface.get(self, varlist)
 
         # Validate the variable list returned
         if self.abort_on_nonexistent:
@@ -304,6 +573,111 @@ class Session(object):
         # Return a list or single item depending on what was passed in
         return list(varlist) if is_list else varlist[0]
 
+    def _should_pack(self, varlist):
+        return bool(self.max_varbinds_per_pdu) and (
+            len(varlist) > self.max_varbinds_per_pdu
+        )
+
+    def _send_packed(self, command, varlist):
+        """
+        Sends the variables of varlist in requests of at most
+        max_varbinds_per_pdu variables each, with up to pdu_window of them
+        outstanding at once, and returns the retrieved variables in the
+        order they were requested.
+        """
+
+        size = self.max_varbinds_per_pdu
+        chunks = [
+            SNMPVariableList(varlist[start : start + size])
+            for start in range(0, len(varlist), size)
+        ]
+
+        # SNMPv1 NOSUCH repair and tooBig recovery are only performed by
+        # synchronous requests, which fill in the variables they are given
+        send = interface.get if command == interface.MSG_GET else interface.getnext
+        if self.pdu_window <= 1 or (self.version == 1 and self.retry_no_such):
+            for chunk in chunks:
+                send(self, chunk)
+            return varlist
+
+        # Every request is answered or timed out by Net-SNMP within this
+        # long, so waiting any longer than it without progress means the
+        # agent has stopped answering altogether
+        request_timeout = self.timeout * (self.retries + 1)
+        deadline = time.time() + request_timeout
+
+        results = [None] * len(chunks)
+        pending = {}
+        next_chunk = 0
+        try:
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < self.pdu_window:
+                    request = interface.async_send(
+                        self, command, 0, 0, chunks[next_chunk]
+                    )
+                    pending[request] = next_chunk
+                    next_chunk += 1
+                    deadline = time.time() + request_timeout
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise EasySNMPTimeoutError(
+                        "timed out while connecting to remote host"
+                    )
+
+                interface.poll([self], remaining)
+                for request, index in list(pending.items()):
+                    try:
+                        response = interface.async_result(self, request)
+                    except EasySNMPError:
+                        if self.error_number != SNMP_ERR_TOOBIG:
+                            raise
+                        # Resent through the synchronous path, which splits
+                        # the request until each part fits
+                        del pending[request]
+                        send(self, chunks[index])
+                        results[index] = chunks[index]
+                        deadline = time.time() + request_timeout
+                        continue
+
+                    if response is not None:
+                        del pending[request]
+                        results[index] = response[0]
+                        deadline = time.time() + request_timeout
+        finally:
+            if pending:
+                self._drain_requests(pending, deadline)
+
+        return SNMPVariableList(
+            variable for result in results for variable in result
+        )
+
+    def _drain_requests(self, requests, deadline):
+        """
+        Waits until deadline for the outstanding asynchronous requests of a
+        failed packed request to complete and discards their responses, so
+        that none of them is left behind on the session. The errors of the
+        session are those of the original failure afterwards.
+        """
+
+        errors = (self.error_string, self.error_number, self.error_index)
+        requests = list(requests)
+        try:
+            while requests:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                interface.poll([self], remaining)
+                for request in list(requests):
+                    try:
+                        done = interface.async_result(self, request) is not None
+                    except EasySNMPError:
+                        done = True
+                    if done:
+                        requests.remove(request)
+        finally:
+            self.error_string, self.error_number, self.error_index = errors
+
     def set(self, oid, value, snmp_type=None):
         """
         Perform an SNMP SET operation using the prepared session.
@@ -381,8 +755,11 @@ class Session(object):
         # Build our variable bindings for the C interface
         varlist, is_list = build_varlist(oids)
 
-        # Perform the SNMP GET operation
-        interface.getnext(self, varlist)
+        # Perform the SNMP GETNEXT operation
+        if self._should_pack(varlist):
+            varlist = self._send_packed(interface.MSG_GETNEXT, varlist)
+        else:
+            interface.getnext(self, varlist)
 
         # Validate the variable list returned
         if self.abort_on_nonexistent:
@@ -391,7 +768,9 @@ class Session(object):
         # Return a list or single item depending on what was passed in
         return list(varlist) if is_list else varlist[0]
 
-    def get_bulk(self, oids, non_repeaters=0, max_repetitions=10):
+    def get_bulk(
+        self, oids, non_repeaters=0, max_repetitions=10, result_format=None
+    ):
         """
         Performs a bulk SNMP GET operation using the prepared session to
         retrieve multiple pieces of information in a single packet.
@@ -405,7 +784,16 @@ class Session(object):
                               return a single GETNEXT instance, not multiple
                               instances
         :param max_repetitions: the number of objects that should be returned
-                                for all the repeating OIDs
+                                for all the repeating OIDs, or 'auto' to use
+                                the value learned by the session (see
+                                auto_max_repetitions), reducing it if the
+                                response is too big
+        :param result_format: None to return SNMPVariable objects or
+                              'columnar' to return a ColumnarResult; the
+                              numeric columns of a columnar result are not
+                              affected by use_enums or use_sprint_value;
+                              'lazy' returns a LazyResult, which formats
+                              each row only when it is accessed
         :return: a list of SNMPVariable objects containing the values that
                  were retrieved via SNMP
         """
@@ -417,8 +805,18 @@ class Session(object):
 
         # Build our variable bindings for the C interface
         varlist, _ = build_varlist(oids)
+        columns = build_columns(result_format, self)
+
+        interface.getbulk(
+            self,
+            non_repeaters,
+            build_max_repetitions(max_repetitions),
+            varlist,
+            columns,
+        )
 
-        interface.getbulk(self, non_repeaters, max_repetitions, varlist)
+        if columns is not None:
+            varlist = columns
 
         # Validate the variable list returned
         if self.abort_on_nonexistent:
@@ -427,7 +825,7 @@ class Session(object):
         # Return a list of variables
         return varlist
 
-    def walk(self, oids=".1.3.6.1.2.1"):
+    def walk(self, oids=".1.3.6.1.2.1", result_format=None, resume_from=None):
         """
         Uses SNMP GETNEXT operation using the prepared session to
         automatically retrieve multiple pieces of information in an OID.
@@ -437,24 +835,56 @@ class Session(object):
                      entire OID (e.g. 'sysDescr.0') or may be a tuple
                      containing the name as its first item and index as its
                      second (e.g. ('sysDescr', 0))
+        :param result_format: None to return SNMPVariable objects or
+                              'columnar' to return a ColumnarResult; the
+                              numeric columns of a columnar result are not
+                              affected by use_enums or use_sprint_value;
+                              'lazy' returns a LazyResult, which formats
+                              each row only when it is accessed
+        :param resume_from: the cursor of an earlier walk of the same OIDs,
+                            which continues after the last OIDs it received
+                            rather than starting over
         :return: a list of SNMPVariable objects containing the values that
-                 were retrieved via SNMP
+                 were retrieved via SNMP; its cursor attribute holds the
+                 last OID received for each OID walked
+        :raises EasySNMPError: if a request fails, with the variables
+                               retrieved so far in partial_results and the
+                               point to resume from in cursor
         """
 
         # Build our variable bindings for the C interface
         varlist, _ = build_varlist(oids)
+        columns = build_columns(result_format, self)
+        start = build_start_varlist(varlist, resume_from)
+        results = varlist if columns is None else columns
 
         # Perform the SNMP walk using GETNEXT operations
-        interface.walk(self, varlist)
+        cursor = []
+        try:
+            interface.walk(self, varlist, columns, start, cursor)
+        except EasySNMPError as exc:
+            exc.partial_results = results
+            exc.cursor = build_cursor(cursor)
+            raise
+        results.cursor = build_cursor(cursor)
 
         # Validate the variable list returned
         if self.abort_on_nonexistent:
-            validate_results(varlist)
+            validate_results(results)
 
         # Return a list of variables
-        return list(varlist)
+        return results
 
-    def bulkwalk(self, oids=".1.3.6.1.2.1", non_repeaters=0, max_repetitions=10):
+    def bulkwalk(
+        self,
+        oids=".1.3.6.1.2.1",
+        non_repeaters=0,
+        max_repetitions=10,
+        result_format=None,
+        partitions=1,
+        split_points=None,
+        resume_from=None,
+    ):
         """
         Uses SNMP GETBULK operation using the prepared session to
         automatically retrieve multiple pieces of information in an OID
@@ -464,8 +894,40 @@ class Session(object):
                      entire OID (e.g. 'sysDescr.0') or may be a tuple
                      containing the name as its first item and index as its
                      second (e.g. ('sysDescr', 0))
+        :param non_repeaters: the number of objects that are only expected to
+                              return a single GETNEXT instance, not multiple
+                              instances
+        :param max_repetitions: the number of objects that should be returned
+                                per request, or 'auto' to start from the value
+                                learned by the session (see
+                                auto_max_repetitions) and adapt it as the
+                                walk proceeds: it grows while full responses
+                                return quickly and shrinks on tooBig errors,
+                                timeouts, slow responses and overshooting
+                                the end of the subtree
+        :param result_format: None to return SNMPVariable objects or
+                              'columnar' to return a ColumnarResult; the
+                              numeric columns of a columnar result are not
+                              affected by use_enums or use_sprint_value;
+                              'lazy' returns a LazyResult, which formats
+                              each row only when it is accessed
+        :param partitions: the number of ranges the subtree of each OID is
+                           divided into and walked concurrently; the split
+                           points are chosen by probing the subtree with a
+                           few GETNEXT requests first; non_repeaters must be
+                           0 for a partitioned walk
+        :param split_points: a list of OIDs within the subtree which divide
+                             it into ranges, used instead of probing
+        :param resume_from: the cursor of an earlier bulkwalk of the same
+                            OIDs, which continues after the last OIDs it
+                            received rather than starting over (not
+                            supported by partitioned walks)
         :return: a list of SNMPVariable objects containing the values that
-                 were retrieved via SNMP
+                 were retrieved via SNMP; its cursor attribute holds the
+                 last OID received for each OID walked
+        :raises EasySNMPError: if a request fails, with the variables
+                               retrieved so far in partial_results and the
+                               point to resume from in cursor
         """
 
         if self.version == 1:
@@ -473,16 +935,231 @@ class Session(object):
 
         # Build our variable bindings for the C interface
         varlist, _ = build_varlist(oids)
+        columns = build_columns(result_format, self)
 
-        # Perform the SNMP walk using GETNEXT operations
-        interface.bulkwalk(self, non_repeaters, max_repetitions, varlist)
+        if partitions > 1 or split_points:
+            if columns is not None:
+                raise ValueError(
+                    "a partitioned walk cannot return columnar or lazy results"
+                )
+            if resume_from is not None:
+                raise ValueError("a partitioned walk cannot be resumed")
+            if non_repeaters:
+                raise ValueError(
+                    "a partitioned walk walks every OID and takes no non_repeaters"
+                )
+            if max_repetitions == "auto":
+                max_repetitions = self.auto_max_repetitions
+
+            varlist = self._partitioned_bulkwalk(
+                varlist, partitions, split_points, max_repetitions
+            )
+            if self.abort_on_nonexistent:
+                validate_results(varlist)
+            return varlist
+
+        start = build_start_varlist(varlist, resume_from)
+        results = varlist if columns is None else columns
+
+        # Perform the SNMP walk using GETBULK operations
+        cursor = []
+        try:
+            interface.bulkwalk(
+                self,
+                non_repeaters,
+                build_max_repetitions(max_repetitions),
+                varlist,
+                columns,
+                start,
+                cursor,
+            )
+        except EasySNMPError as exc:
+            exc.partial_results = results
+            exc.cursor = build_cursor(cursor)
+            raise
+        results.cursor = build_cursor(cursor)
 
         # Validate the variable list returned
         if self.abort_on_nonexistent:
-            validate_results(varlist)
+            validate_results(results)
 
         # Return a list of variables
-        return varlist
+        return results
+
+    def _partitioned_bulkwalk(self, varlist, partitions, split_points, max_repetitions):
+        """
+        Walks the subtree of each variable in varlist in turn, dividing each
+        one into ranges which are walked concurrently.
+        """
+
+        roots = interface.resolve(self, varlist)
+        if split_points:
+            points_varlist, _ = build_varlist(split_points)
+            points = sorted(interface.resolve(self, points_varlist))
+
+        results = SNMPVariableList()
+        for root in roots:
+            if split_points:
+                root_points = [
+                    point
+                    for point in points
+                    if len(point) > len(root) and point[: len(root)] == root
+                ]
+            else:
+                root_points = probe_split_points(self, root, partitions)
+            results.extend(
+                partitioned_bulkwalk(self, root, root_points, max_repetitions)
+            )
+        return results
+
+    def iter_walk(self, oids=".1.3.6.1.2.1"):
+        """
+        Performs the same walk as :py:meth:`walk` but returns an iterator
+        which yields the variables of each response as soon as it has been
+        received, so that memory use stays constant regardless of the size
+        of the subtree.
+
+        :param oids: you may pass in a single item or a list of items which
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0)); multiple OIDs are walked in
+                     lockstep
+        :return: an iterator yielding a list of SNMPVariable objects for
+                 each response received
+        """
+
+        # Build our variable bindings for the C interface
+        varlist, _ = build_varlist(oids)
+
+        # The walk state lives in the iterator returned by the C interface
+        return interface.walk_iter(self, interface.MSG_GETNEXT, 0, varlist)
+
+    def iter_bulkwalk(self, oids=".1.3.6.1.2.1", max_repetitions=10):
+        """
+        Performs the same walk as :py:meth:`bulkwalk` but returns an
+        iterator which yields the variables of each GETBULK response as
+        soon as it has been received, so that memory use stays constant
+        regardless of the size of the subtree.
+
+        :param oids: you may pass in a single item or a list of items which
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0)); multiple OIDs are walked in
+                     lockstep
+        :param max_repetitions: the number of objects that should be returned
+                                for each OID per request
+        :return: an iterator yielding a list of SNMPVariable objects for
+                 each response received
+        """
+
+        if self.version == 1:
+            raise EasySNMPError("BULKWALK is not available for SNMP version 1")
+
+        # Build our variable bindings for the C interface
+        varlist, _ = build_varlist(oids)
+
+        # The walk state lives in the iterator returned by the C interface
+        return interface.walk_iter(
+            self, interface.MSG_GETBULK, max_repetitions, varlist
+        )
+
+    def table(self, entry_oid, columns=None, max_repetitions=10):
+        """
+        Retrieves a conceptual table by walking the chosen columns in
+        lockstep, so that every request carries the next instances of all
+        columns at once, and assembles the results into rows.
+
+        .. code-block:: python
+            :caption: Example usage
+
+            rows = session.table('ifXEntry', ['ifName', 'ifHCInOctets'])
+            for index, row in rows.items():
+                print(index, row['ifName'].value, row['ifHCInOctets'].value)
+
+        :param entry_oid: the conceptual row of the table (e.g. 'ifXEntry')
+        :param columns: the columns to retrieve, each given by name
+                        (e.g. 'ifName') or by its sub-identifier below the
+                        entry (e.g. 1); defaults to every accessible column
+                        defined for the entry by the loaded MIBs
+        :param max_repetitions: the number of instances of each column
+                                requested per GETBULK request (ignored for
+                                SNMP version 1, which walks using GETNEXT)
+        :return: an OrderedDict mapping each row index, as the dotted
+                 numeric sub-identifiers of the instance below its column
+                 (e.g. '2.192.168.1.1'), to a dict of the SNMPVariable
+                 objects retrieved for that row keyed by column; missing
+                 cells of sparse tables are simply absent from their row
+        """
+
+        entry_varlist, _ = build_varlist(entry_oid)
+        entry = interface.resolve(self, entry_varlist)[0]
+
+        if columns is None:
+            columns = sorted(interface.table_columns(self, entry_varlist[0]))
+            columns = [label for _, label in columns]
+        names = list(columns)
+
+        # Columns given by sub-identifier are walked from beneath the entry
+        varlist, _ = build_varlist(
+            [
+                format_numeric_oid(entry + (column,))
+                if isinstance(column, int)
+                else column
+                for column in names
+            ]
+        )
+
+        # Each variable comes with the numeric OID of its instance below the
+        # column, which identifies its row whatever the oid_index rendered
+        # (use_numeric leaves only the last sub-identifier in oid_index)
+        if self.version == 1:
+            walk = interface.walk_iter(self, interface.MSG_GETNEXT, 0, varlist, 2)
+        else:
+            walk = interface.walk_iter(
+                self, interface.MSG_GETBULK, max_repetitions, varlist, 2
+            )
+
+        rows = OrderedDict()
+        for varbinds in walk:
+            for column, varbind, instance in varbinds:
+                index = ".".join(str(sub_id) for sub_id in instance)
+                row = rows.get(index)
+                if row is None:
+                    row = rows[index] = {}
+                row[names[column]] = varbind
+
+        return rows
+
+    def prepare(self, oids, op="get", non_repeaters=0, max_repetitions=10):
+        """
+        Translates OIDs and builds the request for an operation once, so
+        that it may be repeated cheaply; useful when polling the same
+        objects on every cycle.
+
+        .. code-block:: python
+            :caption: Example usage
+
+            request = session.prepare(['sysUpTime.0', 'ifNumber.0'])
+            while True:
+                uptime, if_number = request.execute()
+                time.sleep(30)
+
+        :param oids: you may pass in a list of OIDs or single item; each item
+                     may be a string representing the entire OID
+                     (e.g. 'sysDescr.0') or may be a tuple containing the
+                     name as its first item and index as its second
+                     (e.g. ('sysDescr', 0))
+        :param op: the operation to prepare; one of get, get_next or get_bulk
+        :param non_repeaters: the number of objects that are only expected to
+                              return a single GETNEXT instance (get_bulk only)
+        :param max_repetitions: the number of objects that should be returned
+                                for all the repeating OIDs (get_bulk only)
+        :return: a :py:class:`PreparedRequest`
+        """
+
+        return PreparedRequest(self, oids, op, non_repeaters, max_repetitions)
 
     def update_session(self, **kwargs):
         """
@@ -508,8 +1185,8 @@ class Session(object):
             s.update_session()
         """
         for keyword, value in kwargs.items():
-            if keyword in self.__dict__:
-                self.__setattr__(keyword, value)
+            if keyword in self.__dict__ or keyword in OPTION_ATTRIBUTES:
+                setattr(self, keyword, value)
             else:
                 warn('Keyword argument "{}" is not an attribute'.format(keyword))
         # Tunneled
@@ -562,3 +1239,25 @@ class Session(object):
                 self.retries,
                 self.timeout_microseconds,
             )
+
+        interface.update_options(self)
+        interface.oid_cache_resize(self, self.oid_cache_size)
+
+    def oid_cache_info(self):
+        """
+        Reports how effective the OID translation cache of this session is.
+
+        :return: an OIDCacheInfo named tuple of hits, misses, maxsize and
+                 currsize
+        """
+
+        return OIDCacheInfo(*interface.oid_cache_info(self))
+
+    def clear_oid_cache(self):
+        """
+        Empties the OID translation cache of this session and resets its
+        statistics. This should be called after loading MIBs that redefine
+        objects which have already been requested.
+        """
+
+        interface.oid_cache_resize(self, self.oid_cache_size)
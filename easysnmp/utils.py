@@ -15,6 +15,15 @@ def strip_non_printable(value):
     if value is None:
         return None
 
+    # Values returned as native objects (see Session.typed_values) have
+    # nothing to strip
+    if not isinstance(value, (bytes, text_type)):
+        return value
+
+    # Values returned as bytes (see Session.value_bytes) are shown as text
+    if isinstance(value, bytes) and not isinstance(value, str):
+        value = value.decode("latin-1")
+
     # Filter all non-printable characters
     # (note that we must use join to account for the fact that Python 3
     # returns a generator)
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals, absolute_import
 
+import struct
+
 from .compat import urepr
 from .helpers import normalize_oid
 from .utils import strip_non_printable, tostr
@@ -20,6 +22,10 @@ class SNMPVariable(object):
                       NOSUCHOBJECT and NOSUCHINSTANCE respectively
     """
 
+    # Instances are created in large numbers by the C interface, so we use
+    # slots rather than a per-instance __dict__
+    __slots__ = ("oid", "oid_index", "value", "snmp_type")
+
     def __init__(self, oid=None, oid_index=None, value=None, snmp_type=None):
         self.oid, self.oid_index = normalize_oid(oid, oid_index)
         self.value = value
@@ -36,7 +42,21 @@ class SNMPVariable(object):
         )
 
     def __setattr__(self, name, value):
-        self.__dict__[name] = tostr(value)
+        object.__setattr__(self, name, tostr(value))
+
+    def __reduce__(self):
+        # The attributes are restored as they are rather than through the
+        # constructor, so that typed and bytes values are not turned into
+        # strings along the way
+        return (
+            self.__class__,
+            (),
+            (self.oid, self.oid_index, self.value, self.snmp_type),
+        )
+
+    def __setstate__(self, state):
+        for slot, value in zip(SNMPVariable.__slots__, state):
+            object.__setattr__(self, slot, value)
 
 
 class SNMPVariableList(list):
@@ -48,3 +68,234 @@ class SNMPVariableList(list):
     @property
     def varbinds(self):
         return self
+
+
+# ASN.1 type codes stored in ColumnarResult.type_codes mapped to the names
+# used for SNMPVariable.snmp_type
+ASN_TYPE_NAMES = {
+    0x02: "INTEGER",
+    0x03: "BITS",
+    0x04: "OCTETSTR",
+    0x05: "NULL",
+    0x06: "OBJECTID",
+    0x40: "IPADDR",
+    0x41: "COUNTER",
+    0x42: "GAUGE",
+    0x43: "TICKS",
+    0x44: "OPAQUE",
+    0x46: "COUNTER64",
+    0x47: "UINTEGER",
+    0x80: "NOSUCHOBJECT",
+    0x81: "NOSUCHINSTANCE",
+    0x82: "ENDOFMIBVIEW",
+}
+
+# Type codes whose values are stored in the int64 and uint64 columns
+ASN_SIGNED_TYPES = frozenset([0x02])
+ASN_UNSIGNED_TYPES = frozenset([0x41, 0x42, 0x43, 0x46, 0x47])
+
+
+def _cast(buffer, format):
+    view = memoryview(buffer)
+    if hasattr(view, "cast"):
+        return view.cast(format)
+    # memoryview.cast is unavailable on Python 2, where the values are
+    # unpacked into a tuple instead
+    count = len(buffer) // struct.calcsize(format)
+    return struct.unpack("={0}{1}".format(count, format), bytes(buffer))
+
+
+class ColumnarResult(object):
+    """
+    The result of a walk, bulkwalk or get_bulk performed with
+    ``result_format='columnar'``.
+
+    Rather than one SNMPVariable per variable binding, the C interface
+    appends each binding as a row of a set of parallel columns. Integer
+    values are stored as native signed 64-bit integers and counters, gauges
+    and timeticks as unsigned 64-bit integers, so they may be handed to
+    numpy or array without converting every value through a string. Other
+    types are formatted as text in :py:attr:`string_values`, which holds
+    None for numeric rows. On Python 2, which cannot cast a memoryview, the
+    numeric columns are unpacked into tuples instead.
+
+    Indexing or iterating a ColumnarResult produces SNMPVariable objects
+    for compatibility, although doing so gives up the savings of the
+    columnar format.
+    """
+
+    def __init__(self):
+        self.oids = []
+        self.oid_indexes = []
+        self.string_values = []
+        self._type_codes = bytearray()
+        self._int_values = bytearray()
+        self._uint_values = bytearray()
+
+    def __len__(self):
+        return len(self.oids)
+
+    def __repr__(self):
+        return "<{0} rows={1}>".format(self.__class__.__name__, len(self))
+
+    @property
+    def type_codes(self):
+        """
+        The ASN.1 type code of each row as a memoryview of unsigned bytes.
+        """
+
+        return _cast(self._type_codes, "B")
+
+    @property
+    def int_values(self):
+        """
+        A memoryview of signed 64-bit integers holding the value of each
+        INTEGER row and 0 for every other row.
+        """
+
+        return _cast(self._int_values, "q")
+
+    @property
+    def uint_values(self):
+        """
+        A memoryview of unsigned 64-bit integers holding the value of each
+        COUNTER, GAUGE, TICKS, COUNTER64 and UINTEGER row and 0 for every
+        other row.
+        """
+
+        return _cast(self._uint_values, "Q")
+
+    @property
+    def snmp_types(self):
+        """
+        The snmp_type of each row as used by SNMPVariable.
+        """
+
+        return [ASN_TYPE_NAMES.get(code, "") for code in bytearray(self._type_codes)]
+
+    def value(self, row):
+        """
+        Returns the value of a single row as it would be reported by an
+        SNMPVariable.
+
+        :param row: the index of the row
+        :return: the value of the row as a string
+        """
+
+        code = self._type_codes[row]
+        if code in ASN_SIGNED_TYPES:
+            return str(struct.unpack_from("=q", self._int_values, row * 8)[0])
+        if code in ASN_UNSIGNED_TYPES:
+            return str(struct.unpack_from("=Q", self._uint_values, row * 8)[0])
+        return self.string_values[row]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+
+        if row < 0:
+            row += len(self)
+        return SNMPVariable(
+            self.oids[row],
+            self.oid_indexes[row],
+            self.value(row),
+            ASN_TYPE_NAMES.get(self._type_codes[row], ""),
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class LazySNMPVariable(SNMPVariable):
+    """
+    A row of a :py:class:`LazyResult`, which formats its attributes from the
+    response only when they are first accessed. The snmp_type is known
+    without formatting anything, while accessing oid, oid_index or value
+    formats the whole variable binding at once.
+    """
+
+    __slots__ = ("_result", "_row")
+
+    def __init__(self, result, row):
+        object.__setattr__(self, "_result", result)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name):
+        # Only called for attributes which have not been filled in yet
+        if name == "snmp_type":
+            value = ASN_TYPE_NAMES.get(self._result._type_codes[self._row], "")
+            object.__setattr__(self, name, value)
+            return value
+        if name not in SNMPVariable.__slots__:
+            raise AttributeError(name)
+
+        varbind = self._result._decode(self._row)
+        for slot in SNMPVariable.__slots__:
+            object.__setattr__(self, slot, getattr(varbind, slot))
+        return getattr(varbind, name)
+
+    def __reduce__(self):
+        return (
+            SNMPVariable,
+            (),
+            (self.oid, self.oid_index, self.value, self.snmp_type),
+        )
+
+
+class LazyResult(object):
+    """
+    The result of a walk, bulkwalk or get_bulk performed with
+    ``result_format='lazy'``.
+
+    Rather than formatting every variable binding as it is received, the C
+    interface copies each one into a compact buffer exactly as it appeared
+    in the response. Indexing or iterating a LazyResult produces
+    :py:class:`LazySNMPVariable` objects which format their oid,
+    oid_index and value on first access, following the options of the
+    session at that time, so rows which are skipped cost almost nothing.
+
+    :param session: the Session the results are retrieved through
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._raw = bytearray()
+        self._offsets = bytearray()
+        self._type_codes = bytearray()
+
+    def __len__(self):
+        return len(self._type_codes)
+
+    def __repr__(self):
+        return "<{0} rows={1}>".format(self.__class__.__name__, len(self))
+
+    @property
+    def type_codes(self):
+        """
+        The ASN.1 type code of each row as a memoryview of unsigned bytes.
+        """
+
+        return _cast(self._type_codes, "B")
+
+    def _decode(self, row):
+        # The C interface imports this module, so it cannot be imported
+        # at the top of it
+        from . import interface
+
+        (offset,) = struct.unpack_from("=Q", self._offsets, row * 8)
+        return interface.decode_varbind(self.session, self._raw, offset)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("row index out of range")
+        return LazySNMPVariable(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield LazySNMPVariable(self, row)
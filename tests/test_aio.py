@@ -0,0 +1,161 @@
+from __future__ import unicode_literals
+
+import sys
+
+import pytest
+
+if sys.version_info < (3, 5):
+    pytest.skip("asyncio sessions require Python 3.5+", allow_module_level=True)
+
+import asyncio
+
+from easysnmp.exceptions import EasySNMPError, EasySNMPTimeoutError
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def async_sess(sess_args, loop):
+    from easysnmp.aio import AsyncSession
+
+    return AsyncSession(loop=loop, **sess_args)
+
+
+def test_async_session_get(async_sess, loop):
+    res = loop.run_until_complete(
+        async_sess.get(["sysUpTime.0", "sysContact.0", "sysLocation.0"])
+    )
+
+    assert len(res) == 3
+
+    assert res[0].oid == "sysUpTimeInstance"
+    assert res[0].oid_index == ""
+    assert int(res[0].value) > 0
+    assert res[0].snmp_type == "TICKS"
+
+    assert res[1].oid == "sysContact"
+    assert res[1].oid_index == "0"
+    assert res[1].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[1].snmp_type == "OCTETSTR"
+
+    assert res[2].oid == "sysLocation"
+    assert res[2].oid_index == "0"
+    assert res[2].value == "my original location"
+    assert res[2].snmp_type == "OCTETSTR"
+
+
+def test_async_session_get_next(async_sess, loop):
+    res = loop.run_until_complete(async_sess.get_next("sysContact.0"))
+
+    assert res.oid == "sysName"
+    assert res.oid_index == "0"
+    assert res.snmp_type == "OCTETSTR"
+
+
+def test_async_session_get_bulk(async_sess, loop):
+    if async_sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            loop.run_until_complete(async_sess.get_bulk(["sysUpTime", "sysORID"], 1, 4))
+    else:
+        res = loop.run_until_complete(
+            async_sess.get_bulk(["sysUpTime", "sysORID"], 1, 4)
+        )
+
+        assert len(res) == 5
+        assert res[0].oid == "sysUpTimeInstance"
+        assert res[1].oid == "sysORID"
+        assert res[1].oid_index == "1"
+
+
+def test_async_session_walk_matches_sync(async_sess, loop, sess):
+    res = loop.run_until_complete(async_sess.walk("system"))
+    expected = sess.walk("system")
+
+    assert type(res) is type(expected)
+    assert [(v.oid, v.oid_index) for v in res] == [
+        (v.oid, v.oid_index) for v in expected
+    ]
+
+
+def test_async_session_running_loop(sess_args):
+    from easysnmp.aio import AsyncSession
+
+    # Created outside of any loop, the session uses each loop it is run in
+    async_sess = AsyncSession(**sess_args)
+    for _ in range(2):
+        loop = asyncio.new_event_loop()
+        try:
+            res = loop.run_until_complete(async_sess.get("sysLocation.0"))
+        finally:
+            loop.close()
+        assert res.value == "my original location"
+
+
+def test_async_session_bulkwalk(async_sess, loop):
+    if async_sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            loop.run_until_complete(async_sess.bulkwalk("system"))
+    else:
+        res = loop.run_until_complete(async_sess.bulkwalk("system", max_repetitions=3))
+
+        assert len(res) >= 7
+        assert res[0].oid == "sysDescr"
+        assert res[0].oid_index == "0"
+        assert res[3].oid == "sysContact"
+        assert res[3].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+        with pytest.raises(ValueError):
+            loop.run_until_complete(async_sess.bulkwalk("system", non_repeaters=1))
+
+
+def test_async_session_concurrent_requests(async_sess, loop):
+    res = loop.run_until_complete(
+        asyncio.gather(
+            async_sess.get("sysContact.0"),
+            async_sess.get("sysLocation.0"),
+            async_sess.walk("system"),
+        )
+    )
+
+    assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[1].value == "my original location"
+    assert len(res[2]) >= 7
+
+
+def test_async_session_concurrent_walks(async_sess, loop, sess):
+    # Each walk keeps to the errors of its own requests while the others
+    # complete around it, e.g. the end of the MIB view reported by SNMP v1
+    res = loop.run_until_complete(
+        asyncio.gather(
+            async_sess.walk(["system", "snmpSetSerialNo"]),
+            async_sess.walk("system"),
+            async_sess.get("sysContact.0"),
+        )
+    )
+
+    expected = sess.walk("system")
+    assert [(v.oid, v.oid_index) for v in res[1]] == [
+        (v.oid, v.oid_index) for v in expected
+    ]
+    assert set((v.oid, v.oid_index) for v in expected) <= set(
+        (v.oid, v.oid_index) for v in res[0]
+    )
+    assert res[2].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_async_session_timeout(version, loop):
+    from easysnmp.aio import AsyncSession
+
+    session = AsyncSession(
+        remote_port=1234, version=version, timeout=0.2, retries=1, loop=loop
+    )
+    with pytest.raises(EasySNMPTimeoutError):
+        loop.run_until_complete(session.get("sysContact.0"))
@@ -0,0 +1,42 @@
+from __future__ import unicode_literals
+
+from benchmarks.harness import (
+    Result,
+    format_results,
+    measure,
+    percentile,
+    read_results,
+    write_results,
+)
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+
+    assert percentile(samples, 0.50) == 50
+    assert percentile(samples, 0.99) == 99
+    assert percentile(samples, 1.0) == 100
+    assert percentile([7], 0.99) == 7
+
+
+def test_measure():
+    calls = []
+    result = measure("noop", lambda: calls.append(None), iterations=50, warmup=5)
+
+    assert len(calls) == 55
+    assert result.name == "noop"
+    assert result.iterations == 50
+    assert result.ops_per_sec > 0
+    assert 0 <= result.p50_ms <= result.p99_ms
+
+
+def test_results_round_trip(tmpdir):
+    path = str(tmpdir.join("results.json"))
+    results = [Result("v2c_get_1", 100, 2000.0, 0.4, 1.2, 10240)]
+    write_results(path, results, rows=10)
+
+    baseline = read_results(path)
+    assert baseline == {"v2c_get_1": results[0]}
+
+    faster = [results[0]._replace(ops_per_sec=3000.0)]
+    assert "+50.0%" in format_results(faster, baseline)
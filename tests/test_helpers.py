@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 
-from easysnmp.helpers import normalize_oid
+from easysnmp.helpers import format_numeric_oid, normalize_oid
 
 
 def test_normalize_oid_regular():
@@ -25,3 +25,7 @@ def test_normalize_oid_with_index():
     oid, oid_index = normalize_oid("abc", "def")
     assert oid == "abc"
     assert oid_index == "def"
+
+
+def test_format_numeric_oid():
+    assert format_numeric_oid((1, 3, 6, 1, 2, 1, 1, 1, 0)) == ".1.3.6.1.2.1.1.1.0"
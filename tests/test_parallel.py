@@ -0,0 +1,207 @@
+from __future__ import unicode_literals
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from easysnmp.exceptions import EasySNMPError, EasySNMPTimeoutError
+from easysnmp import parallel
+from easysnmp.parallel import (
+    ParallelJob,
+    ParallelPoller,
+    _decode_shard,
+    _encode_shard,
+    _run_shard,
+)
+from easysnmp.pool import SessionPool
+from easysnmp.session import Session
+from easysnmp.variables import SNMPVariable, SNMPVariableList
+
+
+def typed_variable(oid, oid_index, value, snmp_type):
+    # Typed and bytes values are filled in without being converted to
+    # strings, as the C interface does
+    var = SNMPVariable(oid, oid_index, None, snmp_type)
+    object.__setattr__(var, "value", value)
+    return var
+
+
+def test_parallel_encode_round_trip():
+    records = [
+        (0, [SNMPVariable("sysDescr", "0", "Linux \xff", "OCTETSTR")], None),
+        (2, SNMPVariable("sysUpTimeInstance", "", "1234", "TICKS"), None),
+        (3, [typed_variable("ifPhysAddress", "1", b"\x00\xff", "OCTETSTR")], None),
+        (4, [typed_variable("ifHCInOctets", "1", 2 ** 64 - 1, "COUNTER64")], None),
+        (5, [typed_variable("sysObjectID", "0", (1, 3, 6, 1), "OBJECTID")], None),
+        (1, None, EasySNMPTimeoutError("timed out")),
+        (6, None, ValueError("bad arguments")),
+    ]
+
+    decoded = _decode_shard(_encode_shard(records))
+
+    assert [index for index, _, _ in decoded] == [0, 2, 3, 4, 5, 1, 6]
+    assert decoded[0][1][0].value == "Linux \xff"
+    assert decoded[0][1][0].oid_index == "0"
+    assert decoded[1][1].oid == "sysUpTimeInstance"
+    assert decoded[1][1].snmp_type == "TICKS"
+    assert decoded[2][1][0].value == b"\x00\xff"
+    assert decoded[3][1][0].value == 2 ** 64 - 1
+    assert decoded[4][1][0].value == (1, 3, 6, 1)
+    assert isinstance(decoded[5][2], EasySNMPTimeoutError)
+    assert str(decoded[5][2]) == "timed out"
+    assert isinstance(decoded[6][2], ValueError)
+
+
+class StubSession(object):
+    def __init__(self, **session_kargs):
+        self.hostname = session_kargs.get("hostname")
+
+    def walk(self, oids):
+        return SNMPVariableList([SNMPVariable(oids, "0", self.hostname, "OCTETSTR")])
+
+
+def test_parallel_shard_reuses_sessions(monkeypatch):
+    pool = SessionPool(session_class=StubSession)
+    monkeypatch.setattr(parallel, "_worker_sessions", pool)
+    shard = [
+        (index, {"hostname": hostname}, "sysDescr", "walk", {})
+        for index, hostname in enumerate(["a", "a", "b", "a", "b"])
+    ]
+
+    _, data = _run_shard(shard, use_shared_memory=False)
+
+    assert [result[0].value for _, result, _ in _decode_shard(data)] == [
+        "a",
+        "a",
+        "b",
+        "a",
+        "b",
+    ]
+    info = pool.info()
+    assert (info.misses, info.idle, info.in_use) == (2, 2, 0)
+
+
+# Runs shards with shared memory in a pool of workers with stub sessions,
+# reading each result back as ParallelPoller does
+SHARED_MEMORY_SCRIPT = textwrap.dedent(
+    """
+    import multiprocessing
+
+    from easysnmp import parallel
+    from easysnmp.pool import SessionPool
+    from easysnmp.variables import SNMPVariable, SNMPVariableList
+
+    class StubSession(object):
+        def __init__(self, **session_kargs):
+            pass
+
+        def walk(self, oids):
+            return SNMPVariableList([SNMPVariable(oids, "0", "x", "OCTETSTR")])
+
+    def init():
+        parallel._worker_sessions = SessionPool(session_class=StubSession)
+
+    if __name__ == "__main__":
+        shard = [(0, {}, "sysDescr", "walk", {})]
+        context = multiprocessing.get_context("fork")
+        with context.Pool(2, initializer=init) as pool:
+            blocks = pool.map(parallel._run_shard_star, [(shard, True)] * 4)
+        for name, size in blocks:
+            data = parallel._read_shard(name, size)
+            print(parallel._decode_shard(data)[0][1][0].value)
+    """
+)
+
+
+@pytest.mark.skipif(
+    parallel.shared_memory is None or sys.platform == "win32",
+    reason="requires shared memory and the fork start method",
+)
+def test_parallel_shared_memory_not_leaked(tmp_path):
+    script = tmp_path / "shared_memory.py"
+    script.write_text(SHARED_MEMORY_SCRIPT)
+
+    process = subprocess.run(
+        [sys.executable, str(script)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        # The stub sessions need no C interface
+        env=dict(os.environ, READTHEDOCS="1", PYTHONPATH=os.pathsep.join(sys.path)),
+    )
+
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.split() == ["x"] * 4
+    assert "resource_tracker" not in process.stderr
+
+
+def test_parallel_job_invalid_arguments():
+    with pytest.raises(ValueError):
+        ParallelJob({}, "sysDescr.0", "set")
+    with pytest.raises(ValueError):
+        ParallelJob({}, "sysDescr.0", "get", max_repetitions=10, timeout=1)
+    with pytest.raises(ValueError):
+        ParallelJob({}, "system", "walk", result_format="columnar")
+    with pytest.raises(ValueError):
+        ParallelJob({}, "system", "walk", result_format="varbinds")
+
+    job = ParallelJob({}, "sysDescr.0", "get", result_format=None)
+    assert job.operation_kargs == {}
+
+
+@pytest.mark.parametrize("use_shared_memory", [False, True])
+def test_parallel_poller(sess_args, use_shared_memory):
+    with ParallelPoller(
+        processes=2, shard_size=2, use_shared_memory=use_shared_memory
+    ) as poller:
+        get_jobs = [
+            poller.add(sess_args, ["sysContact.0", "sysLocation.0"])
+            for _ in range(4)
+        ]
+        single = poller.add(sess_args, "sysContact.0")
+        walk = poller.add(sess_args, "system", "walk")
+        completed = list(poller.as_completed())
+
+        assert len(completed) == 6
+        for job in get_jobs:
+            assert [v.value for v in job.result()] == [
+                "G. S. Marzot <gmarzot@marzot.net>",
+                "my original location",
+            ]
+        assert single.result().value == "G. S. Marzot <gmarzot@marzot.net>"
+
+        expected = Session(**sess_args).walk("system")
+        assert [(v.oid, v.oid_index) for v in walk.result()] == [
+            (v.oid, v.oid_index) for v in expected
+        ]
+
+        # The workers and their sessions outlive a run
+        job = poller.add(sess_args, "sysLocation.0")
+        assert poller.run() == [job]
+        assert job.result().value == "my original location"
+
+
+def test_parallel_poller_timeout():
+    with ParallelPoller(processes=1) as poller:
+        job = poller.add(
+            {"remote_port": 1234, "version": 2, "timeout": 0.2, "retries": 1},
+            "sysContact.0",
+        )
+        poller.run()
+
+    assert job.done()
+    assert isinstance(job.exception(), EasySNMPError)
+    with pytest.raises(EasySNMPError):
+        job.result()
+
+
+def test_parallel_poller_invalid_job(sess_args):
+    with ParallelPoller(processes=1, shard_size=2) as poller:
+        invalid = poller.add(sess_args, "system", "walk", no_such_argument=True)
+        valid = poller.add(sess_args, "sysLocation.0")
+        poller.run()
+
+    assert isinstance(invalid.exception(), TypeError)
+    assert valid.result().value == "my original location"
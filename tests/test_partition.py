@@ -0,0 +1,82 @@
+from __future__ import unicode_literals
+
+import pytest
+from easysnmp import partition
+from easysnmp.exceptions import EasySNMPError
+from easysnmp.helpers import SNMP_ERR_TOOBIG, format_numeric_oid
+
+
+class TooBigInterface(object):
+    """
+    Answers GETNEXT requests with the OID following each one, or tooBig for
+    requests of more than max_varbinds OIDs.
+    """
+
+    MSG_GETNEXT = 0xA1
+
+    def __init__(self, max_varbinds):
+        self.max_varbinds = max_varbinds
+        self.sizes = []
+
+    def async_send(self, session, command, non_repeaters, max_repetitions, varlist):
+        self.sizes.append(len(varlist))
+        # Requests are told apart by the OIDs they carry
+        return tuple(
+            tuple(int(sub) for sub in v.oid.strip(".").split(".")) for v in varlist
+        )
+
+    def poll(self, sessions):
+        return [0]
+
+    def async_result(self, session, request):
+        if len(request) > self.max_varbinds:
+            session.error_number = SNMP_ERR_TOOBIG
+            raise EasySNMPError("(tooBig) Response message would have been too large.")
+        session.error_number = 0
+        return [], [name + (1,) for name in request]
+
+
+class FakeSession(object):
+    error_number = 0
+    timeout = 1
+    retries = 0
+
+    def __init__(self):
+        self.drained = []
+
+    def _drain_requests(self, requests, deadline):
+        self.drained.extend(requests)
+
+
+def test_getnext_names_too_big(monkeypatch):
+    fake = TooBigInterface(max_varbinds=3)
+    monkeypatch.setattr(partition, "interface", fake, raising=False)
+    probes = [[(1, 3, 6, 1, branch) for branch in range(8)], [(1, 3, 6, 2)]]
+
+    names = partition._getnext_names(FakeSession(), probes)
+
+    assert names == [[oid + (1,) for oid in probe] for probe in probes]
+    assert fake.sizes == [8, 1, 4, 4, 2, 2, 2, 2]
+    assert format_numeric_oid(names[1][0]) == ".1.3.6.2.1"
+
+
+def test_getnext_names_too_big_single(monkeypatch):
+    monkeypatch.setattr(
+        partition, "interface", TooBigInterface(max_varbinds=0), raising=False
+    )
+
+    with pytest.raises(EasySNMPError):
+        partition._getnext_names(FakeSession(), [[(1, 3, 6, 1)]])
+
+
+def test_getnext_names_failure_drains(monkeypatch):
+    monkeypatch.setattr(
+        partition, "interface", TooBigInterface(max_varbinds=0), raising=False
+    )
+    session = FakeSession()
+
+    with pytest.raises(EasySNMPError):
+        partition._getnext_names(session, [[(1, 3, 6, 1)], [(1, 3, 6, 2)]])
+
+    # The request of the second probe was still outstanding
+    assert session.drained == [((1, 3, 6, 2),)]
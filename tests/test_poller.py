@@ -0,0 +1,136 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from easysnmp import interface
+from easysnmp.exceptions import EasySNMPError, EasySNMPTimeoutError
+from easysnmp.poller import MultiPoller
+from easysnmp.session import Session
+from easysnmp.variables import SNMPVariable
+
+
+def test_poller_get(sess):
+    poller = MultiPoller()
+    job = poller.add(sess, ["sysContact.0", "sysLocation.0"])
+    completed = list(poller.as_completed())
+
+    assert completed == [job]
+    assert job.done()
+
+    res = job.result()
+    assert len(res) == 2
+    assert res[0].oid == "sysContact"
+    assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[1].oid == "sysLocation"
+    assert res[1].value == "my original location"
+
+
+def test_poller_get_next_single(sess):
+    poller = MultiPoller()
+    job = poller.add(sess, "sysContact.0", operation="get_next")
+    poller.run()
+
+    res = job.result()
+    assert res.oid == "sysName"
+    assert res.oid_index == "0"
+
+
+def test_poller_get_bulk(sess):
+    poller = MultiPoller()
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            poller.add(sess, ["sysUpTime", "sysORID"], "get_bulk", 1, 4)
+    else:
+        job = poller.add(sess, ["sysUpTime", "sysORID"], "get_bulk", 1, 4)
+        poller.run()
+
+        res = job.result()
+        assert len(res) == 5
+        assert res[0].oid == "sysUpTimeInstance"
+        assert res[1].oid == "sysORID"
+
+
+def test_poller_many_sessions(sess_args):
+    poller = MultiPoller()
+    jobs = [
+        poller.add(Session(**sess_args), "sysLocation.0", "get") for _ in range(10)
+    ]
+    completed = poller.run()
+
+    assert completed == jobs
+    assert len(poller) == 0
+    for job in jobs:
+        assert job.result().value == "my original location"
+
+
+def test_poller_invalid_operation(sess):
+    with pytest.raises(ValueError):
+        MultiPoller().add(sess, "sysContact.0", operation="walk")
+
+
+def test_poller_job_timeout():
+    poller = MultiPoller()
+    good = poller.add(
+        Session(hostname="localhost", remote_port=11161, version=2), "sysContact.0"
+    )
+    bad = poller.add(
+        Session(remote_port=1234, version=2, timeout=0.2, retries=1), "sysContact.0"
+    )
+    completed = list(poller.as_completed())
+
+    assert completed == [good, bad]
+    assert good.result().value == "G. S. Marzot <gmarzot@marzot.net>"
+    with pytest.raises(EasySNMPTimeoutError):
+        bad.result()
+
+
+def test_poller_sends_before_yielding(sess):
+    poller = MultiPoller()
+    failed = poller.add(sess, "sysContact.0")
+    job = poller.add(sess, "sysLocation.0")
+    sent = []
+
+    def fail():
+        raise EasySNMPError("the request could not be sent")
+
+    def send(send=job._send):
+        sent.append(job)
+        return send()
+
+    failed._send = fail
+    job._send = send
+
+    completed = poller.as_completed()
+    assert next(completed) is failed
+    assert sent == [job]
+    assert list(completed) == [job]
+    assert job.result().value == "my original location"
+
+
+def test_poller_overall_timeout():
+    poller = MultiPoller()
+    job = poller.add(
+        Session(remote_port=1234, version=2, timeout=5, retries=0), "sysContact.0"
+    )
+
+    with pytest.raises(EasySNMPTimeoutError):
+        poller.run(timeout=0.2)
+
+    assert job.done()
+    with pytest.raises(EasySNMPTimeoutError):
+        job.result()
+
+
+def test_async_result_other_session(sess_args):
+    sess = Session(**sess_args)
+    other = Session(**sess_args)
+    request = interface.async_send(
+        sess, interface.MSG_GET, 0, 0, [SNMPVariable("sysContact", "0")]
+    )
+
+    with pytest.raises(ValueError):
+        interface.async_result(other, request)
+
+    interface.poll([sess], 5)
+    varbinds, _ = interface.async_result(sess, request)
+    assert varbinds[0].value == "G. S. Marzot <gmarzot@marzot.net>"
@@ -0,0 +1,155 @@
+from __future__ import unicode_literals
+
+import threading
+
+import pytest
+from easysnmp.easy import snmp_get
+from easysnmp.pool import SessionPool, get_default_pool, set_default_pool
+
+
+def test_session_pool_reuses_sessions(sess_args):
+    pool = SessionPool()
+
+    with pool.session(**sess_args) as first:
+        pass
+    with pool.session(**sess_args) as second:
+        res = second.get("sysContact.0")
+
+    assert first is second
+    assert res.value == "G. S. Marzot <gmarzot@marzot.net>"
+
+    info = pool.info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.idle == 1
+    assert info.in_use == 0
+
+
+def test_session_pool_keys_on_parameters(sess_args):
+    pool = SessionPool()
+
+    with pool.session(**sess_args) as first:
+        pass
+    with pool.session(timeout=2, **sess_args) as second:
+        pass
+
+    assert first is not second
+    assert pool.info().misses == 2
+    assert len(pool) == 2
+
+
+def test_session_pool_checkout_is_exclusive(sess_args):
+    pool = SessionPool()
+
+    first = pool.acquire(**sess_args)
+    second = pool.acquire(**sess_args)
+    assert first is not second
+
+    pool.release(first)
+    pool.release(second)
+    assert pool.info().idle == 2
+
+    with pytest.raises(ValueError):
+        pool.release(first)
+
+
+def test_session_pool_evicts_beyond_max_size(sess_args):
+    pool = SessionPool(max_size=1)
+
+    sessions = [pool.acquire(**sess_args) for _ in range(3)]
+    for session in sessions:
+        pool.release(session)
+
+    info = pool.info()
+    assert info.idle == 1
+    assert info.evictions == 2
+
+
+def test_session_pool_evicts_idle_sessions(sess_args):
+    pool = SessionPool(idle_timeout=0)
+
+    with pool.session(**sess_args):
+        pass
+
+    assert pool.info().idle == 0
+    assert pool.info().evictions == 1
+
+
+def test_session_pool_threads(sess_args):
+    pool = SessionPool()
+    results = []
+
+    def worker():
+        for _ in range(5):
+            with pool.session(**sess_args) as session:
+                results.append(session.get("sysContact.0").value)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["G. S. Marzot <gmarzot@marzot.net>"] * 20
+    assert pool.info().in_use == 0
+    assert pool.info().misses <= 4
+
+
+def test_easy_api_uses_default_pool(sess_args):
+    pool = SessionPool()
+    previous = set_default_pool(pool)
+    try:
+        assert get_default_pool() is pool
+        for _ in range(3):
+            res = snmp_get("sysContact.0", **sess_args)
+            assert res.value == "G. S. Marzot <gmarzot@marzot.net>"
+    finally:
+        set_default_pool(previous)
+
+    assert pool.info().hits == 2
+    assert pool.info().misses == 1
+
+
+def test_easy_api_explicit_pool(sess_args):
+    pool = SessionPool()
+
+    snmp_get("sysContact.0", pool=pool, **sess_args)
+    snmp_get("sysLocation.0", pool=pool, **sess_args)
+
+    assert pool.info().hits == 1
+
+
+class StubSession(object):
+    def __init__(self, **session_kargs):
+        self.use_numeric = False
+        self.__dict__.update(session_kargs)
+
+
+def test_session_pool_discards_changed_sessions():
+    pool = SessionPool(session_class=StubSession)
+
+    with pool.session(hostname="localhost") as first:
+        first.use_numeric = True
+    with pool.session(hostname="localhost") as second:
+        second.hostname = "remotehost"
+    with pool.session(hostname="localhost") as third:
+        pass
+    with pool.session(hostname="localhost") as fourth:
+        pass
+
+    assert first is not third and second is not third
+    assert fourth is third
+    assert pool.info().misses == 3
+    assert pool.info().idle == 1
+
+
+def test_session_pool_discards_on_error():
+    pool = SessionPool(session_class=StubSession)
+
+    with pytest.raises(RuntimeError):
+        with pool.session(hostname="localhost"):
+            raise RuntimeError("the request failed")
+
+    info = pool.info()
+    assert info.idle == 0
+    assert info.in_use == 0
@@ -0,0 +1,116 @@
+from __future__ import unicode_literals
+
+import struct
+
+from easysnmp.rates import RateTracker
+from easysnmp.variables import ColumnarResult, SNMPVariable
+
+
+def counters(*values, **kwargs):
+    snmp_type = kwargs.get("snmp_type", "COUNTER")
+    return [
+        SNMPVariable("ifInOctets", str(index + 1), str(value), snmp_type)
+        for index, value in enumerate(values)
+    ]
+
+
+def uptime(ticks):
+    return SNMPVariable("sysUpTimeInstance", "", str(ticks), "TICKS")
+
+
+def columnar(rows):
+    result = ColumnarResult()
+    for oid, oid_index, type_code, value in rows:
+        result.oids.append(oid)
+        result.oid_indexes.append(oid_index)
+        result.string_values.append(None)
+        result._type_codes.append(type_code)
+        result._int_values += struct.pack("=q", 0)
+        result._uint_values += struct.pack("=Q", value)
+    return result
+
+
+def test_rate_tracker_timestamps():
+    tracker = RateTracker()
+
+    assert len(tracker.update(counters(100, 200), timestamp=10)) == 0
+    rates = tracker.update(counters(300, 200), timestamp=20)
+
+    assert len(tracker) == 2
+    assert [(r.oid_index, r.delta, r.rate) for r in rates] == [
+        ("1", 200, 20.0),
+        ("2", 0, 0.0),
+    ]
+
+
+def test_rate_tracker_wraps():
+    tracker = RateTracker()
+
+    tracker.update(counters(2 ** 32 - 10), timestamp=0)
+    assert tracker.update(counters(10), timestamp=1)[0].delta == 20
+
+    tracker.update(counters(2 ** 64 - 5, snmp_type="COUNTER64"), timestamp=2)
+    rates = tracker.update(counters(5, snmp_type="COUNTER64"), timestamp=4)
+    assert rates[0].delta == 10
+    assert rates[0].rate == 5.0
+
+
+def test_rate_tracker_ignores_other_types():
+    tracker = RateTracker()
+
+    tracker.update(counters(1, snmp_type="GAUGE"), timestamp=0)
+    assert len(tracker) == 0
+
+
+def test_rate_tracker_uptime():
+    tracker = RateTracker()
+
+    tracker.update([uptime(1000)] + counters(0), timestamp=0)
+    # The agent's clock advanced 5 seconds although 60 passed locally
+    rates = tracker.update([uptime(1500)] + counters(50), timestamp=60)
+    assert rates[0].rate == 10.0
+
+    # sysUpTime sampled separately before the counters
+    tracker.update(uptime(2500), timestamp=70)
+    rates = tracker.update(counters(150), timestamp=75)
+    assert rates[0].rate == 10.0
+
+
+def test_rate_tracker_restart():
+    tracker = RateTracker()
+
+    tracker.update([uptime(100000)] + counters(5000), timestamp=0)
+    rates = tracker.update([uptime(500)] + counters(20), timestamp=60)
+
+    assert rates.restarted
+    assert len(rates) == 0
+
+    rates = tracker.update([uptime(1500)] + counters(120), timestamp=70)
+    assert not rates.restarted
+    assert rates[0].rate == 10.0
+
+
+def test_rate_tracker_uptime_wrap():
+    tracker = RateTracker()
+
+    tracker.update([uptime(2 ** 32 - 100)] + counters(0), timestamp=0)
+    rates = tracker.update([uptime(100)] + counters(20), timestamp=2)
+
+    assert not rates.restarted
+    assert rates[0].rate == 10.0
+
+
+def test_rate_tracker_columnar():
+    tracker = RateTracker()
+    uptime_oid = (".1.3.6.1.2.1.1.3", "0", 0x43)
+
+    tracker.update(
+        columnar([uptime_oid + (0,), ("ifHCInOctets", "1", 0x46, 2 ** 64 - 1)])
+    )
+    rates = tracker.update(
+        columnar([uptime_oid + (200,), ("ifHCInOctets", "1", 0x46, 99)])
+    )
+
+    assert list(rates.oids) == ["ifHCInOctets"]
+    assert list(rates.deltas) == [100]
+    assert list(rates.rates) == [50.0]
@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 import platform
 import re
+import threading
+import time
 
 import pytest
 from easysnmp.exceptions import (
@@ -11,8 +13,10 @@ from easysnmp.exceptions import (
     EasySNMPNoSuchObjectError,
     EasySNMPNoSuchInstanceError,
     EasySNMPNoSuchNameError,
+    EasySNMPUnknownObjectIDError,
 )
 
+from easysnmp import interface
 from easysnmp.session import Session
 
 
@@ -129,6 +133,97 @@ def test_session_get(sess):
     assert res[2].snmp_type == "OCTETSTR"
 
 
+def test_session_get_too_big(sess):
+    # The response would not fit in a UDP datagram so the agent answers
+    # tooBig and the request is split
+    res = sess.get(["sysDescr.0"] * 1000 + ["sysContact.0"])
+
+    assert len(res) == 1001
+    assert all(v.oid == "sysDescr" and v.value == res[0].value for v in res[:-1])
+    assert res[-1].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+    res = sess.get_next(["sysDescr"] * 1000)
+    assert len(res) == 1000
+    assert res[-1].oid == "sysDescr"
+    assert res[-1].oid_index == "0"
+
+
+@pytest.mark.parametrize("pdu_window", [1, 2])
+def test_session_get_packed(sess_args, pdu_window):
+    sess = Session(max_varbinds_per_pdu=2, pdu_window=pdu_window, **sess_args)
+    oids = ["sysUpTime.0", "sysContact.0", "sysName.0", "sysLocation.0", "sysDescr.0"]
+
+    res = sess.get(oids)
+    assert [(v.oid, v.oid_index) for v in res] == [
+        ("sysUpTimeInstance", ""),
+        ("sysContact", "0"),
+        ("sysName", "0"),
+        ("sysLocation", "0"),
+        ("sysDescr", "0"),
+    ]
+    assert res[1].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[3].value == "my original location"
+
+    res = sess.get_next(oids)
+    expected = Session(**sess_args).get_next(oids)
+    assert [(v.oid, v.oid_index) for v in res] == [
+        (v.oid, v.oid_index) for v in expected
+    ]
+
+
+def test_session_get_packed_timeout():
+    sess = Session(
+        remote_port=1234,
+        version=2,
+        timeout=0.2,
+        retries=1,
+        max_varbinds_per_pdu=1,
+        pdu_window=2,
+    )
+    oids = ["sysContact.0", "sysName.0", "sysLocation.0", "sysDescr.0"]
+
+    started = time.time()
+    with pytest.raises(EasySNMPTimeoutError):
+        sess.get(oids)
+    # The first timeout ends the request, whose other requests are drained
+    # within the same deadline rather than waited for one window at a time
+    assert time.time() - started < 2
+
+
+def test_session_thread_safe_concurrent_calls(sess_args):
+    sess = Session(thread_safe=True, **sess_args)
+    expected_walk = [(v.oid, v.oid_index) for v in sess.walk("system")]
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(10):
+                res = sess.get(["sysContact.0", "sysLocation.0"])
+                assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+                assert res[1].value == "my original location"
+                walked = sess.walk("system")
+                assert [(v.oid, v.oid_index) for v in walked] == expected_walk
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_session_thread_safe_timeout():
+    sess = Session(
+        remote_port=1234, version=2, timeout=0.2, retries=1, thread_safe=True
+    )
+
+    with pytest.raises(EasySNMPTimeoutError):
+        sess.get("sysContact.0")
+
+
 def test_session_get_use_numeric(sess):
     sess.use_numeric = True
     res = sess.get("sysContact.0")
@@ -139,6 +234,48 @@ def test_session_get_use_numeric(sess):
     assert res.snmp_type == "OCTETSTR"
 
 
+def test_session_options_follow_assignment(sess):
+    sess.use_numeric = True
+    assert sess.get("sysContact.0").oid == ".1.3.6.1.2.1.1.4"
+
+    sess.use_numeric = False
+    res = sess.get("sysContact.0")
+
+    assert res.oid == "sysContact"
+    assert res.oid_index == "0"
+
+
+def test_session_naming_options_are_independent(sess_args):
+    numeric = Session(use_numeric=True, thread_safe=True, **sess_args)
+    suffix = Session(thread_safe=True, **sess_args)
+    expected = {numeric: ".1.3.6.1.2.1.1.4", suffix: "sysContact"}
+    errors = []
+
+    def worker(session):
+        try:
+            for _ in range(20):
+                assert session.get("sysContact.0").oid == expected[session]
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in expected]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert suffix.get("sysContact.0").oid == "sysContact"
+
+
+def test_session_get_use_sprint_value_numeric_oid_value(sess_args):
+    sess = Session(use_sprint_value=True, use_numeric=True, **sess_args)
+    res = sess.get("sysObjectID.0")
+
+    assert res.oid == ".1.3.6.1.2.1.1.2"
+    assert res.value.rsplit(".", 1)[0] == ".1.3.6.1.4.1.8072.3.2"
+
+
 def test_session_get_use_sprint_value(sess):
     sess.use_sprint_value = True
     res = sess.get("sysUpTimeInstance")
@@ -149,6 +286,39 @@ def test_session_get_use_sprint_value(sess):
     assert res.snmp_type == "TICKS"
 
 
+def test_session_value_bytes(sess_args):
+    sess = Session(value_bytes=True, **sess_args)
+    res = sess.get(["sysContact.0", "sysUpTime.0"])
+
+    assert res[0].value == b"G. S. Marzot <gmarzot@marzot.net>"
+    assert res[0].snmp_type == "OCTETSTR"
+    assert int(res[1].value) > 0
+
+    walked = sess.walk("ifPhysAddress")
+    expected = Session(**sess_args).walk("ifPhysAddress")
+    assert [v.value for v in walked] == [
+        v.value.encode("latin-1") for v in expected
+    ]
+
+    columns = sess.walk("system", result_format="columnar")
+    assert b"G. S. Marzot <gmarzot@marzot.net>" in columns.string_values
+
+
+def test_session_typed_values(sess_args):
+    sess = Session(typed_values=True, **sess_args)
+    res = sess.get(["sysUpTime.0", "sysContact.0", "sysObjectID.0"])
+
+    assert isinstance(res[0].value, int)
+    assert res[0].value > 0
+    assert res[1].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[2].value[:9] == (1, 3, 6, 1, 4, 1, 8072, 3, 2)
+    assert repr(res[2])
+
+    walked = sess.walk("ifInOctets")
+    assert walked
+    assert all(isinstance(v.value, int) for v in walked)
+
+
 def test_session_get_use_enums(sess):
     sess.use_enums = True
     res = sess.get("ifAdminStatus.1")
@@ -341,6 +511,263 @@ def test_session_bulkwalk(sess):
         assert res[5].snmp_type == "OCTETSTR"
 
 
+def test_session_bulkwalk_auto_max_repetitions(sess_args):
+    sess = Session(auto_max_repetitions=2, **sess_args)
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.bulkwalk("ifTable", max_repetitions="auto")
+    else:
+        res = sess.bulkwalk("ifTable", max_repetitions="auto")
+        expected = sess.walk("ifTable")
+
+        assert [(v.oid, v.oid_index, v.value) for v in res] == [
+            (v.oid, v.oid_index, v.value) for v in expected
+        ]
+        assert 1 <= sess.auto_max_repetitions <= 512
+
+        # The learned value may be persisted and used to start a new session
+        learned = sess.auto_max_repetitions
+        assert Session(auto_max_repetitions=learned).auto_max_repetitions == learned
+
+
+@pytest.mark.parametrize(
+    "partitions,split_points",
+    [(3, None), (1, ["ifDescr", "ifType.2", "ifSpeed"])],
+)
+def test_session_bulkwalk_partitioned(sess, partitions, split_points):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.bulkwalk("ifTable", partitions=partitions)
+    else:
+        res = sess.bulkwalk(
+            "ifTable",
+            max_repetitions=2,
+            partitions=partitions,
+            split_points=split_points,
+        )
+        expected = sess.walk("ifTable")
+
+        assert [(v.oid, v.oid_index, v.value) for v in res] == [
+            (v.oid, v.oid_index, v.value) for v in expected
+        ]
+
+        with pytest.raises(ValueError):
+            sess.bulkwalk("ifTable", partitions=2, result_format="columnar")
+        with pytest.raises(ValueError):
+            sess.bulkwalk("ifTable", non_repeaters=1, partitions=2)
+
+
+def test_session_get_bulk_auto_max_repetitions(sess_args):
+    sess = Session(auto_max_repetitions=4, **sess_args)
+    if sess.version != 1:
+        res = sess.get_bulk(["sysUpTime", "sysORID"], 1, "auto")
+
+        assert len(res) == 5
+        assert res[1].oid == "sysORID"
+        assert res[1].oid_index == "1"
+
+        with pytest.raises(ValueError):
+            sess.get_bulk(["sysUpTime", "sysORID"], 1, -1)
+
+
+@pytest.mark.parametrize("method", ["walk", "bulkwalk"])
+def test_session_walk_resume(sess, method):
+    if sess.version == 1 and method == "bulkwalk":
+        pytest.skip("BULKWALK is not available for SNMP version 1")
+
+    walk = getattr(sess, method)
+    full = walk("system")
+    keys = [(v.oid, v.oid_index) for v in full]
+    position = keys.index(("sysContact", "0"))
+
+    resumed = walk("system", resume_from="sysContact.0")
+    assert [(v.oid, v.oid_index) for v in resumed] == keys[position + 1 :]
+    assert resumed.cursor == full.cursor
+    assert len(full.cursor) == 1
+    assert full.cursor[0].startswith(".1.3.6.1.2.1.1.")
+
+    # Resuming from the end of a walk retrieves nothing more
+    finished = walk("system", resume_from=full.cursor)
+    assert list(finished) == []
+    assert finished.cursor == full.cursor
+
+    with pytest.raises(ValueError):
+        walk("system", resume_from=["sysContact.0", "sysName.0"])
+
+
+@pytest.mark.parametrize("method", ["walk", "bulkwalk"])
+def test_session_walk_timeout_partial_results(method):
+    sess = Session(remote_port=1234, version=2, timeout=0.2, retries=1)
+
+    with pytest.raises(EasySNMPTimeoutError) as excinfo:
+        getattr(sess, method)("system")
+
+    assert list(excinfo.value.partial_results) == []
+    assert excinfo.value.cursor == (".1.3.6.1.2.1.1",)
+
+
+@pytest.mark.parametrize("use_numeric", [False, True])
+def test_session_walk_labels_match_get(sess_args, use_numeric):
+    sess = Session(use_numeric=use_numeric, **sess_args)
+
+    # Rows after the first of each column are labelled from the label cache
+    res = sess.walk("ifTable")
+    expected = sess.get([(v.oid, v.oid_index) for v in res])
+
+    assert len(res) > 1
+    assert [(v.oid, v.oid_index) for v in res] == [
+        (v.oid, v.oid_index) for v in expected
+    ]
+    assert [v.value for v in res if v.snmp_type == "OCTETSTR"] == [
+        v.value for v in expected if v.snmp_type == "OCTETSTR"
+    ]
+
+
+def test_session_walk_columnar(sess):
+    res = sess.walk("system", result_format="columnar")
+    expected = sess.walk("system")
+
+    assert len(res) == len(expected)
+    assert res.oids == [v.oid for v in expected]
+    assert res.oid_indexes == [v.oid_index for v in expected]
+    assert res.snmp_types == [v.snmp_type for v in expected]
+
+    # sysDescr is a string and sysUpTime is stored as an unsigned integer
+    assert res.string_values[0] == expected[0].value
+    assert res.oids[2] == "sysUpTimeInstance"
+    assert res.string_values[2] is None
+    assert res.uint_values[2] > 0
+
+    assert res[3].oid == "sysContact"
+    assert res[3].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+
+def test_session_bulkwalk_columnar(sess):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.bulkwalk("system", result_format="columnar")
+    else:
+        res = sess.bulkwalk("system", result_format="columnar")
+        expected = sess.bulkwalk("system")
+
+        assert res.oids == [v.oid for v in expected]
+        assert res.oid_indexes == [v.oid_index for v in expected]
+        assert res[3].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+
+def test_session_get_bulk_columnar(sess):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.get_bulk(["sysUpTime", "sysORID"], 1, 2, result_format="columnar")
+    else:
+        res = sess.get_bulk(["sysUpTime", "sysORLastChange"], 1, 2, "columnar")
+
+        assert len(res) == 3
+        assert res.oids == ["sysUpTimeInstance", "sysORLastChange", "sysORID"]
+        assert res.snmp_types[:2] == ["TICKS", "TICKS"]
+        assert res.string_values[:2] == [None, None]
+        assert res.string_values[2] is not None
+
+
+def test_session_walk_lazy(sess):
+    res = sess.walk("system", result_format="lazy")
+    expected = sess.walk("system")
+
+    assert len(res) == len(expected)
+    assert [v.snmp_type for v in res] == [v.snmp_type for v in expected]
+    assert res[3].oid == "sysContact"
+    assert res[3].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert [(v.oid, v.oid_index, v.value) for v in res] == [
+        (v.oid, v.oid_index, v.value) for v in expected
+    ]
+    assert res.cursor == expected.cursor
+
+
+def test_session_bulkwalk_lazy(sess):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.bulkwalk("system", result_format="lazy")
+    else:
+        res = sess.bulkwalk("ifDescr", result_format="lazy")
+        expected = sess.bulkwalk("ifDescr")
+
+        assert [v.oid_index for v in res] == [v.oid_index for v in expected]
+        assert [v.value for v in res] == [v.value for v in expected]
+
+
+def test_session_canned_responses():
+    sess = Session(
+        hostname="localhost", remote_port=11161, version=2, community="public"
+    )
+    sys_contact = (1, 3, 6, 1, 2, 1, 1, 4, 0)
+    sys_up_time = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+    interface.set_canned_responses(
+        sess, [[(sys_contact, 0x04, b"canned"), (sys_up_time, 0x43, 42)]]
+    )
+    try:
+        res = sess.get(["sysContact.0", "sysUpTime.0"])
+        again = sess.get(["sysContact.0", "sysUpTime.0"])
+    finally:
+        interface.set_canned_responses(sess, None)
+
+    assert res[0].oid == "sysContact"
+    assert res[0].value == "canned"
+    assert res[1].oid == "sysUpTimeInstance"
+    assert res[1].value == "42"
+    assert [v.value for v in again] == ["canned", "42"]
+
+    # Requests reach the agent again once the responses are cleared
+    res = sess.get("sysContact.0")
+    assert res.value == "G. S. Marzot <gmarzot@marzot.net>"
+
+
+def test_session_walk_invalid_result_format(sess):
+    with pytest.raises(ValueError):
+        sess.walk("system", result_format="rows")
+
+
+def test_session_iter_walk(sess):
+    pages = list(sess.iter_walk("system"))
+    res = [variable for page in pages for variable in page]
+
+    # GETNEXT returns a single variable per response
+    assert all(len(page) == 1 for page in pages)
+    assert [(v.oid, v.oid_index, v.value) for v in res] == [
+        (v.oid, v.oid_index, v.value) for v in sess.walk("system")
+    ]
+
+
+def test_session_iter_walk_is_lazy(sess):
+    pages = sess.iter_walk("system")
+
+    first = next(pages)
+    assert first[0].oid == "sysDescr"
+    assert first[0].oid_index == "0"
+
+    second = next(pages)
+    assert second[0].oid == "sysObjectID"
+
+
+def test_session_iter_bulkwalk(sess):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.iter_bulkwalk("system")
+    else:
+        pages = list(sess.iter_bulkwalk("system", max_repetitions=3))
+        res = [variable for page in pages for variable in page]
+
+        assert len(pages) > 1
+        assert all(len(page) <= 3 for page in pages)
+        assert [(v.oid, v.oid_index) for v in res] == [
+            (v.oid, v.oid_index) for v in sess.walk("system")
+        ]
+
+
+def test_session_iter_walk_unknown_oid(sess):
+    with pytest.raises(EasySNMPUnknownObjectIDError):
+        sess.iter_walk("sysDescripto")
+
+
 def test_session_walk_all(sess):
     # OID 1.3.6.1.6.3.16.1.5.2.1.6.6.95.110.111.110.101.95.1.2
     # or SNMP-VIEW-BASED-ACM-MIB::vacmViewTreeFamilyStatus."_none_".1.2
@@ -375,6 +802,123 @@ def test_session_walk_all(sess):
         assert res[5].snmp_type == "OCTETSTR"
 
 
+def test_session_prepare_get(sess):
+    request = sess.prepare(["sysUpTime.0", "sysContact.0", "sysLocation.0"])
+
+    for _ in range(3):
+        res = request.execute()
+
+        assert len(res) == 3
+        assert res[0].oid == "sysUpTimeInstance"
+        assert int(res[0].value) > 0
+        assert res[0].snmp_type == "TICKS"
+        assert res[1].oid == "sysContact"
+        assert res[1].oid_index == "0"
+        assert res[1].value == "G. S. Marzot <gmarzot@marzot.net>"
+        assert res[2].value == "my original location"
+
+
+def test_session_prepare_single(sess):
+    res = sess.prepare("sysContact.0").execute()
+    assert res.value == "G. S. Marzot <gmarzot@marzot.net>"
+
+    res = sess.prepare("sysContact.0", op="get_next").execute()
+    assert res.oid == "sysName"
+    assert res.oid_index == "0"
+
+
+def test_session_prepare_get_bulk(sess):
+    if sess.version == 1:
+        with pytest.raises(EasySNMPError):
+            sess.prepare(["sysUpTime", "sysORID"], "get_bulk", 1, 4)
+    else:
+        res = sess.prepare(["sysUpTime", "sysORID"], "get_bulk", 1, 4).execute()
+
+        assert len(res) == 5
+        assert res[0].oid == "sysUpTimeInstance"
+        assert res[1].oid == "sysORID"
+        assert res[1].oid_index == "1"
+
+
+def test_session_prepare_invalid(sess):
+    with pytest.raises(ValueError):
+        sess.prepare("sysContact.0", op="set")
+    with pytest.raises(EasySNMPUnknownObjectIDError):
+        sess.prepare("sysDescripto.0")
+
+
+def test_session_table(sess):
+    rows = sess.table("ifEntry", ["ifDescr", "ifType", 5])
+    walked = sess.walk(["ifDescr", "ifType"])
+
+    assert list(rows) == [v.oid_index for v in walked if v.oid == "ifDescr"]
+    for variable in walked:
+        assert rows[variable.oid_index][variable.oid].value == variable.value
+    for row in rows.values():
+        assert row[5].oid == "ifSpeed"
+
+
+def test_session_table_use_numeric(sess_args):
+    # ipAddrTable is indexed by an IpAddress, i.e. four sub-identifiers,
+    # only the last of which is rendered in oid_index with use_numeric
+    sess = Session(use_numeric=True, **sess_args)
+    rows = sess.table("ipAddrEntry", ["ipAdEntAddr", "ipAdEntIfIndex"])
+    addresses = sess.walk("ipAdEntAddr")
+
+    assert list(rows) == [v.value for v in addresses]
+    for index, row in rows.items():
+        assert row["ipAdEntAddr"].value == index
+        assert "ipAdEntIfIndex" in row
+
+
+def test_session_table_all_columns(sess):
+    rows = sess.table("ifEntry")
+    res = sess.walk("ifEntry")
+
+    assert sum(len(row) for row in rows.values()) == len(res)
+    assert all(row["ifIndex"].oid_index == index for index, row in rows.items())
+
+    with pytest.raises(EasySNMPUnknownObjectIDError):
+        sess.table("sysContact")
+
+
+def test_session_oid_cache(sess):
+    sess.clear_oid_cache()
+    sess.get(["sysContact.0", "sysLocation.0"])
+    info = sess.oid_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 2, 2)
+
+    res = sess.get(["sysContact.0", ("sysLocation", "0")])
+    assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[1].value == "my original location"
+    info = sess.oid_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+    sess.clear_oid_cache()
+    assert sess.oid_cache_info() == (0, 0, 256, 0)
+
+
+def test_session_oid_cache_eviction(sess_args):
+    sess = Session(oid_cache_size=1, **sess_args)
+    sess.get(["sysContact.0", "sysLocation.0", "sysContact.0"])
+    info = sess.oid_cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (0, 3, 1, 1)
+
+
+def test_session_oid_cache_disabled(sess_args):
+    sess = Session(oid_cache_size=0, **sess_args)
+    res = sess.get("sysContact.0")
+    assert res.value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert sess.oid_cache_info() == (0, 0, 0, 0)
+
+
+def test_session_oid_cache_unknown_oid(sess):
+    sess.clear_oid_cache()
+    with pytest.raises(EasySNMPUnknownObjectIDError):
+        sess.get("sysDescripto.0")
+    assert sess.oid_cache_info().currsize == 0
+
+
 def test_session_update():
     s = Session(version=3)
     ptr = s.sess_ptr
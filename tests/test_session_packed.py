@@ -0,0 +1,79 @@
+from __future__ import unicode_literals
+
+from easysnmp import session as session_module
+from easysnmp.exceptions import EasySNMPError
+from easysnmp.helpers import SNMP_ERR_TOOBIG
+from easysnmp.session import Session
+
+
+class TooBigInterface(object):
+    """
+    Answers asynchronous requests of more than max_varbinds variables with
+    tooBig, and synchronous ones by filling in their variables as the
+    tooBig recovery of the C interface does.
+    """
+
+    MSG_GET = 0xA0
+    MSG_GETNEXT = 0xA1
+
+    def __init__(self, max_varbinds):
+        self.max_varbinds = max_varbinds
+        self.async_sizes = []
+        self.sync_sizes = []
+
+    def async_send(self, session, command, non_repeaters, max_repetitions, varlist):
+        self.async_sizes.append(len(varlist))
+        return tuple(varlist)
+
+    def poll(self, sessions, timeout=None):
+        return [0]
+
+    def async_result(self, session, request):
+        if len(request) > self.max_varbinds:
+            session.error_number = SNMP_ERR_TOOBIG
+            raise EasySNMPError("(tooBig) Response message would have been too large.")
+        session.error_number = 0
+        return [self._answer(var) for var in request], []
+
+    def get(self, session, varlist):
+        self.sync_sizes.append(len(varlist))
+        for var in varlist:
+            self._answer(var)
+
+    def _answer(self, var):
+        var.value = "value of {0}".format(var.oid)
+        var.snmp_type = "OCTETSTR"
+        return var
+
+
+def packed_session(fake, monkeypatch):
+    monkeypatch.setattr(session_module, "interface", fake, raising=False)
+    sess = object.__new__(Session)
+    sess.__dict__.update(
+        sess_ptr=None,
+        max_varbinds_per_pdu=3,
+        pdu_window=2,
+        timeout=1,
+        retries=0,
+        abort_on_nonexistent=False,
+        error_string="",
+        error_number=0,
+        error_index=0,
+    )
+    sess.version = 2
+    sess.retry_no_such = False
+    return sess
+
+
+def test_session_get_packed_too_big(monkeypatch):
+    fake = TooBigInterface(max_varbinds=2)
+    sess = packed_session(fake, monkeypatch)
+    oids = ["sysDescr.0", "sysContact.0", "sysName.0", "sysLocation.0"]
+
+    res = sess.get(oids)
+
+    assert [v.oid for v in res] == ["sysDescr", "sysContact", "sysName", "sysLocation"]
+    assert [v.value for v in res] == ["value of {0}".format(v.oid) for v in res]
+    # The chunk of three answered tooBig is resent synchronously
+    assert fake.async_sizes == [3, 1]
+    assert fake.sync_sizes == [3]
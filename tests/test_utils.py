@@ -18,6 +18,15 @@ def test_strip_non_printable_only_binary():
     assert strip_non_printable(ub(chr(20)) + ub(chr(155))) == ("(contains binary)")
 
 
+def test_strip_non_printable_bytes():
+    assert strip_non_printable(b"\x00\x1bmy thingo") == "my thingo (contains binary)"
+
+
+def test_strip_non_printable_typed():
+    assert strip_non_printable(5) == 5
+    assert strip_non_printable((1, 3, 6, 1)) == (1, 3, 6, 1)
+
+
 def test_tostr_none():
     assert tostr(None) is None
 
@@ -1,7 +1,17 @@
 from __future__ import unicode_literals
 
+import pickle
+import struct
+
+import pytest
 from easysnmp.compat import ub
-from easysnmp.variables import SNMPVariable, SNMPVariableList
+from easysnmp.variables import (
+    ColumnarResult,
+    LazyResult,
+    LazySNMPVariable,
+    SNMPVariable,
+    SNMPVariableList,
+)
 
 
 def test_snmp_variable_regular():
@@ -82,6 +92,108 @@ def test_snmp_variable_numeric():
     assert var.snmp_type is None
 
 
+def test_snmp_variable_slots():
+    var = SNMPVariable("sysDescr", "0", "my thingo", "OCTETSTR")
+    assert not hasattr(var, "__dict__")
+    with pytest.raises(AttributeError):
+        var.root_oid = "system"
+
+
+def test_snmp_variable_value_converted():
+    var = SNMPVariable("sysUpTime", "0", 42)
+    assert var.value == "42"
+
+
+def test_snmp_variable_pickle():
+    var = SNMPVariable("sysDescr", "0", "my thingo", "OCTETSTR")
+    copy = pickle.loads(pickle.dumps(var))
+    assert (copy.oid, copy.oid_index, copy.value, copy.snmp_type) == (
+        "sysDescr",
+        "0",
+        "my thingo",
+        "OCTETSTR",
+    )
+
+
+@pytest.mark.parametrize(
+    "value", [2 ** 64 - 1, (1, 3, 6, 1, 4, 1), b"\x00\xff", "my thingo", None]
+)
+def test_snmp_variable_pickle_typed_value(value):
+    var = SNMPVariable("ifHCInOctets", "1", None, "COUNTER64")
+    object.__setattr__(var, "value", value)
+    copy = pickle.loads(pickle.dumps(var))
+    assert type(copy.value) is type(value)
+    assert copy.value == value
+    assert (copy.oid, copy.oid_index, copy.snmp_type) == (
+        "ifHCInOctets",
+        "1",
+        "COUNTER64",
+    )
+
+
+def test_columnar_result():
+    res = ColumnarResult()
+    res.oids.extend(["sysDescr", "sysUpTimeInstance", "ifInOctets"])
+    res.oid_indexes.extend(["0", "", "1"])
+    res.string_values.extend(["my thingo", None, None])
+    res._type_codes.extend(bytearray([0x04, 0x43, 0x41]))
+    res._int_values.extend(struct.pack("=3q", 0, 0, 0))
+    res._uint_values.extend(struct.pack("=3Q", 0, 12345, 2 ** 32 - 1))
+
+    assert len(res) == 3
+    assert res.snmp_types == ["OCTETSTR", "TICKS", "COUNTER"]
+    assert list(res.uint_values) == [0, 12345, 2 ** 32 - 1]
+    assert res.value(1) == "12345"
+
+    var = res[2]
+    assert (var.oid, var.oid_index, var.value, var.snmp_type) == (
+        "ifInOctets",
+        "1",
+        "4294967295",
+        "COUNTER",
+    )
+    assert [v.oid for v in res] == res.oids
+    assert res[-3].value == "my thingo"
+
+
+def test_lazy_result():
+    res = LazyResult(None)
+    res._type_codes.extend(bytearray([0x04, 0x41]))
+    res._offsets.extend(struct.pack("=2Q", 0, 64))
+
+    decoded = []
+
+    def decode(row):
+        decoded.append(row)
+        return SNMPVariable("ifInOctets", "1", "42", "COUNTER")
+
+    res._decode = decode
+
+    assert len(res) == 2
+    assert list(res.type_codes) == [0x04, 0x41]
+    assert [v.snmp_type for v in res] == ["OCTETSTR", "COUNTER"]
+    assert decoded == []
+
+    var = res[-1]
+    assert isinstance(var, LazySNMPVariable)
+    assert (var.oid, var.oid_index, var.value, var.snmp_type) == (
+        "ifInOctets",
+        "1",
+        "42",
+        "COUNTER",
+    )
+    assert decoded == [1]
+
+    unpickled = pickle.loads(pickle.dumps(var))
+    assert type(unpickled) is SNMPVariable
+    assert unpickled.value == "42"
+
+    with pytest.raises(IndexError):
+        res[2]
+    with pytest.raises(AttributeError):
+        var.missing
+
+
 def test_snmp_variable_list():
     varlist = SNMPVariableList(["sysContact.0", "sysLocation.0", "sysDescr.0"])
     assert varlist.varbinds == ["sysContact.0", "sysLocation.0", "sysDescr.0"]